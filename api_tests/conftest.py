@@ -1,4 +1,7 @@
 import os
+import socket
+import sys
+import threading
 import time
 
 import httpx
@@ -8,10 +11,42 @@ import pytest
 DB_SERVICE_URL = os.getenv("DB_SERVICE_URL", "http://127.0.0.1:8000")
 AUTH_SERVICE_URL = os.getenv("AUTH_SERVICE_URL", "http://127.0.0.1:8010")
 SCHOOL_SERVICE_URL = os.getenv("SCHOOL_SERVICE_URL", "http://127.0.0.1:8020")
+# Run the db_service tests against the in-memory stand-in instead of DB_SERVICE_URL
+USE_MEMORY_DB_SERVICE = os.getenv("USE_MEMORY_DB_SERVICE") == "1"
+MEMORY_DB_LATENCY_MS = float(os.getenv("MEMORY_DB_LATENCY_MS", "0"))
 
 
 @pytest.fixture(scope="session")
-def db_service_url() -> str:
+def memory_db_service_url() -> str:
+    """Start the in-memory db_service stand-in (db_service/memory_service.py) in a thread."""
+    import uvicorn
+
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "db_service")))
+    from memory_service import create_app
+
+    with socket.socket() as free_socket:
+        free_socket.bind(("127.0.0.1", 0))
+        port = free_socket.getsockname()[1]
+
+    server = uvicorn.Server(
+        uvicorn.Config(create_app(latency_ms=MEMORY_DB_LATENCY_MS), host="127.0.0.1", port=port, log_level="warning")
+    )
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    yield f"http://127.0.0.1:{port}"
+
+    server.should_exit = True
+    thread.join(timeout=5)
+
+
+@pytest.fixture(scope="session")
+def db_service_url(request) -> str:
+    if USE_MEMORY_DB_SERVICE:
+        return request.getfixturevalue("memory_db_service_url")
+
     return DB_SERVICE_URL
 
 
@@ -15,11 +15,16 @@ Environment Variables:
 
 # Import FastAPI framework
 import os
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 
 # Import route modules
-from routes.auth_routes import auth_router
+from routes.auth_routes import auth_router, api_client
+
+# Import the request context propagated to db_service
+from utils.config import REQUEST_TIMEOUT_MS
+from utils.request_context import REQUEST_ID_HEADER, start_request
 
 # Import environment variable loader
 from dotenv import load_dotenv
@@ -28,9 +33,18 @@ from dotenv import load_dotenv
 # This allows sensitive information (e.g., database credentials) to be stored securely
 load_dotenv()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Close the db_service client and its connections when the server shuts down.
+    """
+    yield
+    await api_client.aclose()
+
 # Initialize the FastAPI application
 # This creates the main app instance that will handle all incoming requests
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Defina as origens permitidas (pode ser específico ou "*")
 origins = [
@@ -51,6 +65,17 @@ app.add_middleware(
     allow_headers=["*"],  # Permite todos os headers
 )
 
+
+@app.middleware("http")
+async def propagate_request_context(request: Request, call_next):
+    """
+    Start the request id and deadline that BDClient forwards to db_service.
+    """
+    request_id = start_request(request.headers, REQUEST_TIMEOUT_MS)
+    response = await call_next(request)
+    response.headers[REQUEST_ID_HEADER] = request_id
+    return response
+
 # Include the authentication routes
 # These routes handle user authentication, such as login and registration
 app.include_router(auth_router, prefix="/auth", tags=["auth"])
@@ -71,16 +96,22 @@ if __name__ == "__main__":
         - host (str): The IP address or hostname to bind the server to (default: 127.0.0.1).
         - port (int): The port to bind the server to (default: 8010).
         - reload (bool): Enables automatic reloading of the app on code changes (useful for development).
+        - uds (str): Unix domain socket path (UDS_PATH); when set, host and port are ignored.
     """
     import uvicorn
     
     # Retrieve the host and port from environment variables, with default values
     host = os.getenv("HOST", "127.0.0.1")  # Default host is 127.0.0.1 (localhost)
     port = int(os.getenv("PORT", 8010))  # Default port is 8010
+    uds = os.getenv("UDS_PATH")  # Optional Unix domain socket, replaces host/port when set
 
-    # Print the host and port for debugging purposes
-    print(f"Starting server on {host}:{port}")
+    if uds:
+        print(f"Starting server on unix:{uds}")
+        uvicorn.run("main:app", uds=uds, reload=False)
+    else:
+        # Print the host and port for debugging purposes
+        print(f"Starting server on {host}:{port}")
 
-    # Start the Uvicorn server to run the FastAPI application
-    uvicorn.run("main:app", host=host, port=port, reload=False)
+        # Start the Uvicorn server to run the FastAPI application
+        uvicorn.run("main:app", host=host, port=port, reload=False)
 # End of main.py
\ No newline at end of file
@@ -4,7 +4,8 @@ bd_client.py
 This file contains the BDClient class, which provides methods for interacting with a REST API
 that performs database operations such as inserting, finding, updating, and deleting documents.
 
-The BDClient class uses the `httpx` library to make asynchronous HTTP requests to the API.
+The BDClient class uses the `httpx` library to make asynchronous HTTP requests to the API,
+reusing one client (and its connections) per event loop.
 
 Methods:
     - insert: Insert a new document into the database.
@@ -12,6 +13,7 @@ Methods:
     - find_by_id: Find a specific document in the database by its ID.
     - update: Update an existing document in the database.
     - delete: Delete a document from the database.
+    - aclose: Close the client and its connections.
 
 Dependencies:
     - httpx: For making asynchronous HTTP requests.
@@ -19,19 +21,72 @@ Dependencies:
     - typing: For type annotations (Dict, Any, Optional).
 """
 
+import asyncio
 import json
 import httpx
 from typing import Optional, Dict, Any
 
+from utils.config import BD_UDS_PATH
+from utils.request_context import get_propagation_headers
+
 class BDClient:
     """
     A client for interacting with a REST API for database operations.
 
     Args:
         base_url (str): The base URL of the REST API.
+        uds (str, optional): Unix domain socket of db_service. When empty, TCP is used.
     """
-    def __init__(self, base_url: str):
+    def __init__(self, base_url: str, uds: str = BD_UDS_PATH):
         self.base_url = base_url
+        self.uds = uds
+        self.client = None
+        self.client_loop = None
+
+    def create_client(self):
+        """
+        Create the httpx client, connecting over the Unix domain socket when configured.
+        """
+        if self.uds:
+            return httpx.AsyncClient(transport=httpx.AsyncHTTPTransport(uds=self.uds))
+
+        return httpx.AsyncClient()
+
+    def get_client(self):
+        """
+        Return the client bound to the running event loop, creating it when needed. Reusing it
+        keeps the connections to db_service alive; a client left on another event loop is closed.
+        """
+        loop = asyncio.get_running_loop()
+        if self.client is not None and self.client_loop is not loop:
+            self.discard_client()
+
+        if self.client is None:
+            self.client = self.create_client()
+            self.client_loop = loop
+
+        return self.client
+
+    def discard_client(self):
+        """
+        Close the client of a previous event loop on that loop, or drop it when the loop is closed
+        (its connections were closed with it).
+        """
+        client, client_loop = self.client, self.client_loop
+        self.client = None
+        self.client_loop = None
+        if not client_loop.is_closed():
+            asyncio.run_coroutine_threadsafe(client.aclose(), client_loop)
+
+    async def aclose(self):
+        """
+        Close the client and its connections; called when the server shuts down.
+        """
+        client = self.client
+        self.client = None
+        self.client_loop = None
+        if client is not None:
+            await client.aclose()
 
     async def insert(self, endpoint: str, payload: Optional[Dict[str, Any]] = None):
         """
@@ -49,19 +104,19 @@ class BDClient:
 
         url = f"{self.base_url}/{endpoint}"
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(url, json=payload)
-                print("Insert Document Response:", response.status_code, response.json())
-
-                # Raise an exception for any HTTP errors
-                response.raise_for_status()
-                return response.json()
-            except Exception as e:
-                # Log the error and return an empty response
-                print(f"Error in insert(): {e}")
-                return {}
-            
+        client = self.get_client()
+        try:
+            response = await client.post(url, json=payload, headers=get_propagation_headers())
+            print("Insert Document Response:", response.status_code, response.json())
+
+            # Raise an exception for any HTTP errors
+            response.raise_for_status()
+            return response.json()
+        except Exception as e:
+            # Log the error and return an empty response
+            print(f"Error in insert(): {e}")
+            return {}
+        
     async def find(self, endpoint: str, payload: Optional[Dict[str, Any]] = None):
         """
         Find documents in the database based on a query.
@@ -78,18 +133,18 @@ class BDClient:
         
         url = f"{self.base_url}/{endpoint}"
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(url, json=payload)
-                print("Find Documents Response:", response.status_code, response.json())
+        client = self.get_client()
+        try:
+            response = await client.post(url, json=payload, headers=get_propagation_headers())
+            print("Find Documents Response:", response.status_code, response.json())
 
-                # Raise an exception for any HTTP errors
-                response.raise_for_status()
-                return response.json()
-            except Exception as e:
-                # Log the error and return an empty response
-                print(f"Error in find(): {e}")
-                return {}
+            # Raise an exception for any HTTP errors
+            response.raise_for_status()
+            return response.json()
+        except Exception as e:
+            # Log the error and return an empty response
+            print(f"Error in find(): {e}")
+            return {}
 
     async def find_by_id(self, endpoint: str, payload: Optional[Dict[str, Any]] = None):
         """
@@ -107,18 +162,18 @@ class BDClient:
 
         url = f"{self.base_url}/{endpoint}"
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(url, json=payload)
-                print("Find Document by ID Response:", response.status_code, response.json())
+        client = self.get_client()
+        try:
+            response = await client.post(url, json=payload, headers=get_propagation_headers())
+            print("Find Document by ID Response:", response.status_code, response.json())
 
-                # Raise an exception for any HTTP errors
-                response.raise_for_status()
-                return response.json()
-            except Exception as e:
-                # Log the error and return an empty response
-                print(f"Error in find_by_id(): {e}")
-                return {}
+            # Raise an exception for any HTTP errors
+            response.raise_for_status()
+            return response.json()
+        except Exception as e:
+            # Log the error and return an empty response
+            print(f"Error in find_by_id(): {e}")
+            return {}
 
     async def update(self, endpoint: str, payload: Optional[Dict[str, Any]] = None):
         """
@@ -136,19 +191,19 @@ class BDClient:
 
         url = f"{self.base_url}/{endpoint}"
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.put(url, json=payload)
-                print("Update Document Response:", response.status_code, response.json())
-
-                # Raise an exception for any HTTP errors
-                response.raise_for_status()
-                return response.json()
-            except Exception as e:
-                # Log the error and return an empty response
-                print(f"Error in update(): {e}")
-                return {}
-            
+        client = self.get_client()
+        try:
+            response = await client.put(url, json=payload, headers=get_propagation_headers())
+            print("Update Document Response:", response.status_code, response.json())
+
+            # Raise an exception for any HTTP errors
+            response.raise_for_status()
+            return response.json()
+        except Exception as e:
+            # Log the error and return an empty response
+            print(f"Error in update(): {e}")
+            return {}
+        
     async def delete(self, endpoint: str, payload: Optional[Dict[str, Any]] = None):
         """
         Delete a document from the database.
@@ -165,15 +220,15 @@ class BDClient:
             
         url = f"{self.base_url}/{endpoint}"
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.request("DELETE", url, content=json.dumps(payload))  # Use request with content
-                print("Delete Document Response:", response.status_code, response.json())
-
-                # Raise an exception for any HTTP errors
-                response.raise_for_status()
-                return response.json()
-            except Exception as e:
-                # Log the error and return an empty response
-                print(f"Error in delete(): {e}")
-                return {}
+        client = self.get_client()
+        try:
+            response = await client.request("DELETE", url, content=json.dumps(payload), headers=get_propagation_headers())  # Use request with content
+            print("Delete Document Response:", response.status_code, response.json())
+
+            # Raise an exception for any HTTP errors
+            response.raise_for_status()
+            return response.json()
+        except Exception as e:
+            # Log the error and return an empty response
+            print(f"Error in delete(): {e}")
+            return {}
@@ -12,3 +12,7 @@ USERS_COLLECTION: str = "users"
 
 ENCRYPTION_KEY: str = os.getenv("ENCRYPTION_KEY", "")
 BD_BASE_URL: str = os.getenv("BD_BASE_URL", "http://127.0.0.1:8000/db-api")
+# Optional Unix domain socket of db_service; when set, BD_BASE_URL only provides the path prefix
+BD_UDS_PATH: str = os.getenv("BD_UDS_PATH", "")
+# Default deadline for incoming requests without X-Deadline-Remaining-Ms (0 disables it)
+REQUEST_TIMEOUT_MS: int = int(os.getenv("REQUEST_TIMEOUT_MS", "30000"))
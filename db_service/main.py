@@ -1,8 +1,10 @@
 import os  # Import the os module to interact with environment variables
-from fastapi import FastAPI  # Import FastAPI to create the application instance
+from fastapi import FastAPI, Request  # Import FastAPI to create the application instance
+from fastapi.responses import JSONResponse
 from routes.db_routes import router  # Import the router from the db_routes module
 from dotenv import load_dotenv  # Import dotenv to load environment variables from a .env file
 from utils.logging import setup_logging
+from utils.request_context import REQUEST_ID_HEADER, DeadlineExceeded, check_deadline, start_request
 
 # Load environment variables from the .env file at startup
 # This allows sensitive information (e.g., database credentials) to be stored securely
@@ -12,6 +14,22 @@ setup_logging()
 # Create an instance of the FastAPI application
 app = FastAPI()
 
+
+@app.middleware("http")
+async def apply_request_context(request: Request, call_next):
+    """
+    Read the caller's request id and deadline, and refuse work the caller no longer waits for.
+    """
+    request_id = start_request(request.headers)
+    try:
+        check_deadline()
+    except DeadlineExceeded as e:
+        return JSONResponse(status_code=504, content={"detail": str(e)}, headers={REQUEST_ID_HEADER: request_id})
+
+    response = await call_next(request)
+    response.headers[REQUEST_ID_HEADER] = request_id
+    return response
+
 # Register the database routes with the application
 # - `prefix="/db"`: All routes in the router will be prefixed with `/db`
 # - `tags=["Database"]`: Tags are used for grouping routes in the API documentation
@@ -30,6 +48,7 @@ if __name__ == "__main__":
     Environment Variables:
         - HOST: The IP address or hostname to bind the server to (default: 127.0.0.1).
         - PORT: The port to bind the server to (default: 8000).
+        - UDS_PATH: Unix domain socket to bind to instead of HOST/PORT (optional).
 
     Arguments:
         - host (str): The IP address or hostname to bind the server to.
@@ -41,12 +60,17 @@ if __name__ == "__main__":
     # Retrieve the host and port from environment variables, with default values
     HOST = os.getenv("HOST", "127.0.0.1")  # Default host is 127.0.0.1 (localhost)
     PORT = int(os.getenv("PORT", 8000))  # Default port is 8000
+    UDS = os.getenv("UDS_PATH")  # Optional Unix domain socket, replaces HOST/PORT when set
 
-    # Print the host and port for debugging purposes
-    print(f"Starting server on {HOST}:{PORT}")
+    if UDS:
+        print(f"Starting server on unix:{UDS}")
+        uvicorn.run("main:app", uds=UDS, reload=False)
+    else:
+        # Print the host and port for debugging purposes
+        print(f"Starting server on {HOST}:{PORT}")
 
-    # Start the Uvicorn server to run the FastAPI application
-    # The server will listen on the specified host and port
-    # `reload=False` disables automatic reloading (useful for production)
-    uvicorn.run("main:app", host=HOST, port=PORT, reload=False)
+        # Start the Uvicorn server to run the FastAPI application
+        # The server will listen on the specified host and port
+        # `reload=False` disables automatic reloading (useful for production)
+        uvicorn.run("main:app", host=HOST, port=PORT, reload=False)
     
\ No newline at end of file
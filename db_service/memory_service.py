@@ -0,0 +1,322 @@
+"""
+memory_service.py
+
+In-memory stand-in for db_service. It implements the same `/db-api` contract
+(insert, find, findbyid, update, increment, upsertmany, delete, log and the GridFS
+file routes putfile, findfiles, getfile, deletefile) without MongoDB, so the school and auth
+services can be load-tested in isolation on any machine.
+
+Usage:
+    - As a server, in place of db_service:
+        MEMORY_DB_LATENCY_MS=2 python memory_service.py
+      (HOST, PORT and UDS_PATH work as in main.py.)
+    - In-process, e.g. from api_tests or benchmarks:
+        from memory_service import create_app
+        app = create_app(latency_ms=2)
+
+Notes:
+    - Queries support equality on top-level fields and the `$in` operator.
+    - `latency_ms` adds a fixed delay to every request, to simulate MongoDB time.
+"""
+
+import asyncio
+import base64
+import binascii
+import copy
+import os
+from datetime import datetime
+
+from fastapi import APIRouter, FastAPI, HTTPException, Request
+
+
+class MemoryDatabase:
+    """
+    A minimal in-memory document store with the operations used by db_service.
+    """
+    def __init__(self):
+        self.collections = {}
+        self.files = {}
+
+    def get_collection(self, collection_name: str):
+        return self.collections.setdefault(collection_name, [])
+
+    def matches(self, document: dict, filter: dict):
+        for key, expected in filter.items():
+            value = document.get(key)
+            if isinstance(expected, dict) and "$in" in expected:
+                if value not in expected["$in"]:
+                    return False
+            elif value != expected:
+                return False
+
+        return True
+
+    def insert(self, collection_name: str, data: dict):
+        document = copy.deepcopy(data)
+        document["_id"] = os.urandom(12).hex()
+        self.get_collection(collection_name).append(document)
+        return document["_id"]
+
+    def find(self, collection_name: str, id: str = "", filter: dict = None):
+        filter = {"_id": id} if id else (filter or {})
+        return [
+            copy.deepcopy(document)
+            for document in self.get_collection(collection_name)
+            if self.matches(document, filter)
+        ]
+
+    def find_one(self, collection_name: str, id: str, filter: dict):
+        filter = filter or {"_id": id}
+        return next(
+            (document for document in self.get_collection(collection_name) if self.matches(document, filter)),
+            None,
+        )
+
+    def update(self, collection_name: str, id: str, filter: dict, data: dict):
+        document = self.find_one(collection_name, id, filter)
+        if document is None:
+            return None
+
+        document.update(copy.deepcopy({key: value for key, value in data.items() if key != "_id"}))
+        return copy.deepcopy(document)
+
+    def increment(self, collection_name: str, filter: dict, increments: dict):
+        document = self.find_one(collection_name, "", filter)
+        if document is None:
+            document = {key: value for key, value in filter.items() if not isinstance(value, dict)}
+            document["_id"] = os.urandom(12).hex()
+            self.get_collection(collection_name).append(document)
+
+        for key, delta in increments.items():
+            document[key] = document.get(key, 0) + delta
+        return copy.deepcopy(document)
+
+    def upsert_many(self, collection_name: str, operations: list):
+        result = {"matched_count": 0, "modified_count": 0, "upserted_count": 0}
+        for operation in operations:
+            if self.update(collection_name, "", operation["query"], operation["data"]) is not None:
+                result["matched_count"] += 1
+                result["modified_count"] += 1
+            else:
+                self.insert(collection_name, {**operation["query"], **operation["data"]})
+                result["upserted_count"] += 1
+
+        return result
+
+    def delete(self, collection_name: str, document_id: str, filter: dict):
+        document = self.find_one(collection_name, document_id, filter)
+        if document is None:
+            return 0
+
+        self.get_collection(collection_name).remove(document)
+        return 1
+
+    def put_file(self, bucket: str, filename: str, data: bytes, metadata: dict = None):
+        files = self.files.setdefault(bucket, {})
+        files.pop(filename, None)
+        files[filename] = {
+            "_id": os.urandom(12).hex(),
+            "filename": filename,
+            "length": len(data),
+            "uploadDate": datetime.now().isoformat(),
+            "metadata": copy.deepcopy(metadata or {}),
+            "data": bytes(data),
+        }
+        return files[filename]["_id"]
+
+    def find_files(self, bucket: str, filter: dict = None):
+        return [
+            {key: copy.deepcopy(value) for key, value in file.items() if key not in ("_id", "data")}
+            for file in self.files.get(bucket, {}).values()
+            if self.matches(file, filter or {})
+        ]
+
+    def get_file(self, bucket: str, filename: str):
+        file = self.files.get(bucket, {}).get(filename)
+        return file["data"] if file else None
+
+    def delete_file(self, bucket: str, filename: str):
+        return 1 if self.files.get(bucket, {}).pop(filename, None) else 0
+
+    def log_to_mongodb(self, log_collection: str, level: str, message: str, extra: dict = None):
+        log_entry = {"level": level, "message": message}
+        if extra:
+            log_entry["extra"] = extra
+
+        return self.insert(log_collection, log_entry)
+
+
+def create_router(database: MemoryDatabase, latency_ms: float = 0):
+    """
+    Create the `/db-api` routes backed by the given in-memory database.
+
+    Args:
+        database (MemoryDatabase): The store used by the routes.
+        latency_ms (float): Delay added to every request, in milliseconds.
+
+    Returns:
+        APIRouter: The router with the db_service contract.
+    """
+    router = APIRouter()
+
+    async def read_body(request: Request):
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+        return await request.json()
+
+    @router.post("/insert")
+    async def insert_document(request: Request):
+        body = await read_body(request)
+        if not body.get("collection") or not body.get("data"):
+            raise HTTPException(status_code=400, detail="Both 'collection' and 'data' are required.")
+
+        return {"message": "Document inserted", "id": database.insert(body["collection"], body["data"])}
+
+    @router.post("/find")
+    async def find_documents(request: Request):
+        body = await read_body(request)
+        if not body.get("collection"):
+            raise HTTPException(status_code=400, detail="The 'collection' field is required.")
+
+        return {"documents": database.find(body["collection"], filter=body.get("query") or {})}
+
+    @router.post("/findbyid")
+    async def find_documents_by_id(request: Request):
+        body = await read_body(request)
+        if not body.get("collection") or not body.get("id"):
+            raise HTTPException(status_code=400, detail="Both 'collection' and 'id' are required.")
+
+        return {"documents": database.find(body["collection"], id=body["id"])}
+
+    @router.put("/update")
+    async def update_document(request: Request):
+        body = await read_body(request)
+        query = body.get("query") or {}
+        if not body.get("collection") or (not body.get("id") and not query) or not body.get("data"):
+            raise HTTPException(status_code=400, detail="The 'collection', 'query', and 'data' fields are required.")
+
+        modified_count = database.update(body["collection"], body.get("id"), query, body["data"])
+        return {"message": "Document updated", "modified_count": modified_count}
+
+    @router.put("/increment")
+    async def increment_document(request: Request):
+        body = await read_body(request)
+        query = body.get("query") or {}
+        increments = body.get("inc")
+        if not body.get("collection") or not query or not increments:
+            raise HTTPException(status_code=400, detail="The 'collection', 'query', and 'inc' fields are required.")
+
+        return {"message": "Document updated", "document": database.increment(body["collection"], query, increments)}
+
+    @router.put("/upsertmany")
+    async def upsert_many_documents(request: Request):
+        body = await read_body(request)
+        operations = body.get("operations")
+        if not body.get("collection") or not operations:
+            raise HTTPException(status_code=400, detail="The 'collection' and 'operations' fields are required.")
+
+        return {"message": "Documents updated", **database.upsert_many(body["collection"], operations)}
+
+    @router.delete("/delete")
+    async def delete_document(request: Request):
+        body = await read_body(request)
+        query = body.get("query") or {}
+        if not body.get("collection") or (not body.get("id") and not query):
+            raise HTTPException(status_code=400, detail="The 'collection' and 'query' fields are required.")
+
+        deleted_count = database.delete(body["collection"], body.get("id"), query)
+        return {"message": "Document deleted", "deleted_count": deleted_count}
+
+    @router.put("/putfile")
+    async def put_file(request: Request):
+        body = await read_body(request)
+        if not body.get("bucket") or not body.get("filename") or not body.get("data"):
+            raise HTTPException(status_code=400, detail="The 'bucket', 'filename' and 'data' fields are required.")
+        try:
+            data = base64.b64decode(body["data"], validate=True)
+        except (binascii.Error, TypeError):
+            raise HTTPException(status_code=400, detail="The 'data' field must be base64 encoded.")
+
+        file_id = database.put_file(body["bucket"], body["filename"], data, body.get("metadata"))
+        return {"message": "File stored", "id": file_id}
+
+    @router.post("/findfiles")
+    async def find_files(request: Request):
+        body = await read_body(request)
+        if not body.get("bucket"):
+            raise HTTPException(status_code=400, detail="The 'bucket' field is required.")
+
+        return {"files": database.find_files(body["bucket"], body.get("query") or {})}
+
+    @router.post("/getfile")
+    async def get_file(request: Request):
+        body = await read_body(request)
+        if not body.get("bucket") or not body.get("filename"):
+            raise HTTPException(status_code=400, detail="The 'bucket' and 'filename' fields are required.")
+
+        data = database.get_file(body["bucket"], body["filename"])
+        return {
+            "filename": body["filename"],
+            "data": base64.b64encode(data).decode("ascii") if data is not None else None,
+        }
+
+    @router.delete("/deletefile")
+    async def delete_file(request: Request):
+        body = await read_body(request)
+        if not body.get("bucket") or not body.get("filename"):
+            raise HTTPException(status_code=400, detail="The 'bucket' and 'filename' fields are required.")
+
+        return {"message": "File deleted", "deleted_count": database.delete_file(body["bucket"], body["filename"])}
+
+    @router.post("/log")
+    async def log(request: Request):
+        body = await read_body(request)
+        collection = body.get("collection")
+        if not collection or not body.get("source") or not body.get("logtype") or not body.get("level"):
+            raise HTTPException(
+                status_code=400,
+                detail="Both 'collection' and 'source' and 'logtype' and 'logLevel' are required.",
+            )
+
+        message = f"{datetime.now().strftime('%Y%m%d')};{body.get('source')};{body.get('message')}"
+        if body.get("logtype") == "db":
+            inserted_id = database.log_to_mongodb(collection, body["level"], message, body.get("extra"))
+            return {"message": "Document inserted", "id": inserted_id}
+
+        return {"message": "Document inserted in log file"}
+
+    return router
+
+
+def create_app(latency_ms: float = 0, database: MemoryDatabase = None):
+    """
+    Create a FastAPI application that serves the db_service contract from memory.
+
+    Args:
+        latency_ms (float): Delay added to every request, in milliseconds.
+        database (MemoryDatabase, optional): Store to use, e.g. pre-filled by a benchmark.
+
+    Returns:
+        FastAPI: The application, with the store available as `app.state.database`.
+    """
+    app = FastAPI()
+    app.state.database = database or MemoryDatabase()
+    app.include_router(create_router(app.state.database, latency_ms), prefix="/db-api", tags=["Database"])
+    return app
+
+
+app = create_app(latency_ms=float(os.getenv("MEMORY_DB_LATENCY_MS", "0")))
+
+if __name__ == "__main__":
+    import uvicorn
+
+    HOST = os.getenv("HOST", "127.0.0.1")
+    PORT = int(os.getenv("PORT", 8000))
+    UDS = os.getenv("UDS_PATH")
+
+    if UDS:
+        print(f"Starting in-memory db_service on unix:{UDS}")
+        uvicorn.run("memory_service:app", uds=UDS, reload=False)
+    else:
+        print(f"Starting in-memory db_service on {HOST}:{PORT}")
+        uvicorn.run("memory_service:app", host=HOST, port=PORT, reload=False)
@@ -4,9 +4,12 @@ import os
 from pathlib import Path
 from dotenv import load_dotenv  # Load environment variables from a .env file
 from fastapi import APIRouter, HTTPException, Request  # Import FastAPI utilities for routing and error handling
+from utils import operations  # Validation and execution of the operations, shared with the in-process backend
 from utils.database import database  # Database handling utilities
 from utils.logging import logging  # Custom logging utility
 from pydantic import BaseModel
+from pymongo.errors import ExecutionTimeout  # Raised when maxTimeMS is exceeded
+from utils.request_context import DeadlineExceeded
 
 # Load environment variables from the .env file
 # This ensures sensitive information (e.g., database credentials) is securely loaded
@@ -15,6 +18,28 @@ from pydantic import BaseModel
 # Create a FastAPI router instance for defining API routes
 router = APIRouter()
 
+
+async def run_route(request: Request, operation, **kwargs):
+    """
+    Run a db_service operation (see utils/operations.py) on the JSON body of the request.
+
+    Raises:
+        HTTPException: 400 for an invalid body, 504 when the caller's deadline has passed, or
+            500 if an error occurs while running the operation.
+    """
+    try:
+        # Parse the JSON body from the request
+        body = await request.json()
+        return operation(database, body, **kwargs)
+    except operations.InvalidRequest as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except (DeadlineExceeded, ExecutionTimeout) as e:
+        # The caller's deadline has passed: report a timeout instead of a server error
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        # Raise an HTTP 500 error if an exception occurs
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post("/insert")
 async def insert_document(request: Request):
     """
@@ -29,24 +54,7 @@ async def insert_document(request: Request):
     Raises:
         HTTPException: If the collection name or data is missing, or if an error occurs during the insertion process.
     """
-    try:
-        # Parse the JSON body from the request
-        body = await request.json()
-        collection = body.get("collection")  # Extract the collection name
-        data = body.get("data")  # Extract the document data
-
-        if not collection or not data:
-            raise HTTPException(status_code=400, detail="Both 'collection' and 'data' are required.")
-
-        logging.info(f"insert_document();collection={collection}")
-        logging.info(f"insert_document();data={data}")
-
-        # Call the Database class's insert method to insert the document
-        inserted_id = database.insert(collection, data)
-        return {"message": "Document inserted", "id": inserted_id}
-    except Exception as e:
-        # Raise an HTTP 500 error if an exception occurs
-        raise HTTPException(status_code=500, detail=str(e))
+    return await run_route(request, operations.insert_document)
 
 @router.post("/find")
 async def find_documents(request: Request):
@@ -62,25 +70,7 @@ async def find_documents(request: Request):
     Raises:
         HTTPException: If the collection name is missing, or if an error occurs during the retrieval process.
     """
-    try:
-        # Parse the JSON body from the request
-        body = await request.json()
-        collection = body.get("collection")  # Extract the collection name
-        query = body.get("query") or {}  # Extract the query, default to an empty dictionary
-
-        if not collection:
-            raise HTTPException(status_code=400, detail="The 'collection' field is required.")
-
-        logging.info(f"find_documents();collection={collection}")
-        logging.info(f"find_documents();query={query}")
-
-        # Call the Database class's find method to retrieve documents
-        documents = database.find(collection_name=collection, filter=query)
-
-        return {"documents": documents}
-    except Exception as e:
-        # Raise an HTTP 500 error if an exception occurs
-        raise HTTPException(status_code=500, detail=str(e))
+    return await run_route(request, operations.find_documents)
 
 @router.post("/findbyid")
 async def find_documents_by_id(request: Request):
@@ -96,26 +86,8 @@ async def find_documents_by_id(request: Request):
     Raises:
         HTTPException: If the collection name or ID is missing, or if an error occurs during the retrieval process.
     """
-    try:
-        # Parse the JSON body from the request
-        body = await request.json()
-        collection = body.get("collection")  # Extract the collection name
-        id = body.get("id")  # Extract the document ID
-
-        if not collection or not id:
-            raise HTTPException(status_code=400, detail="Both 'collection' and 'id' are required.")
+    return await run_route(request, operations.find_documents_by_id)
 
-        logging.info(f"find_documents_by_id();collection={collection}")
-        logging.info(f"find_documents_by_id();id={id}")
-
-        # Call the Database class's find method to retrieve the document
-        documents = database.find(collection_name=collection, id=id)
-
-        return {"documents": documents}
-    except Exception as e:
-        # Raise an HTTP 500 error if an exception occurs
-        raise HTTPException(status_code=500, detail=str(e))
-    
 @router.put("/update")
 async def update_document(request: Request):
     """
@@ -130,28 +102,43 @@ async def update_document(request: Request):
     Raises:
         HTTPException: If the collection name, query, or update data is missing, or if an error occurs during the update process.
     """
-    try:
-        # Parse the JSON body from the request
-        body = await request.json()
-        collection = body.get("collection")  # Extract the collection name
-        id = body.get("id")  # Extract the document ID
-        query = body.get("query") or {}  # Extract the query, default to an empty dictionary
-        data = body.get("data")  # Extract the update data
-
-        if not collection or (not id and not query) or not data:
-            raise HTTPException(status_code=400, detail="The 'collection', 'query', and 'data' fields are required.")
-
-        logging.info(f"update_document();collection={collection}")
-        logging.info(f"update_document();id={id}")
-        logging.info(f"update_document();query={query}")
-        logging.info(f"update_document();data={data}")
-
-        # Call the Database class's update method to update documents
-        modified_count = database.update(collection, id, query, data)
-        return {"message": "Document updated", "modified_count": modified_count}
-    except Exception as e:
-        # Raise an HTTP 500 error if an exception occurs
-        raise HTTPException(status_code=500, detail=str(e))
+    return await run_route(request, operations.update_document)
+
+@router.put("/increment")
+async def increment_document(request: Request):
+    """
+    Atomically increment numeric fields of the document matching a query, creating it when missing.
+
+    Args:
+        request (Request): The raw JSON body of the request, containing the collection name, query,
+            and the increments (field -> numeric delta).
+
+    Returns:
+        dict: A success message and the document after the increment.
+
+    Raises:
+        HTTPException: If the collection name, query, or increments are missing or not numeric, or if
+            an error occurs during the update process.
+    """
+    return await run_route(request, operations.increment_document)
+
+@router.put("/upsertmany")
+async def upsert_many_documents(request: Request):
+    """
+    Set the data of the documents matching each query in one bulk write, inserting the missing ones.
+
+    Args:
+        request (Request): The raw JSON body of the request, containing the collection name and the
+            operations (a list of {"query", "data"}).
+
+    Returns:
+        dict: A success message and the number of matched, modified and inserted documents.
+
+    Raises:
+        HTTPException: If the collection name or operations are missing or invalid, or if an error
+            occurs during the bulk write.
+    """
+    return await run_route(request, operations.upsert_many_documents)
 
 @router.delete("/delete")
 async def delete_document(request: Request):
@@ -167,102 +154,91 @@ async def delete_document(request: Request):
     Raises:
         HTTPException: If the collection name or query is missing, or if an error occurs during the deletion process.
     """
-    try:
-        # Parse the JSON body from the request
-        body = await request.json()
-        collection = body.get("collection")  # Extract the collection name
-        id = body.get("id")  # Extract the document ID
-        query = body.get("query") or {}  # Extract the query, default to an empty dictionary
+    return await run_route(request, operations.delete_document)
 
-        if not collection or (not id and not query):
-            raise HTTPException(status_code=400, detail="The 'collection' and 'query' fields are required.")
+@router.put("/putfile")
+async def put_file(request: Request):
+    """
+    Store a file (e.g. a generated report) in a GridFS bucket, replacing any file with the same name.
 
-        logging.info(f"delete_document();collection={collection}")
-        logging.info(f"delete_document();id={id}")
-        logging.info(f"delete_document();query={query}")
+    Args:
+        request (Request): The raw JSON body of the request, containing the bucket, the filename, the
+            base64 encoded data and optional metadata.
 
-        # Call the Database class's delete method to delete documents
-        deleted_count = database.delete(collection, id, query)
+    Returns:
+        dict: A success message and the ID of the stored file.
 
-        return {"message": "Document deleted", "deleted_count": deleted_count}
-    except Exception as e:
-        # Raise an HTTP 500 error if an exception occurs
-        raise HTTPException(status_code=500, detail=str(e))
+    Raises:
+        HTTPException: If the bucket, filename or data is missing or invalid, or if an error occurs
+            while storing the file.
+    """
+    return await run_route(request, operations.put_file)
 
-@router.post("/log")
-async def log(request: Request):
+@router.post("/findfiles")
+async def find_files(request: Request):
     """
-    Insert a document into a specified MongoDB collection.
+    List the files of a GridFS bucket, oldest first, without their content.
 
     Args:
-        request (Request): The raw JSON body of the request, containing the collection name and data.
+        request (Request): The raw JSON body of the request, containing the bucket and an optional query
+            on the file fields (e.g. "filename").
 
     Returns:
-        dict: A success message and the ID of the inserted document.
+        dict: The name, length, upload date and metadata of the matching files.
 
     Raises:
-        HTTPException: If the collection name or data is missing, or if an error occurs during the insertion process. 
+        HTTPException: If the bucket is missing, or if an error occurs while listing the files.
     """
-    try:
-        # Parse the JSON body from the request
-        body = await request.json()
-        collection = body.get("collection")  # Extract the collection name
-        source = body.get("source")  # Extract the document data
-        logtype = body.get("logtype")  # Extract the document data
-        logLevel = body.get("level")  # Extract the document data
+    return await run_route(request, operations.find_files)
 
-        if not collection or not source or not logtype or not logLevel:
-            raise HTTPException(status_code=400, detail="Both 'collection' and 'source' and 'logtype' and 'logLevel' are required.")
+@router.post("/getfile")
+async def get_file(request: Request):
+    """
+    Read a file of a GridFS bucket.
 
-        logging.info(f"insert_document();collection={collection}")
-        logging.info(f"insert_document();source={source}")
-        logging.info(f"insert_document();logtype={logtype}")
-        logging.info(f"insert_document();logLevel={logLevel}")
+    Args:
+        request (Request): The raw JSON body of the request, containing the bucket and the filename.
 
-        message = f"{datetime.now().strftime('%Y%m%d')};{source};{body.get('message')}"
+    Returns:
+        dict: The filename and its base64 encoded data, or None as data when the file does not exist.
 
-        # checks if the logtype is db or file
-        if logtype == 'db':
-            # Call the Database class's insert method to insert the document
-            inserted_id = database.log_to_mongodb(collection, logLevel, message, body.get("extra"))
+    Raises:
+        HTTPException: If the bucket or filename is missing, or if an error occurs while reading the file.
+    """
+    return await run_route(request, operations.get_file)
 
-            return {"message": "Document inserted", "id": inserted_id}
-        else:
-            # Optional log file name
-            log_file_name = body.get("log_file_name", "default.log")
+@router.delete("/deletefile")
+async def delete_file(request: Request):
+    """
+    Delete the files with the given name from a GridFS bucket.
 
-            # Change the log file dynamically
-            change_log_file(log_file_name)
-            
-            # cahnge message
-            message = f"{message};extra={body.get('extra')}"
+    Args:
+        request (Request): The raw JSON body of the request, containing the bucket and the filename.
 
-            # Call the Database class's insert method to insert the document
-            match logLevel:
-                case "INFO":
-                    logging.info(f"insert_document();{message}")
+    Returns:
+        dict: A success message and the number of deleted files.
 
-                case "ERROR":
-                    logging.error(f"insert_document();{message}")   
+    Raises:
+        HTTPException: If the bucket or filename is missing, or if an error occurs during the deletion.
+    """
+    return await run_route(request, operations.delete_file)
 
-                case "WARNING":
-                    logging.warning(f"insert_document();{message}") 
+@router.post("/log")
+async def log(request: Request):
+    """
+    Insert a document into a specified MongoDB collection.
 
-                case "DEBUG":
-                    logging.debug(f"insert_document();{message}")
+    Args:
+        request (Request): The raw JSON body of the request, containing the collection name and data.
 
-                case "CRITICAL":
-                    logging.critical(f"insert_document();{message}")    
+    Returns:
+        dict: A success message and the ID of the inserted document.
 
-                case _:  # default
-                    logging.info(f"insert_document();{message}")
+    Raises:
+        HTTPException: If the collection name or data is missing, or if an error occurs during the insertion process. 
+    """
+    return await run_route(request, operations.write_log, change_log_file=change_log_file)
 
-            return {"message": "Document inserted in log file"}
-    
-    except Exception as e:
-        # Raise an HTTP 500 error if an exception occurs
-        raise HTTPException(status_code=500, detail=str(e))
-    
 def change_log_file(log_file_name: str):
     """
     Change the log file dynamically at runtime.
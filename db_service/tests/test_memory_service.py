@@ -0,0 +1,116 @@
+import base64
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from fastapi.testclient import TestClient
+from memory_service import create_app
+
+
+def test_memory_service_crud_flow():
+    client = TestClient(create_app())
+
+    insert_response = client.post(
+        "/db-api/insert",
+        json={"collection": "students", "data": {"classId": "class-1", "name": "Ana"}},
+    )
+    assert insert_response.status_code == 200
+    document_id = insert_response.json()["id"]
+
+    find_response = client.post("/db-api/find", json={"collection": "students", "query": {"classId": "class-1"}})
+    assert find_response.json() == {"documents": [{"classId": "class-1", "name": "Ana", "_id": document_id}]}
+
+    find_by_id_response = client.post("/db-api/findbyid", json={"collection": "students", "id": document_id})
+    assert find_by_id_response.json()["documents"][0]["name"] == "Ana"
+
+    update_response = client.put(
+        "/db-api/update",
+        json={"collection": "students", "query": {"name": "Ana"}, "data": {"name": "Ana Maria"}},
+    )
+    assert update_response.json()["modified_count"]["name"] == "Ana Maria"
+
+    missing_update_response = client.put(
+        "/db-api/update",
+        json={"collection": "students", "query": {"name": "Bruno"}, "data": {"name": "B"}},
+    )
+    assert missing_update_response.json()["modified_count"] is None
+
+    delete_response = client.request("DELETE", "/db-api/delete", json={"collection": "students", "id": document_id})
+    assert delete_response.json() == {"message": "Document deleted", "deleted_count": 1}
+    assert client.post("/db-api/find", json={"collection": "students"}).json() == {"documents": []}
+
+
+def test_memory_service_validates_payloads_like_db_service():
+    client = TestClient(create_app())
+
+    assert client.post("/db-api/insert", json={"collection": "students"}).status_code == 400
+    assert client.post("/db-api/find", json={}).status_code == 400
+    assert client.post(
+        "/db-api/log",
+        json={"collection": "logs", "source": "tests", "logtype": "db", "level": "INFO", "message": "ok"},
+    ).json()["message"] == "Document inserted"
+
+
+def test_memory_service_supports_in_queries_and_latency():
+    client = TestClient(create_app(latency_ms=20))
+    for student_id in ("s1", "s2", "s3"):
+        client.post("/db-api/insert", json={"collection": "students", "data": {"studentId": student_id}})
+
+    started = time.perf_counter()
+    response = client.post(
+        "/db-api/find",
+        json={"collection": "students", "query": {"studentId": {"$in": ["s1", "s3"]}}},
+    )
+
+    assert time.perf_counter() - started >= 0.02
+    assert [document["studentId"] for document in response.json()["documents"]] == ["s1", "s3"]
+
+
+def test_memory_service_increment_creates_and_updates_document():
+    client = TestClient(create_app())
+    payload = {"collection": "totals", "query": {"momentId": "m1", "studentId": "s1"}, "inc": {"total": 4.5}}
+
+    created = client.put("/db-api/increment", json=payload).json()["document"]
+    updated = client.put("/db-api/increment", json={**payload, "inc": {"total": -1.5}}).json()["document"]
+
+    assert created["total"] == 4.5
+    assert updated == {**created, "total": 3.0}
+    assert client.put("/db-api/increment", json={"collection": "totals", "query": {}}).status_code == 400
+
+
+def test_memory_service_upsert_many_updates_and_inserts_documents():
+    client = TestClient(create_app())
+    client.post("/db-api/insert", json={"collection": "values", "data": {"cell": "a", "value": 1}})
+    operations = [
+        {"query": {"cell": "a"}, "data": {"value": 2}},
+        {"query": {"cell": "b"}, "data": {"value": 3}},
+    ]
+
+    response = client.put("/db-api/upsertmany", json={"collection": "values", "operations": operations}).json()
+    documents = client.post("/db-api/find", json={"collection": "values", "query": {}}).json()["documents"]
+
+    assert response["matched_count"] == 1
+    assert response["upserted_count"] == 1
+    assert sorted((document["cell"], document["value"]) for document in documents) == [("a", 2), ("b", 3)]
+    assert client.put("/db-api/upsertmany", json={"collection": "values"}).status_code == 400
+
+
+def test_memory_service_file_routes():
+    client = TestClient(create_app())
+    data = base64.b64encode(b"%PDF-1.4 report").decode("ascii")
+
+    stored = client.put("/db-api/putfile", json={"bucket": "reports", "filename": "a.pdf", "data": data})
+    replaced = client.put("/db-api/putfile", json={"bucket": "reports", "filename": "a.pdf", "data": data})
+    files = client.post("/db-api/findfiles", json={"bucket": "reports", "query": {"filename": "a.pdf"}}).json()["files"]
+    read = client.post("/db-api/getfile", json={"bucket": "reports", "filename": "a.pdf"}).json()
+
+    assert stored.status_code == replaced.status_code == 200
+    assert [(file["filename"], file["length"]) for file in files] == [("a.pdf", 15)]
+    assert base64.b64decode(read["data"]) == b"%PDF-1.4 report"
+    assert client.put("/db-api/putfile", json={"bucket": "reports", "filename": "b.pdf", "data": "%%"}).status_code == 400
+
+    deleted = client.request("DELETE", "/db-api/deletefile", json={"bucket": "reports", "filename": "a.pdf"}).json()
+    assert deleted["deleted_count"] == 1
+    assert client.post("/db-api/getfile", json={"bucket": "reports", "filename": "a.pdf"}).json()["data"] is None
@@ -1,10 +1,13 @@
 # Import necessary modules and libraries
 import os  # For accessing environment variables
-from pymongo import MongoClient  # MongoDB client for database operations
+from pymongo import MongoClient, UpdateOne  # MongoDB client and bulk write operations
 from bson.objectid import ObjectId  # For working with MongoDB ObjectId
-from utils.logging import logging  # Custom logging utility
+from gridfs import GridFSBucket, NoFile  # Files (e.g. generated reports) stored in MongoDB
+from pymongo.errors import ExecutionTimeout  # Raised when maxTimeMS is exceeded
+from .logging import logging  # Custom logging utility
 from datetime import datetime
-from utils.config import MONGO_DATABASE, MONGO_URI
+from .config import MONGO_DATABASE, MONGO_URI
+from .request_context import DeadlineExceeded, check_deadline, get_remaining_ms
 
 class Database:
     """
@@ -58,6 +61,7 @@ class Database:
             Exception: If an error occurs during the insertion process.
         """
         try:
+            check_deadline()  # Abandon the work if the caller's deadline has passed
             collection = self.db[collection_name]
             result = collection.insert_one(data)  # Insert the document
             logging.info(f"insert();Inserted into {collection_name}: {result.inserted_id}")
@@ -82,15 +86,23 @@ class Database:
             Exception: If an error occurs during the retrieval process.
         """
         try:
+            check_deadline()  # Abandon the work if the caller's deadline has passed
             collection = self.db[collection_name]
             
             if id:
                 filter = {"_id": ObjectId(id)}
 
-            result = list(collection.find(filter))  # Find documents matching the filter
+            cursor = collection.find(filter)  # Find documents matching the filter
+            remaining_ms = get_remaining_ms()
+            if remaining_ms is not None:
+                cursor = cursor.max_time_ms(max(1, remaining_ms))  # Let MongoDB stop at the deadline
+            result = list(cursor)
 
             logging.info(f"find();Found {len(result)} documents in {collection_name}")
             return [self.serialize_data(doc) for doc in result]  # Serialize the results
+        except (DeadlineExceeded, ExecutionTimeout) as e:
+            logging.warning(f"find();Deadline exceeded in {collection_name}: {e}")
+            raise
         except Exception as e:
             logging.error(f"find();Error finding documents in {collection_name}: {e}")
             return []
@@ -112,23 +124,98 @@ class Database:
             Exception: If an error occurs during the update process.
         """
         try:
+            check_deadline()  # Abandon the work if the caller's deadline has passed
             collection = self.db[collection_name]
+            remaining_ms = get_remaining_ms()
+            max_time = {"maxTimeMS": max(1, remaining_ms)} if remaining_ms is not None else {}
 
             if not filter:
                 result = collection.find_one_and_update(
-                    {"_id": ObjectId(id)}, {"$set": data}, return_document=True
+                    {"_id": ObjectId(id)}, {"$set": data}, return_document=True, **max_time
                 )
             else:
                 result = collection.find_one_and_update(
-                    filter, {"$set": data}, return_document=True
+                    filter, {"$set": data}, return_document=True, **max_time
                 )  
 
             logging.info(f"update();Updated document in {collection_name}: {result}")
             return self.serialize_data(result) if result else None
+        except (DeadlineExceeded, ExecutionTimeout) as e:
+            logging.warning(f"update();Deadline exceeded in {collection_name}: {e}")
+            raise
         except Exception as e:
             logging.error(f"update();Error updating document in {collection_name}: {e}")
             return None
 
+    def increment(self, collection_name: str, filter: dict, increments: dict):
+        """
+        Atomically add numeric deltas to fields of the document matching the filter, creating
+        the document (with the filter fields) when it does not exist.
+
+        Args:
+            collection_name (str): The name of the MongoDB collection.
+            filter (dict): The filter criteria selecting the document.
+            increments (dict): Field -> numeric delta, applied with $inc.
+
+        Returns:
+            dict: The document after the increment.
+
+        Raises:
+            Exception: If an error occurs during the update process.
+        """
+        try:
+            check_deadline()  # Abandon the work if the caller's deadline has passed
+            collection = self.db[collection_name]
+            remaining_ms = get_remaining_ms()
+            max_time = {"maxTimeMS": max(1, remaining_ms)} if remaining_ms is not None else {}
+
+            result = collection.find_one_and_update(
+                filter, {"$inc": increments}, upsert=True, return_document=True, **max_time
+            )
+
+            logging.info(f"increment();Incremented document in {collection_name}: {result}")
+            return self.serialize_data(result)
+        except Exception as e:
+            logging.error(f"increment();Error incrementing document in {collection_name}: {e}")
+            raise
+
+    def upsert_many(self, collection_name: str, operations: list):
+        """
+        Set the data of the documents matching each filter in one bulk write, inserting the
+        documents that do not exist.
+
+        Args:
+            collection_name (str): The name of the MongoDB collection.
+            operations (list): Items with a "query" (filter) and the "data" to set.
+
+        Returns:
+            dict: The number of matched, modified and inserted documents.
+
+        Raises:
+            Exception: If an error occurs during the bulk write.
+        """
+        try:
+            check_deadline()  # Abandon the work if the caller's deadline has passed
+            collection = self.db[collection_name]
+            requests = [
+                UpdateOne(operation["query"], {"$set": operation["data"]}, upsert=True)
+                for operation in operations
+            ]
+            result = collection.bulk_write(requests, ordered=False)
+
+            logging.info(
+                f"upsert_many();Upserted {len(requests)} documents in {collection_name}: "
+                f"matched={result.matched_count}, inserted={result.upserted_count}"
+            )
+            return {
+                "matched_count": result.matched_count,
+                "modified_count": result.modified_count,
+                "upserted_count": result.upserted_count,
+            }
+        except Exception as e:
+            logging.error(f"upsert_many();Error upserting documents in {collection_name}: {e}")
+            raise
+
     def delete(self, collection_name: str, document_id: str, filter: dict):
         """
         Delete a document from the specified collection.
@@ -145,6 +232,7 @@ class Database:
             Exception: If an error occurs during the deletion process.
         """
         try:
+            check_deadline()  # Abandon the work if the caller's deadline has passed
             collection = self.db[collection_name]
             if not filter:
                 result = collection.delete_one({"_id": ObjectId(document_id)})  # Delete the document
@@ -153,10 +241,104 @@ class Database:
             
             logging.info(f"delete();Deleted {result.deleted_count} document(s) from {collection_name}")
             return result.deleted_count  # Return the count of deleted documents
+        except DeadlineExceeded as e:
+            logging.warning(f"delete();Deadline exceeded in {collection_name}: {e}")
+            raise
         except Exception as e:
             logging.error(f"delete();Error deleting document from {collection_name}: {e}")
             return 0
 
+    def put_file(self, bucket: str, filename: str, data: bytes, metadata: dict = None):
+        """
+        Store a file in a GridFS bucket, replacing any older file with the same name.
+
+        Args:
+            bucket (str): The name of the GridFS bucket.
+            filename (str): The name of the file.
+            data (bytes): The file content.
+            metadata (dict, optional): Extra fields kept with the file.
+
+        Returns:
+            str: The ID of the stored file.
+
+        Raises:
+            Exception: If an error occurs while storing the file.
+        """
+        try:
+            check_deadline()  # Abandon the work if the caller's deadline has passed
+            files = GridFSBucket(self.db, bucket_name=bucket)
+            file_id = files.upload_from_stream(filename, data, metadata=metadata or {})
+            # Keep only the new revision
+            for old_file in files.find({"filename": filename, "_id": {"$ne": file_id}}):
+                files.delete(old_file._id)
+
+            logging.info(f"put_file();Stored {filename} ({len(data)} bytes) in {bucket}")
+            return str(file_id)
+        except Exception as e:
+            logging.error(f"put_file();Error storing {filename} in {bucket}: {e}")
+            raise
+
+    def find_files(self, bucket: str, filter: dict = None):
+        """
+        List the files of a GridFS bucket, oldest first, without their content.
+
+        Args:
+            bucket (str): The name of the GridFS bucket.
+            filter (dict, optional): Filter on the file fields (e.g. "filename").
+
+        Returns:
+            list: The name, length, upload date (ISO format) and metadata of each file.
+        """
+        check_deadline()  # Abandon the work if the caller's deadline has passed
+        files = GridFSBucket(self.db, bucket_name=bucket)
+        return [
+            {
+                "filename": grid_out.filename,
+                "length": grid_out.length,
+                "uploadDate": grid_out.upload_date.isoformat(),
+                "metadata": self.serialize_data(grid_out.metadata or {}),
+            }
+            for grid_out in files.find(filter or {}).sort("uploadDate", 1)
+        ]
+
+    def get_file(self, bucket: str, filename: str):
+        """
+        Read the content of the latest file with the given name.
+
+        Args:
+            bucket (str): The name of the GridFS bucket.
+            filename (str): The name of the file.
+
+        Returns:
+            bytes: The file content, or None when the file does not exist.
+        """
+        check_deadline()  # Abandon the work if the caller's deadline has passed
+        try:
+            return GridFSBucket(self.db, bucket_name=bucket).open_download_stream_by_name(filename).read()
+        except NoFile:
+            return None
+
+    def delete_file(self, bucket: str, filename: str):
+        """
+        Delete every file with the given name from a GridFS bucket.
+
+        Args:
+            bucket (str): The name of the GridFS bucket.
+            filename (str): The name of the file.
+
+        Returns:
+            int: The number of files deleted.
+        """
+        check_deadline()  # Abandon the work if the caller's deadline has passed
+        files = GridFSBucket(self.db, bucket_name=bucket)
+        deleted_count = 0
+        for grid_out in files.find({"filename": filename}):
+            files.delete(grid_out._id)
+            deleted_count += 1
+
+        logging.info(f"delete_file();Deleted {deleted_count} file(s) named {filename} from {bucket}")
+        return deleted_count
+
     def serialize_data(self, data):
         """
         Converts MongoDB data into a JSON-serializable format.
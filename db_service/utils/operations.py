@@ -0,0 +1,279 @@
+"""
+operations.py
+
+The db_service operations, shared by the HTTP routes (routes/db_routes.py) and the in-process
+backend of the school service, so that both validate requests and build responses the same way.
+
+Each operation receives the database engine (the `Database` singleton, or any object with the
+same methods) and the JSON body of the request, and returns the response body. An invalid body
+raises InvalidRequest, which the routes answer with a 400.
+
+The modules of this package import each other with relative imports, so they can also be
+imported under a package-qualified name from another service (see the school bd_backends.py).
+
+Functions:
+    - run_operation: Run the operation of a db_service endpoint name (e.g. "find").
+"""
+
+import base64
+import binascii
+from datetime import datetime
+
+from .logging import logging
+
+LOG_LEVELS = {
+    "INFO": logging.INFO,
+    "ERROR": logging.ERROR,
+    "WARNING": logging.WARNING,
+    "DEBUG": logging.DEBUG,
+    "CRITICAL": logging.CRITICAL,
+}
+
+
+class InvalidRequest(ValueError):
+    """
+    Raised when the request body misses required fields or has invalid values.
+    """
+
+
+def insert_document(database, body):
+    collection = body.get("collection")  # Extract the collection name
+    data = body.get("data")  # Extract the document data
+
+    if not collection or not data:
+        raise InvalidRequest("Both 'collection' and 'data' are required.")
+
+    logging.info(f"insert_document();collection={collection}")
+    logging.info(f"insert_document();data={data}")
+
+    inserted_id = database.insert(collection, data)
+    return {"message": "Document inserted", "id": inserted_id}
+
+
+def find_documents(database, body):
+    collection = body.get("collection")  # Extract the collection name
+    query = body.get("query") or {}  # Extract the query, default to an empty dictionary
+
+    if not collection:
+        raise InvalidRequest("The 'collection' field is required.")
+
+    logging.info(f"find_documents();collection={collection}")
+    logging.info(f"find_documents();query={query}")
+
+    return {"documents": database.find(collection_name=collection, filter=query)}
+
+
+def find_documents_by_id(database, body):
+    collection = body.get("collection")  # Extract the collection name
+    id = body.get("id")  # Extract the document ID
+
+    if not collection or not id:
+        raise InvalidRequest("Both 'collection' and 'id' are required.")
+
+    logging.info(f"find_documents_by_id();collection={collection}")
+    logging.info(f"find_documents_by_id();id={id}")
+
+    return {"documents": database.find(collection_name=collection, id=id)}
+
+
+def update_document(database, body):
+    collection = body.get("collection")  # Extract the collection name
+    id = body.get("id")  # Extract the document ID
+    query = body.get("query") or {}  # Extract the query, default to an empty dictionary
+    data = body.get("data")  # Extract the update data
+
+    if not collection or (not id and not query) or not data:
+        raise InvalidRequest("The 'collection', 'query', and 'data' fields are required.")
+
+    logging.info(f"update_document();collection={collection}")
+    logging.info(f"update_document();id={id}")
+    logging.info(f"update_document();query={query}")
+    logging.info(f"update_document();data={data}")
+
+    modified_count = database.update(collection, id, query, data)
+    return {"message": "Document updated", "modified_count": modified_count}
+
+
+def increment_document(database, body):
+    collection = body.get("collection")  # Extract the collection name
+    query = body.get("query") or {}  # Extract the query, default to an empty dictionary
+    increments = body.get("inc")  # Extract the field deltas
+
+    if not collection or not query or not increments:
+        raise InvalidRequest("The 'collection', 'query', and 'inc' fields are required.")
+    if not isinstance(increments, dict) or not all(
+        isinstance(value, (int, float)) and not isinstance(value, bool) for value in increments.values()
+    ):
+        raise InvalidRequest("The 'inc' field must map fields to numbers.")
+
+    logging.info(f"increment_document();collection={collection}")
+    logging.info(f"increment_document();query={query}")
+    logging.info(f"increment_document();inc={increments}")
+
+    return {"message": "Document updated", "document": database.increment(collection, query, increments)}
+
+
+def upsert_many_documents(database, body):
+    collection = body.get("collection")  # Extract the collection name
+    operations = body.get("operations")  # Extract the list of {"query", "data"}
+
+    if not collection or not operations:
+        raise InvalidRequest("The 'collection' and 'operations' fields are required.")
+    if not isinstance(operations, list) or not all(
+        isinstance(operation, dict) and operation.get("query") and operation.get("data")
+        for operation in operations
+    ):
+        raise InvalidRequest("Each operation requires a 'query' and 'data'.")
+
+    logging.info(f"upsert_many_documents();collection={collection}")
+    logging.info(f"upsert_many_documents();operations={len(operations)}")
+
+    return {"message": "Documents updated", **database.upsert_many(collection, operations)}
+
+
+def delete_document(database, body):
+    collection = body.get("collection")  # Extract the collection name
+    id = body.get("id")  # Extract the document ID
+    query = body.get("query") or {}  # Extract the query, default to an empty dictionary
+
+    if not collection or (not id and not query):
+        raise InvalidRequest("The 'collection' and 'query' fields are required.")
+
+    logging.info(f"delete_document();collection={collection}")
+    logging.info(f"delete_document();id={id}")
+    logging.info(f"delete_document();query={query}")
+
+    deleted_count = database.delete(collection, id, query)
+    return {"message": "Document deleted", "deleted_count": deleted_count}
+
+
+def put_file(database, body):
+    bucket = body.get("bucket")  # Extract the GridFS bucket name
+    filename = body.get("filename")  # Extract the file name
+
+    if not bucket or not filename or not body.get("data"):
+        raise InvalidRequest("The 'bucket', 'filename' and 'data' fields are required.")
+    try:
+        data = base64.b64decode(body["data"], validate=True)
+    except (binascii.Error, TypeError):
+        raise InvalidRequest("The 'data' field must be base64 encoded.")
+
+    logging.info(f"put_file();bucket={bucket}")
+    logging.info(f"put_file();filename={filename}")
+
+    file_id = database.put_file(bucket, filename, data, body.get("metadata"))
+    return {"message": "File stored", "id": file_id}
+
+
+def find_files(database, body):
+    bucket = body.get("bucket")  # Extract the GridFS bucket name
+
+    if not bucket:
+        raise InvalidRequest("The 'bucket' field is required.")
+
+    logging.info(f"find_files();bucket={bucket}")
+
+    return {"files": database.find_files(bucket, body.get("query") or {})}
+
+
+def get_file(database, body):
+    bucket = body.get("bucket")  # Extract the GridFS bucket name
+    filename = body.get("filename")  # Extract the file name
+
+    if not bucket or not filename:
+        raise InvalidRequest("The 'bucket' and 'filename' fields are required.")
+
+    logging.info(f"get_file();bucket={bucket}")
+    logging.info(f"get_file();filename={filename}")
+
+    data = database.get_file(bucket, filename)
+    return {
+        "filename": filename,
+        "data": base64.b64encode(data).decode("ascii") if data is not None else None,
+    }
+
+
+def delete_file(database, body):
+    bucket = body.get("bucket")  # Extract the GridFS bucket name
+    filename = body.get("filename")  # Extract the file name
+
+    if not bucket or not filename:
+        raise InvalidRequest("The 'bucket' and 'filename' fields are required.")
+
+    logging.info(f"delete_file();bucket={bucket}")
+    logging.info(f"delete_file();filename={filename}")
+
+    return {"message": "File deleted", "deleted_count": database.delete_file(bucket, filename)}
+
+
+def write_log(database, body, change_log_file=None):
+    """
+    Write a log entry in MongoDB ("db" logtype) or in the log file.
+
+    Args:
+        change_log_file (Callable[[str], None], optional): Switches the log file to the requested
+            "log_file_name" before writing; without it the entry goes to the current log file.
+    """
+    collection = body.get("collection")  # Extract the collection name
+    source = body.get("source")  # Extract the document data
+    logtype = body.get("logtype")  # Extract the document data
+    logLevel = body.get("level")  # Extract the document data
+
+    if not collection or not source or not logtype or not logLevel:
+        raise InvalidRequest("Both 'collection' and 'source' and 'logtype' and 'logLevel' are required.")
+
+    logging.info(f"insert_document();collection={collection}")
+    logging.info(f"insert_document();source={source}")
+    logging.info(f"insert_document();logtype={logtype}")
+    logging.info(f"insert_document();logLevel={logLevel}")
+
+    message = f"{datetime.now().strftime('%Y%m%d')};{source};{body.get('message')}"
+
+    # checks if the logtype is db or file
+    if logtype == 'db':
+        inserted_id = database.log_to_mongodb(collection, logLevel, message, body.get("extra"))
+        return {"message": "Document inserted", "id": inserted_id}
+
+    if change_log_file is not None:
+        change_log_file(body.get("log_file_name", "default.log"))
+
+    logging.log(LOG_LEVELS.get(logLevel, logging.INFO), f"insert_document();{message};extra={body.get('extra')}")
+    return {"message": "Document inserted in log file"}
+
+
+OPERATIONS = {
+    "insert": insert_document,
+    "find": find_documents,
+    "findbyid": find_documents_by_id,
+    "update": update_document,
+    "increment": increment_document,
+    "upsertmany": upsert_many_documents,
+    "delete": delete_document,
+    "putfile": put_file,
+    "findfiles": find_files,
+    "getfile": get_file,
+    "deletefile": delete_file,
+    "log": write_log,
+}
+
+
+def run_operation(database, endpoint, body):
+    """
+    Run the operation of a db_service endpoint.
+
+    Args:
+        database: The database engine.
+        endpoint (str): The endpoint name (e.g., "find").
+        body (dict): The request body.
+
+    Returns:
+        dict: The response body.
+
+    Raises:
+        InvalidRequest: When the endpoint is unknown or the body is invalid.
+    """
+    operation = OPERATIONS.get(endpoint)
+    if operation is None:
+        raise InvalidRequest(f"Unknown endpoint: {endpoint}")
+
+    return operation(database, body)
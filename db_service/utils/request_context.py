@@ -0,0 +1,76 @@
+"""
+request_context.py
+
+Per-request context received from the school and auth services.
+
+Callers send a request id (`X-Request-Id`) and the time they are still willing to wait
+(`X-Deadline-Remaining-Ms`). The deadline is passed to MongoDB as `maxTimeMS` and work is
+abandoned once it has passed. Requests without the header have no deadline.
+
+Functions:
+    - start_request: Initialise the context from the incoming request headers.
+    - get_remaining_ms: Milliseconds left before the deadline (None when there is no deadline).
+    - check_deadline: Raise DeadlineExceeded when the deadline has passed.
+"""
+
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Optional
+
+REQUEST_ID_HEADER = "X-Request-Id"
+DEADLINE_HEADER = "X-Deadline-Remaining-Ms"
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+deadline_var: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """
+    Raised when work is attempted after the request deadline has passed.
+    """
+
+
+def parse_remaining_ms(value) -> Optional[int]:
+    try:
+        remaining_ms = int(value)
+    except (TypeError, ValueError):
+        return None
+
+    return remaining_ms if remaining_ms >= 0 else None
+
+
+def start_request(headers, default_timeout_ms: int = 0) -> str:
+    """
+    Initialise the request id and deadline for the current request.
+
+    Args:
+        headers: The incoming request headers.
+        default_timeout_ms (int): Deadline used when the caller sends none (0 disables it).
+
+    Returns:
+        str: The request id.
+    """
+    request_id = headers.get(REQUEST_ID_HEADER) or uuid.uuid4().hex
+    remaining_ms = parse_remaining_ms(headers.get(DEADLINE_HEADER))
+    if remaining_ms is None and default_timeout_ms > 0:
+        remaining_ms = default_timeout_ms
+
+    request_id_var.set(request_id)
+    deadline_var.set(time.monotonic() + remaining_ms / 1000 if remaining_ms is not None else None)
+    return request_id
+
+
+def get_remaining_ms() -> Optional[int]:
+    deadline = deadline_var.get()
+    if deadline is None:
+        return None
+
+    return max(0, int((deadline - time.monotonic()) * 1000))
+
+
+def check_deadline():
+    remaining_ms = get_remaining_ms()
+    if remaining_ms is not None and remaining_ms <= 0:
+        raise DeadlineExceeded(f"Deadline exceeded for request {request_id_var.get()}")
+
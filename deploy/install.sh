@@ -8,6 +8,8 @@ ENV_FILE="$ENV_DIR/backend.env"
 WEB_ROOT=/var/www/school-server
 NGINX_AVAILABLE=/etc/nginx/sites-available/school-server
 NGINX_ENABLED=/etc/nginx/sites-enabled/school-server
+# Transporte entre nginx e serviços: "tcp" (127.0.0.1) ou "uds" (Unix domain sockets)
+TRANSPORT="${SCHOOL_SERVER_TRANSPORT:-tcp}"
 
 if [[ ${EUID} -ne 0 ]]; then
     echo "Executar com privilégios administrativos: sudo ./deploy/install.sh" >&2
@@ -33,12 +35,25 @@ install -m 0644 "$DEPLOY_DIR/systemd/school-db.service" /etc/systemd/system/scho
 install -m 0644 "$DEPLOY_DIR/systemd/school-auth.service" /etc/systemd/system/school-auth.service
 install -m 0644 "$DEPLOY_DIR/systemd/school-api.service" /etc/systemd/system/school-api.service
 
+for service in school-db school-auth school-api; do
+    if [[ "$TRANSPORT" == "uds" ]]; then
+        install -d -m 0755 "/etc/systemd/system/$service.service.d"
+        install -m 0644 "$DEPLOY_DIR/systemd/uds/$service.service.d/uds.conf" "/etc/systemd/system/$service.service.d/uds.conf"
+    else
+        rm -f "/etc/systemd/system/$service.service.d/uds.conf"
+    fi
+done
+
 install -d -m 0755 "$WEB_ROOT"
 cp -a "$PROJECT_DIR/frontend/dist/." "$WEB_ROOT/"
 find "$WEB_ROOT" -type d -exec chmod 0755 {} +
 find "$WEB_ROOT" -type f -exec chmod 0644 {} +
 
-install -m 0644 "$DEPLOY_DIR/nginx/school-server.conf" "$NGINX_AVAILABLE"
+if [[ "$TRANSPORT" == "uds" ]]; then
+    install -m 0644 "$DEPLOY_DIR/nginx/school-server-uds.conf" "$NGINX_AVAILABLE"
+else
+    install -m 0644 "$DEPLOY_DIR/nginx/school-server.conf" "$NGINX_AVAILABLE"
+fi
 ln -sfn "$NGINX_AVAILABLE" "$NGINX_ENABLED"
 if [[ -L /etc/nginx/sites-enabled/default ]]; then
     unlink /etc/nginx/sites-enabled/default
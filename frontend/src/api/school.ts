@@ -29,6 +29,13 @@ export type PercentageRange = {
   textColor: string
 }
 
+export type ReportJob = {
+  jobId: string
+  status: 'queued' | 'running' | 'done' | 'failed'
+  url?: string
+  message?: string
+}
+
 function findCollection<T = SchoolDocument>(path: string, query: Record<string, unknown> = {}) {
   return apiRequest<T[]>(API_CONFIG.schoolBaseUrl, path, {
     method: 'POST',
@@ -111,6 +118,15 @@ export const schoolApi = {
         body: document,
       },
     ),
+  saveStudentMomentValues: (document: SchoolDocument) =>
+    apiRequest<{ count: number; values: SchoolDocument[] }>(
+      API_CONFIG.schoolBaseUrl,
+      '/config/upsertmomentvalues',
+      {
+        method: 'PUT',
+        body: document,
+      },
+    ),
   findStudentCalendarTasks: (query?: Record<string, unknown>) =>
     findCollection('/config/findstudentscalendar', query),
   addStudentCalendarTask: (document: SchoolDocument) =>
@@ -149,6 +165,17 @@ export const schoolApi = {
         body: document,
       },
     ),
+  submitReportJob: (document: SchoolDocument) =>
+    apiRequest<ReportJob & { statusUrl: string }>(
+      API_CONFIG.schoolBaseUrl,
+      '/config/moment-assessment-report',
+      {
+        method: 'POST',
+        body: { ...document, async: true },
+      },
+    ),
+  getReportJob: (jobId: string) =>
+    apiRequest<ReportJob>(API_CONFIG.schoolBaseUrl, `/config/report-jobs/${jobId}`),
   getReportUrl: (path: string) => `${API_CONFIG.schoolBaseUrl}${path}`,
 
   getAppSettings: () =>
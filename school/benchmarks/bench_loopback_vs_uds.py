@@ -0,0 +1,115 @@
+"""
+bench_loopback_vs_uds.py
+
+Compares BDClient round-trip latency to a db_service-shaped endpoint over loopback TCP
+and over a Unix domain socket. Both servers run locally with the same small FastAPI app,
+so the difference measured is the transport only.
+
+Usage (from the school folder):
+    python benchmarks/bench_loopback_vs_uds.py --iterations 500 --documents 50
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import uvicorn
+from fastapi import FastAPI, Request
+
+from utils.bd_backends import HTTPBackend
+from utils.bd_client import BDClient
+
+
+def create_app(documents):
+    app = FastAPI()
+    stored_documents = [
+        {"_id": str(index), "studentId": f"student-{index}", "value": index % 20}
+        for index in range(documents)
+    ]
+
+    @app.post("/db-api/find")
+    async def find(request: Request):
+        await request.json()
+        return {"documents": stored_documents}
+
+    return app
+
+
+def start_server(app, **bind_options):
+    server = uvicorn.Server(uvicorn.Config(app, log_level="warning", **bind_options))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+def get_free_port():
+    with socket.socket() as free_socket:
+        free_socket.bind(("127.0.0.1", 0))
+        return free_socket.getsockname()[1]
+
+
+async def measure(client, iterations):
+    payload = {"collection": "studentstestmoments", "query": {"classId": "class-1"}}
+    await client.find(endpoint="find", payload=payload)
+
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await client.find(endpoint="find", payload=payload)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    return timings
+
+
+def print_timings(name, timings):
+    print(
+        f"{name:<9} mean={statistics.mean(timings):7.3f} ms  "
+        f"p50={statistics.median(timings):7.3f} ms  min={min(timings):7.3f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--documents", type=int, default=50)
+    args = parser.parse_args()
+
+    app = create_app(args.documents)
+    port = get_free_port()
+    uds = os.path.join(tempfile.mkdtemp(), "db.sock")
+    servers = [
+        start_server(app, host="127.0.0.1", port=port),
+        start_server(app, uds=uds),
+    ]
+
+    # BDClient prints every response; keep the benchmark output readable
+    sys.stdout = open(os.devnull, "w")
+    try:
+        tcp_timings = asyncio.run(
+            measure(BDClient("", backend=HTTPBackend(f"http://127.0.0.1:{port}/db-api", uds="")), args.iterations)
+        )
+        uds_timings = asyncio.run(
+            measure(BDClient("", backend=HTTPBackend("http://localhost/db-api", uds=uds)), args.iterations)
+        )
+    finally:
+        sys.stdout = sys.__stdout__
+
+    print_timings("loopback", tcp_timings)
+    print_timings("uds", uds_timings)
+
+    for server in servers:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
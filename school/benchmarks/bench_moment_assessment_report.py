@@ -0,0 +1,102 @@
+"""
+bench_moment_assessment_report.py
+
+Times build_moment_assessment_report (values indexed by (studentId, questionNumber)) against
+the previous assembly, which scanned all the values for every student x question and all the
+enriched values for every student.
+
+Usage (from the school folder):
+    python benchmarks/bench_moment_assessment_report.py --students 30 200 1000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.fixtures import build_class_data
+from utils import grading
+
+
+def build_linear_report(moment, students, values):
+    enriched_values = grading.enrich_student_moment_values(values, [moment])
+    questions = [question for question in moment.get("questions", []) if isinstance(question, dict)]
+    rows = []
+
+    for student in students:
+        if student.get("active") is False:
+            continue
+
+        student_id = grading.get_document_id(student)
+        student_values = [
+            next(
+                (
+                    value_document
+                    for value_document in values
+                    if str(value_document.get("studentId")) == str(student_id)
+                    and str(value_document.get("questionNumber"))
+                    == str(question.get("number") or question.get("questionNumber"))
+                ),
+                {},
+            )
+            for question in questions
+        ]
+        matching_enriched_value = next(
+            (
+                value_document
+                for value_document in enriched_values
+                if str(value_document.get("studentId")) == str(student_id)
+            ),
+            {},
+        )
+        rows.append(
+            [
+                grading.get_student_name(student),
+                *[str(value_document.get("value", 0)) for value_document in student_values],
+                str(grading.format_number(grading.to_float(matching_enriched_value.get("studentMomentTotal")))),
+                matching_enriched_value.get("studentMomentPercentageText", "0.0%"),
+                str(matching_enriched_value.get("studentMomentGrade", 0)),
+            ]
+        )
+
+    return rows
+
+
+def time_report(build, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        rows = build()
+    return (time.perf_counter() - started) * 1000 / iterations, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, nargs="+", default=[30, 200, 1000])
+    parser.add_argument("--questions", type=int, default=20)
+    parser.add_argument("--iterations", type=int, default=3)
+    args = parser.parse_args()
+
+    for students in args.students:
+        data = build_class_data(students, moments=1, questions=args.questions)
+        moment = data["moments"][0]
+
+        indexed_ms, report = time_report(
+            lambda: grading.build_moment_assessment_report(moment, data["students"], data["values"]),
+            args.iterations,
+        )
+        linear_ms, rows = time_report(
+            lambda: build_linear_report(moment, data["students"], data["values"]),
+            1,
+        )
+        assert report["rows"] == rows
+
+        print(
+            f"students={students:<5} values={len(data['values']):<6} indexed={indexed_ms:8.1f} ms  "
+            f"linear={linear_ms:9.1f} ms  speedup={linear_ms / indexed_ms:6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
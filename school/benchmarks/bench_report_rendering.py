@@ -0,0 +1,66 @@
+"""
+bench_report_rendering.py
+
+Times render_report_pdf in "fast" mode (plain cells unless wrapping is needed, cached styles,
+wide tables split into groups of columns) against "standard" mode (a Paragraph in every cell)
+for a semester report of many students and columns.
+
+Usage (from the school folder):
+    python benchmarks/bench_report_rendering.py --rows 300 --columns 40
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.reports import render_report_pdf
+
+
+def build_semester_table(rows, columns):
+    headers = ["Aluno", *[f"Momento {column}" for column in range(1, columns - 2)], "Média", "Nota"]
+    table_rows = [
+        [
+            f"Aluno {row + 1} da turma",
+            *[f"{(row * column) % 100}.{column % 10}%" for column in range(1, columns - 2)],
+            f"{row % 100}.0%",
+            str(row % 5 + 1),
+        ]
+        for row in range(rows)
+    ]
+    return headers, table_rows
+
+
+def time_render(mode, headers, rows, directory, iterations):
+    started = time.perf_counter()
+    for iteration in range(iterations):
+        path = os.path.join(directory, f"{mode}-{iteration}.pdf")
+        render_report_pdf("Avaliações - 1.º semestre", headers, rows, path, mode)
+    return (time.perf_counter() - started) * 1000 / iterations, os.path.getsize(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=300)
+    parser.add_argument("--columns", type=int, default=40)
+    parser.add_argument("--iterations", type=int, default=3)
+    args = parser.parse_args()
+
+    headers, rows = build_semester_table(args.rows, args.columns)
+    with tempfile.TemporaryDirectory() as directory:
+        # Warm up the style sheet and font metrics
+        render_report_pdf("warm-up", headers[:3], [row[:3] for row in rows[:5]], os.path.join(directory, "warm-up.pdf"))
+        fast_ms, fast_size = time_render("fast", headers, rows, directory, args.iterations)
+        standard_ms, standard_size = time_render("standard", headers, rows, directory, args.iterations)
+
+    print(
+        f"rows={args.rows} columns={args.columns}  fast={fast_ms:8.1f} ms ({fast_size // 1024} KiB)  "
+        f"standard={standard_ms:8.1f} ms ({standard_size // 1024} KiB)  speedup={standard_ms / fast_ms:5.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+bench_school_overhead.py
+
+Measures the school-service cost of the semester summary with db_service replaced by the
+in-memory stand-in (db_service/memory_service.py). No MongoDB is needed, so the numbers
+isolate the school service (HTTP client, JSON and grading) on any Linux machine.
+
+Usage (from the school folder):
+    python benchmarks/bench_school_overhead.py --students 30 --moments 12 --questions 10 --latency-ms 0
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "db_service")))
+
+import uvicorn
+from memory_service import MemoryDatabase, create_app
+
+from benchmarks.fixtures import CLASS_ID, USER_ID, build_class_data, load_into_memory_database
+from routes import class_tests_router
+from utils.bd_backends import HTTPBackend
+
+
+def start_memory_db_service(database, latency_ms):
+    with socket.socket() as free_socket:
+        free_socket.bind(("127.0.0.1", 0))
+        port = free_socket.getsockname()[1]
+
+    server = uvicorn.Server(
+        uvicorn.Config(create_app(latency_ms, database), host="127.0.0.1", port=port, log_level="warning")
+    )
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+
+    return server, f"http://127.0.0.1:{port}/db-api"
+
+
+async def measure(body, iterations):
+    await class_tests_router.get_semester_evaluations_summary(body)
+
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await class_tests_router.get_semester_evaluations_summary(body)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=30)
+    parser.add_argument("--moments", type=int, default=12)
+    parser.add_argument("--questions", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    database = MemoryDatabase()
+    load_into_memory_database(database, build_class_data(args.students, args.moments, args.questions))
+    server, base_url = start_memory_db_service(database, args.latency_ms)
+    class_tests_router.api_client.backend = HTTPBackend(base_url, uds="")
+    body = {"userId": USER_ID, "schoolId": "bench-school", "yearId": "bench-year", "classId": CLASS_ID, "semester": "1"}
+
+    # BDClient prints every response; keep the benchmark output readable
+    sys.stdout = open(os.devnull, "w")
+    try:
+        timings = asyncio.run(measure(body, args.iterations))
+    finally:
+        sys.stdout = sys.__stdout__
+        server.should_exit = True
+
+    print(
+        f"students={args.students} moments={args.moments} questions={args.questions} "
+        f"latency={args.latency_ms} ms: mean={statistics.mean(timings):.1f} ms "
+        f"p50={statistics.median(timings):.1f} ms min={min(timings):.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+bench_semester_simulation.py
+
+Times the what-if grading of a class semester for several weight scenarios: SemesterSimulation
+(student moment totals computed once, then every scenario only regroups and weights them)
+against rebuilding the whole summary with build_semester_evaluations_summary for each scenario.
+
+Usage (from the school folder):
+    python benchmarks/bench_semester_simulation.py --students 30 300 --scenarios 10
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.fixtures import SETTINGS, build_class_data
+from utils import grading
+
+
+def build_scenarios(count):
+    return [
+        {
+            "name": f"Cenário {index + 1}",
+            "evaluationMomentTemplates": [
+                {"id": "testes", "type": "Teste", "weightPercentage": 40 + index * 4},
+                {"id": "questoes-aula", "type": "Questão aula", "weightPercentage": 45 - index * 4},
+            ],
+        }
+        for index in range(count)
+    ]
+
+
+def time_simulation(data, scenarios, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        simulation = grading.SemesterSimulation("1", data["students"], data["moments"], data["values"])
+        simulation.simulate(data["settings"], scenarios)
+    return (time.perf_counter() - started) * 1000 / iterations
+
+
+def time_rebuilt_summaries(data, scenarios, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for settings in [data["settings"], *[{**SETTINGS, **scenario} for scenario in scenarios]]:
+            grading.build_semester_evaluations_summary(
+                {"semester": "1"}, data["students"], data["moments"], data["values"], settings,
+            )
+    return (time.perf_counter() - started) * 1000 / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, nargs="+", default=[30, 300])
+    parser.add_argument("--moments", type=int, default=12)
+    parser.add_argument("--questions", type=int, default=10)
+    parser.add_argument("--scenarios", type=int, default=10)
+    parser.add_argument("--iterations", type=int, default=3)
+    args = parser.parse_args()
+
+    scenarios = build_scenarios(args.scenarios)
+    for students in args.students:
+        data = build_class_data(students, args.moments, args.questions)
+        simulation_ms = time_simulation(data, scenarios, args.iterations)
+        rebuilt_ms = time_rebuilt_summaries(data, scenarios, args.iterations)
+        print(
+            f"students={students:<5} scenarios={len(scenarios):<3} simulation={simulation_ms:8.1f} ms  "
+            f"rebuilt summaries={rebuilt_ms:8.1f} ms  speedup={rebuilt_ms / simulation_ms:5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
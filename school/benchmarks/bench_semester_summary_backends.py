@@ -0,0 +1,78 @@
+"""
+bench_semester_summary_backends.py
+
+End-to-end latency comparison of the semester-summary flow with the HTTP backend
+(school -> db_service -> MongoDB) and the in-process backend (school -> MongoDB).
+
+Requirements:
+    - MongoDB reachable through MONGO_DB_CONNECTION_STRING / DATABASE_NAME.
+    - db_service running at BD_BASE_URL (only for the HTTP backend).
+    - A class with students, moments and values already stored.
+
+Usage (from the school folder):
+    python benchmarks/bench_semester_summary_backends.py --user-id <id> --school-id <id> \
+        --year-id <id> --class-id <id> --semester 1 --iterations 50
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from routes import class_tests_router
+from utils.bd_backends import HTTPBackend, InProcessBackend
+from utils.config import BD_BASE_URL
+
+
+async def measure(backend, body, iterations):
+    class_tests_router.api_client.backend = backend
+
+    # Warm-up call (connections, lazy imports)
+    await class_tests_router.get_semester_evaluations_summary(body)
+
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await class_tests_router.get_semester_evaluations_summary(body)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    return timings
+
+
+def print_timings(name, timings):
+    ordered = sorted(timings)
+    p95 = ordered[max(0, int(len(ordered) * 0.95) - 1)]
+    print(
+        f"{name:<10} mean={statistics.mean(ordered):8.2f} ms  "
+        f"p50={statistics.median(ordered):8.2f} ms  p95={p95:8.2f} ms"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user-id", required=True)
+    parser.add_argument("--school-id", required=True)
+    parser.add_argument("--year-id", required=True)
+    parser.add_argument("--class-id", required=True)
+    parser.add_argument("--semester", default="1")
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    body = {
+        "userId": args.user_id,
+        "schoolId": args.school_id,
+        "yearId": args.year_id,
+        "classId": args.class_id,
+        "semester": args.semester,
+    }
+
+    print_timings("http", await measure(HTTPBackend(BD_BASE_URL), body, args.iterations))
+    print_timings("inprocess", await measure(InProcessBackend(), body, args.iterations))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
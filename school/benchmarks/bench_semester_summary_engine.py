@@ -0,0 +1,73 @@
+"""
+bench_semester_summary_engine.py
+
+Times build_semester_evaluations_summary with the pure-Python engine (indexed
+(studentId, momentId) totals), the NumPy engine when installed, and the previous linear
+lookup (get_student_moment_total for every student x moment).
+
+The linear reference grows with students^2, so by default it only runs up to 300 students.
+
+Usage (from the school folder):
+    python benchmarks/bench_semester_summary_engine.py --students 30 300 3000
+"""
+
+import argparse
+import os
+import sys
+import time
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.fixtures import build_class_data
+from utils import grading
+
+
+class LinearMomentTotals:
+    def __init__(self, enriched_values):
+        self.enriched_values = enriched_values
+
+    def get(self, key, default=0):
+        return grading.get_student_moment_total(self.enriched_values, key[0], key[1])
+
+
+def time_summary(data, iterations):
+    metadata = {"userId": "bench-user", "classId": "bench-class", "semester": "1"}
+    started = time.perf_counter()
+    for _ in range(iterations):
+        grading.build_semester_evaluations_summary(
+            metadata, data["students"], data["moments"], data["values"], data["settings"],
+        )
+    return (time.perf_counter() - started) * 1000 / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, nargs="+", default=[30, 300, 3000])
+    parser.add_argument("--moments", type=int, default=12)
+    parser.add_argument("--questions", type=int, default=10)
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--reference-max-students", type=int, default=300)
+    args = parser.parse_args()
+
+    for students in args.students:
+        data = build_class_data(students, args.moments, args.questions)
+        with mock.patch.object(grading, "GRADING_ENGINE", "python"):
+            indexed_ms = time_summary(data, args.iterations)
+        line = f"students={students:<5} values={len(data['values']):<7} indexed={indexed_ms:9.1f} ms"
+
+        if grading.np is not None:
+            numpy_ms = time_summary(data, args.iterations)
+            line += f"  numpy={numpy_ms:9.1f} ms"
+
+        if students <= args.reference_max_students:
+            with mock.patch.object(grading, "GRADING_ENGINE", "python"), \
+                    mock.patch.object(grading, "index_student_moment_totals", LinearMomentTotals):
+                linear_ms = time_summary(data, 1)
+            line += f"  linear={linear_ms:9.1f} ms  speedup={linear_ms / indexed_ms:6.1f}x"
+
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
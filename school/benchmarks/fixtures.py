@@ -0,0 +1,94 @@
+"""
+fixtures.py
+
+Synthetic class data shared by the benchmarks: students, evaluation moments, per-question
+values and app settings shaped like the documents stored by db_service.
+"""
+
+import random
+
+from utils.config import CLASS_MOMENTS_COLLECTION, MOMENTS_COLLECTION, STUDENTS_COLLECTION
+
+USER_ID = "bench-user"
+CLASS_ID = "bench-class"
+
+SETTINGS = {
+    "evaluationMomentTemplates": [
+        {"id": "testes", "type": "Teste", "weightPercentage": 60},
+        {"id": "questoes-aula", "type": "Questão aula", "weightPercentage": 25},
+    ],
+    "attitudeTemplates": [
+        {"id": "participacao", "text": "Participação", "alias": "Part.", "weightPercentage": 10},
+        {"id": "comportamento", "text": "Comportamento", "alias": "Comp.", "weightPercentage": 5},
+    ],
+    "percentageRanges": None,
+}
+
+
+def build_class_data(students=30, moments=12, questions=10, seed=1):
+    """
+    Build a class with the given number of students, moments and questions per moment.
+
+    Returns:
+        dict: {"students": [...], "moments": [...], "values": [...], "settings": {...}}
+    """
+    generator = random.Random(seed)
+    student_documents = [
+        {
+            "_id": f"student-{index}",
+            "userId": USER_ID,
+            "classId": CLASS_ID,
+            "name": f"Aluno {index:04d}",
+            "active": True,
+            "attitudes": [
+                {"templateId": "participacao", "value": generator.randint(1, 5)},
+                {"templateId": "comportamento", "value": generator.randint(1, 5)},
+            ],
+        }
+        for index in range(students)
+    ]
+    moment_documents = [
+        {
+            "_id": f"moment-{index}",
+            "userId": USER_ID,
+            "classId": CLASS_ID,
+            "name": f"Momento {index + 1}",
+            "semester": "1",
+            "type": "Teste" if index % 2 == 0 else "Questão aula",
+            "totalValue": float(questions * 10),
+            "questions": [{"number": str(number + 1), "value": 10.0} for number in range(questions)],
+        }
+        for index in range(moments)
+    ]
+    value_documents = [
+        {
+            "_id": f"value-{moment['_id']}-{student['_id']}-{number + 1}",
+            "userId": USER_ID,
+            "classId": CLASS_ID,
+            "momentId": moment["_id"],
+            "studentId": student["_id"],
+            "questionNumber": str(number + 1),
+            "questionValue": 10.0,
+            "value": float(generator.randint(0, 10)),
+        }
+        for moment in moment_documents
+        for student in student_documents
+        for number in range(questions)
+    ]
+
+    return {
+        "students": student_documents,
+        "moments": moment_documents,
+        "values": value_documents,
+        "settings": SETTINGS,
+    }
+
+
+def load_into_memory_database(database, data):
+    """
+    Store the synthetic class in a db_service MemoryDatabase (db_service/memory_service.py).
+    """
+    database.get_collection(STUDENTS_COLLECTION).extend(data["students"])
+    database.get_collection(MOMENTS_COLLECTION).extend(data["moments"])
+    database.get_collection(CLASS_MOMENTS_COLLECTION).extend(data["values"])
+    database.get_collection("appsettings").append({"_id": "settings", "key": "global", **data["settings"]})
@@ -14,7 +14,9 @@ Environment Variables:
 
 # Import FastAPI framework
 import os
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 app = FastAPI()
@@ -25,7 +27,12 @@ from routes.schools_router import schools_router
 from routes.years_routes import years_router
 from routes.class_routes import class_router
 from routes.students_routes import students_router
-from routes.class_tests_router import school_tests_router
+from routes.class_tests_router import school_tests_router, summary_workers, report_workers, report_janitor
+
+# Import the request context propagated to db_service
+from utils.config import BD_BACKEND, REQUEST_TIMEOUT_MS
+from utils.bd_backends import InProcessBackend, close_backends
+from utils.request_context import REQUEST_ID_HEADER, DeadlineExceeded, start_request
 
 # Import environment variable loader
 from dotenv import load_dotenv
@@ -34,9 +41,27 @@ from dotenv import load_dotenv
 # This allows sensitive information (e.g., database credentials) to be stored securely
 load_dotenv()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Load the db_service engine of the in-process backend and start the report janitor, and stop
+    it, the worker processes of the CPU-bound routes and the db_service clients when the server
+    shuts down.
+    """
+    if BD_BACKEND == "inprocess":
+        # Refuse to start when the engine cannot be loaded, instead of answering every call with {}
+        InProcessBackend().get_database()
+    report_janitor.start()
+    yield
+    await report_janitor.stop()
+    summary_workers.shutdown()
+    report_workers.shutdown()
+    await close_backends()
+
 # Initialize the FastAPI application
 # This creates the main app instance that will handle all incoming requests
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Defina as origens permitidas (pode ser específico ou "*")
 origins = [
@@ -57,6 +82,25 @@ app.add_middleware(
     allow_headers=["*"],  # Permite todos os headers
 )
 
+
+@app.middleware("http")
+async def propagate_request_context(request: Request, call_next):
+    """
+    Start the request id and deadline that BDClient forwards to db_service.
+    """
+    request_id = start_request(request.headers, REQUEST_TIMEOUT_MS)
+    response = await call_next(request)
+    response.headers[REQUEST_ID_HEADER] = request_id
+    return response
+
+
+@app.exception_handler(DeadlineExceeded)
+async def deadline_exceeded_handler(request: Request, exc: DeadlineExceeded):
+    """
+    Answer with a 504 when the request deadline passed during a db_service call, like db_service.
+    """
+    return JSONResponse(status_code=504, content={"message": "O pedido excedeu o tempo limite."})
+
 # Include the clases routes
 # These routes handle user authentication, such as login and registration
 app.include_router(auth_router, prefix="/auth", tags=["auth"])
@@ -92,16 +136,22 @@ if __name__ == "__main__":
         - host (str): The IP address or hostname to bind the server to (default: 127.0.0.1).
         - port (int): The port to bind the server to (default: 8020).
         - reload (bool): Enables automatic reloading of the app on code changes (useful for development).
+        - uds (str): Unix domain socket path (UDS_PATH); when set, host and port are ignored.
     """
     import uvicorn
     
     # Retrieve the host and port from environment variables, with default values
     host = os.getenv("HOST", "127.0.0.1")  # Default host is 127.0.0.1 (localhost)
     port = int(os.getenv("PORT", 8020))  # Default port is 8020
+    uds = os.getenv("UDS_PATH")  # Optional Unix domain socket, replaces host/port when set
 
-    # Print the host and port for debugging purposes
-    print(f"Starting server on {host}:{port}")
+    if uds:
+        print(f"Starting server on unix:{uds}")
+        uvicorn.run("main:app", uds=uds, reload=False)
+    else:
+        # Print the host and port for debugging purposes
+        print(f"Starting server on {host}:{port}")
 
-    # Start the Uvicorn server to run the FastAPI application
-    uvicorn.run("main:app", host=host, port=port, reload=False)
+        # Start the Uvicorn server to run the FastAPI application
+        uvicorn.run("main:app", host=host, port=port, reload=False)
 # End of main.py
@@ -23,6 +23,7 @@ from fastapi.responses import JSONResponse
 from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.hazmat.primitives.asymmetric import padding, rsa
 from utils.bd_client import BDClient  # API client for database interactions
+from utils.request_context import DeadlineExceeded  # Answered with a 504 (see main.py)
 
 # Import custom utility modules
 from utils import utilities  # General utilities
@@ -157,6 +158,8 @@ async def register(request: Request):
             status_code=201
         )
 
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         # Handle unexpected errors
         errMessage = f"Error message:{e}"
@@ -251,6 +254,8 @@ async def login(request: Request, response: Response):
         # Return the generated token
         return login_response
     
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         # Handle unexpected errors
         errMessage = f"Error message:{e}"
@@ -274,6 +279,8 @@ async def logout(request: Request, response: Response):
         # Return the generated token
         return logout_response
     
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         errMessage = f"Error message:{e}"
         utilities.add_log_to_db(api_client=api_client, source="auth_routes", method="login", message=errMessage)
@@ -331,6 +338,8 @@ async def get_users(request: Request):
         # Sem resultados não é um erro: devolve 200 com uma lista vazia
         return JSONResponse(content={"message": response.get("documents") or []}, status_code=200)
 
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         # Handle unexpected errors
         errMessage = f"Error message:{e}"
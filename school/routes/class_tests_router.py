@@ -1,28 +1,80 @@
-import re
-import tempfile
+import asyncio
+import json
 from pathlib import Path
 
 from fastapi import APIRouter, Depends, Request
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from httpx import request
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4, landscape
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
 
 # Import custom utility modules
 from utils.bd_client import BDClient  # Database handling utilities
 from utils import utilities  # General utilities
+from utils.concurrency import gather_named  # Concurrent db_service calls
+from utils.request_context import DeadlineExceeded  # Answered with a 504 (see main.py)
+from utils.app_settings import APP_SETTINGS_COLLECTION, AppSettingsService  # Cached app settings
+from utils.semester_summaries import SemesterSummaryStore  # Materialized semester summaries
+from utils.workers import ProcessWorkerPool, WorkerPoolFull  # CPU-bound work in worker processes
+from utils.reports import (  # PDF reports
+    REPORT_RENDER_MODES,
+    GridFSReportStore,
+    ReportCache,
+    get_report_key,
+    render_report_bytes,
+    render_report_pdf,
+    safe_report_filename,
+)
+from utils.report_jobs import ReportJobs  # Background report jobs
+from utils.exports import EXPORT_MEDIA_TYPES, create_export_writer, stream_export  # CSV and XLSX exports
+from utils.report_archives import ArchiveProgress, stream_zip  # ZIP archives of many reports
+from utils.report_janitor import ReportJanitor  # Eviction of old reports
+from utils.grading import (
+    APP_SETTINGS_KEY,
+    DEFAULT_APP_SETTINGS,
+    normalize_inactive_logout_minutes,
+    normalize_message_timeout_seconds,
+    normalize_hex_color,
+    normalize_evaluation_moment_templates,
+    normalize_attitude_templates,
+    normalize_percentage_ranges,
+    to_float,
+    format_number,
+    get_document_id,
+    get_string_value,
+    get_moment_name,
+    get_moment_semester,
+    get_moment_max_value,
+    get_question_max_value,
+    normalize_moment_value,
+    build_projected_student_moment_values,
+    validate_evaluation_moment_payload,
+    get_student_moment_fields,
+    enrich_student_moment_values,
+    build_moment_assessment_report,
+    build_moment_statistics,
+    build_semester_summary_content,
+    SemesterSimulation,
+    get_content_hash,
+    get_semester_evaluations_content_hash,
+    restore_semester_evaluations_summary,
+)
 
 from utils.config import (
     BD_BASE_URL,
+    CLASSES_COLLECTION,
     STUDENTS_COLLECTION,
     STUDENT_TESTES_COLLECTION,
     TESTS_COLLECTION,
     MOMENTS_COLLECTION,
     CLASS_MOMENTS_COLLECTION,
+    STUDENT_MOMENT_TOTALS_COLLECTION,
     STUDENT_CALENDAR_COLLECTION,
     SEMESTER_EVALUATIONS_COLLECTION,
+    SUMMARY_WORKERS,
+    REPORT_WORKERS,
+    REPORT_MAX_QUEUE,
+    REPORT_RENDER_MODE,
+    REPORT_STORAGE,
+    SIMULATION_MAX_SCENARIOS,
 )
 
 # Create a new router for data-related endpoints
@@ -31,501 +83,36 @@ school_tests_router = APIRouter()
 # Instantiate the API client
 api_client = BDClient(BD_BASE_URL)
 
-APP_SETTINGS_COLLECTION = "appsettings"
-APP_SETTINGS_KEY = "global"
-DEFAULT_APP_SETTINGS = {
-    "key": APP_SETTINGS_KEY,
-    "inactiveLogoutMinutes": 15,
-    "messageTimeoutSeconds": 5,
-    "popupBackgroundColor": "#15803d",
-    "popupTextColor": "#ffffff",
-    "errorPopupBackgroundColor": "#fee2e2",
-    "errorPopupTextColor": "#dc2626",
-    "evaluationMomentTemplates": [],
-    "attitudeTemplates": [],
-    "percentageRanges": [
-        {
-            "id": "very-low",
-            "min": 0,
-            "max": 10,
-            "nota": 1,
-            "backgroundColor": "#dc2626",
-            "textColor": "#ffffff",
-        },
-        {
-            "id": "low",
-            "min": 11,
-            "max": 39,
-            "nota": 2,
-            "backgroundColor": "#fdba74",
-            "textColor": "#7c2d12",
-        },
-        {
-            "id": "mid-low",
-            "min": 40,
-            "max": 49,
-            "nota": 2,
-            "backgroundColor": "#fde68a",
-            "textColor": "#713f12",
-        },
-        {
-            "id": "mid",
-            "min": 50,
-            "max": 69,
-            "nota": 3,
-            "backgroundColor": "#bbf7d0",
-            "textColor": "#14532d",
-        },
-        {
-            "id": "high",
-            "min": 70,
-            "max": 85,
-            "nota": 4,
-            "backgroundColor": "#15803d",
-            "textColor": "#ffffff",
-        },
-        {
-            "id": "very-high",
-            "min": 86,
-            "max": 100,
-            "nota": 5,
-            "backgroundColor": "#ddd6fe",
-            "textColor": "#4c1d95",
-        },
-    ],
-}
-
-DEFAULT_EVALUATION_MOMENT_TEMPLATE_COLORS = [
-    {
-        "backgroundColor": "#1e40af",
-        "averageBackgroundColor": "#1d4ed8",
-        "weightedBackgroundColor": "#2563eb",
-        "textColor": "#eff6ff",
-    },
-    {
-        "backgroundColor": "#5b21b6",
-        "averageBackgroundColor": "#6d28d9",
-        "weightedBackgroundColor": "#7c3aed",
-        "textColor": "#f5f3ff",
-    },
-    {
-        "backgroundColor": "#9a3412",
-        "averageBackgroundColor": "#c2410c",
-        "weightedBackgroundColor": "#ea580c",
-        "textColor": "#fff7ed",
-    },
-    {
-        "backgroundColor": "#115e59",
-        "averageBackgroundColor": "#0f766e",
-        "weightedBackgroundColor": "#0d9488",
-        "textColor": "#f0fdfa",
-    },
-]
-
-
-def safe_report_filename(value):
-    normalized = re.sub(r"[^A-Za-z0-9_-]+", "_", value.strip())
-    return normalized.strip("_") or "momento_avaliacao"
-
-
-def normalize_inactive_logout_minutes(value):
-    if isinstance(value, bool):
-        return DEFAULT_APP_SETTINGS["inactiveLogoutMinutes"]
-
-    try:
-        minutes = int(value)
-    except (TypeError, ValueError):
-        return DEFAULT_APP_SETTINGS["inactiveLogoutMinutes"]
-
-    return minutes if minutes > 0 else DEFAULT_APP_SETTINGS["inactiveLogoutMinutes"]
-
-
-def normalize_message_timeout_seconds(value):
-    if isinstance(value, bool):
-        return DEFAULT_APP_SETTINGS["messageTimeoutSeconds"]
-
-    try:
-        seconds = int(value)
-    except (TypeError, ValueError):
-        return DEFAULT_APP_SETTINGS["messageTimeoutSeconds"]
-
-    return seconds if seconds > 0 else DEFAULT_APP_SETTINGS["messageTimeoutSeconds"]
-
-
-def normalize_hex_color(value, default):
-    if not isinstance(value, str) or not re.fullmatch(r"#[0-9a-fA-F]{6}", value):
-        return default
-
-    return value.lower()
-
-
-def normalize_weight_percentage(value):
-    if isinstance(value, bool):
-        return None
-
-    if isinstance(value, str):
-        value = value.strip().replace(",", ".")
-
-    try:
-        numeric_value = float(value)
-    except (TypeError, ValueError):
-        return None
-
-    return format_number(min(100, max(0, round(numeric_value, 2))))
-
-
-def normalize_evaluation_moment_templates(value):
-    if not isinstance(value, list):
-        return DEFAULT_APP_SETTINGS["evaluationMomentTemplates"]
-
-    normalized_templates = []
-    for template_index, template in enumerate(value):
-        if not isinstance(template, dict):
-            continue
-
-        moment_type = template.get("type")
-        if not isinstance(moment_type, str) or not moment_type.strip():
-            continue
-
-        weight_percentage = template.get("weightPercentage")
-        if isinstance(weight_percentage, bool):
-            continue
-
-        normalized_weight = normalize_weight_percentage(weight_percentage)
-        if normalized_weight is None:
-            continue
-        default_colors = DEFAULT_EVALUATION_MOMENT_TEMPLATE_COLORS[
-            template_index % len(DEFAULT_EVALUATION_MOMENT_TEMPLATE_COLORS)
-        ]
-
-        normalized_templates.append(
-            {
-                "id": str(template.get("id") or f"evaluation-template-{template_index + 1}"),
-                "type": moment_type.strip(),
-                "weightPercentage": normalized_weight,
-                "backgroundColor": normalize_hex_color(
-                    template.get("backgroundColor"),
-                    default_colors["backgroundColor"],
-                ),
-                "averageBackgroundColor": normalize_hex_color(
-                    template.get("averageBackgroundColor"),
-                    default_colors["averageBackgroundColor"],
-                ),
-                "weightedBackgroundColor": normalize_hex_color(
-                    template.get("weightedBackgroundColor"),
-                    default_colors["weightedBackgroundColor"],
-                ),
-                "textColor": normalize_hex_color(
-                    template.get("textColor"),
-                    default_colors["textColor"],
-                ),
-            }
-        )
-
-    return normalized_templates
-
-
-def normalize_attitude_templates(value):
-    if not isinstance(value, list):
-        return DEFAULT_APP_SETTINGS["attitudeTemplates"]
-
-    normalized_templates = []
-    for template_index, template in enumerate(value):
-        if not isinstance(template, dict):
-            continue
-
-        text = template.get("text")
-        alias = template.get("alias")
-        if not isinstance(text, str) or not text.strip():
-            continue
-        if not isinstance(alias, str) or not alias.strip():
-            continue
-
-        weight_percentage = template.get("weightPercentage")
-        if isinstance(weight_percentage, bool):
-            continue
-
-        normalized_weight = normalize_weight_percentage(weight_percentage)
-        if normalized_weight is None:
-            continue
-        default_colors = DEFAULT_EVALUATION_MOMENT_TEMPLATE_COLORS[
-            template_index % len(DEFAULT_EVALUATION_MOMENT_TEMPLATE_COLORS)
-        ]
-
-        normalized_templates.append(
-            {
-                "id": str(template.get("id") or f"attitude-template-{template_index + 1}"),
-                "text": text.strip(),
-                "alias": alias.strip(),
-                "weightPercentage": normalized_weight,
-                "backgroundColor": normalize_hex_color(
-                    template.get("backgroundColor"),
-                    default_colors["backgroundColor"],
-                ),
-                "weightedBackgroundColor": normalize_hex_color(
-                    template.get("weightedBackgroundColor"),
-                    default_colors["weightedBackgroundColor"],
-                ),
-                "textColor": normalize_hex_color(
-                    template.get("textColor"),
-                    default_colors["textColor"],
-                ),
-            }
-        )
-
-    return normalized_templates
-
-
-def normalize_percentage_ranges(value):
-    if not isinstance(value, list):
-        return DEFAULT_APP_SETTINGS["percentageRanges"]
-
-    normalized_ranges = []
-    for percentage_range in value:
-        if not isinstance(percentage_range, dict):
-            return DEFAULT_APP_SETTINGS["percentageRanges"]
-
-        try:
-            min_value = int(percentage_range.get("min"))
-            max_value = int(percentage_range.get("max"))
-            nota = int(percentage_range.get("nota", 0))
-        except (TypeError, ValueError):
-            return DEFAULT_APP_SETTINGS["percentageRanges"]
-
-        background_color = percentage_range.get("backgroundColor")
-        text_color = percentage_range.get("textColor")
-        if not isinstance(background_color, str) or not isinstance(text_color, str):
-            return DEFAULT_APP_SETTINGS["percentageRanges"]
-
-        normalized_ranges.append(
-            {
-                "id": str(percentage_range.get("id") or f"{min_value}-{max_value}"),
-                "min": min_value,
-                "max": max_value,
-                "nota": max(0, nota),
-                "backgroundColor": background_color,
-                "textColor": text_color,
-            }
-        )
-
-    return normalized_ranges or DEFAULT_APP_SETTINGS["percentageRanges"]
-
-
-def get_percentage_range(percentage, percentage_ranges=None):
-    ranges = normalize_percentage_ranges(percentage_ranges or DEFAULT_APP_SETTINGS["percentageRanges"])
-    matching_range = next(
-        (
-            percentage_range
-            for percentage_range in ranges
-            if percentage >= percentage_range["min"] and percentage <= percentage_range["max"]
-        ),
-        None,
-    )
-
-    return matching_range or ranges[-1]
-
-
-def get_percentage_fields(percentage, percentage_ranges=None, prefix=""):
-    percentage_range = get_percentage_range(percentage, percentage_ranges)
-    return {
-        f"{prefix}Percentage": round(percentage, 1),
-        f"{prefix}PercentageText": f"{percentage:.1f}%",
-        f"{prefix}Grade": percentage_range.get("nota", 0),
-        f"{prefix}BackgroundColor": percentage_range.get("backgroundColor"),
-        f"{prefix}TextColor": percentage_range.get("textColor"),
-    }
-
-
-def to_float(value, default=0):
-    if isinstance(value, bool):
-        return default
-
-    try:
-        return float(value)
-    except (TypeError, ValueError):
-        return default
-
-
-def format_number(value):
-    rounded_value = round(value, 2)
-    return int(rounded_value) if rounded_value.is_integer() else rounded_value
-
-
-def get_document_id(document):
-    return document.get("_id") or document.get("id")
-
-
-def get_string_value(value, default=""):
-    return value if isinstance(value, str) else default
-
-
-def get_student_name(student):
-    return get_string_value(student.get("name")) or "Aluno"
-
-
-def get_moment_name(moment):
-    return get_string_value(moment.get("name")) or "Momento de avaliação"
-
-
-def get_moment_type_label(moment):
-    moment_type = get_string_value(
-        moment.get("evaluationMomentTemplateType") or moment.get("type")
-    )
-
-    if moment_type == "questao-aula":
-        return "Questão aula"
-
-    if moment_type == "teste":
-        return "Teste"
-
-    return moment_type or "Sem tipo"
-
-
-def get_moment_template(moment, templates):
-    template_id = get_string_value(moment.get("evaluationMomentTemplateId"))
-    if template_id:
-        matching_template = next(
-            (
-                template
-                for template in templates
-                if get_string_value(template.get("id")) == template_id
-            ),
-            None,
-        )
-
-        if matching_template:
-            return matching_template
-
-    moment_type = get_moment_type_label(moment)
-    return next(
-        (
-            template
-            for template in templates
-            if template.get("type") == moment_type
-        ),
-        None,
-    )
-
-
-def get_moment_group_type_label(moment, templates):
-    matching_template = get_moment_template(moment, templates)
-    if matching_template:
-        return get_string_value(matching_template.get("type")) or "Sem tipo"
-
-    return get_moment_type_label(moment)
-
-
-def get_moment_semester(moment):
-    return "2" if str(moment.get("semester", "1")) == "2" else "1"
-
-
-def get_moment_max_value(moment, value_documents):
-    if moment:
-        max_value = to_float(moment.get("totalValue"))
-        if max_value:
-            return max_value
-
-        questions = moment.get("questions")
-        if isinstance(questions, list):
-            questions_total = sum(
-                to_float(question.get("value")) for question in questions if isinstance(question, dict)
-            )
-            if questions_total:
-                return questions_total
-
-    question_values = {}
-    for value_document in value_documents:
-        question_number = value_document.get("questionNumber")
-        if question_number not in question_values:
-            question_values[question_number] = to_float(value_document.get("questionValue"))
-
-    return sum(question_values.values())
-
-
-def get_moment_weight_percentage(moment, templates):
-    configured_template = get_moment_template(moment, templates)
+# Normalized app settings, shared by the requests of this process
+app_settings_service = AppSettingsService(api_client)
 
-    if configured_template:
-        return to_float(configured_template.get("weightPercentage"))
+# Materialized semester summaries, recomputed when their class data changes
+semester_summary_store = SemesterSummaryStore(api_client)
 
-    return to_float(moment.get("evaluationMomentTemplateWeightPercentage"))
+# Worker processes building the semester summaries of many classes
+summary_workers = ProcessWorkerPool(SUMMARY_WORKERS)
 
+# Worker processes rendering the PDF reports, so big reports do not block the event loop
+report_workers = ProcessWorkerPool(REPORT_WORKERS, max_queue=REPORT_MAX_QUEUE)
 
-def get_question_max_value(moment, question_number, fallback_value):
-    if moment:
-        questions = moment.get("questions")
-        if isinstance(questions, list):
-            for question in questions:
-                if (
-                    isinstance(question, dict)
-                    and str(question.get("number") or question.get("questionNumber")) == str(question_number)
-                ):
-                    return to_float(question.get("value"))
+# Rendered PDF reports by content, evicted least recently used first
+report_cache = ReportCache()
 
-    return to_float(fallback_value)
+# Reports shared by every instance through db_service GridFS (REPORT_STORAGE="gridfs"), else None
+report_store = GridFSReportStore(api_client) if REPORT_STORAGE == "gridfs" else None
+REPORT_STREAM_CHUNK_SIZE = 64 * 1024
 
+# Background task evicting old reports, started by the lifespan of the app (main.py)
+report_janitor = ReportJanitor(report_cache, report_store)
 
-def normalize_moment_value(value):
-    if value in (None, ""):
-        value = 0
-    if isinstance(value, str):
-        value = value.strip() or "0"
-    if isinstance(value, bool):
-        return None
+# Background report jobs ("async": true on POST /moment-assessment-report)
+report_jobs = ReportJobs()
 
-    try:
-        numeric_value = float(value)
-    except (TypeError, ValueError):
-        return None
-
-    return numeric_value if numeric_value >= 0 else None
-
-
-def build_projected_student_moment_values(existing_values, next_value):
-    projected_values = []
-    replaced = False
-
-    for existing_value in existing_values:
-        if existing_value.get("questionNumber") == next_value.get("questionNumber"):
-            projected_values.append(next_value)
-            replaced = True
-        else:
-            projected_values.append(existing_value)
-
-    if not replaced:
-        projected_values.append(next_value)
-
-    return projected_values
-
-
-def validate_evaluation_moment_payload(data):
-    if not isinstance(data, dict):
-        return "Dados do momento de avaliação inválidos."
+# Progress of the report archives being streamed (POST /year-reports-archive)
+archive_progress = ArchiveProgress()
 
-    questions = data.get("questions")
-    if not isinstance(questions, list) or len(questions) == 0:
-        return None
-
-    question_total = 0
-    for question in questions:
-        if not isinstance(question, dict):
-            return "Preenche o número e o valor de todas as questões."
-
-        question_number = question.get("number") or question.get("questionNumber")
-        question_value = normalize_moment_value(question.get("value"))
-        if not question_number or question_value is None or question_value <= 0:
-            return "Preenche o número e o valor de todas as questões."
-
-        question_total += question_value
-
-    total_value = to_float(data.get("totalValue"))
-    if total_value and format_number(question_total) != format_number(total_value):
-        return (
-            f"O total das questões deve ser {format_number(total_value)}. "
-            f"Total atual: {format_number(question_total)}."
-        )
-
-    return None
+# Fields shared by the values of one moment
+MOMENT_VALUE_GROUP_FIELDS = ["userId", "schoolId", "yearId", "classId", "momentId"]
 
 
 async def find_moment_for_value(body):
@@ -553,388 +140,167 @@ async def find_moment_for_value(body):
     )
 
 
-def enrich_student_moment_values(value_documents, moments=None, percentage_ranges=None):
-    moments = moments or []
-    percentage_ranges = percentage_ranges or DEFAULT_APP_SETTINGS["percentageRanges"]
-    moments_by_id = {
-        str(moment_id): moment
-        for moment in moments
-        if isinstance(moment, dict)
-        for moment_id in [get_document_id(moment)]
-        if moment_id
-    }
-    groups = {}
-
-    for value_document in value_documents:
-        group_key = (value_document.get("momentId"), value_document.get("studentId"))
-        groups.setdefault(group_key, []).append(value_document)
-
-    enriched_documents = []
-    for (moment_id, student_id), group_documents in groups.items():
-        total = sum(to_float(value_document.get("value")) for value_document in group_documents)
-        moment = moments_by_id.get(str(moment_id))
-        max_value = get_moment_max_value(moment, group_documents)
-        percentage = (total / max_value) * 100 if max_value else 0
-        processed_fields = {
-            "studentMomentTotal": format_number(total),
-            "studentMomentMaxValue": format_number(max_value),
-            **get_percentage_fields(percentage, percentage_ranges, "studentMoment"),
-        }
-
-        enriched_documents.extend(
-            {
-                **value_document,
-                **processed_fields,
-            }
-            for value_document in group_documents
-        )
-
-    return enriched_documents
+async def find_moments_for_values(value_documents, query):
+    moment_query = {}
 
+    if query.get("userId"):
+        moment_query["userId"] = query.get("userId")
+    if query.get("classId"):
+        moment_query["classId"] = query.get("classId")
 
-def get_student_moment_total(enriched_values, student_id, moment_id):
-    matching_value = next(
-        (
-            value_document
-            for value_document in enriched_values
-            if str(value_document.get("studentId")) == str(student_id)
-            and str(value_document.get("momentId")) == str(moment_id)
-            and value_document.get("studentMomentTotal") is not None
-        ),
-        None,
+    response = await api_client.find(
+        endpoint="find",
+        payload={"collection": MOMENTS_COLLECTION, "query": moment_query},
     )
+    moments = response.get("documents") or []
+    moment_ids = {value_document.get("momentId") for value_document in value_documents}
 
-    return to_float(matching_value.get("studentMomentTotal")) if matching_value else 0
-
-
-def get_student_attitude_value(student, template):
-    matching_keys = [
-        str(template.get("id") or ""),
-        get_string_value(template.get("alias")),
-        get_string_value(template.get("text")),
+    return [
+        moment for moment in moments
+        if not moment_ids or get_document_id(moment) in moment_ids
     ]
-    matching_keys = [key for key in matching_keys if key]
 
-    for collection_key in ("attitudes", "attitudeValues", "attitudeAssessments"):
-        collection = student.get(collection_key)
 
-        if isinstance(collection, list):
-            for attitude in collection:
-                if not isinstance(attitude, dict):
-                    continue
-
-                attitude_keys = [
-                    str(attitude.get("id") or ""),
-                    str(attitude.get("templateId") or ""),
-                    get_string_value(attitude.get("alias")),
-                    get_string_value(attitude.get("text")),
-                ]
-                if any(key in matching_keys for key in attitude_keys):
-                    return to_float(
-                        attitude.get("value")
-                        if attitude.get("value") is not None
-                        else attitude.get("studentTotal")
-                        if attitude.get("studentTotal") is not None
-                        else attitude.get("total")
-                    )
+async def find_enriched_moment_values(query):
+    response = await api_client.find(
+        endpoint="find",
+        payload={"collection": CLASS_MOMENTS_COLLECTION, "query": query},
+    )
+    value_documents = response.get("documents") or []
+    if not value_documents:
+        return []
 
-        if isinstance(collection, dict):
-            for key in matching_keys:
-                if key in collection:
-                    return to_float(collection.get(key))
+    moments = await find_moments_for_values(value_documents, query)
+    settings = await app_settings_service.get()
+    return enrich_student_moment_values(value_documents, moments, settings.percentage_scale)
 
-    for key in matching_keys:
-        if key in student:
-            return to_float(student.get(key))
 
-    return 0
+def build_moment_value_data(fields, query, question_value, numeric_value):
+    """
+    Build the stored document of a moment value (one student, one question) from the request fields.
+    """
+    return {
+        **query,
+        "schoolName": fields.get("schoolName"),
+        "academicYearId": fields.get("academicYearId") or fields.get("yearId"),
+        "academicYearName": fields.get("academicYearName"),
+        "className": fields.get("className"),
+        "name": fields.get("name") or fields.get("momentName"),
+        "momentName": fields.get("momentName"),
+        "studentUniqueId": fields.get("studentUniqueId"),
+        "studentName": fields.get("studentName"),
+        "questionValue": format_number(question_value),
+        "value": format_number(numeric_value),
+    }
 
 
-def group_semester_moments(moments, templates):
-    groups = []
+def validate_moment_value_cells(body, cells, moment, existing_values):
+    """
+    Validate a grid of moment values in one pass, against the question maxima of the moment and
+    the total of each student (its stored values with the new ones applied).
+
+    Args:
+        body (dict): Fields shared by all cells (userId, schoolId, yearId, classId, momentId, names).
+        cells (list): One item per cell with studentId, questionNumber and value. A cell repeated
+            in the list keeps its last value.
+        moment (dict | None): The evaluation moment.
+        existing_values (list): The stored values of the moment.
+
+    Returns:
+        tuple: (values, totals, errors). values maps (studentId, questionNumber) to the document to
+        write, totals maps each changed studentId to its new total and errors lists
+        {"index", "studentId", "questionNumber", "message"} items.
+    """
+    group_query = {field: body.get(field) for field in MOMENT_VALUE_GROUP_FIELDS}
+    student_values = {}
+    for value_document in existing_values:
+        student_values.setdefault(value_document.get("studentId"), {})[value_document.get("questionNumber")] = value_document
+
+    values = {}
+    errors = []
+    for index, cell in enumerate(cells):
+        cell = cell if isinstance(cell, dict) else {}
+        student_id = cell.get("studentId")
+        question_number = cell.get("questionNumber")
+        error = {"index": index, "studentId": student_id, "questionNumber": question_number}
+
+        missing_fields = [field for field in ["studentId", "questionNumber"] if cell.get(field) in (None, "")]
+        if missing_fields:
+            errors.append({**error, "message": f"Campos obrigatórios em falta: {', '.join(missing_fields)}."})
+            continue
 
-    for moment in moments:
-        moment_type = get_moment_group_type_label(moment, templates)
-        existing_group = next(
-            (group for group in groups if group["type"] == moment_type),
-            None,
-        )
+        numeric_value = normalize_moment_value(cell.get("value"))
+        if numeric_value is None:
+            errors.append({**error, "message": "Insere um valor válido para a questão."})
+            continue
 
-        if existing_group:
-            existing_group["moments"].append(moment)
-        else:
-            groups.append(
+        question_value = get_question_max_value(moment, question_number, cell.get("questionValue"))
+        if question_value and numeric_value > question_value:
+            errors.append(
                 {
-                    "type": moment_type,
-                    "weightPercentage": format_number(
-                        get_moment_weight_percentage(moment, templates),
+                    **error,
+                    "message": (
+                        f"O valor da questão {question_number} "
+                        f"não pode ultrapassar {format_number(question_value)}."
                     ),
-                    "moments": [moment],
                 }
             )
-
-    return groups
-
-
-def build_semester_evaluations_summary(metadata, students, moments, value_documents, settings):
-    percentage_ranges = normalize_percentage_ranges(settings.get("percentageRanges"))
-    templates = normalize_evaluation_moment_templates(settings.get("evaluationMomentTemplates"))
-    attitude_templates = normalize_attitude_templates(settings.get("attitudeTemplates"))
-    total_attitude_weight_percentage = sum(
-        to_float(template.get("weightPercentage"))
-        for template in attitude_templates
-    )
-    semester = str(metadata.get("semester"))
-    semester_moments = [
-        moment
-        for moment in moments
-        if get_moment_semester(moment) == semester
-    ]
-    groups = group_semester_moments(semester_moments, templates)
-    enriched_values = enrich_student_moment_values(
-        value_documents,
-        semester_moments,
-        percentage_ranges,
-    )
-    final_max_value = 0
-
-    for group in groups:
-        if not group["moments"]:
             continue
 
-        group_max_average = sum(
-            get_moment_max_value(moment, [])
-            for moment in group["moments"]
-        ) / len(group["moments"])
-        final_max_value += group_max_average * (to_float(group["weightPercentage"]) / 100)
-
-    active_students = [student for student in students if student.get("active") is not False]
-    student_summaries = []
+        query = {**group_query, "studentId": student_id, "questionNumber": question_number}
+        data = build_moment_value_data({**body, **cell}, query, question_value, numeric_value)
+        values[(student_id, question_number)] = data
+        student_values.setdefault(student_id, {})[question_number] = data
 
-    for student in active_students:
-        student_id = get_document_id(student)
-        student_groups = []
-        final_value = 0
+    totals = {}
+    for student_id in {student_id for student_id, _ in values}:
+        projected_values = list(student_values[student_id].values())
+        moment_max_value = get_moment_max_value(moment, projected_values)
+        total = round(sum(to_float(value_document.get("value")) for value_document in projected_values), 2)
+        totals[student_id] = total
 
-        for group in groups:
-            moment_summaries = [
+        if moment_max_value and total > moment_max_value:
+            errors.append(
                 {
-                    "id": get_document_id(moment),
-                    "name": get_moment_name(moment),
-                    "totalValue": format_number(get_moment_max_value(moment, [])),
-                    "studentTotal": format_number(
-                        get_student_moment_total(
-                            enriched_values,
-                            student_id,
-                            get_document_id(moment),
-                        )
+                    "index": None,
+                    "studentId": student_id,
+                    "questionNumber": None,
+                    "message": (
+                        f"O total do aluno não pode ultrapassar {format_number(moment_max_value)}. "
+                        f"Total atual: {format_number(total)}."
                     ),
                 }
-                for moment in group["moments"]
-            ]
-            group_average = (
-                sum(moment["studentTotal"] for moment in moment_summaries) / len(moment_summaries)
-                if moment_summaries
-                else 0
             )
-            weighted_value = group_average * (to_float(group["weightPercentage"]) / 100)
-            final_value += weighted_value
-            student_groups.append(
-                {
-                    "type": group["type"],
-                    "weightPercentage": group["weightPercentage"],
-                    "moments": moment_summaries,
-                    "average": format_number(group_average),
-                    "weightedValue": format_number(weighted_value),
-                }
-            )
-
-        attitude_summaries = [
-            {
-                "id": template["id"],
-                "text": template["text"],
-                "alias": template["alias"],
-                "weightPercentage": template["weightPercentage"],
-                "value": format_number(get_student_attitude_value(student, template)),
-            }
-            for template in attitude_templates
-        ]
-        attitudes_weighted_value = sum(
-            attitude["value"] for attitude in attitude_summaries
-        ) * (total_attitude_weight_percentage / 100)
-        final_percentage = (final_value / final_max_value) * 100 if final_max_value else final_value
-        final_range = get_percentage_range(final_percentage, percentage_ranges)
-        student_summaries.append(
-            {
-                "studentId": student_id,
-                "studentName": get_student_name(student),
-                "groups": student_groups,
-                "attitudes": attitude_summaries,
-                "attitudesWeightPercentage": format_number(total_attitude_weight_percentage),
-                "attitudesWeightedValue": format_number(attitudes_weighted_value),
-                "finalValue": format_number(final_value),
-                "finalMaxValue": format_number(final_max_value),
-                "finalPercentage": round(final_percentage, 1),
-                "finalPercentageText": f"{final_percentage:.1f}%",
-                "finalGrade": final_range.get("nota", 0),
-                "finalBackgroundColor": final_range.get("backgroundColor"),
-                "finalTextColor": final_range.get("textColor"),
-            }
-        )
-
-    headers = [
-        "Aluno",
-        *[
-            header
-            for group in groups
-            for header in [
-                *[
-                    f"{get_moment_name(moment)} ({format_number(get_moment_max_value(moment, []))})"
-                    for moment in group["moments"]
-                ],
-                f"{group['type']} - Média",
-                f"{group['type']} - M*{format_number(group['weightPercentage'])}%",
-            ]
-        ],
-        *[
-            attitude["alias"]
-            for attitude in attitude_templates
-        ],
-        *(
-            [f"Atitudes - {format_number(total_attitude_weight_percentage)}%"]
-            if attitude_templates
-            else []
-        ),
-        "Final",
-        "Nota",
-    ]
-    rows = [
-        [
-            student_summary["studentName"],
-            *[
-                str(value)
-                for group in student_summary["groups"]
-                for value in [
-                    *[moment["studentTotal"] for moment in group["moments"]],
-                    group["average"],
-                    group["weightedValue"],
-                ]
-            ],
-            *[
-                str(attitude["value"])
-                for attitude in student_summary["attitudes"]
-            ],
-            *(
-                [str(student_summary["attitudesWeightedValue"])]
-                if student_summary["attitudes"]
-                else []
-            ),
-            str(student_summary["finalValue"]),
-            str(student_summary["finalGrade"]),
-        ]
-        for student_summary in student_summaries
-    ]
-
-    return {
-        **metadata,
-        "title": metadata.get("title") or f"Avaliações - {semester}.º semestre",
-        "tests": [
-            {
-                "id": get_document_id(moment),
-                "name": get_moment_name(moment),
-                "totalValue": format_number(get_moment_max_value(moment, [])),
-            }
-            for moment in semester_moments
-        ],
-        "groups": [
-            {
-                "type": group["type"],
-                "weightPercentage": group["weightPercentage"],
-                "moments": [
-                    {
-                        "id": get_document_id(moment),
-                        "name": get_moment_name(moment),
-                        "totalValue": format_number(get_moment_max_value(moment, [])),
-                    }
-                    for moment in group["moments"]
-                ],
-            }
-            for group in groups
-        ],
-        "attitudes": [
-            {
-                "id": template["id"],
-                "text": template["text"],
-                "alias": template["alias"],
-                "weightPercentage": template["weightPercentage"],
-            }
-            for template in attitude_templates
-        ],
-        "attitudesWeightPercentage": format_number(total_attitude_weight_percentage),
-        "headers": headers,
-        "rows": rows,
-        "students": student_summaries,
-    }
 
-
-def get_semester_evaluations_comparison_payload(document):
-    return {
-        "tests": document.get("tests") or [],
-        "groups": document.get("groups") or [],
-        "headers": document.get("headers") or [],
-        "rows": document.get("rows") or [],
-        "students": document.get("students") or [],
-    }
-
-
-async def find_moments_for_values(value_documents, query):
-    moment_query = {}
-
-    if query.get("userId"):
-        moment_query["userId"] = query.get("userId")
-    if query.get("classId"):
-        moment_query["classId"] = query.get("classId")
-
-    response = await api_client.find(
-        endpoint="find",
-        payload={"collection": MOMENTS_COLLECTION, "query": moment_query},
-    )
-    moments = response.get("documents") or []
-    moment_ids = {value_document.get("momentId") for value_document in value_documents}
-
-    return [
-        moment for moment in moments
-        if not moment_ids or get_document_id(moment) in moment_ids
-    ]
-
-
-async def get_normalized_app_settings():
-    response = await api_client.find(
-        endpoint="find",
-        payload={"collection": APP_SETTINGS_COLLECTION, "query": {"key": APP_SETTINGS_KEY}},
-    )
-    documents = response.get("documents") or []
-    settings = {**DEFAULT_APP_SETTINGS, **(documents[0] if documents else {})}
-    settings["evaluationMomentTemplates"] = normalize_evaluation_moment_templates(
-        settings.get("evaluationMomentTemplates"),
-    )
-    settings["attitudeTemplates"] = normalize_attitude_templates(settings.get("attitudeTemplates"))
-    settings["percentageRanges"] = normalize_percentage_ranges(settings.get("percentageRanges"))
-    return settings
+    return values, totals, errors
 
 
-async def find_enriched_moment_values(query):
-    response = await api_client.find(
-        endpoint="find",
-        payload={"collection": CLASS_MOMENTS_COLLECTION, "query": query},
+async def increment_student_moment_total(group_query, delta):
+    """
+    Add a value delta to the materialized total of a (moment, student) group, creating the
+    totals document when missing.
+
+    Returns:
+        float | None: The new total, or None when it could not be updated. In that case the
+        totals document is removed, so the next upsert rebuilds it from the values.
+    """
+    response = await api_client.update(
+        endpoint="increment",
+        payload={
+            "collection": STUDENT_MOMENT_TOTALS_COLLECTION,
+            "query": group_query,
+            "inc": {"total": delta},
+        },
     )
-    value_documents = response.get("documents") or []
-    if not value_documents:
-        return []
+    document = response.get("document")
+    if document:
+        return to_float(document.get("total"))
 
-    moments = await find_moments_for_values(value_documents, query)
-    settings = await get_normalized_app_settings()
-    return enrich_student_moment_values(value_documents, moments, settings["percentageRanges"])
+    await api_client.delete(
+        endpoint="delete",
+        payload={"collection": STUDENT_MOMENT_TOTALS_COLLECTION, "query": group_query},
+    )
+    return None
 
 
 async def get_semester_evaluations_summary(body):
@@ -955,64 +321,139 @@ async def get_semester_evaluations_summary(body):
 
     class_id = body.get("classId")
     user_id = body.get("userId")
-    class_query = {"userId": user_id, "classId": class_id}
-    students_response = await api_client.find(
-        endpoint="find",
-        payload={"collection": STUDENTS_COLLECTION, "query": class_query},
-    )
-    moments_response = await api_client.find(
-        endpoint="find",
-        payload={"collection": MOMENTS_COLLECTION, "query": class_query},
+    semester = str(body.get("semester"))
+    saved_query = {
+        "userId": user_id,
+        "schoolId": body.get("schoolId"),
+        "yearId": body.get("yearId"),
+        "classId": class_id,
+        "semester": semester,
+    }
+    results = await gather_named(
+        {
+            "materialized": lambda: semester_summary_store.find(user_id, class_id, semester),
+            "settings": app_settings_service.get,
+            "saved": lambda: api_client.find(
+                endpoint="find",
+                payload={"collection": SEMESTER_EVALUATIONS_COLLECTION, "query": saved_query},
+            ),
+        }
     )
-    values_response = await api_client.find(
-        endpoint="find",
-        payload={"collection": CLASS_MOMENTS_COLLECTION, "query": class_query},
+    settings = results["settings"]
+    content = semester_summary_store.get_fresh_content(results["materialized"], settings.content_hash)
+    if content is None:
+        content, error_response = await compute_semester_summary_content(
+            user_id,
+            class_id,
+            semester,
+            results["materialized"],
+            settings,
+        )
+        if error_response:
+            return None, error_response
+
+    saved_documents = results["saved"].get("documents") or []
+    summary = restore_class_semester_summary(
+        body,
+        class_id,
+        body.get("className"),
+        content,
+        saved_documents[0] if saved_documents else None,
     )
-    settings = await get_normalized_app_settings()
+
+    return summary, None
+
+
+def restore_class_semester_summary(body, class_id, class_name, content, saved_summary):
+    """
+    Return the semester summary of a class from its stored content, with the request metadata and
+    whether it differs from the saved semester evaluations.
+    """
     metadata = {
-        "userId": user_id,
+        "userId": body.get("userId"),
         "schoolId": body.get("schoolId"),
         "schoolName": body.get("schoolName"),
         "yearId": body.get("yearId"),
         "academicYearId": body.get("academicYearId") or body.get("yearId"),
         "academicYearName": body.get("academicYearName"),
         "classId": class_id,
-        "className": body.get("className"),
+        "className": class_name,
         "semester": str(body.get("semester")),
         "title": body.get("title"),
     }
-    summary = build_semester_evaluations_summary(
-        metadata,
-        students_response.get("documents") or [],
-        moments_response.get("documents") or [],
-        values_response.get("documents") or [],
-        settings,
-    )
-    saved_response = await api_client.find(
-        endpoint="find",
-        payload={
-            "collection": SEMESTER_EVALUATIONS_COLLECTION,
-            "query": {
-                "userId": user_id,
-                "schoolId": body.get("schoolId"),
-                "yearId": body.get("yearId"),
-                "classId": class_id,
-                "semester": str(body.get("semester")),
-            },
-        },
-    )
-    saved_documents = saved_response.get("documents") or []
-    saved_summary = saved_documents[0] if saved_documents else None
+    summary = restore_semester_evaluations_summary(metadata, content)
     summary["hasUnsavedChanges"] = (
         saved_summary is None
-        or get_semester_evaluations_comparison_payload(saved_summary)
-        != get_semester_evaluations_comparison_payload(summary)
+        or get_semester_evaluations_content_hash(saved_summary) != content["contentHash"]
     )
 
-    return summary, None
+    return summary
 
 
-async def get_moment_assessment_report_data(body):
+def get_failed_finds(results, keys):
+    """
+    Return the keys of the finds that failed. BDClient answers a failed call with {}, while a
+    successful find always has "documents" (maybe empty), so a failure is not read as no data.
+    """
+    return [key for key in keys if "documents" not in results[key]]
+
+
+async def compute_semester_summary_content(user_id, class_id, semester, materialized, settings):
+    """
+    Build the semester summary content from the class data and store it as the materialized
+    summary of the class semester.
+
+    Returns:
+        tuple: (content, None), or (None, JSONResponse) when the class data could not be read;
+        nothing is stored then.
+    """
+    revision = await semester_summary_store.get_revision(user_id, class_id, semester, materialized)
+    class_query = {"userId": user_id, "classId": class_id}
+    results = await gather_named(
+        {
+            "students": lambda: api_client.find(
+                endpoint="find",
+                payload={"collection": STUDENTS_COLLECTION, "query": class_query},
+            ),
+            "moments": lambda: api_client.find(
+                endpoint="find",
+                payload={"collection": MOMENTS_COLLECTION, "query": class_query},
+            ),
+            "values": lambda: api_client.find(
+                endpoint="find",
+                payload={"collection": CLASS_MOMENTS_COLLECTION, "query": class_query},
+            ),
+        }
+    )
+    failed_finds = get_failed_finds(results, ["students", "moments", "values"])
+    if failed_finds:
+        await utilities.add_log_to_db(
+            api_client=api_client,
+            source="school_tests_router",
+            method="compute_semester_summary_content",
+            message=f"Could not read {', '.join(failed_finds)} of class {class_id}",
+            error=True,
+        )
+        return None, JSONResponse(status_code=500, content={"message": "Erro ao ler os dados da turma."})
+
+    content = build_semester_summary_content(
+        semester,
+        results["students"]["documents"],
+        results["moments"]["documents"],
+        results["values"]["documents"],
+        settings,
+    )
+    await semester_summary_store.save(user_id, class_id, semester, revision, settings.content_hash, content)
+
+    return content, None
+
+
+async def get_moment_class_data(body):
+    """
+    Return ((moment, students, values, settings), None) for the moment of a request ("userId",
+    "classId" and "momentId"): the moment, the students of its class, its values and the compiled
+    settings. On error, (None, JSONResponse).
+    """
     required_fields = ["userId", "classId", "momentId"]
     missing_fields = [field for field in required_fields if body.get(field) in (None, "")]
 
@@ -1024,22 +465,38 @@ async def get_moment_assessment_report_data(body):
 
     class_query = {"userId": body.get("userId"), "classId": body.get("classId")}
     moment_id = str(body.get("momentId"))
-    students_response = await api_client.find(
-        endpoint="find",
-        payload={"collection": STUDENTS_COLLECTION, "query": class_query},
-    )
-    moments_response = await api_client.find(
-        endpoint="find",
-        payload={"collection": MOMENTS_COLLECTION, "query": class_query},
-    )
-    values_response = await api_client.find(
-        endpoint="find",
-        payload={
-            "collection": CLASS_MOMENTS_COLLECTION,
-            "query": {**class_query, "momentId": body.get("momentId")},
-        },
+    results = await gather_named(
+        {
+            "students": lambda: api_client.find(
+                endpoint="find",
+                payload={"collection": STUDENTS_COLLECTION, "query": class_query},
+            ),
+            "moments": lambda: api_client.find(
+                endpoint="find",
+                payload={"collection": MOMENTS_COLLECTION, "query": class_query},
+            ),
+            "values": lambda: api_client.find(
+                endpoint="find",
+                payload={
+                    "collection": CLASS_MOMENTS_COLLECTION,
+                    "query": {**class_query, "momentId": body.get("momentId")},
+                },
+            ),
+            "settings": app_settings_service.get,
+        }
     )
-    moments = moments_response.get("documents") or []
+    failed_finds = get_failed_finds(results, ["students", "moments", "values"])
+    if failed_finds:
+        await utilities.add_log_to_db(
+            api_client=api_client,
+            source="school_tests_router",
+            method="get_moment_class_data",
+            message=f"Could not read {', '.join(failed_finds)} of class {body.get('classId')}",
+            error=True,
+        )
+        return None, JSONResponse(status_code=500, content={"message": "Erro ao ler os dados da turma."})
+
+    moments = results["moments"]["documents"]
     moment = next(
         (
             moment
@@ -1055,78 +512,149 @@ async def get_moment_assessment_report_data(body):
             content={"message": "Momento de avaliação não encontrado."},
         )
 
-    settings = await get_normalized_app_settings()
-    values = values_response.get("documents") or []
-    enriched_values = enrich_student_moment_values(values, [moment], settings["percentageRanges"])
-    questions = [
-        question
-        for question in moment.get("questions", [])
-        if isinstance(question, dict)
-    ]
-    active_students = [
-        student
-        for student in (students_response.get("documents") or [])
-        if student.get("active") is not False
-    ]
-    headers = [
-        "Aluno",
-        *[
-            f"Q{question.get('number') or question.get('questionNumber')} ({format_number(to_float(question.get('value')))})"
-            for question in questions
-        ],
-        "Total",
-        "%",
-        "Nota",
-    ]
-    rows = []
+    return (
+        moment,
+        results["students"]["documents"],
+        results["values"]["documents"],
+        results["settings"],
+    ), None
 
-    for student in active_students:
-        student_id = get_document_id(student)
-        student_values = [
-            next(
-                (
-                    value_document
-                    for value_document in values
-                    if str(value_document.get("studentId")) == str(student_id)
-                    and str(value_document.get("questionNumber"))
-                    == str(question.get("number") or question.get("questionNumber"))
-                ),
-                {},
-            )
-            for question in questions
-        ]
-        matching_enriched_value = next(
-            (
-                value_document
-                for value_document in enriched_values
-                if str(value_document.get("studentId")) == str(student_id)
-            ),
-            {},
-        )
-        rows.append(
-            [
-                get_student_name(student),
-                *[str(value_document.get("value", 0)) for value_document in student_values],
-                str(format_number(to_float(matching_enriched_value.get("studentMomentTotal")))),
-                matching_enriched_value.get("studentMomentPercentageText", "0.0%"),
-                str(matching_enriched_value.get("studentMomentGrade", 0)),
-            ]
-        )
+
+async def get_moment_assessment_report_data(body):
+    moment_data, error_response = await get_moment_class_data(body)
+    if error_response:
+        return None, error_response
+
+    moment, students, values, settings = moment_data
+    report = build_moment_assessment_report(moment, students, values, settings.percentage_scale)
 
     return {
         "title": body.get("title") or get_moment_name(moment),
-        "headers": headers,
-        "rows": rows,
+        **report,
     }, None
 
 
+async def run_report_job(body):
+    """
+    Build a report for a background job and return (url, message).
+    """
+    response = await build_report(body)
+    content = json.loads(response.body)
+    if response.status_code == 201:
+        return content["url"], None
+
+    return None, content.get("message")
+
+
+async def get_report_table(body):
+    """
+    Return ((title, headers, rows), None) of a report request: explicit title/headers/rows, or the
+    data of a "moment-assessment" or "semester-evaluations" report. On error, (None, JSONResponse).
+    """
+    if body.get("reportType") == "moment-assessment":
+        report_data, error_response = await get_moment_assessment_report_data(body)
+        if error_response:
+            return None, error_response
+        body = report_data
+    elif body.get("reportType") == "semester-evaluations":
+        summary, error_response = await get_semester_evaluations_summary(body)
+        if error_response:
+            return None, error_response
+        body = {
+            "title": summary["title"],
+            "headers": summary["headers"],
+            "rows": summary["rows"],
+        }
+
+    title = body.get("title")
+    headers = body.get("headers")
+    rows = body.get("rows")
+
+    if not title or not headers or not rows:
+        return None, JSONResponse(
+            status_code=400,
+            content={"message": "Os campos 'title', 'headers' e 'rows' são obrigatórios."},
+        )
+
+    return (title, headers, rows), None
+
+
+def build_pdf_response(data: bytes, filename: str):
+    """
+    Stream a PDF held in memory.
+    """
+    def iterate_chunks():
+        view = memoryview(data)
+        for start in range(0, len(view), REPORT_STREAM_CHUNK_SIZE):
+            yield bytes(view[start:start + REPORT_STREAM_CHUNK_SIZE])
+
+    return StreamingResponse(
+        iterate_chunks(),
+        media_type="application/pdf",
+        headers={
+            "Content-Disposition": f'inline; filename="{filename}"',
+            "Content-Length": str(len(data)),
+        },
+    )
+
+
+async def build_report(body):
+    """
+    Build the PDF of a report request (see get_report_table). "renderMode" ("fast" or "standard")
+    overrides REPORT_RENDER_MODE.
+
+    With "delivery": "stream" the PDF is rendered in memory and returned in the response itself;
+    otherwise it is stored (REPORTS_DIR or the GridFS report_store) and its download URL returned.
+    """
+    render_mode = body.get("renderMode") if body.get("renderMode") in REPORT_RENDER_MODES else REPORT_RENDER_MODE
+    stream = body.get("delivery") == "stream"
+
+    report_table, error_response = await get_report_table(body)
+    if error_response:
+        return error_response
+    title, headers, rows = report_table
+
+    pdf_path = report_cache.get_path(title, get_report_key(title, headers, rows, render_mode))
+    try:
+        if stream:
+            if report_cache.get(pdf_path) is not None:
+                return FileResponse(
+                    path=str(pdf_path),
+                    media_type="application/pdf",
+                    headers={"Content-Disposition": f'inline; filename="{pdf_path.name}"'},
+                )
+            # Nothing is written to disk: the PDF goes from the worker to the response
+            data = await report_workers.run(render_report_bytes, str(title), headers, rows, render_mode)
+            return build_pdf_response(data, pdf_path.name)
+
+        if report_store is not None:
+            if not await report_store.exists(pdf_path.name):
+                data = await report_workers.run(render_report_bytes, str(title), headers, rows, render_mode)
+                if not await report_store.put(pdf_path.name, data):
+                    return JSONResponse(status_code=500, content={"message": "Não foi possível guardar o relatório."})
+        elif report_cache.get(pdf_path) is None:
+            await report_workers.run(render_report_pdf, str(title), headers, rows, str(pdf_path), render_mode)
+            report_cache.add(pdf_path)
+    except WorkerPoolFull:
+        return JSONResponse(
+            status_code=503,
+            content={"message": "Existem demasiados relatórios em preparação. Tenta novamente dentro de momentos."},
+        )
+
+    return JSONResponse(
+        content={
+            "path": pdf_path.name if report_store is not None else str(pdf_path),
+            "url": f"/config/moment-assessment-report/{pdf_path.name}",
+        },
+        status_code=201,
+    )
+
+
 @school_tests_router.get("/app-settings")
 async def get_app_settings(_: None = Depends(utilities.verificar_token_cookie)):
-    payload = {"collection": APP_SETTINGS_COLLECTION, "query": {"key": APP_SETTINGS_KEY}}
-    response = await api_client.find(endpoint="find", payload=payload)
-    documents = response.get("documents") or []
+    settings = await app_settings_service.get()
 
-    if not documents:
+    if not app_settings_service.stored:
         created = await api_client.insert(
             endpoint="insert",
             payload={"collection": APP_SETTINGS_COLLECTION, "data": DEFAULT_APP_SETTINGS},
@@ -1136,55 +664,9 @@ async def get_app_settings(_: None = Depends(utilities.verificar_token_cookie)):
                 status_code=500,
                 content={"message": "Erro ao criar configurações da aplicação."},
             )
-        return JSONResponse(content=DEFAULT_APP_SETTINGS, status_code=200)
+        settings = app_settings_service.replace(settings.settings, stored=True)
 
-    settings = {**DEFAULT_APP_SETTINGS, **documents[0]}
-    settings["inactiveLogoutMinutes"] = normalize_inactive_logout_minutes(
-        settings.get("inactiveLogoutMinutes"),
-    )
-    settings["messageTimeoutSeconds"] = normalize_message_timeout_seconds(
-        settings.get("messageTimeoutSeconds"),
-    )
-    settings["popupBackgroundColor"] = normalize_hex_color(
-        settings.get("popupBackgroundColor"),
-        DEFAULT_APP_SETTINGS["popupBackgroundColor"],
-    )
-    settings["popupTextColor"] = normalize_hex_color(
-        settings.get("popupTextColor"),
-        DEFAULT_APP_SETTINGS["popupTextColor"],
-    )
-    settings["errorPopupBackgroundColor"] = normalize_hex_color(
-        settings.get("errorPopupBackgroundColor"),
-        DEFAULT_APP_SETTINGS["errorPopupBackgroundColor"],
-    )
-    settings["errorPopupTextColor"] = normalize_hex_color(
-        settings.get("errorPopupTextColor"),
-        DEFAULT_APP_SETTINGS["errorPopupTextColor"],
-    )
-    settings["evaluationMomentTemplates"] = normalize_evaluation_moment_templates(
-        settings.get("evaluationMomentTemplates"),
-    )
-    settings["attitudeTemplates"] = normalize_attitude_templates(settings.get("attitudeTemplates"))
-    settings["percentageRanges"] = normalize_percentage_ranges(settings.get("percentageRanges"))
-    if (
-        documents[0].get("messageTimeoutSeconds") != settings["messageTimeoutSeconds"]
-        or documents[0].get("popupBackgroundColor") != settings["popupBackgroundColor"]
-        or documents[0].get("popupTextColor") != settings["popupTextColor"]
-        or documents[0].get("errorPopupBackgroundColor") != settings["errorPopupBackgroundColor"]
-        or documents[0].get("errorPopupTextColor") != settings["errorPopupTextColor"]
-        or documents[0].get("evaluationMomentTemplates") != settings["evaluationMomentTemplates"]
-        or documents[0].get("attitudeTemplates") != settings["attitudeTemplates"]
-        or documents[0].get("percentageRanges") != settings["percentageRanges"]
-    ):
-        await api_client.update(
-            endpoint="update",
-            payload={
-                "collection": APP_SETTINGS_COLLECTION,
-                "query": {"key": APP_SETTINGS_KEY},
-                "data": settings,
-            },
-        )
-    return JSONResponse(content=settings, status_code=200)
+    return JSONResponse(content=settings.settings, status_code=200)
 
 
 @school_tests_router.put("/app-settings")
@@ -1237,6 +719,8 @@ async def update_app_settings(request: Request, _: None = Depends(utilities.veri
                 content={"message": "Erro ao atualizar configurações da aplicação."},
             )
 
+    # Serve the saved settings right away; other instances pick them up on their next refresh
+    app_settings_service.replace(data, stored=True)
     return JSONResponse(content=data, status_code=200)
 
 # curl -X POST http://127.0.0.1:8020/config/addtest -H "Content-Type: application/json" -d "{\"userid\": \"67e32c8bf97d9bb2e993e50d\", \"name\": \"teste 1\", \"questions\": [{\"question\":\"1\", \"value\": \"12\"}, {\"question\":\"2\", \"value\": \"10\"}]}"
@@ -1298,6 +782,7 @@ async def create_evoluation_moments(request: Request,  _: None = Depends(utiliti
             status_code=404,
             content={"message": f"Error creating create_evoluation_moments {body}"},
         )
+    await semester_summary_store.mark_document_dirty(body)
 
     return JSONResponse(
         content={"message": "Create_evoluation_moments added successfully", "id": created_id},
@@ -1340,67 +825,355 @@ async def update_evoluation_moments(request: Request,  _: None = Depends(utiliti
     updated_moment = response.get("modified_count")
     if not updated_moment:
         return JSONResponse(status_code=404, content={"message": "Momento de avaliação não encontrado."})
+    await semester_summary_store.mark_document_dirty(updated_moment)
 
     return JSONResponse(content=updated_moment, status_code=200)
 
 
-@school_tests_router.delete("/deleteevaluationmoments")
-async def delete_evoluation_moments(request: Request,  _: None = Depends(utilities.verificar_token_cookie)):
-    body = await request.json()
-    moment_id = body.get("id")
+@school_tests_router.delete("/deleteevaluationmoments")
+async def delete_evoluation_moments(request: Request,  _: None = Depends(utilities.verificar_token_cookie)):
+    body = await request.json()
+    moment_id = body.get("id")
+
+    if not moment_id:
+        return JSONResponse(
+            status_code=400,
+            content={"message": "O campo 'id' é obrigatório."},
+        )
+
+    # Read the moment first to know which class summaries it affects
+    existing = await api_client.find_by_id(
+        endpoint="findbyid",
+        payload={"collection": MOMENTS_COLLECTION, "id": moment_id},
+    )
+    response = await api_client.delete(
+        endpoint="delete",
+        payload={"collection": MOMENTS_COLLECTION, "id": moment_id},
+    )
+
+    deleted_count = response.get("deleted_count", 0)
+    if not deleted_count:
+        return JSONResponse(status_code=404, content={"message": "Momento de avaliação não encontrado."})
+
+    for moment in existing.get("documents") or []:
+        await semester_summary_store.mark_document_dirty(moment)
+
+    return JSONResponse(content=deleted_count, status_code=200)
+
+# curl -X POST http://127.0.0.1:8020/config/addclassmoments -H "Content-Type: application/json" -d "{\"user\":\"user\", \"classid\":\"67e32c8bf97d9bb2e993e50d\",\"momentid\":\"67e34a1bf97d9bb2e993e52a\",\"students\":[{\"moments\":[{\"id\":\"1\",\"name\":\"name 1\",\"percentage\":12,\"studentid\":\"1\",\"testid\":\"67e342b8f97d9bb2e993e524\",\"studentvalue\":\"\"},{\"id\":\"2\",\"name\":\"name 2\",\"percentage\":30,\"studentid\":\"2\",\"testid\":\"67e342b8f97d9bb2e993e524\",\"studentvalue\":\"\"},{\"id\":\"3\",\"name\":\"name 3\",\"percentage\":40,\"studentid\":\"3\",\"testid\":\"67e342b8f97d9bb2e993e524\",\"studentvalue\":\"\"}]},{\"moments\":[{\"id\":\"1\",\"name\":\"name 1\",\"percentage\":12,\"testid\":\"\",\"studentid\":\"1\",\"studentvalue\":\"\"},{\"id\":\"2\",\"name\":\"name 2\",\"percentage\":30,\"testid\":\"\",\"studentid\":\"2\",\"studentvalue\":\"\"},{\"id\":\"3\",\"name\":\"name 3\",\"percentage\":40,\"testid\":\"\",\"studentid\":\"3\",\"studentvalue\":\"\"}]},{\"moments\":[{\"id\":\"1\",\"name\":\"name 1\",\"percentage\":12,\"testid\":\"\",\"studentid\":\"1\",\"studentvalue\":\"\"},{\"id\":\"2\",\"name\":\"name 2\",\"percentage\":30,\"testid\":\"\",\"studentid\":\"2\",\"studentvalue\":\"\"},{\"id\":\"3\",\"name\":\"name 3\",\"percentage\":40,\"testid\":\"\",\"studentid\":\"3\",\"studentvalue\":\"\"}]}]}"
+@school_tests_router.post("/addmomentsclass")
+async def add_moments_class(request: Request,  _: None = Depends(utilities.verificar_token_cookie)):
+    response = await utilities.add_document(api_client=api_client, request=request, collection=CLASS_MOMENTS_COLLECTION, source="school_tests_router", method="add_moments_class")
+    if response.status_code == 201:
+        body = await request.json()
+        await semester_summary_store.mark_document_dirty(body)
+        if body.get("momentId") and body.get("studentId"):
+            # The value was not counted in the stored student total: let the next upsert rebuild it
+            await api_client.delete(
+                endpoint="delete",
+                payload={
+                    "collection": STUDENT_MOMENT_TOTALS_COLLECTION,
+                    "query": {
+                        field: body.get(field)
+                        for field in ["userId", "schoolId", "yearId", "classId", "momentId", "studentId"]
+                    },
+                },
+            )
+
+    return response
+
+# curl -X GET http://127.0.0.1:8020/config/findmomentsclass -H "Content-Type: application/json" -d "{\"user\":\"user\", \"classid\":\"67e32c8bf97d9bb2e993e50d\",\"momentid\":\"67e34a1bf97d9bb2e993e52a\"}"
+@school_tests_router.get("/findmomentsclass")
+@school_tests_router.post("/findmomentsclass")
+async def find_moments_class(request: Request,  _: None = Depends(utilities.verificar_token_cookie)):
+    try:
+        try:
+            query = await request.json()
+        except Exception:
+            query = {}
+
+        return JSONResponse(content=await find_enriched_moment_values(query), status_code=200)
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        await utilities.add_log_to_db(
+            api_client=api_client,
+            source="school_tests_router",
+            method="find_moments_class",
+            message=f"Get find_moments_class error: {e}",
+            error=True,
+        )
+        return JSONResponse(status_code=500, content={"message": f"Get find_moments_class error: {e}"})
+
+
+@school_tests_router.post("/semester-evaluations-summary")
+async def semester_evaluations_summary(request: Request, _: None = Depends(utilities.verificar_token_cookie)):
+    body = await request.json()
+    summary, error_response = await get_semester_evaluations_summary(body)
+    if error_response:
+        return error_response
+
+    return JSONResponse(content=summary, status_code=200)
+
+
+@school_tests_router.post("/semester-evaluations-simulation")
+async def semester_evaluations_simulation(request: Request, _: None = Depends(utilities.verificar_token_cookie)):
+    """
+    What-if semester grades of a class: the final values, percentages and grades of its students
+    with the current settings and with each scenario of candidate "evaluationMomentTemplates",
+    "attitudeTemplates" and "percentageRanges", with the per-student deltas (see
+    SemesterSimulation). The class data is loaded once for all the scenarios and nothing is saved.
+    """
+    body = await request.json()
+    required_fields = ["userId", "classId", "semester"]
+    missing_fields = [field for field in required_fields if body.get(field) in (None, "")]
+
+    if missing_fields:
+        return JSONResponse(
+            status_code=400,
+            content={"message": f"Campos obrigatórios em falta: {', '.join(missing_fields)}."},
+        )
+
+    scenarios = body.get("scenarios")
+    if not isinstance(scenarios, list) or not scenarios or not all(isinstance(scenario, dict) for scenario in scenarios):
+        return JSONResponse(status_code=400, content={"message": "Indique pelo menos um cenário."})
+
+    if len(scenarios) > SIMULATION_MAX_SCENARIOS:
+        return JSONResponse(
+            status_code=400,
+            content={"message": f"Só é possível simular até {SIMULATION_MAX_SCENARIOS} cenários de cada vez."},
+        )
+
+    class_query = {"userId": body.get("userId"), "classId": body.get("classId")}
+    results = await gather_named(
+        {
+            "students": lambda: api_client.find(
+                endpoint="find",
+                payload={"collection": STUDENTS_COLLECTION, "query": class_query},
+            ),
+            "moments": lambda: api_client.find(
+                endpoint="find",
+                payload={"collection": MOMENTS_COLLECTION, "query": class_query},
+            ),
+            "values": lambda: api_client.find(
+                endpoint="find",
+                payload={"collection": CLASS_MOMENTS_COLLECTION, "query": class_query},
+            ),
+            "settings": app_settings_service.get,
+        }
+    )
+    failed_finds = get_failed_finds(results, ["students", "moments", "values"])
+    if failed_finds:
+        await utilities.add_log_to_db(
+            api_client=api_client,
+            source="school_tests_router",
+            method="semester_evaluations_simulation",
+            message=f"Could not read {', '.join(failed_finds)} of class {body.get('classId')}",
+            error=True,
+        )
+        return JSONResponse(status_code=500, content={"message": "Erro ao ler os dados da turma."})
+
+    simulation = SemesterSimulation(
+        body.get("semester"),
+        results["students"]["documents"],
+        results["moments"]["documents"],
+        results["values"]["documents"],
+    )
+
+    return JSONResponse(
+        content={
+            "classId": body.get("classId"),
+            "semester": str(body.get("semester")),
+            **simulation.simulate(results["settings"], scenarios),
+        },
+        status_code=200,
+    )
+
+
+async def get_year_classes(body):
+    """
+    Return (classes, None) with the classes of the year of a request ("userId", "schoolId",
+    "yearId" and "semester"), or (None, JSONResponse) on error.
+    """
+    required_fields = ["userId", "schoolId", "yearId", "semester"]
+    missing_fields = [field for field in required_fields if body.get(field) in (None, "")]
 
-    if not moment_id:
-        return JSONResponse(
+    if missing_fields:
+        return None, JSONResponse(
             status_code=400,
-            content={"message": "O campo 'id' é obrigatório."},
+            content={"message": f"Campos obrigatórios em falta: {', '.join(missing_fields)}."},
         )
 
-    response = await api_client.delete(
-        endpoint="delete",
-        payload={"collection": MOMENTS_COLLECTION, "id": moment_id},
+    classes_response = await api_client.find(
+        endpoint="find",
+        payload={
+            "collection": CLASSES_COLLECTION,
+            "query": {"userId": body.get("userId"), "schoolId": body.get("schoolId"), "yearId": body.get("yearId")},
+        },
     )
+    classes = [
+        school_class
+        for school_class in classes_response.get("documents") or []
+        if get_document_id(school_class)
+    ]
 
-    deleted_count = response.get("deleted_count", 0)
-    if not deleted_count:
-        return JSONResponse(status_code=404, content={"message": "Momento de avaliação não encontrado."})
+    if not classes:
+        return None, JSONResponse(
+            status_code=404,
+            content={"message": "Não foram encontradas turmas para o ano letivo."},
+        )
 
-    return JSONResponse(content=deleted_count, status_code=200)
+    return classes, None
 
-# curl -X POST http://127.0.0.1:8020/config/addclassmoments -H "Content-Type: application/json" -d "{\"user\":\"user\", \"classid\":\"67e32c8bf97d9bb2e993e50d\",\"momentid\":\"67e34a1bf97d9bb2e993e52a\",\"students\":[{\"moments\":[{\"id\":\"1\",\"name\":\"name 1\",\"percentage\":12,\"studentid\":\"1\",\"testid\":\"67e342b8f97d9bb2e993e524\",\"studentvalue\":\"\"},{\"id\":\"2\",\"name\":\"name 2\",\"percentage\":30,\"studentid\":\"2\",\"testid\":\"67e342b8f97d9bb2e993e524\",\"studentvalue\":\"\"},{\"id\":\"3\",\"name\":\"name 3\",\"percentage\":40,\"studentid\":\"3\",\"testid\":\"67e342b8f97d9bb2e993e524\",\"studentvalue\":\"\"}]},{\"moments\":[{\"id\":\"1\",\"name\":\"name 1\",\"percentage\":12,\"testid\":\"\",\"studentid\":\"1\",\"studentvalue\":\"\"},{\"id\":\"2\",\"name\":\"name 2\",\"percentage\":30,\"testid\":\"\",\"studentid\":\"2\",\"studentvalue\":\"\"},{\"id\":\"3\",\"name\":\"name 3\",\"percentage\":40,\"testid\":\"\",\"studentid\":\"3\",\"studentvalue\":\"\"}]},{\"moments\":[{\"id\":\"1\",\"name\":\"name 1\",\"percentage\":12,\"testid\":\"\",\"studentid\":\"1\",\"studentvalue\":\"\"},{\"id\":\"2\",\"name\":\"name 2\",\"percentage\":30,\"testid\":\"\",\"studentid\":\"2\",\"studentvalue\":\"\"},{\"id\":\"3\",\"name\":\"name 3\",\"percentage\":40,\"testid\":\"\",\"studentid\":\"3\",\"studentvalue\":\"\"}]}]}"
-@school_tests_router.post("/addmomentsclass")
-async def add_moments_class(request: Request,  _: None = Depends(utilities.verificar_token_cookie)):
-    return await utilities.add_document(api_client=api_client, request=request, collection=CLASS_MOMENTS_COLLECTION, source="school_tests_router", method="add_moments_class")
 
-# curl -X GET http://127.0.0.1:8020/config/findmomentsclass -H "Content-Type: application/json" -d "{\"user\":\"user\", \"classid\":\"67e32c8bf97d9bb2e993e50d\",\"momentid\":\"67e34a1bf97d9bb2e993e52a\"}"
-@school_tests_router.get("/findmomentsclass")
-@school_tests_router.post("/findmomentsclass")
-async def find_moments_class(request: Request,  _: None = Depends(utilities.verificar_token_cookie)):
-    try:
-        try:
-            query = await request.json()
-        except Exception:
-            query = {}
+async def get_year_semester_summaries(body, classes):
+    """
+    Build the semester summaries of the classes of a year (see get_year_classes).
 
-        return JSONResponse(content=await find_enriched_moment_values(query), status_code=200)
-    except Exception as e:
-        await utilities.add_log_to_db(
-            api_client=api_client,
-            source="school_tests_router",
-            method="find_moments_class",
-            message=f"Get find_moments_class error: {e}",
-            error=True,
+    Returns:
+        AsyncIterator: {"classId", "className", "summary"} (or {"classId", "className", "message"}
+        when the class failed) in the order the classes are ready.
+    """
+    user_id = body.get("userId")
+    semester = str(body.get("semester"))
+    class_ids = [str(get_document_id(school_class)) for school_class in classes]
+    results = await gather_named(
+        {
+            "materialized": lambda: semester_summary_store.find_many(user_id, class_ids, semester),
+            "settings": app_settings_service.get,
+            "saved": lambda: api_client.find(
+                endpoint="find",
+                payload={
+                    "collection": SEMESTER_EVALUATIONS_COLLECTION,
+                    "query": {
+                        "userId": user_id,
+                        "schoolId": body.get("schoolId"),
+                        "yearId": body.get("yearId"),
+                        "classId": {"$in": class_ids},
+                        "semester": semester,
+                    },
+                },
+            ),
+        }
+    )
+    settings = results["settings"]
+    materialized = results["materialized"]
+    saved_summaries = {}
+    for saved_summary in results["saved"].get("documents") or []:
+        saved_summaries.setdefault(str(saved_summary.get("classId")), saved_summary)
+
+    contents = {
+        class_id: semester_summary_store.get_fresh_content(materialized.get(class_id), settings.content_hash)
+        for class_id in class_ids
+    }
+    dirty_class_ids = [class_id for class_id, content in contents.items() if content is None]
+    class_data = {}
+    revisions = {}
+    failed_finds = []
+
+    if dirty_class_ids:
+        # Revisions first, so changes made while the summaries are built keep them dirty
+        revisions = await gather_named(
+            {
+                class_id: (
+                    lambda class_id=class_id: semester_summary_store.get_revision(
+                        user_id, class_id, semester, materialized.get(class_id),
+                    )
+                )
+                for class_id in dirty_class_ids
+            }
         )
-        return JSONResponse(status_code=500, content={"message": f"Get find_moments_class error: {e}"})
+        dirty_query = {"userId": user_id, "classId": {"$in": dirty_class_ids}}
+        responses = await gather_named(
+            {
+                key: (
+                    lambda collection=collection: api_client.find(
+                        endpoint="find",
+                        payload={"collection": collection, "query": dirty_query},
+                    )
+                )
+                for key, collection in [
+                    ("students", STUDENTS_COLLECTION),
+                    ("moments", MOMENTS_COLLECTION),
+                    ("values", CLASS_MOMENTS_COLLECTION),
+                ]
+            }
+        )
+        failed_finds = get_failed_finds(responses, ["students", "moments", "values"])
+        class_data = {class_id: {"students": [], "moments": [], "values": []} for class_id in dirty_class_ids}
+        for key, response in responses.items():
+            for document in response.get("documents") or []:
+                documents = class_data.get(str(document.get("classId")))
+                if documents is not None:
+                    documents[key].append(document)
+
+    async def build_class_summary(school_class):
+        class_id = str(get_document_id(school_class))
+        class_name = get_string_value(school_class.get("name")) or None
+        try:
+            content = contents[class_id]
+            if content is None:
+                if failed_finds:
+                    # Never build (and store) a summary from data that could not be read
+                    raise RuntimeError(f"Could not read {', '.join(failed_finds)} of the classes")
+
+                data = class_data[class_id]
+                content = await summary_workers.run(
+                    build_semester_summary_content,
+                    semester,
+                    data["students"],
+                    data["moments"],
+                    data["values"],
+                    settings.settings,
+                )
+                await semester_summary_store.save(
+                    user_id, class_id, semester, revisions.get(class_id), settings.content_hash, content,
+                )
 
+            summary = restore_class_semester_summary(
+                body, class_id, class_name, content, saved_summaries.get(class_id),
+            )
+            return {"classId": class_id, "className": class_name, "summary": summary}
+        except Exception as e:
+            await utilities.add_log_to_db(
+                api_client=api_client,
+                source="school_tests_router",
+                method="year_semester_evaluations_summary",
+                message=f"Get year_semester_evaluations_summary error for class {class_id}: {e}",
+                error=True,
+            )
+            return {"classId": class_id, "className": class_name, "message": "Erro ao calcular o resumo da turma."}
 
-@school_tests_router.post("/semester-evaluations-summary")
-async def semester_evaluations_summary(request: Request, _: None = Depends(utilities.verificar_token_cookie)):
+    async def iterate_summaries():
+        tasks = [asyncio.ensure_future(build_class_summary(school_class)) for school_class in classes]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    return iterate_summaries()
+
+
+@school_tests_router.post("/year-semester-evaluations-summary")
+async def year_semester_evaluations_summary(request: Request, _: None = Depends(utilities.verificar_token_cookie)):
+    """
+    Semester summaries of every class of a year, streamed as NDJSON: one line per class, in the
+    order they are ready, with {"classId", "className", "summary"} or {"classId", "className",
+    "message"} when the class failed.
+    """
     body = await request.json()
-    summary, error_response = await get_semester_evaluations_summary(body)
+    classes, error_response = await get_year_classes(body)
     if error_response:
         return error_response
+    summaries = await get_year_semester_summaries(body, classes)
 
-    return JSONResponse(content=summary, status_code=200)
+    async def stream_summaries():
+        async for summary in summaries:
+            yield json.dumps(summary, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(stream_summaries(), media_type="application/x-ndjson")
 
 
 @school_tests_router.put("/addstudentscalendar")
@@ -1429,15 +1202,7 @@ async def find_student_calendar_tasks(request: Request, _: None = Depends(utilit
 @school_tests_router.put("/upsertmomentvalue")
 async def upsert_moment_value(request: Request,  _: None = Depends(utilities.verificar_token_cookie)):
     body = await request.json()
-    required_fields = [
-        "userId",
-        "schoolId",
-        "yearId",
-        "classId",
-        "momentId",
-        "studentId",
-        "questionNumber",
-    ]
+    required_fields = MOMENT_VALUE_GROUP_FIELDS + ["studentId", "questionNumber"]
     missing_fields = [field for field in required_fields if body.get(field) in (None, "")]
 
     if missing_fields:
@@ -1454,8 +1219,27 @@ async def upsert_moment_value(request: Request,  _: None = Depends(utilities.ver
         )
 
     query = {field: body.get(field) for field in required_fields}
-    group_query = {field: body.get(field) for field in required_fields if field != "questionNumber"}
-    moment = await find_moment_for_value(body)
+    group_query = {field: body.get(field) for field in MOMENT_VALUE_GROUP_FIELDS + ["studentId"]}
+    results = await gather_named(
+        {
+            "moment": lambda: find_moment_for_value(body),
+            "cell": lambda: api_client.find(
+                endpoint="find",
+                payload={"collection": CLASS_MOMENTS_COLLECTION, "query": query},
+            ),
+            "totals": lambda: api_client.find(
+                endpoint="find",
+                payload={"collection": STUDENT_MOMENT_TOTALS_COLLECTION, "query": group_query},
+            ),
+            "settings": app_settings_service.get,
+        }
+    )
+    if get_failed_finds(results, ["cell", "totals"]):
+        # The total is moved by this cell's delta: a failed read must not be taken for a missing
+        # value or total, or the stored total would drift
+        return JSONResponse(status_code=500, content={"message": "Erro ao ler os valores do aluno."})
+
+    moment = results["moment"]
     question_value = get_question_max_value(
         moment,
         body.get("questionNumber"),
@@ -1473,28 +1257,28 @@ async def upsert_moment_value(request: Request,  _: None = Depends(utilities.ver
             },
         )
 
-    data = {
-        **query,
-        "schoolName": body.get("schoolName"),
-        "academicYearId": body.get("academicYearId") or body.get("yearId"),
-        "academicYearName": body.get("academicYearName"),
-        "className": body.get("className"),
-        "name": body.get("name") or body.get("momentName"),
-        "momentName": body.get("momentName"),
-        "studentUniqueId": body.get("studentUniqueId"),
-        "studentName": body.get("studentName"),
-        "questionValue": format_number(question_value),
-        "value": format_number(numeric_value),
-    }
+    data = build_moment_value_data(body, query, question_value, numeric_value)
 
-    existing_group_response = await api_client.find(
-        endpoint="find",
-        payload={"collection": CLASS_MOMENTS_COLLECTION, "query": group_query},
-    )
-    existing_group_values = existing_group_response.get("documents") or []
-    projected_values = build_projected_student_moment_values(existing_group_values, data)
-    moment_max_value = get_moment_max_value(moment, projected_values)
-    projected_total = sum(to_float(value_document.get("value")) for value_document in projected_values)
+    existing_values = results["cell"]["documents"]
+    previous_value = to_float(existing_values[0].get("value")) if existing_values else 0
+    totals_documents = results["totals"]["documents"]
+    stored_total = to_float(totals_documents[0].get("total")) if totals_documents else 0
+    moment_max_value = get_moment_max_value(moment, [])
+
+    if totals_documents and moment_max_value:
+        # The stored total only changes by this cell's delta
+        projected_total = round(stored_total - previous_value + to_float(data["value"]), 2)
+    else:
+        # No stored total yet (or the maximum comes from the values): read the group once
+        existing_group_response = await api_client.find(
+            endpoint="find",
+            payload={"collection": CLASS_MOMENTS_COLLECTION, "query": group_query},
+        )
+        if "documents" not in existing_group_response:
+            return JSONResponse(status_code=500, content={"message": "Erro ao ler os valores do aluno."})
+        projected_values = build_projected_student_moment_values(existing_group_response["documents"], data)
+        moment_max_value = get_moment_max_value(moment, projected_values)
+        projected_total = sum(to_float(value_document.get("value")) for value_document in projected_values)
 
     if moment_max_value and projected_total > moment_max_value:
         return JSONResponse(
@@ -1511,13 +1295,12 @@ async def upsert_moment_value(request: Request,  _: None = Depends(utilities.ver
         endpoint="update",
         payload={"collection": CLASS_MOMENTS_COLLECTION, "query": query, "data": data},
     )
+    written_value = response.get("modified_count")
+    status_code = 200
 
-    if not response.get("modified_count"):
-        existing = await api_client.find(
-            endpoint="find",
-            payload={"collection": CLASS_MOMENTS_COLLECTION, "query": query},
-        )
-        if existing.get("documents"):
+    if not written_value:
+        if existing_values:
+            # The value exists but was not updated: answer with its current state
             enriched_values = await find_enriched_moment_values(group_query)
             current_value = next(
                 (
@@ -1539,116 +1322,487 @@ async def upsert_moment_value(request: Request,  _: None = Depends(utilities.ver
                 status_code=500,
                 content={"message": "Erro ao gravar valor do aluno."},
             )
-        enriched_values = await find_enriched_moment_values(group_query)
-        current_value = next(
-            (
-                value
-                for value in enriched_values
-                if value.get("questionNumber") == body.get("questionNumber")
+        written_value = {**data, "_id": created_id}
+        status_code = 201
+
+    changes = await gather_named(
+        {
+            "total": lambda: increment_student_moment_total(group_query, projected_total - stored_total),
+            "summaries": lambda: semester_summary_store.mark_dirty(body.get("userId"), body.get("classId")),
+        }
+    )
+    student_moment_total = changes["total"]
+    current_value = {
+        **written_value,
+        **get_student_moment_fields(
+            projected_total if student_moment_total is None else student_moment_total,
+            moment_max_value,
+            results["settings"].percentage_scale,
+        ),
+    }
+
+    if status_code == 201:
+        return JSONResponse(content={"id": written_value["_id"], "value": current_value}, status_code=201)
+
+    return JSONResponse(content={"value": current_value}, status_code=200)
+
+
+@school_tests_router.put("/upsertmomentvalues")
+async def upsert_moment_values(request: Request,  _: None = Depends(utilities.verificar_token_cookie)):
+    body = await request.json()
+    missing_fields = [field for field in MOMENT_VALUE_GROUP_FIELDS if body.get(field) in (None, "")]
+
+    if missing_fields:
+        return JSONResponse(
+            status_code=400,
+            content={"message": f"Campos obrigatórios em falta: {', '.join(missing_fields)}."},
+        )
+
+    cells = body.get("values")
+    if not isinstance(cells, list) or not cells:
+        return JSONResponse(
+            status_code=400,
+            content={"message": "Indica os valores a gravar."},
+        )
+
+    moment_query = {field: body.get(field) for field in MOMENT_VALUE_GROUP_FIELDS}
+    results = await gather_named(
+        {
+            "moment": lambda: find_moment_for_value(body),
+            "values": lambda: api_client.find(
+                endpoint="find",
+                payload={"collection": CLASS_MOMENTS_COLLECTION, "query": moment_query},
             ),
-            {**data, "_id": created_id},
+            "settings": app_settings_service.get,
+        }
+    )
+    moment = results["moment"]
+    if moment is None or get_failed_finds(results, ["values"]):
+        # Validating against no stored values would set totals without the other questions
+        return JSONResponse(
+            status_code=500,
+            content={"message": "Erro ao ler o momento de avaliação e os valores dos alunos."},
         )
-        return JSONResponse(content={"id": created_id, "value": current_value}, status_code=201)
 
-    enriched_values = await find_enriched_moment_values(group_query)
-    current_value = next(
-        (
-            value
-            for value in enriched_values
-            if value.get("questionNumber") == body.get("questionNumber")
-        ),
-        data,
+    values, totals, errors = validate_moment_value_cells(body, cells, moment, results["values"]["documents"])
+
+    if errors:
+        return JSONResponse(
+            status_code=400,
+            content={"message": errors[0]["message"], "errors": errors},
+        )
+
+    response = await api_client.update(
+        endpoint="upsertmany",
+        payload={
+            "collection": CLASS_MOMENTS_COLLECTION,
+            "operations": [
+                {
+                    "query": {key: data[key] for key in MOMENT_VALUE_GROUP_FIELDS + ["studentId", "questionNumber"]},
+                    "data": data,
+                }
+                for data in values.values()
+            ],
+        },
+    )
+    if "matched_count" not in response:
+        return JSONResponse(
+            status_code=500,
+            content={"message": "Erro ao gravar valores dos alunos."},
+        )
+
+    changes = await gather_named(
+        {
+            "values": lambda: api_client.find(
+                endpoint="find",
+                payload={
+                    "collection": CLASS_MOMENTS_COLLECTION,
+                    "query": {**moment_query, "studentId": {"$in": list(totals)}},
+                },
+            ),
+            "summaries": lambda: semester_summary_store.mark_dirty(body.get("userId"), body.get("classId")),
+        }
+    )
+
+    # The totals come from all the values of each student, so they are set instead of incremented.
+    # They are summed from the values read after the write, not from the earlier read, so a
+    # concurrent single-cell upsert already written is part of them.
+    totals_response = {}
+    if not get_failed_finds(changes, ["values"]):
+        written_totals = {student_id: 0 for student_id in totals}
+        for value_document in changes["values"]["documents"]:
+            student_id = value_document.get("studentId")
+            if student_id in written_totals:
+                written_totals[student_id] += to_float(value_document.get("value"))
+
+        totals_response = await api_client.update(
+            endpoint="upsertmany",
+            payload={
+                "collection": STUDENT_MOMENT_TOTALS_COLLECTION,
+                "operations": [
+                    {"query": {**moment_query, "studentId": student_id}, "data": {"total": round(total, 2)}}
+                    for student_id, total in written_totals.items()
+                ],
+            },
+        )
+
+    if "matched_count" not in totals_response:
+        # Let the next upsert of each student rebuild its total from the values
+        await gather_named(
+            {
+                student_id: (
+                    lambda student_id=student_id: api_client.delete(
+                        endpoint="delete",
+                        payload={
+                            "collection": STUDENT_MOMENT_TOTALS_COLLECTION,
+                            "query": {**moment_query, "studentId": student_id},
+                        },
+                    )
+                )
+                for student_id in totals
+            }
+        )
+
+    enriched_values = enrich_student_moment_values(
+        changes["values"].get("documents") or [],
+        [moment],
+        results["settings"].percentage_scale,
+    )
+    return JSONResponse(content={"count": len(values), "values": enriched_values}, status_code=200)
+
+
+@school_tests_router.post("/moment-statistics")
+async def get_moment_statistics(request: Request, _: None = Depends(utilities.verificar_token_cookie)):
+    """
+    Per-question statistics of a moment and the distribution of its students by grade (see
+    build_moment_statistics).
+    """
+    body = await request.json()
+    moment_data, error_response = await get_moment_class_data(body)
+    if error_response:
+        return error_response
+
+    moment, students, values, settings = moment_data
+    return JSONResponse(
+        content={
+            "momentId": str(get_document_id(moment)),
+            "momentName": get_moment_name(moment),
+            **build_moment_statistics(moment, students, values, settings.percentage_scale),
+        },
+        status_code=200,
     )
-    return JSONResponse(content={"value": current_value}, status_code=200)
 
 
 @school_tests_router.post("/moment-assessment-report")
 async def create_moment_assessment_report(request: Request,  _: None = Depends(utilities.verificar_token_cookie)):
     body = await request.json()
-    if body.get("reportType") == "moment-assessment":
-        report_data, error_response = await get_moment_assessment_report_data(body)
+    if body.get("async"):
+        # Background job: answer at once, the report is built by the job workers
+        report_body = {key: value for key, value in body.items() if key not in ("async", "delivery")}
+        job = report_jobs.submit(
+            get_content_hash(report_body),
+            lambda: run_report_job(report_body),
+        )
+        return JSONResponse(
+            content={**job, "statusUrl": f"/config/report-jobs/{job['jobId']}"},
+            status_code=202,
+        )
+
+    return await build_report(body)
+
+
+@school_tests_router.post("/moment-assessment-report/export")
+async def export_report(request: Request, _: None = Depends(utilities.verificar_token_cookie)):
+    """
+    Export a report as CSV or XLSX ("format"), streamed while its rows are written. The report is
+    chosen as in POST /moment-assessment-report; "reportType": "year-semester-evaluations" exports
+    the semester summaries of every class of a year, one table (XLSX worksheet) per class.
+    """
+    body = await request.json()
+    export_format = str(body.get("format") or "").lower()
+    if export_format not in EXPORT_MEDIA_TYPES:
+        return JSONResponse(
+            status_code=400,
+            content={"message": "O formato de exportação tem de ser 'csv' ou 'xlsx'."},
+        )
+
+    if body.get("reportType") == "year-semester-evaluations":
+        classes, error_response = await get_year_classes(body)
         if error_response:
             return error_response
-        body = report_data
-    elif body.get("reportType") == "semester-evaluations":
-        summary, error_response = await get_semester_evaluations_summary(body)
+        summaries = await get_year_semester_summaries(body, classes)
+        title = body.get("title") or f"Avaliações - {body.get('semester')}.º semestre"
+
+        async def iterate_tables():
+            async for class_summary in summaries:
+                class_name = class_summary.get("className") or class_summary["classId"]
+                summary = class_summary.get("summary")
+                if summary is None:
+                    yield class_name, ["Turma", "Erro"], [[class_name, class_summary.get("message")]]
+                    continue
+                yield (
+                    class_name,
+                    ["Turma", *summary["headers"]],
+                    ([class_name, *row] for row in summary["rows"]),
+                )
+    else:
+        report_table, error_response = await get_report_table(body)
         if error_response:
             return error_response
-        body = {
-            "title": summary["title"],
-            "headers": summary["headers"],
-            "rows": summary["rows"],
-        }
+        title = report_table[0]
 
-    title = body.get("title")
-    headers = body.get("headers")
-    rows = body.get("rows")
+        async def iterate_tables():
+            yield report_table
 
-    if not title or not headers or not rows:
-        return JSONResponse(
-            status_code=400,
-            content={"message": "Os campos 'title', 'headers' e 'rows' são obrigatórios."},
-        )
+    filename = f"{safe_report_filename(str(title))}.{export_format}"
+    return StreamingResponse(
+        stream_export(create_export_writer(export_format), iterate_tables()),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+def get_unique_name(name, used_names):
+    unique_name = name
+    suffix = 1
+    while unique_name in used_names:
+        suffix += 1
+        unique_name = f"{name}_{suffix}"
+    used_names.add(unique_name)
+    return unique_name
+
+
+@school_tests_router.post("/year-reports-archive")
+async def year_reports_archive(request: Request, _: None = Depends(utilities.verificar_token_cookie)):
+    """
+    Semester report and moment assessment reports of every class of a year, rendered in the report
+    workers in parallel and streamed as one ZIP archive (a folder per class) as they are ready.
+
+    The "X-Archive-Id" response header identifies the progress returned by
+    GET /report-archives/{archiveId}; reports that could not be built are listed in erros.txt.
+    """
+    body = await request.json()
+    classes, error_response = await get_year_classes(body)
+    if error_response:
+        return error_response
 
-    reports_dir = Path(tempfile.gettempdir()) / "school-server-reports"
-    reports_dir.mkdir(parents=True, exist_ok=True)
-    pdf_path = reports_dir / f"{safe_report_filename(title)}.pdf"
-
-    document = SimpleDocTemplate(
-        str(pdf_path),
-        pagesize=landscape(A4),
-        rightMargin=24,
-        leftMargin=24,
-        topMargin=24,
-        bottomMargin=24,
+    user_id = body.get("userId")
+    semester = str(body.get("semester"))
+    render_mode = body.get("renderMode") if body.get("renderMode") in REPORT_RENDER_MODES else REPORT_RENDER_MODE
+    class_ids = [str(get_document_id(school_class)) for school_class in classes]
+    class_query = {"userId": user_id, "classId": {"$in": class_ids}}
+    results = await gather_named(
+        {
+            "students": lambda: api_client.find(
+                endpoint="find",
+                payload={"collection": STUDENTS_COLLECTION, "query": class_query},
+            ),
+            "moments": lambda: api_client.find(
+                endpoint="find",
+                payload={"collection": MOMENTS_COLLECTION, "query": class_query},
+            ),
+            "settings": app_settings_service.get,
+        }
     )
-    styles = getSampleStyleSheet()
-    elements = [
-        Paragraph(str(title), styles["Title"]),
-        Spacer(1, 12),
+    moments = [
+        moment
+        for moment in results["moments"].get("documents") or []
+        if get_document_id(moment) and get_moment_semester(moment) == semester
     ]
-    table_data = [[Paragraph(str(cell), styles["BodyText"]) for cell in headers]]
-    table_data.extend([[Paragraph(str(cell), styles["BodyText"]) for cell in row] for row in rows])
-    available_width = landscape(A4)[0] - 48
-    first_col_width = min(160, available_width * 0.28)
-    other_columns = max(len(headers) - 1, 1)
-    col_widths = [first_col_width] + [
-        (available_width - first_col_width) / other_columns
-    ] * other_columns
-    table = Table(table_data, colWidths=col_widths, repeatRows=1)
-    table.setStyle(
-        TableStyle(
-            [
-                ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#e2e8f0")),
-                ("TEXTCOLOR", (0, 0), (-1, 0), colors.HexColor("#0f172a")),
-                ("GRID", (0, 0), (-1, -1), 0.4, colors.HexColor("#cbd5e1")),
-                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                ("FONTSIZE", (0, 0), (-1, -1), 7),
-                ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-                ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor("#f8fafc")]),
-            ]
+    results["values"] = await api_client.find(
+        endpoint="find",
+        payload={
+            "collection": CLASS_MOMENTS_COLLECTION,
+            "query": {**class_query, "momentId": {"$in": [str(get_document_id(moment)) for moment in moments]}},
+        },
+    ) if moments else {"documents": []}
+    failed_finds = get_failed_finds(results, ["students", "moments", "values"])
+    if failed_finds:
+        # Fail before the stream starts: an archive of reports without students or grades
+        # would look complete
+        await utilities.add_log_to_db(
+            api_client=api_client,
+            source="school_tests_router",
+            method="year_reports_archive",
+            message=f"Could not read {', '.join(failed_finds)} of year {body.get('yearId')}",
+            error=True,
         )
+        return JSONResponse(status_code=500, content={"message": "Erro ao ler os dados das turmas."})
+
+    summaries = await get_year_semester_summaries(body, classes)
+
+    students_by_class = {}
+    for student in results["students"]["documents"]:
+        students_by_class.setdefault(str(student.get("classId")), []).append(student)
+    values_by_moment = {}
+    for value_document in results["values"]["documents"]:
+        values_by_moment.setdefault(str(value_document.get("momentId")), []).append(value_document)
+
+    used_names = set()
+    folders = {}
+    class_names = {}
+    for school_class in classes:
+        class_id = str(get_document_id(school_class))
+        class_names[class_id] = get_string_value(school_class.get("name")) or class_id
+        folders[class_id] = get_unique_name(safe_report_filename(class_names[class_id]), used_names)
+
+    moment_reports = []
+    for moment in moments:
+        class_id = str(moment.get("classId"))
+        if class_id not in folders:
+            continue
+        title = get_moment_name(moment)
+        report = build_moment_assessment_report(
+            moment,
+            students_by_class.get(class_id, []),
+            values_by_moment.get(str(get_document_id(moment)), []),
+            results["settings"].percentage_scale,
+        )
+        name = get_unique_name(f"{folders[class_id]}/{safe_report_filename(title)}", used_names)
+        moment_reports.append((f"{name}.pdf", f"{class_names[class_id]} - {title}", report["headers"], report["rows"]))
+
+    total = len(classes) + len(moment_reports)
+    archive_id = archive_progress.start(total)
+    # At most one report per worker is handed to the pool, so an archive never fills its queue
+    render_slots = asyncio.Semaphore(report_workers.get_concurrency())
+
+    async def render(name, title, headers, rows):
+        if not rows:
+            return name, None, "O relatório não tem alunos."
+        try:
+            async with render_slots:
+                pdf_path = report_cache.get_path(title, get_report_key(title, headers, rows, render_mode))
+                if report_cache.get(pdf_path) is not None:
+                    return name, await asyncio.to_thread(pdf_path.read_bytes), None
+                data = await report_workers.run(render_report_bytes, str(title), headers, rows, render_mode)
+                return name, data, None
+        except Exception as e:
+            await utilities.add_log_to_db(
+                api_client=api_client,
+                source="school_tests_router",
+                method="year_reports_archive",
+                message=f"Render report {name} error: {e}",
+                error=True,
+            )
+            return name, None, "Erro ao gerar o relatório."
+
+    async def iterate_reports():
+        tasks = [asyncio.ensure_future(render(*report)) for report in moment_reports]
+        summary_task = None
+        try:
+            pending = set(tasks)
+
+            async def next_summary():
+                return await anext(summaries, None)
+
+            summary_task = asyncio.ensure_future(next_summary())
+            pending.add(summary_task)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task is not summary_task:
+                        yield task.result()
+                        continue
+
+                    class_summary = task.result()
+                    if class_summary is None:
+                        continue
+                    class_id = class_summary["classId"]
+                    name = f"{folders[class_id]}/semestre_{semester}.pdf"
+                    summary = class_summary.get("summary")
+                    if summary is None:
+                        yield name, None, class_summary.get("message")
+                    else:
+                        rendering = asyncio.ensure_future(
+                            render(name, f"{class_names[class_id]} - {summary['title']}", summary["headers"], summary["rows"])
+                        )
+                        tasks.append(rendering)
+                        pending.add(rendering)
+                    summary_task = asyncio.ensure_future(next_summary())
+                    pending.add(summary_task)
+        finally:
+            for task in [*tasks, summary_task]:
+                if task is not None:
+                    task.cancel()
+
+    async def iterate_entries():
+        errors = []
+        finished = False
+        try:
+            async for name, data, message in iterate_reports():
+                archive_progress.advance(archive_id, failed=data is None)
+                if data is None:
+                    errors.append(f"{name}: {message}")
+                    continue
+                yield name, data
+
+            if errors:
+                yield "erros.txt", ("\n".join(errors) + "\n").encode("utf-8")
+            finished = True
+        finally:
+            archive_progress.finish(archive_id, "done" if finished else "cancelled")
+
+    filename = f"{safe_report_filename(f'relatorios_{semester}_semestre')}.zip"
+    return StreamingResponse(
+        stream_zip(iterate_entries()),
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Archive-Id": archive_id,
+            "X-Report-Count": str(total),
+        },
     )
-    elements.append(table)
-    document.build(elements)
 
+
+@school_tests_router.get("/report-archives/{archive_id}")
+async def get_report_archive(archive_id: str, _: None = Depends(utilities.verificar_token_cookie)):
+    archive = archive_progress.get(archive_id)
+    if archive is None:
+        return JSONResponse(status_code=404, content={"message": "Arquivo de relatórios não encontrado."})
+
+    return JSONResponse(content=archive, status_code=200)
+
+
+@school_tests_router.get("/report-jobs/{job_id}")
+async def get_report_job(job_id: str, _: None = Depends(utilities.verificar_token_cookie)):
+    job = report_jobs.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"message": "Pedido de relatório não encontrado."})
+
+    return JSONResponse(content=job, status_code=200)
+
+
+@school_tests_router.get("/worker-metrics")
+async def get_worker_metrics(_: None = Depends(utilities.verificar_token_cookie)):
     return JSONResponse(
         content={
-            "path": str(pdf_path),
-            "url": f"/config/moment-assessment-report/{pdf_path.name}",
+            "reports": report_workers.get_metrics(),
+            "summaries": summary_workers.get_metrics(),
+            "reportCache": report_cache.get_metrics(),
+            "reportStore": report_store.get_metrics() if report_store is not None else None,
+            "reportJanitor": report_janitor.get_metrics(),
         },
-        status_code=201,
+        status_code=200,
     )
 
 
 @school_tests_router.get("/moment-assessment-report/{filename}")
 async def open_moment_assessment_report(filename: str, _: None = Depends(utilities.verificar_token_cookie)):
     safe_filename = Path(filename).name
-    report_path = Path(tempfile.gettempdir()) / "school-server-reports" / safe_filename
+    report_path = report_cache.directory / safe_filename
 
-    if not report_path.exists() or report_path.suffix.lower() != ".pdf":
+    if report_path.suffix.lower() != ".pdf":
         return JSONResponse(status_code=404, content={"message": "Relatório não encontrado."})
 
+    if not report_path.exists():
+        # Reports stored by any instance are served from the shared store
+        data = await report_store.get(safe_filename) if report_store is not None else None
+        if data is None:
+            return JSONResponse(status_code=404, content={"message": "Relatório não encontrado."})
+        return build_pdf_response(data, safe_filename)
+
+    report_cache.touch(report_path)
+
     return FileResponse(
         path=str(report_path),
         media_type="application/pdf",
@@ -5,6 +5,7 @@ from httpx import request
 # Import custom utility modules
 from utils.bd_client import BDClient  # Database handling utilities
 from utils import utilities  # General utilities
+from utils.semester_summaries import SemesterSummaryStore  # Materialized semester summaries
 
 from utils.config import STUDENTS_COLLECTION,BD_BASE_URL
 
@@ -14,6 +15,9 @@ students_router = APIRouter()
 # Instantiate the API client
 api_client = BDClient(BD_BASE_URL)
 
+# Student changes (e.g., active, attitudes) make the class semester summaries dirty
+semester_summary_store = SemesterSummaryStore(api_client)
+
 # Endpoint: Get all students
 # curl -X POST http://127.0.0.1:8020/students/add -H  "Content-Type: application/json" -d "{ \"userid\": \"67e32c8bf97d9bb2e993e50d\", \"classid\": \"67e32c8bf97d9bb2e993e50d\", \"id\": \"1\", \"name\": \"nome aluno\", \"email\": \"aluno@ctt.pt\" }"
 @students_router.post("/find")
@@ -29,7 +33,11 @@ async def findbyid_class_students(request: Request):
 # curl -X POST http://127.0.0.1:8020/students/add -H  "Content-Type: application/json" -d "{ \"userid\": \"67e32c8bf97d9bb2e993e50d\", \"classid\": \"67e32c8bf97d9bb2e993e50d\", \"id\": \"1\", \"name\": \"nome aluno\", \"email\": \"aluno@ctt.pt\" }"
 @students_router.post("/add")
 async def add_class_student(request: Request):
-    return await utilities.add_document(api_client=api_client, request=request, collection=STUDENTS_COLLECTION, source="students_routes", method="add_class_student")
+    response = await utilities.add_document(api_client=api_client, request=request, collection=STUDENTS_COLLECTION, source="students_routes", method="add_class_student")
+    if response.status_code == 201:
+        await semester_summary_store.mark_document_dirty(await request.json())
+
+    return response
 
 
 @students_router.put("/update")
@@ -53,6 +61,8 @@ async def update_class_student(request: Request):
     if not updated_student:
         return JSONResponse(status_code=404, content={"message": "Aluno não encontrado."})
 
+    await semester_summary_store.mark_document_dirty(updated_student)
+
     return JSONResponse(content=updated_student, status_code=200)
 
 
@@ -67,6 +77,11 @@ async def delete_class_student(request: Request):
             content={"message": "O campo 'id' é obrigatório."},
         )
 
+    # Read the student first to know which class summaries it affects
+    existing = await api_client.find_by_id(
+        endpoint="findbyid",
+        payload={"collection": STUDENTS_COLLECTION, "id": student_id},
+    )
     response = await api_client.delete(
         endpoint="delete",
         payload={"collection": STUDENTS_COLLECTION, "id": student_id},
@@ -76,4 +91,7 @@ async def delete_class_student(request: Request):
     if not deleted_count:
         return JSONResponse(status_code=404, content={"message": "Aluno não encontrado."})
 
+    for student in existing.get("documents") or []:
+        await semester_summary_store.mark_document_dirty(student)
+
     return JSONResponse(content=deleted_count, status_code=200)
@@ -0,0 +1,133 @@
+import asyncio
+import os
+import sys
+
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.app_settings import AppSettingsService
+from utils.grading import DEFAULT_APP_SETTINGS, CompiledSettings
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeApiClient:
+    def __init__(self, documents):
+        self.documents = documents
+        self.finds = 0
+        self.updates = []
+
+    async def find(self, endpoint, payload):
+        self.finds += 1
+        if self.documents is None:
+            return {}
+        return {"documents": [dict(document) for document in self.documents]}
+
+    async def update(self, endpoint, payload):
+        self.updates.append(payload)
+        return {"modified_count": payload["data"]}
+
+
+def build_document(**fields):
+    return {**DEFAULT_APP_SETTINGS, "_id": "settings-1", **fields}
+
+
+def test_get_reuses_snapshot_until_ttl_expires():
+    api_client = FakeApiClient([build_document()])
+    clock = FakeClock()
+    service = AppSettingsService(api_client, ttl_seconds=60, clock=clock)
+
+    async def scenario():
+        first = await service.get()
+        second = await service.get()
+        clock.now = 61
+        third = await service.get()
+        return first, second, third
+
+    first, second, third = asyncio.run(scenario())
+
+    assert isinstance(first, CompiledSettings)
+    assert first is second is third
+    assert first.version == 1
+    assert "_id" not in first.settings
+    assert api_client.finds == 2
+    assert api_client.updates == []
+
+
+def test_changed_settings_get_a_new_version():
+    api_client = FakeApiClient([build_document()])
+    clock = FakeClock()
+    service = AppSettingsService(api_client, ttl_seconds=60, clock=clock)
+
+    async def scenario():
+        first = await service.get()
+        api_client.documents = [build_document(percentageRanges=[
+            {"id": "all", "min": 0, "max": 100, "nota": 5, "backgroundColor": "#000000", "textColor": "#ffffff"},
+        ])]
+        clock.now = 61
+        return first, await service.get()
+
+    first, second = asyncio.run(scenario())
+
+    assert second.version == first.version + 1
+    assert second.percentage_scale.get_range(50)["id"] == "all"
+
+
+def test_concurrent_gets_read_settings_once():
+    api_client = FakeApiClient([build_document()])
+    service = AppSettingsService(api_client, ttl_seconds=60)
+
+    async def scenario():
+        return await asyncio.gather(*(service.get() for _ in range(10)))
+
+    results = asyncio.run(scenario())
+
+    assert api_client.finds == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_refresh_repairs_document_that_is_not_normalized():
+    api_client = FakeApiClient([build_document(popupTextColor="#FFFFFF", messageTimeoutSeconds="abc")])
+    service = AppSettingsService(api_client, ttl_seconds=60)
+
+    settings = asyncio.run(service.get())
+
+    assert settings.settings["popupTextColor"] == "#ffffff"
+    assert len(api_client.updates) == 1
+    assert "_id" not in api_client.updates[0]["data"]
+    assert service.stored
+
+
+def test_missing_document_is_reported_and_failures_are_not_cached():
+    api_client = FakeApiClient([])
+    service = AppSettingsService(api_client, ttl_seconds=60)
+
+    asyncio.run(service.get())
+    assert not service.stored
+
+    api_client.documents = None
+    service.invalidate()
+    settings = asyncio.run(service.get())
+    assert settings.settings["percentageRanges"] == DEFAULT_APP_SETTINGS["percentageRanges"]
+    assert not service.is_fresh()
+
+
+def test_replace_serves_saved_settings_without_reading_them():
+    api_client = FakeApiClient([build_document()])
+    service = AppSettingsService(api_client, ttl_seconds=60)
+    saved = {key: value for key, value in DEFAULT_APP_SETTINGS.items()}
+    saved["attitudeTemplates"] = [
+        {"id": "participacao", "text": "Participação", "alias": "Part.", "weightPercentage": 10},
+    ]
+
+    settings = service.replace(saved, stored=True)
+
+    assert asyncio.run(service.get()) is settings
+    assert settings.attitude_templates[0]["id"] == "participacao"
+    assert api_client.finds == 0
@@ -0,0 +1,166 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils import config as school_config
+from utils.bd_backends import DB_SERVICE_PATH, HTTPBackend, InProcessBackend, close_backends, create_backend
+from utils.bd_client import BDClient
+from utils.request_context import start_request
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.inserted = []
+
+    def insert(self, collection_name, data):
+        data["_id"] = object()
+        self.inserted.append((collection_name, data))
+        return "new-id"
+
+    def find(self, collection_name, id="", filter={}):
+        return [{"_id": id or "doc-1", "collection": collection_name, "filter": filter}]
+
+    def update(self, collection_name, id, filter, data):
+        return {"_id": id or "doc-1", **data}
+
+    def delete(self, collection_name, document_id, filter):
+        return 1
+
+
+def create_in_process_client(database):
+    backend = InProcessBackend()
+    backend.get_database = lambda: database
+    return BDClient("http://unused", backend=backend)
+
+
+def test_create_backend_uses_configuration_name():
+    assert isinstance(create_backend("http://127.0.0.1:8000/db-api", "http"), HTTPBackend)
+    assert isinstance(create_backend("http://127.0.0.1:8000/db-api", "inprocess"), InProcessBackend)
+
+
+def test_in_process_backend_returns_db_service_responses():
+    client = create_in_process_client(FakeDatabase())
+
+    assert asyncio.run(client.find(endpoint="find", payload={"collection": "students", "query": {"classId": "c1"}})) == {
+        "documents": [{"_id": "doc-1", "collection": "students", "filter": {"classId": "c1"}}],
+    }
+    assert asyncio.run(client.find_by_id(endpoint="findbyid", payload={"collection": "students", "id": "s1"})) == {
+        "documents": [{"_id": "s1", "collection": "students", "filter": {}}],
+    }
+    assert asyncio.run(client.delete(endpoint="delete", payload={"collection": "students", "id": "s1"})) == {
+        "message": "Document deleted",
+        "deleted_count": 1,
+    }
+
+
+def test_in_process_backend_does_not_mutate_payload():
+    database = FakeDatabase()
+    client = create_in_process_client(database)
+    data = {"name": "Ana"}
+
+    response = asyncio.run(client.insert(endpoint="insert", payload={"collection": "students", "data": data}))
+
+    assert response == {"message": "Document inserted", "id": "new-id"}
+    assert data == {"name": "Ana"}
+    assert "_id" in database.inserted[0][1]
+
+
+def test_in_process_backend_returns_empty_response_on_invalid_payload():
+    client = create_in_process_client(FakeDatabase())
+
+    assert asyncio.run(client.insert(endpoint="insert", payload={"collection": "students"})) == {}
+    assert asyncio.run(client.update(endpoint="update", payload={"collection": "students", "data": {"a": 1}})) == {}
+    # The validation of the db_service routes is shared, not copied
+    assert asyncio.run(client.update(endpoint="increment", payload={
+        "collection": "totals", "query": {"studentId": "s1"}, "inc": {"total": "1"},
+    })) == {}
+    assert InProcessBackend._operations.__name__ == "db_service.utils.operations"
+
+
+class FakeCursor(list):
+    max_time_ms_values = []
+
+    def max_time_ms(self, max_time_ms):
+        self.max_time_ms_values.append(max_time_ms)
+        return self
+
+
+class FakeMongoClient:
+    """Stands in for the MongoDB server: the engine itself is the real db_service module."""
+
+    def __init__(self, uri, **kwargs):
+        self.uri = uri
+        self.admin = self
+
+    def command(self, name):
+        return {"ok": 1}
+
+    def __getitem__(self, name):
+        return {"students": self}
+
+    def find(self, filter):
+        return FakeCursor([{"_id": "student-1", "name": "Ana"}])
+
+
+def test_in_process_backend_loads_the_db_service_engine_with_its_own_modules(monkeypatch):
+    pymongo = pytest.importorskip("pymongo")
+    monkeypatch.setattr(pymongo, "MongoClient", FakeMongoClient)
+    monkeypatch.setattr(InProcessBackend, "_database", None)
+    monkeypatch.setattr(InProcessBackend, "_request_context", None)
+    monkeypatch.setenv("MONGO_DB_CONNECTION_STRING", "mongodb://db-service-host:27017")
+    client = BDClient("http://unused", backend=InProcessBackend())
+
+    async def find_within_deadline():
+        start_request({"X-Deadline-Remaining-Ms": "5000"})
+        return await client.find(endpoint="find", payload={"collection": "students", "query": {}})
+
+    response = asyncio.run(find_within_deadline())
+
+    database = InProcessBackend._database
+    assert response == {"documents": [{"_id": "student-1", "name": "Ana"}]}
+    assert database.client.uri == "mongodb://db-service-host:27017"
+    assert InProcessBackend._request_context.__file__.startswith(os.path.join(DB_SERVICE_PATH, "utils"))
+    # The engine is imported under its own package and leaves the school modules alone
+    assert InProcessBackend._request_context.__name__ == "db_service.utils.request_context"
+    assert sys.modules["utils.config"] is school_config
+    assert "utils.database" not in sys.modules
+    # The school deadline reached the engine as a MongoDB maxTimeMS
+    assert 0 < FakeCursor.max_time_ms_values[-1] <= 5000
+
+
+def test_in_process_backend_fails_loudly_without_db_service(tmp_path, monkeypatch):
+    monkeypatch.setattr(InProcessBackend, "_database", None)
+
+    with pytest.raises(FileNotFoundError):
+        InProcessBackend(str(tmp_path)).get_database()
+
+
+def test_http_backend_closes_clients_of_previous_loops_and_at_shutdown():
+    backend = HTTPBackend("http://unused", uds="")
+
+    async def get_client():
+        return backend.get_client()
+
+    previous_loop = asyncio.new_event_loop()
+    try:
+        previous_client = previous_loop.run_until_complete(get_client())
+
+        async def use_then_shut_down():
+            client = backend.get_client()
+            await close_backends()
+            return client
+
+        client = asyncio.run(use_then_shut_down())
+        # The client of the previous loop is closed on that loop once it runs again
+        previous_loop.run_until_complete(asyncio.sleep(0.05))
+    finally:
+        previous_loop.close()
+
+    assert client is not previous_client
+    assert previous_client.is_closed
+    assert client.is_closed
+    assert backend.client is None
@@ -8,7 +8,7 @@ from routes.class_tests_router import normalize_evaluation_moment_templates
 from routes.class_tests_router import normalize_attitude_templates
 from routes.class_tests_router import normalize_hex_color
 from routes.class_tests_router import enrich_student_moment_values
-from routes.class_tests_router import build_semester_evaluations_summary
+from utils.grading import build_semester_evaluations_summary
 from routes.class_tests_router import validate_evaluation_moment_payload
 
 
@@ -0,0 +1,59 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.concurrency import gather_named
+
+
+def test_gather_named_returns_results_by_name():
+    async def value(result, delay):
+        await asyncio.sleep(delay)
+        return result
+
+    results = asyncio.run(
+        gather_named(
+            {
+                "slow": lambda: value("a", 0.02),
+                "fast": lambda: value("b", 0),
+            }
+        )
+    )
+
+    assert results == {"slow": "a", "fast": "b"}
+
+
+def test_gather_named_respects_concurrency_limit():
+    running = 0
+    max_running = 0
+
+    async def call():
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    asyncio.run(gather_named({f"call-{index}": call for index in range(6)}, limit=2))
+
+    assert max_running == 2
+
+
+def test_gather_named_cancels_pending_calls_on_first_error():
+    finished = []
+
+    async def fail():
+        raise ValueError("boom")
+
+    async def slow():
+        await asyncio.sleep(1)
+        finished.append("slow")
+
+    with pytest.raises(ValueError):
+        asyncio.run(gather_named({"fail": fail, "slow": slow}))
+
+    assert finished == []
@@ -0,0 +1,101 @@
+import asyncio
+import io
+import os
+import sys
+import zipfile
+from xml.etree import ElementTree
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from routes import class_tests_router
+from utils import utilities
+from utils.exports import EXPORT_CHUNK_SIZE, CsvExportWriter, XlsxExportWriter, stream_export
+
+
+SHEET_NAMESPACE = {"main": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+
+
+async def collect(writer, tables):
+    async def iterate_tables():
+        for table in tables:
+            yield table
+
+    return [chunk async for chunk in stream_export(writer, iterate_tables())]
+
+
+def read_sheet(workbook, number):
+    root = ElementTree.fromstring(workbook.read(f"xl/worksheets/sheet{number}.xml"))
+    rows = []
+    for row in root.iterfind(".//main:row", SHEET_NAMESPACE):
+        rows.append(
+            [
+                cell.findtext("main:v", namespaces=SHEET_NAMESPACE)
+                if cell.get("t") != "inlineStr"
+                else cell.findtext("main:is/main:t", namespaces=SHEET_NAMESPACE)
+                for cell in row.iterfind("main:c", SHEET_NAMESPACE)
+            ]
+        )
+    return rows
+
+
+def test_csv_export_repeats_headers_of_each_table():
+    chunks = asyncio.run(
+        collect(
+            CsvExportWriter(),
+            [("5.º A", ["Aluno", "Nota"], [["Ana; Maria", "4"]]), ("5.º B", ["Aluno", "Nota"], [["Rui", "3"]])],
+        )
+    )
+
+    assert b"".join(chunks).decode("utf-8-sig").splitlines() == [
+        "Aluno;Nota",
+        '"Ana; Maria";4',
+        "",
+        "Aluno;Nota",
+        "Rui;3",
+    ]
+
+
+def test_xlsx_export_streams_one_worksheet_per_table():
+    rows = ([f"Aluno {row}", str(row), f"{row}.5%"] for row in range(20000))
+    chunks = asyncio.run(
+        collect(
+            XlsxExportWriter(),
+            [("5.º A", ["Aluno", "Total", "%"], rows), ("5.º A", ["Aluno", "Nota"], [["Rui & Ana", "3"]])],
+        )
+    )
+
+    assert len(chunks) > 1
+    assert all(len(chunk) < 4 * EXPORT_CHUNK_SIZE for chunk in chunks)
+    workbook = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+    names = [sheet.get("name") for sheet in ElementTree.fromstring(workbook.read("xl/workbook.xml")).iter(
+        "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}sheet"
+    )]
+    first_sheet = read_sheet(workbook, 1)
+
+    assert names == ["5.º A", "5.º A 2"]
+    assert first_sheet[0] == ["Aluno", "Total", "%"]
+    assert first_sheet[1] == ["Aluno 0", "0", "0.5%"]
+    assert len(first_sheet) == 20001
+    assert read_sheet(workbook, 2) == [["Aluno", "Nota"], ["Rui & Ana", "3"]]
+
+
+def test_export_endpoint_validates_format_and_report():
+    app = FastAPI()
+    app.include_router(class_tests_router.school_tests_router, prefix="/config")
+    app.dependency_overrides[utilities.verificar_token_cookie] = lambda: None
+    client = TestClient(app)
+    body = {"title": "Teste 1", "headers": ["Aluno", "Total"], "rows": [["Ana", "10"]]}
+
+    exported = client.post("/config/moment-assessment-report/export", json={**body, "format": "csv"})
+    wrong_format = client.post("/config/moment-assessment-report/export", json={**body, "format": "pdf"})
+    missing_rows = client.post("/config/moment-assessment-report/export", json={**body, "rows": [], "format": "xlsx"})
+
+    assert exported.status_code == 200
+    assert exported.headers["content-disposition"] == 'attachment; filename="Teste_1.csv"'
+    assert exported.content.decode("utf-8-sig") == "Aluno;Total\r\nAna;10\r\n"
+    assert wrong_format.status_code == 400
+    assert missing_rows.status_code == 400
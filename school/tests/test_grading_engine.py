@@ -0,0 +1,451 @@
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils import grading
+from utils.grading import (
+    DEFAULT_APP_SETTINGS,
+    PercentageScale,
+    SemesterSimulation,
+    build_moment_assessment_report,
+    build_moment_statistics,
+    build_semester_evaluations_summary,
+    enrich_student_moment_values,
+    format_number,
+    get_document_id,
+    get_percentage_fields,
+    get_percentage_range,
+    get_percentage_scale,
+    get_student_moment_total,
+    get_student_name,
+    index_student_moment_totals,
+    to_float,
+)
+
+
+class LinearMomentTotals:
+    """Reference lookup: the linear scan used before the totals were indexed."""
+
+    def __init__(self, enriched_values):
+        self.enriched_values = enriched_values
+
+    def get(self, key, default=0):
+        return get_student_moment_total(self.enriched_values, key[0], key[1])
+
+
+def build_random_class(seed):
+    generator = random.Random(seed)
+    students = [
+        {
+            "_id": student_index if student_index % 5 == 0 else f"student-{student_index}",
+            "name": f"Aluno {student_index}",
+            "active": generator.random() > 0.1,
+            "attitudes": {"participacao": float(generator.randint(0, 5))},
+        }
+        for student_index in range(generator.randint(1, 25))
+    ]
+    moments = [
+        {
+            "_id": f"moment-{moment_index}",
+            "name": f"Momento {moment_index}",
+            "semester": generator.choice(["1", "1", "2"]),
+            "type": generator.choice(["Teste", "Questão aula", "Trabalho"]),
+            "totalValue": float(generator.choice([0, 20, 50])),
+            "questions": [{"number": str(number), "value": 10.0} for number in range(1, 4)],
+        }
+        for moment_index in range(generator.randint(1, 8))
+    ]
+    values = [
+        {
+            "momentId": moment["_id"],
+            "studentId": str(student["_id"]) if generator.random() > 0.5 else student["_id"],
+            "questionNumber": str(number),
+            "questionValue": 10.0,
+            "value": generator.randint(0, 20) / 2,
+        }
+        for moment in moments
+        for student in students
+        for number in range(1, 4)
+        if generator.random() > 0.2
+    ]
+    generator.shuffle(values)
+    settings = {
+        "evaluationMomentTemplates": [
+            {"type": "Teste", "weightPercentage": 50.0},
+            {"type": "Questão aula", "weightPercentage": 30.0},
+        ],
+        "attitudeTemplates": [
+            {"id": "participacao", "text": "Participação", "alias": "Part.", "weightPercentage": 20.0},
+        ],
+        "percentageRanges": None,
+    }
+
+    return students, moments, values, settings
+
+
+def test_index_student_moment_totals_matches_linear_lookup():
+    for seed in range(20):
+        students, moments, values, _ = build_random_class(seed)
+        enriched_values = enrich_student_moment_values(values, moments)
+        totals = index_student_moment_totals(enriched_values)
+
+        for student in students:
+            for moment in moments:
+                key = (str(student["_id"]), str(moment["_id"]))
+                assert totals.get(key, 0) == get_student_moment_total(enriched_values, *key)
+
+
+def test_build_semester_evaluations_summary_matches_linear_reference(monkeypatch):
+    metadata = {"userId": "user-1", "classId": "class-1", "semester": "1", "title": "Avaliações"}
+    monkeypatch.setattr(grading, "GRADING_ENGINE", "python")
+
+    for seed in range(20):
+        students, moments, values, settings = build_random_class(seed)
+        summary = build_semester_evaluations_summary(metadata, students, moments, values, settings)
+
+        with monkeypatch.context() as patch:
+            patch.setattr(grading, "index_student_moment_totals", LinearMomentTotals)
+            reference = build_semester_evaluations_summary(metadata, students, moments, values, settings)
+
+        assert summary == reference
+
+
+def build_random_scenario(generator):
+    return {
+        "evaluationMomentTemplates": [
+            {"type": "Teste", "weightPercentage": float(generator.randint(0, 100))},
+            {"type": "Trabalho", "weightPercentage": generator.randint(0, 40) / 2},
+        ],
+        "attitudeTemplates": [
+            {"id": "participacao", "text": "Participação", "alias": "Part.", "weightPercentage": float(generator.randint(0, 30))},
+        ],
+        "percentageRanges": generator.choice([None, [
+            {"min": 0, "max": 49, "nota": 2, "backgroundColor": "#dc2626", "textColor": "#ffffff"},
+            {"min": 50, "max": 100, "nota": 4, "backgroundColor": "#15803d", "textColor": "#ffffff"},
+        ]]),
+    }
+
+
+@pytest.mark.parametrize("engine", ["auto", "python"])
+def test_semester_simulation_matches_rebuilt_summaries(monkeypatch, engine):
+    monkeypatch.setattr(grading, "GRADING_ENGINE", engine)
+    fields = ("finalValue", "finalPercentage", "finalGrade", "attitudesWeightedValue")
+
+    for seed in range(30):
+        students, moments, values, settings = build_random_class(seed)
+        generator = random.Random(seed)
+        simulation = SemesterSimulation("1", students, moments, values)
+
+        for scenario in [settings, *[build_random_scenario(generator) for _ in range(3)]]:
+            final_max_value, results = simulation.grade(scenario)
+            summary = build_semester_evaluations_summary({"semester": "1"}, students, moments, values, scenario)
+
+            assert all(
+                student_summary["finalMaxValue"] == format_number(final_max_value)
+                for student_summary in summary["students"]
+            )
+            assert results == [
+                {field: student_summary[field] for field in fields} for student_summary in summary["students"]
+            ]
+
+
+def test_semester_simulation_reports_deltas_against_current_settings(monkeypatch):
+    monkeypatch.setattr(grading, "GRADING_ENGINE", "python")
+    students = [{"_id": "a", "name": "Ana", "attitudes": {"participacao": 4}}, {"_id": "b", "name": "Bruno"}]
+    moments = [
+        {"_id": "teste", "type": "Teste", "totalValue": 20, "questions": [{"number": "1", "value": 20}]},
+        {"_id": "trabalho", "type": "Trabalho", "totalValue": 20, "questions": [{"number": "1", "value": 20}]},
+    ]
+    values = [
+        {"momentId": "teste", "studentId": "a", "questionNumber": "1", "value": 18},
+        {"momentId": "trabalho", "studentId": "a", "questionNumber": "1", "value": 6},
+        {"momentId": "teste", "studentId": "b", "questionNumber": "1", "value": 8},
+        {"momentId": "trabalho", "studentId": "b", "questionNumber": "1", "value": 20},
+    ]
+    settings = {
+        "evaluationMomentTemplates": [
+            {"type": "Teste", "weightPercentage": 50},
+            {"type": "Trabalho", "weightPercentage": 50},
+        ],
+        "attitudeTemplates": [{"id": "participacao", "text": "Participação", "weightPercentage": 10}],
+    }
+    scenario = {
+        "name": "Mais teste",
+        "evaluationMomentTemplates": [
+            {"type": "Teste", "weightPercentage": 80},
+            {"type": "Trabalho", "weightPercentage": 20},
+        ],
+    }
+
+    simulation = SemesterSimulation("1", students, moments, values).simulate(settings, [scenario])
+
+    assert simulation["studentCount"] == 2
+    assert [student["finalPercentage"] for student in simulation["current"]["students"]] == [60.0, 70.0]
+    result = simulation["scenarios"][0]
+    assert result["id"] == "scenario-1"
+    assert result["name"] == "Mais teste"
+    assert [student["finalPercentage"] for student in result["students"]] == [78.0, 52.0]
+    assert [student["delta"]["finalPercentage"] for student in result["students"]] == [18.0, -18.0]
+    assert [student["delta"]["finalGrade"] for student in result["students"]] == [1, -1]
+    # The attitude templates were not part of the scenario, so they keep their current weight
+    assert [student["delta"]["attitudesWeightedValue"] for student in result["students"]] == [0, 0]
+    assert result["changedGrades"] == 2
+
+
+def linear_moment_assessment_report(moment, students, values):
+    """Reference report: the per-cell scans used before the values were indexed."""
+    enriched_values = enrich_student_moment_values(values, [moment])
+    questions = [question for question in moment.get("questions", []) if isinstance(question, dict)]
+    rows = []
+
+    for student in students:
+        if student.get("active") is False:
+            continue
+
+        student_id = get_document_id(student)
+        student_values = [
+            next(
+                (
+                    value_document
+                    for value_document in values
+                    if str(value_document.get("studentId")) == str(student_id)
+                    and str(value_document.get("questionNumber"))
+                    == str(question.get("number") or question.get("questionNumber"))
+                ),
+                {},
+            )
+            for question in questions
+        ]
+        matching_enriched_value = next(
+            (
+                value_document
+                for value_document in enriched_values
+                if str(value_document.get("studentId")) == str(student_id)
+            ),
+            {},
+        )
+        rows.append(
+            [
+                get_student_name(student),
+                *[str(value_document.get("value", 0)) for value_document in student_values],
+                str(format_number(to_float(matching_enriched_value.get("studentMomentTotal")))),
+                matching_enriched_value.get("studentMomentPercentageText", "0.0%"),
+                str(matching_enriched_value.get("studentMomentGrade", 0)),
+            ]
+        )
+
+    return rows
+
+
+def test_build_moment_assessment_report_matches_linear_reference():
+    for seed in range(20):
+        students, moments, values, _ = build_random_class(seed)
+        moment = moments[0]
+        moment["questions"].append({"questionNumber": 4, "value": 5})
+        moment_values = [value for value in values if value["momentId"] == moment["_id"]]
+        moment_values.append({"momentId": moment["_id"], "studentId": students[0]["_id"], "questionNumber": 4, "value": 2})
+
+        report = build_moment_assessment_report(moment, students, moment_values)
+
+        assert report["headers"] == ["Aluno", "Q1 (10)", "Q2 (10)", "Q3 (10)", "Q4 (5)", "Total", "%", "Nota"]
+        assert report["rows"] == linear_moment_assessment_report(moment, students, moment_values)
+
+
+@pytest.mark.skipif(grading.np is None, reason="NumPy is not installed")
+def test_vectorized_engine_matches_python_engine(monkeypatch):
+    for seed in range(40):
+        students, moments, values, settings = build_random_class(seed)
+        if seed % 2:
+            settings["percentageRanges"] = [
+                {"min": 0, "max": 49, "nota": 2, "backgroundColor": "#dc2626", "textColor": "#ffffff"},
+                {"min": 50, "max": 100, "nota": 4, "backgroundColor": "#15803d", "textColor": "#ffffff"},
+            ]
+
+        for semester in ("1", "2"):
+            metadata = {"userId": "user-1", "classId": "class-1", "semester": semester}
+            summary = build_semester_evaluations_summary(metadata, students, moments, values, settings)
+
+            with monkeypatch.context() as patch:
+                patch.setattr(grading, "GRADING_ENGINE", "python")
+                reference = build_semester_evaluations_summary(metadata, students, moments, values, settings)
+
+            assert summary == reference
+
+
+def test_moment_statistics_per_question_and_grade_distribution(monkeypatch):
+    monkeypatch.setattr(grading, "GRADING_ENGINE", "python")
+    moment = {"_id": "moment-1", "totalValue": 20, "questions": [{"number": "1", "value": 10}, {"number": "2", "value": 10}]}
+    students = [{"_id": "a"}, {"_id": "b"}, {"_id": "c"}, {"_id": "d", "active": False}, {"_id": "e"}]
+    values = [
+        {"studentId": "a", "questionNumber": "1", "value": 10},
+        {"studentId": "a", "questionNumber": "2", "value": 8},
+        {"studentId": "b", "questionNumber": "1", "value": 4},
+        {"studentId": "c", "questionNumber": "1", "value": 7},
+        {"studentId": "c", "questionNumber": "2", "value": 1},
+        {"studentId": "d", "questionNumber": "1", "value": 10},
+    ]
+
+    statistics = build_moment_statistics(moment, students, values)
+
+    # e has no values and d is inactive; b has no value for question 2 (counts as 0)
+    assert statistics["studentCount"] == 3
+    assert statistics["maxValue"] == 20
+    assert statistics["questions"][0] == {
+        "questionNumber": "1",
+        "maxValue": 10,
+        "mean": 7.0,
+        "median": 7,
+        "standardDeviation": 2.45,
+        "minimum": 4,
+        "maximum": 10,
+        "difficultyIndex": 0.7,
+    }
+    assert statistics["questions"][1]["mean"] == 3.0
+    assert statistics["questions"][1]["difficultyIndex"] == 0.3
+    assert statistics["total"]["mean"] == 10.0
+    counts = {distribution["id"]: distribution["count"] for distribution in statistics["gradeDistribution"]}
+    # Totals 18, 4 and 8 out of 20: 90%, 20% and 40%
+    assert counts == {"very-low": 0, "low": 1, "mid-low": 1, "mid": 0, "high": 0, "very-high": 1}
+
+
+@pytest.mark.skipif(grading.np is None, reason="NumPy is not installed")
+def test_vectorized_moment_statistics_match_python_engine(monkeypatch):
+    for seed in range(40):
+        students, moments, values, _ = build_random_class(seed)
+        moment = moments[0]
+        moment_values = [value for value in values if value["momentId"] == moment["_id"]]
+        percentage_ranges = None if seed % 2 else [
+            {"min": 0, "max": 49, "nota": 2, "backgroundColor": "#dc2626", "textColor": "#ffffff"},
+            {"min": 40, "max": 100, "nota": 4, "backgroundColor": "#15803d", "textColor": "#ffffff"},
+        ]
+
+        statistics = build_moment_statistics(moment, students, moment_values, percentage_ranges)
+        with monkeypatch.context() as patch:
+            patch.setattr(grading, "GRADING_ENGINE", "python")
+            reference = build_moment_statistics(moment, students, moment_values, percentage_ranges)
+
+        assert statistics == reference
+
+
+def linear_percentage_range(percentage, percentage_ranges):
+    """Reference lookup: the first range containing the percentage, else the last range."""
+    return next(
+        (
+            percentage_range
+            for percentage_range in percentage_ranges
+            if percentage >= percentage_range["min"] and percentage <= percentage_range["max"]
+        ),
+        percentage_ranges[-1],
+    )
+
+
+PERCENTAGES = [-5, 0, 10, 10.5, 11, 39.99, 49, 50, 55, 69.5, 85, 86, 100, 100.1, float("nan")]
+UNORDERED_PERCENTAGE_RANGES = [
+    {"id": "b", "min": 50, "max": 100, "nota": 4, "backgroundColor": "#000000", "textColor": "#ffffff"},
+    {"id": "a", "min": 0, "max": 60, "nota": 2, "backgroundColor": "#000000", "textColor": "#ffffff"},
+]
+
+
+def test_percentage_scale_matches_linear_lookup():
+    for percentage_ranges in (DEFAULT_APP_SETTINGS["percentageRanges"], UNORDERED_PERCENTAGE_RANGES):
+        scale = PercentageScale(percentage_ranges)
+
+        for percentage in PERCENTAGES:
+            assert scale.get_range(percentage) == linear_percentage_range(percentage, percentage_ranges)
+            assert get_percentage_range(percentage, percentage_ranges) == scale.get_range(percentage)
+
+
+def test_percentage_scale_is_compiled_once():
+    scale = PercentageScale(None)
+
+    assert scale.ordered
+    assert scale.ranges == DEFAULT_APP_SETTINGS["percentageRanges"]
+    assert get_percentage_scale(scale) is scale
+    assert get_percentage_fields(55, scale, "final")["finalGrade"] == 3
+    assert not PercentageScale(UNORDERED_PERCENTAGE_RANGES).ordered
+    assert not grading.use_vectorized_engine(PercentageScale(UNORDERED_PERCENTAGE_RANGES))
+
+
+@pytest.mark.skipif(grading.np is None, reason="NumPy is not installed")
+def test_percentage_scale_range_indexes_match_get_range():
+    scale = PercentageScale(DEFAULT_APP_SETTINGS["percentageRanges"])
+    indexes = scale.get_range_indexes(grading.np.array(PERCENTAGES))
+
+    assert [scale.ranges[index] for index in indexes] == [
+        scale.get_range(percentage) for percentage in PERCENTAGES
+    ]
+
+
+def linear_moment_template(moment, templates):
+    """Reference lookup: the linear scans used before templates were indexed."""
+    template_id = moment.get("evaluationMomentTemplateId")
+    if isinstance(template_id, str) and template_id:
+        matching_template = next((template for template in templates if template.get("id") == template_id), None)
+        if matching_template:
+            return matching_template
+
+    moment_type = grading.get_moment_type_label(moment)
+    return next((template for template in templates if template.get("type") == moment_type), None)
+
+
+def test_moment_template_index_matches_linear_lookup():
+    templates = [
+        {"id": "testes", "type": "Teste", "weightPercentage": 50},
+        {"id": "testes-2", "type": "Teste", "weightPercentage": 10},
+        {"id": "fichas", "type": "Ficha", "weightPercentage": 20},
+        {"type": "Questão aula", "weightPercentage": 30},
+    ]
+    moments = [
+        {"evaluationMomentTemplateId": "testes-2", "type": "Ficha"},
+        {"evaluationMomentTemplateId": "missing", "type": "teste"},
+        {"evaluationMomentTemplateType": "Ficha"},
+        {"type": "questao-aula"},
+        {"type": "Trabalho"},
+        {},
+    ]
+    index = grading.MomentTemplateIndex(templates)
+
+    for moment in moments:
+        assert index.get(moment) is linear_moment_template(moment, templates)
+        assert grading.get_moment_template(moment, templates) is linear_moment_template(moment, templates)
+
+
+def test_attitude_template_index_matches_linear_lookup():
+    generator = random.Random(7)
+    templates = grading.normalize_attitude_templates(
+        [
+            {"id": "participacao", "text": "Participação", "alias": "Part.", "weightPercentage": 10},
+            {"id": "comportamento", "text": "Comportamento", "alias": "Comp.", "weightPercentage": 5},
+            {"id": "7", "text": "Part.", "alias": "Trab.", "weightPercentage": 5},
+        ]
+    )
+    keys = ["participacao", "Participação", "Part.", "comportamento", "Comp.", "7", 7, "Trab.", "outra"]
+
+    def random_attitude():
+        field = generator.choice(["id", "templateId", "alias", "text"])
+        attitude = {field: generator.choice(keys)}
+        value_field = generator.choice(["value", "studentTotal", "total"])
+        attitude[value_field] = generator.choice([None, 0, 2.5, "4"])
+        return attitude
+
+    index = grading.AttitudeTemplateIndex(templates)
+    for _ in range(300):
+        student = {"_id": "student-1"}
+        for collection_key in ("attitudes", "attitudeValues", "attitudeAssessments"):
+            shape = generator.choice(["list", "dict", "missing"])
+            if shape == "list":
+                student[collection_key] = [random_attitude() for _ in range(generator.randint(0, 4))] + ["x"]
+            elif shape == "dict":
+                student[collection_key] = {
+                    str(generator.choice(keys)): generator.randint(0, 5) for _ in range(generator.randint(0, 3))
+                }
+        if generator.random() > 0.5:
+            student[generator.choice(["Part.", "comportamento", "Trab."])] = 3
+
+        assert index.get_student_values(student) == [
+            grading.get_student_attitude_value(student, template) for template in templates
+        ]
@@ -0,0 +1,99 @@
+import os
+import sys
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "db_service")))
+
+from memory_service import MemoryDatabase
+
+from routes import class_tests_router
+from utils import utilities
+from utils.app_settings import AppSettingsService
+from utils.bd_backends import InProcessBackend
+from utils.config import CLASS_MOMENTS_COLLECTION, MOMENTS_COLLECTION, STUDENTS_COLLECTION
+
+
+CLASS = {"userId": "user-1", "schoolId": "school-1", "yearId": "year-1", "classId": "class-1"}
+
+
+@pytest.fixture
+def school(monkeypatch):
+    database = MemoryDatabase()
+    backend = InProcessBackend()
+    backend.get_database = lambda: database
+    monkeypatch.setattr(class_tests_router.api_client, "backend", backend)
+    monkeypatch.setattr(class_tests_router, "app_settings_service", AppSettingsService(class_tests_router.api_client))
+
+    moment_id = database.insert(
+        MOMENTS_COLLECTION,
+        {
+            "userId": "user-1",
+            "classId": "class-1",
+            "name": "Teste 1",
+            "totalValue": 15,
+            "questions": [{"number": "1", "value": 10}, {"number": "2", "value": 10}],
+        },
+    )
+    app = FastAPI()
+    app.include_router(class_tests_router.school_tests_router, prefix="/config")
+    app.dependency_overrides[utilities.verificar_token_cookie] = lambda: None
+
+    return TestClient(app), database, moment_id
+
+
+def test_moment_statistics_summarizes_the_class_values(school):
+    client, database, moment_id = school
+    student_id = database.insert(STUDENTS_COLLECTION, {"userId": "user-1", "classId": "class-1", "name": "Ana"})
+    for question_number, value in (("1", 9), ("2", 3)):
+        client.put(
+            "/config/upsertmomentvalue",
+            json={**CLASS, "studentId": student_id, "momentId": moment_id, "questionNumber": question_number, "value": value},
+        )
+
+    response = client.post(
+        "/config/moment-statistics",
+        json={"userId": "user-1", "classId": "class-1", "momentId": moment_id},
+    )
+    missing = client.post("/config/moment-statistics", json={"userId": "user-1", "classId": "class-1"})
+    unknown = client.post(
+        "/config/moment-statistics",
+        json={"userId": "user-1", "classId": "class-1", "momentId": "missing"},
+    )
+
+    assert response.status_code == 200
+    statistics = response.json()
+    assert statistics["momentName"] == "Teste 1"
+    assert statistics["studentCount"] == 1
+    assert [question["mean"] for question in statistics["questions"]] == [9, 3]
+    assert statistics["questions"][0]["difficultyIndex"] == 0.9
+    assert statistics["total"]["mean"] == 12
+    assert sum(distribution["count"] for distribution in statistics["gradeDistribution"]) == 1
+    assert missing.status_code == 400
+    assert unknown.status_code == 404
+
+
+def test_moment_statistics_fails_when_class_data_cannot_be_read(school, monkeypatch):
+    client, database, moment_id = school
+    find = database.find
+    failing_collections = set()
+
+    def failing_find(collection_name, id="", filter=None):
+        if collection_name in failing_collections:
+            raise RuntimeError(f"{collection_name} is unavailable")
+        return find(collection_name, id, filter)
+
+    monkeypatch.setattr(database, "find", failing_find)
+    request = {"userId": "user-1", "classId": "class-1", "momentId": moment_id}
+    failing_collections.add(CLASS_MOMENTS_COLLECTION)
+    failed_values = client.post("/config/moment-statistics", json=request)
+    failing_collections.clear()
+    failing_collections.add(MOMENTS_COLLECTION)
+    failed_moments = client.post("/config/moment-statistics", json=request)
+
+    assert failed_values.status_code == failed_moments.status_code == 500
+    assert failed_values.json() == {"message": "Erro ao ler os dados da turma."}
@@ -0,0 +1,249 @@
+import os
+import sys
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "db_service")))
+
+from memory_service import MemoryDatabase
+
+from routes import class_tests_router
+from utils import utilities
+from utils.app_settings import AppSettingsService
+from utils.bd_backends import InProcessBackend
+from utils.config import CLASS_MOMENTS_COLLECTION, MOMENTS_COLLECTION, STUDENT_MOMENT_TOTALS_COLLECTION
+
+
+CELL = {
+    "userId": "user-1",
+    "schoolId": "school-1",
+    "yearId": "year-1",
+    "classId": "class-1",
+    "studentId": "student-1",
+}
+
+
+@pytest.fixture
+def school(monkeypatch):
+    database = MemoryDatabase()
+    backend = InProcessBackend()
+    backend.get_database = lambda: database
+    monkeypatch.setattr(class_tests_router.api_client, "backend", backend)
+    monkeypatch.setattr(class_tests_router, "app_settings_service", AppSettingsService(class_tests_router.api_client))
+
+    moment_id = database.insert(
+        MOMENTS_COLLECTION,
+        {
+            "userId": "user-1",
+            "classId": "class-1",
+            "name": "Teste 1",
+            "totalValue": 15,
+            "questions": [{"number": "1", "value": 10}, {"number": "2", "value": 10}],
+        },
+    )
+    app = FastAPI()
+    app.include_router(class_tests_router.school_tests_router, prefix="/config")
+    app.dependency_overrides[utilities.verificar_token_cookie] = lambda: None
+
+    return TestClient(app), database, moment_id
+
+
+def upsert(client, moment_id, question_number, value):
+    return client.put(
+        "/config/upsertmomentvalue",
+        json={**CELL, "momentId": moment_id, "questionNumber": question_number, "value": value},
+    )
+
+
+def get_stored_total(database):
+    documents = database.find(STUDENT_MOMENT_TOTALS_COLLECTION, filter={"studentId": "student-1"})
+    assert len(documents) == 1
+    return documents[0]["total"]
+
+
+def test_upsert_moment_value_maintains_student_moment_total(school):
+    client, database, moment_id = school
+
+    first = upsert(client, moment_id, "1", 7)
+    second = upsert(client, moment_id, "2", 4.5)
+    edited = upsert(client, moment_id, "1", 9.5)
+
+    assert first.status_code == 201
+    assert first.json()["value"]["studentMomentTotal"] == 7
+    assert second.status_code == 201
+    assert second.json()["value"]["studentMomentTotal"] == 11.5
+    assert edited.status_code == 200
+    assert edited.json()["value"]["value"] == 9.5
+    assert edited.json()["value"]["studentMomentTotal"] == 14
+    assert edited.json()["value"]["studentMomentMaxValue"] == 15
+    assert get_stored_total(database) == 14
+
+    listed = client.post("/config/findmomentsclass", json={**CELL, "momentId": moment_id}).json()
+    assert {value["studentMomentTotal"] for value in listed} == {14}
+    assert {value["studentMomentPercentageText"] for value in listed} == {
+        edited.json()["value"]["studentMomentPercentageText"],
+    }
+
+
+def test_upsert_moment_value_validates_with_stored_total(school):
+    client, database, moment_id = school
+    upsert(client, moment_id, "1", 9)
+
+    response = upsert(client, moment_id, "2", 7)
+
+    assert response.status_code == 400
+    assert response.json()["message"] == "O total do aluno não pode ultrapassar 15. Total atual: 16."
+    assert get_stored_total(database) == 9
+
+
+def test_upsert_moment_value_builds_missing_total_from_existing_values(school):
+    client, database, moment_id = school
+    database.insert(
+        CLASS_MOMENTS_COLLECTION,
+        {**CELL, "momentId": moment_id, "questionNumber": "1", "questionValue": 10, "value": 6},
+    )
+
+    response = upsert(client, moment_id, "2", 5)
+
+    assert response.status_code == 201
+    assert response.json()["value"]["studentMomentTotal"] == 11
+    assert get_stored_total(database) == 11
+
+
+def test_upsert_moment_value_keeps_total_when_stored_values_cannot_be_read(school, monkeypatch):
+    client, database, moment_id = school
+    upsert(client, moment_id, "1", 5)
+    upsert(client, moment_id, "2", 4)
+    find = database.find
+    failing_collections = set()
+
+    def failing_find(collection_name, id="", filter=None):
+        if collection_name in failing_collections:
+            raise RuntimeError(f"{collection_name} is unavailable")
+        return find(collection_name, id, filter)
+
+    monkeypatch.setattr(database, "find", failing_find)
+    failing_collections.add(STUDENT_MOMENT_TOTALS_COLLECTION)
+    failed_totals = upsert(client, moment_id, "2", 3)
+    failing_collections.clear()
+    failing_collections.add(CLASS_MOMENTS_COLLECTION)
+    failed_values = upsert(client, moment_id, "2", 3)
+    monkeypatch.setattr(database, "find", find)
+
+    assert failed_totals.status_code == failed_values.status_code == 500
+    assert failed_totals.json() == {"message": "Erro ao ler os valores do aluno."}
+    assert get_stored_total(database) == 9
+
+    edited = upsert(client, moment_id, "2", 3)
+
+    assert edited.status_code == 200
+    assert get_stored_total(database) == 8
+
+
+def upsert_grid(client, moment_id, values):
+    return client.put(
+        "/config/upsertmomentvalues",
+        json={**{key: value for key, value in CELL.items() if key != "studentId"}, "momentId": moment_id, "values": values},
+    )
+
+
+def test_upsert_moment_values_writes_grid_in_one_request(school):
+    client, database, moment_id = school
+    upsert(client, moment_id, "1", 2)
+
+    response = upsert_grid(
+        client,
+        moment_id,
+        [
+            {"studentId": "student-1", "questionNumber": "1", "value": 6},
+            {"studentId": "student-1", "questionNumber": "2", "value": 3},
+            {"studentId": "student-2", "questionNumber": "1", "value": "10"},
+            {"studentId": "student-2", "questionNumber": "1", "value": 9},
+        ],
+    )
+
+    assert response.status_code == 200
+    assert response.json()["count"] == 3
+    values = {(value["studentId"], value["questionNumber"]): value for value in response.json()["values"]}
+    assert len(values) == 3
+    assert values[("student-1", "1")]["value"] == 6
+    assert values[("student-1", "1")]["studentMomentTotal"] == 9
+    assert values[("student-2", "1")]["studentMomentTotal"] == 9
+    assert len(database.find(CLASS_MOMENTS_COLLECTION, filter={"studentId": "student-1"})) == 2
+    assert get_stored_total(database) == 9
+
+    edited = upsert(client, moment_id, "2", 5)
+    assert edited.json()["value"]["studentMomentTotal"] == 11
+
+
+def test_upsert_moment_values_rejects_whole_grid(school):
+    client, database, moment_id = school
+
+    response = upsert_grid(
+        client,
+        moment_id,
+        [
+            {"studentId": "student-1", "questionNumber": "1", "value": 9},
+            {"studentId": "student-1", "questionNumber": "2", "value": 8},
+            {"studentId": "student-2", "questionNumber": "1", "value": 11},
+            {"studentId": "student-2", "questionNumber": "2", "value": "abc"},
+        ],
+    )
+
+    assert response.status_code == 400
+    errors = response.json()["errors"]
+    assert [error["message"] for error in errors] == [
+        "O valor da questão 1 não pode ultrapassar 10.",
+        "Insere um valor válido para a questão.",
+        "O total do aluno não pode ultrapassar 15. Total atual: 17.",
+    ]
+    assert response.json()["message"] == errors[0]["message"]
+    assert errors[0]["index"] == 2
+    assert database.find(CLASS_MOMENTS_COLLECTION) == []
+    assert database.find(STUDENT_MOMENT_TOTALS_COLLECTION) == []
+
+
+def test_upsert_moment_values_fails_when_stored_values_cannot_be_read(school, monkeypatch):
+    client, database, moment_id = school
+    upsert(client, moment_id, "2", 4)
+    find = database.find
+
+    def failing_find(collection_name, id="", filter=None):
+        if collection_name == CLASS_MOMENTS_COLLECTION:
+            raise RuntimeError("class moments are unavailable")
+        return find(collection_name, id, filter)
+
+    monkeypatch.setattr(database, "find", failing_find)
+    response = upsert_grid(client, moment_id, [{"studentId": "student-1", "questionNumber": "1", "value": 6}])
+    missing_moment = upsert_grid(client, "missing", [{"studentId": "student-1", "questionNumber": "1", "value": 6}])
+    monkeypatch.setattr(database, "find", find)
+
+    assert response.status_code == 500
+    assert missing_moment.status_code == 500
+    assert len(database.find(CLASS_MOMENTS_COLLECTION, filter={"studentId": "student-1"})) == 1
+    assert get_stored_total(database) == 4
+
+
+def test_upsert_moment_values_totals_include_values_written_concurrently(school, monkeypatch):
+    client, database, moment_id = school
+    upsert_many = database.upsert_many
+
+    def upsert_many_with_concurrent_write(collection_name, operations):
+        result = upsert_many(collection_name, operations)
+        if collection_name == CLASS_MOMENTS_COLLECTION:
+            # A single-cell upsert of another question lands after the grid read its values
+            database.insert(
+                CLASS_MOMENTS_COLLECTION,
+                {**CELL, "momentId": moment_id, "questionNumber": "2", "value": 4},
+            )
+        return result
+
+    monkeypatch.setattr(database, "upsert_many", upsert_many_with_concurrent_write)
+    response = upsert_grid(client, moment_id, [{"studentId": "student-1", "questionNumber": "1", "value": 6}])
+
+    assert response.status_code == 200
+    assert get_stored_total(database) == 10
@@ -0,0 +1,88 @@
+import asyncio
+import os
+import sys
+
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "db_service")))
+
+from memory_service import MemoryDatabase
+
+from utils.bd_backends import InProcessBackend
+from utils.bd_client import BDClient
+from utils.report_janitor import ReportJanitor
+from utils.reports import TEMPORARY_FILE_MAX_AGE_SECONDS, GridFSReportStore, ReportCache
+
+
+NOW = 1_000_000
+
+
+def write_report(directory, name, size, age):
+    path = directory / name
+    path.write_bytes(b"x" * size)
+    os.utime(path, (NOW - age, NOW - age))
+    return path
+
+
+def test_janitor_evicts_expired_then_oldest_reports(tmp_path):
+    cache = ReportCache(tmp_path, max_bytes=250)
+    cache.load()
+    write_report(tmp_path, "expired.pdf", 100, age=500)
+    write_report(tmp_path, "old.pdf", 100, age=300)
+    write_report(tmp_path, "recent.pdf", 100, age=20)
+    # Written by another process after this one indexed the directory
+    write_report(tmp_path, "newest.pdf", 100, age=10)
+    write_report(tmp_path, "crashed.pdf.123.tmp", 10, age=TEMPORARY_FILE_MAX_AGE_SECONDS + 1)
+    write_report(tmp_path, "rendering.pdf.456.tmp", 10, age=1)
+    janitor = ReportJanitor(cache, max_age_seconds=400, clock=lambda: NOW)
+
+    evicted = asyncio.run(janitor.run_once())
+
+    assert evicted == 2
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["newest.pdf", "recent.pdf", "rendering.pdf.456.tmp"]
+    assert cache.get_metrics()["reports"] == 2
+    assert cache.get_metrics()["bytes"] == 200
+    assert cache.get_metrics()["evictions"] == 2
+    assert cache.get_metrics()["expired"] == 1
+    assert janitor.get_metrics()["runs"] == 1
+    assert janitor.get_metrics()["evictions"] == 2
+
+
+def test_janitor_trims_shared_store(tmp_path):
+    database = MemoryDatabase()
+    backend = InProcessBackend()
+    backend.get_database = lambda: database
+    store = GridFSReportStore(BDClient("http://unused", backend=backend))
+    cache = ReportCache(tmp_path, max_bytes=15)
+
+    async def scenario():
+        for name in ["a.pdf", "b.pdf", "c.pdf"]:
+            await store.put(name, b"%PDF-" + b"x" * 5)
+        database.files[store.bucket]["a.pdf"]["metadata"]["storedAt"] = NOW - 1000
+        janitor = ReportJanitor(cache, store, max_age_seconds=400, clock=lambda: NOW + 1)
+        return await janitor.run_once()
+
+    evicted = asyncio.run(scenario())
+
+    # a.pdf expired; b.pdf is the oldest of the files over max_bytes
+    assert evicted == 2
+    assert list(database.files[store.bucket]) == ["c.pdf"]
+    assert store.get_metrics() == {"reports": 1, "bytes": 10, "evictions": 2}
+
+
+def test_janitor_task_keeps_running_after_failures(tmp_path):
+    class BrokenCache(ReportCache):
+        def scan(self):
+            raise OSError("disk unavailable")
+
+    janitor = ReportJanitor(BrokenCache(tmp_path), interval_seconds=0.01)
+
+    async def scenario():
+        janitor.start()
+        await asyncio.sleep(0.05)
+        await janitor.stop()
+
+    asyncio.run(scenario())
+
+    assert janitor.failures >= 2
+    assert janitor.task is None
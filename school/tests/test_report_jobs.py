@@ -0,0 +1,173 @@
+import asyncio
+import os
+import sys
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "db_service")))
+
+from memory_service import MemoryDatabase
+
+from routes import class_tests_router
+from utils import utilities
+from utils.bd_backends import InProcessBackend
+from utils.config import REPORTS_BUCKET
+from utils.report_jobs import ReportJobs
+from utils.reports import GridFSReportStore, ReportCache
+from utils.workers import ProcessWorkerPool
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+def test_jobs_run_in_order_share_identical_requests_and_expire():
+    clock = FakeClock()
+    jobs = ReportJobs(max_running=1, ttl_seconds=60, clock=clock)
+    builds = []
+
+    async def build(name):
+        builds.append(name)
+        await asyncio.sleep(0.01)
+        return (f"/reports/{name}.pdf", None) if name != "broken" else (None, "Erro")
+
+    async def scenario():
+        first = jobs.submit("a", lambda: build("a"))
+        second = jobs.submit("b", lambda: build("b"))
+        duplicate = jobs.submit("a", lambda: build("a"))
+        failed = jobs.submit("c", lambda: build("broken"))
+        await asyncio.sleep(0)
+        statuses = [jobs.get(first["jobId"])["status"], jobs.get(second["jobId"])["status"]]
+        while any(job["status"] in ("queued", "running") for job in jobs.jobs.values()):
+            await asyncio.sleep(0.01)
+
+        resubmitted = jobs.submit("a", lambda: build("a"))
+        while jobs.get(resubmitted["jobId"])["status"] in ("queued", "running"):
+            await asyncio.sleep(0.01)
+
+        return first, duplicate, failed, statuses, resubmitted
+
+    first, duplicate, failed, statuses, resubmitted = asyncio.run(scenario())
+
+    assert duplicate["jobId"] == first["jobId"]
+    # A finished job is not shared: the data behind the report may have changed
+    assert resubmitted["jobId"] != first["jobId"]
+    assert statuses == ["running", "queued"]
+    assert builds == ["a", "b", "broken", "a"]
+    assert jobs.get(first["jobId"]) == {"jobId": first["jobId"], "status": "done", "url": "/reports/a.pdf"}
+    assert jobs.get(failed["jobId"]) == {"jobId": failed["jobId"], "status": "failed", "message": "Erro"}
+
+    clock.now = 61
+    assert jobs.get(first["jobId"]) is None
+    assert jobs.jobs_by_key == {}
+
+
+def wait_for_job(client, job):
+    deadline = time.monotonic() + 10
+    while job["status"] in ("queued", "running") and time.monotonic() < deadline:
+        time.sleep(0.02)
+        job = client.get(f"/config/report-jobs/{job['jobId']}").json()
+
+    return job
+
+
+def test_report_job_endpoints(monkeypatch):
+    monkeypatch.setattr(class_tests_router, "report_jobs", ReportJobs())
+    monkeypatch.setattr(class_tests_router, "report_workers", ProcessWorkerPool(0))
+    app = FastAPI()
+    app.include_router(class_tests_router.school_tests_router, prefix="/config")
+    app.dependency_overrides[utilities.verificar_token_cookie] = lambda: None
+    body = {"async": True, "title": "Relatório de teste", "headers": ["Aluno", "Total"], "rows": [["Ana", "10"]]}
+
+    with TestClient(app) as client:
+        submitted = client.post("/config/moment-assessment-report", json=body)
+        shared = client.post("/config/moment-assessment-report", json=body)
+        invalid = client.post("/config/moment-assessment-report", json={**body, "rows": []})
+
+        job = wait_for_job(client, submitted.json())
+        invalid_job = wait_for_job(client, invalid.json())
+
+        assert submitted.status_code == 202
+        assert job["status"] == "done"
+        assert wait_for_job(client, shared.json())["url"] == job["url"]
+        assert client.get(job["url"]).headers["content-type"] == "application/pdf"
+        assert invalid_job["status"] == "failed"
+        assert invalid_job["message"] == "Os campos 'title', 'headers' e 'rows' são obrigatórios."
+        assert client.get("/config/report-jobs/unknown").status_code == 404
+
+
+def test_identical_report_is_served_from_cache(monkeypatch, tmp_path):
+    workers = ProcessWorkerPool(0)
+    monkeypatch.setattr(class_tests_router, "report_workers", workers)
+    monkeypatch.setattr(class_tests_router, "report_cache", ReportCache(tmp_path))
+    app = FastAPI()
+    app.include_router(class_tests_router.school_tests_router, prefix="/config")
+    app.dependency_overrides[utilities.verificar_token_cookie] = lambda: None
+    client = TestClient(app)
+    body = {"title": "5.º A", "headers": ["Aluno", "Total"], "rows": [["Ana", "10"]]}
+
+    first = client.post("/config/moment-assessment-report", json=body)
+    second = client.post("/config/moment-assessment-report", json=body)
+    other_class = client.post("/config/moment-assessment-report", json={**body, "rows": [["Rui", "12"]]})
+
+    assert first.status_code == second.status_code == 201
+    assert second.json() == first.json()
+    assert other_class.json()["url"] != first.json()["url"]
+    assert workers.get_metrics()["completed"] == 2
+    assert client.get(first.json()["url"]).status_code == 200
+
+
+def build_report_client():
+    app = FastAPI()
+    app.include_router(class_tests_router.school_tests_router, prefix="/config")
+    app.dependency_overrides[utilities.verificar_token_cookie] = lambda: None
+    return TestClient(app)
+
+
+def test_streamed_report_is_rendered_in_memory(monkeypatch, tmp_path):
+    monkeypatch.setattr(class_tests_router, "report_workers", ProcessWorkerPool(0))
+    monkeypatch.setattr(class_tests_router, "report_cache", ReportCache(tmp_path))
+    body = {"title": "5.º A", "headers": ["Aluno", "Total"], "rows": [["Ana", "10"]], "delivery": "stream"}
+
+    response = build_report_client().post("/config/moment-assessment-report", json=body)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/pdf"
+    assert response.content.startswith(b"%PDF-")
+    assert int(response.headers["content-length"]) == len(response.content)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_reports_in_shared_store_are_served_by_any_instance(monkeypatch, tmp_path):
+    database = MemoryDatabase()
+    backend = InProcessBackend()
+    backend.get_database = lambda: database
+    api_client = class_tests_router.BDClient("http://unused", backend=backend)
+    workers = ProcessWorkerPool(0)
+    monkeypatch.setattr(class_tests_router, "report_workers", workers)
+    monkeypatch.setattr(class_tests_router, "report_store", GridFSReportStore(api_client))
+    monkeypatch.setattr(class_tests_router, "report_cache", ReportCache(tmp_path / "first"))
+    client = build_report_client()
+    body = {"title": "5.º A", "headers": ["Aluno", "Total"], "rows": [["Ana", "10"]]}
+
+    created = client.post("/config/moment-assessment-report", json=body)
+    again = client.post("/config/moment-assessment-report", json=body)
+    # Another instance, with its own (empty) reports directory
+    monkeypatch.setattr(class_tests_router, "report_cache", ReportCache(tmp_path / "second"))
+    served = client.get(created.json()["url"])
+
+    assert created.status_code == again.status_code == 201
+    assert workers.get_metrics()["completed"] == 1
+    assert [file["filename"] for file in database.find_files(REPORTS_BUCKET)] == [created.json()["path"]]
+    assert served.status_code == 200
+    assert served.content.startswith(b"%PDF-")
+    assert not (tmp_path / "first").exists() or list((tmp_path / "first").iterdir()) == []
+    assert client.get("/config/moment-assessment-report/missing.pdf").status_code == 404
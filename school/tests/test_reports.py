@@ -0,0 +1,55 @@
+import os
+import sys
+
+from reportlab.platypus import Paragraph
+
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.reports import (
+    CELL_FONT,
+    get_fast_cell,
+    get_report_key,
+    get_report_styles,
+    render_report_pdf,
+    split_report_columns,
+)
+
+
+def build_table(row_count, column_count):
+    headers = ["Aluno", *[f"Q{column}" for column in range(1, column_count)]]
+    rows = [[f"Aluno {row}", *[str(column % 20) for column in range(1, column_count)]] for row in range(row_count)]
+    return headers, rows
+
+
+def test_wide_tables_are_split_into_column_groups_with_the_first_column():
+    groups = split_report_columns(40)
+
+    assert len(groups) > 1
+    assert all(group[0] == 0 for group in groups)
+    assert [column for group in groups for column in group[1:]] == list(range(1, 40))
+    assert split_report_columns(6) == [[0, 1, 2, 3, 4, 5]]
+    assert split_report_columns(1) == [[0]]
+
+
+def test_fast_cells_are_plain_strings_unless_they_must_wrap():
+    style = get_report_styles()["ReportCell"]
+
+    assert get_report_styles() is get_report_styles()
+    assert get_fast_cell(12.5, 40, style, CELL_FONT) == "12.5"
+    wrapped = get_fast_cell("Maria & João " * 8, 40, style, CELL_FONT)
+    assert isinstance(wrapped, Paragraph)
+
+
+def test_render_modes_have_their_own_cache_keys_and_both_render(tmp_path):
+    headers, rows = build_table(60, 40)
+
+    assert get_report_key("Turma", headers, rows, "fast") != get_report_key("Turma", headers, rows, "standard")
+
+    fast_path = render_report_pdf("Turma", headers, rows, str(tmp_path / "fast.pdf"), "fast")
+    standard_path = render_report_pdf("Turma", headers, rows, str(tmp_path / "standard.pdf"), "standard")
+
+    for path in (fast_path, standard_path):
+        with open(path, "rb") as pdf:
+            assert pdf.read(5) == b"%PDF-"
+    assert not list(tmp_path.glob("*.tmp"))
@@ -0,0 +1,94 @@
+import asyncio
+import os
+import sys
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import main
+from utils import utilities
+from utils.bd_backends import HTTPBackend
+from utils.bd_client import BDClient
+from utils.request_context import (
+    DEADLINE_HEADER,
+    REQUEST_ID_HEADER,
+    DeadlineExceeded,
+    get_propagation_headers,
+    start_request,
+)
+
+
+def test_start_request_uses_incoming_headers():
+    async def run():
+        request_id = start_request({REQUEST_ID_HEADER: "req-1", DEADLINE_HEADER: "5000"}, 30000)
+        return request_id, get_propagation_headers()
+
+    request_id, headers = asyncio.run(run())
+
+    assert request_id == "req-1"
+    assert headers[REQUEST_ID_HEADER] == "req-1"
+    assert 4000 < int(headers[DEADLINE_HEADER]) <= 5000
+
+
+def test_start_request_generates_id_and_default_deadline():
+    async def run():
+        start_request({}, 30000)
+        return get_propagation_headers()
+
+    headers = asyncio.run(run())
+
+    assert len(headers[REQUEST_ID_HEADER]) == 32
+    assert 29000 < int(headers[DEADLINE_HEADER]) <= 30000
+
+
+def test_start_request_without_deadline_sends_only_request_id():
+    async def run():
+        start_request({REQUEST_ID_HEADER: "req-2"}, 0)
+        return get_propagation_headers()
+
+    assert asyncio.run(run()) == {REQUEST_ID_HEADER: "req-2"}
+
+
+def test_http_backend_does_not_call_db_service_after_deadline():
+    async def run():
+        start_request({DEADLINE_HEADER: "0"}, 30000)
+        await HTTPBackend("http://127.0.0.1:1/db-api", uds="").send("POST", "find", {"collection": "students"})
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(run())
+
+
+def test_bd_client_raises_deadline_exceeded_instead_of_an_empty_response():
+    backend = HTTPBackend("http://db-service/db-api", uds="")
+    backend.create_client = lambda: httpx.AsyncClient(
+        transport=httpx.MockTransport(lambda request: httpx.Response(504, json={"detail": "Deadline exceeded"}))
+    )
+    client = BDClient("http://db-service/db-api", backend=backend)
+
+    async def run(remaining_ms):
+        start_request({DEADLINE_HEADER: remaining_ms}, 30000)
+        return await client.find(endpoint="find", payload={"collection": "students"})
+
+    # Past the deadline before the call, and when db_service answers that it passed
+    for remaining_ms in ("0", "5000"):
+        with pytest.raises(DeadlineExceeded):
+            asyncio.run(run(remaining_ms))
+
+
+def test_request_past_its_deadline_is_answered_with_504():
+    main.app.dependency_overrides[utilities.verificar_token_cookie] = lambda: None
+    try:
+        response = TestClient(main.app).post(
+            "/config/findmomentsclass",
+            json={"userId": "user-1", "classId": "class-1"},
+            headers={DEADLINE_HEADER: "0"},
+        )
+    finally:
+        main.app.dependency_overrides.clear()
+
+    assert response.status_code == 504
+    assert response.json() == {"message": "O pedido excedeu o tempo limite."}
@@ -0,0 +1,354 @@
+import asyncio
+import io
+import json
+import os
+import sys
+import zipfile
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "db_service")))
+
+from memory_service import MemoryDatabase
+
+from routes import class_tests_router
+from utils import utilities
+from utils.app_settings import AppSettingsService
+from utils.bd_backends import InProcessBackend
+from utils.config import (
+    CLASS_MOMENTS_COLLECTION,
+    CLASSES_COLLECTION,
+    MOMENTS_COLLECTION,
+    SEMESTER_EVALUATIONS_COLLECTION,
+    SEMESTER_SUMMARIES_COLLECTION,
+    STUDENTS_COLLECTION,
+)
+from utils.grading import DEFAULT_APP_SETTINGS, get_semester_evaluations_comparison_payload
+from utils.report_archives import ArchiveProgress
+from utils.semester_summaries import SemesterSummaryStore
+from utils.workers import ProcessWorkerPool
+
+
+SUMMARY_REQUEST = {
+    "userId": "user-1",
+    "schoolId": "school-1",
+    "yearId": "year-1",
+    "classId": "class-1",
+    "semester": "1",
+}
+
+
+class CountingDatabase(MemoryDatabase):
+    def __init__(self):
+        super().__init__()
+        self.student_reads = 0
+        self.failing_collections = set()
+
+    def find(self, collection_name, id="", filter=None):
+        if collection_name in self.failing_collections:
+            raise RuntimeError(f"{collection_name} is unavailable")
+        if collection_name == STUDENTS_COLLECTION:
+            self.student_reads += 1
+        return super().find(collection_name, id, filter)
+
+
+@pytest.fixture
+def school(monkeypatch):
+    database = CountingDatabase()
+    backend = InProcessBackend()
+    backend.get_database = lambda: database
+    api_client = class_tests_router.api_client
+    monkeypatch.setattr(api_client, "backend", backend)
+    monkeypatch.setattr(class_tests_router, "app_settings_service", AppSettingsService(api_client))
+    monkeypatch.setattr(class_tests_router, "semester_summary_store", SemesterSummaryStore(api_client))
+
+    database.collections[CLASSES_COLLECTION] = [
+        {"_id": class_id, "userId": "user-1", "schoolId": "school-1", "yearId": "year-1", "name": name}
+        for class_id, name in [("class-1", "5.º A"), ("class-2", "5.º B")]
+    ]
+    student_id = database.insert(STUDENTS_COLLECTION, {"userId": "user-1", "classId": "class-1", "name": "Ana"})
+    database.insert(STUDENTS_COLLECTION, {"userId": "user-1", "classId": "class-2", "name": "Bruno"})
+    moment_id = database.insert(
+        MOMENTS_COLLECTION,
+        {
+            "userId": "user-1",
+            "classId": "class-1",
+            "name": "Teste 1",
+            "semester": "1",
+            "type": "Teste",
+            "totalValue": 20,
+            "questions": [{"number": "1", "value": 10}, {"number": "2", "value": 10}],
+        },
+    )
+    app = FastAPI()
+    app.include_router(class_tests_router.school_tests_router, prefix="/config")
+    app.dependency_overrides[utilities.verificar_token_cookie] = lambda: None
+
+    return TestClient(app), database, {"momentId": moment_id, "studentId": student_id}
+
+
+def get_summary(client):
+    response = client.post("/config/semester-evaluations-summary", json=SUMMARY_REQUEST)
+    assert response.status_code == 200
+    return response.json()
+
+
+def upsert(client, cell, question_number, value):
+    response = client.put(
+        "/config/upsertmomentvalue",
+        json={**SUMMARY_REQUEST, **cell, "questionNumber": question_number, "value": value},
+    )
+    assert response.status_code in (200, 201)
+
+
+def test_summary_is_materialized_until_class_data_changes(school):
+    client, database, cell = school
+
+    first = get_summary(client)
+    second = get_summary(client)
+
+    assert database.student_reads == 1
+    assert second == first
+    assert first["title"] == "Avaliações - 1.º semestre"
+
+    upsert(client, cell, "1", 8)
+    third = get_summary(client)
+
+    assert database.student_reads == 2
+    assert third["rows"][0][1] == "8"
+
+
+def test_summary_is_discarded_when_its_revision_cannot_be_increased(school, monkeypatch):
+    client, database, cell = school
+    get_summary(client)
+    increment = database.increment
+
+    def failing_increment(collection_name, filter, increments):
+        if collection_name == SEMESTER_SUMMARIES_COLLECTION:
+            raise RuntimeError("semester summaries are unavailable")
+        return increment(collection_name, filter, increments)
+
+    monkeypatch.setattr(database, "increment", failing_increment)
+    upsert(client, cell, "1", 8)
+    monkeypatch.setattr(database, "increment", increment)
+
+    assert database.find(SEMESTER_SUMMARIES_COLLECTION, filter={}) == []
+    assert get_summary(client)["rows"][0][1] == "8"
+
+
+def test_summary_is_recomputed_when_settings_change(school):
+    client, database, _ = school
+    first = get_summary(client)
+
+    class_tests_router.app_settings_service.replace(
+        {**DEFAULT_APP_SETTINGS, "evaluationMomentTemplates": [{"type": "Teste", "weightPercentage": 50}]},
+    )
+    second = get_summary(client)
+
+    assert database.student_reads == 2
+    assert first["groups"][0]["weightPercentage"] == 0
+    assert second["groups"][0]["weightPercentage"] == 50
+
+
+def test_has_unsaved_changes_uses_saved_content_hash(school):
+    client, database, cell = school
+
+    assert get_summary(client)["hasUnsavedChanges"]
+
+    saved = client.put("/config/upsertsemesterevaluations", json=SUMMARY_REQUEST)
+    assert saved.status_code == 201
+    assert database.find(SEMESTER_EVALUATIONS_COLLECTION)[0]["contentHash"] == saved.json()["value"]["contentHash"]
+    assert not get_summary(client)["hasUnsavedChanges"]
+
+    upsert(client, cell, "2", 5)
+    assert get_summary(client)["hasUnsavedChanges"]
+
+
+def test_saved_summary_without_content_hash_is_compared_by_content(school):
+    client, database, _ = school
+    summary = get_summary(client)
+    database.insert(
+        SEMESTER_EVALUATIONS_COLLECTION,
+        {**SUMMARY_REQUEST, **get_semester_evaluations_comparison_payload(summary)},
+    )
+
+    assert not get_summary(client)["hasUnsavedChanges"]
+
+
+def test_summary_built_from_older_revision_is_not_stored():
+    database = MemoryDatabase()
+    backend = InProcessBackend()
+    backend.get_database = lambda: database
+    store = SemesterSummaryStore(class_tests_router.BDClient("http://unused", backend=backend))
+
+    async def scenario():
+        revision = await store.get_revision("user-1", "class-1", "1")
+        await store.mark_dirty("user-1", "class-1")
+        stored = await store.save("user-1", "class-1", "1", revision, "settings", {"rows": []})
+        document = await store.find("user-1", "class-1", "1")
+        return stored, document
+
+    stored, document = asyncio.run(scenario())
+
+    assert not stored
+    assert store.get_fresh_content(document, "settings") is None
+
+
+def test_year_summary_streams_every_class(school, monkeypatch):
+    client, database, cell = school
+    workers = ProcessWorkerPool(2)
+    monkeypatch.setattr(class_tests_router, "summary_workers", workers)
+    upsert(client, cell, "1", 7)
+    class_summary = get_summary(client)
+    year_request = {key: value for key, value in SUMMARY_REQUEST.items() if key != "classId"}
+
+    try:
+        response = client.post("/config/year-semester-evaluations-summary", json=year_request)
+        again = client.post("/config/year-semester-evaluations-summary", json=year_request)
+    finally:
+        workers.shutdown()
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = {line["classId"]: line for line in map(json.loads, response.text.splitlines())}
+    assert set(lines) == {"class-1", "class-2"}
+    assert lines["class-1"]["summary"] == {**class_summary, "className": "5.º A"}
+    assert lines["class-2"]["summary"]["rows"] == [["Bruno", "0", "1"]]
+    assert lines["class-2"]["summary"]["hasUnsavedChanges"]
+    # class-1 was already materialized; class-2 was built in a worker and stored
+    assert database.student_reads == 2
+    assert sorted(line["classId"] for line in map(json.loads, again.text.splitlines())) == ["class-1", "class-2"]
+    assert database.student_reads == 2
+
+
+def test_year_summary_requires_classes(school):
+    client, database, _ = school
+    database.collections[CLASSES_COLLECTION] = []
+
+    response = client.post("/config/year-semester-evaluations-summary", json={**SUMMARY_REQUEST, "classId": None})
+
+    assert response.status_code == 404
+    assert response.json()["message"] == "Não foram encontradas turmas para o ano letivo."
+
+
+def test_summary_is_not_built_nor_stored_when_class_data_cannot_be_read(school, monkeypatch):
+    client, database, cell = school
+    monkeypatch.setattr(class_tests_router, "summary_workers", ProcessWorkerPool(0))
+    upsert(client, cell, "1", 7)
+    database.failing_collections.add(CLASS_MOMENTS_COLLECTION)
+    year_request = {key: value for key, value in SUMMARY_REQUEST.items() if key != "classId"}
+
+    response = client.post("/config/semester-evaluations-summary", json=SUMMARY_REQUEST)
+    year_response = client.post("/config/year-semester-evaluations-summary", json=year_request)
+
+    assert response.status_code == 500
+    assert response.json() == {"message": "Erro ao ler os dados da turma."}
+    lines = [json.loads(line) for line in year_response.text.splitlines()]
+    assert {line["classId"]: line.get("message") for line in lines} == {
+        "class-1": "Erro ao calcular o resumo da turma.",
+        "class-2": "Erro ao calcular o resumo da turma.",
+    }
+    assert not any(document.get("content") for document in database.find(SEMESTER_SUMMARIES_COLLECTION, filter={}))
+
+    database.failing_collections.clear()
+    assert get_summary(client)["rows"][0][1] == "7"
+
+
+def test_year_summary_exports_one_worksheet_per_class(school):
+    client, _, cell = school
+    upsert(client, cell, "1", 7)
+    year_request = {key: value for key, value in SUMMARY_REQUEST.items() if key != "classId"}
+
+    response = client.post("/config/moment-assessment-report/export", json={
+        **year_request, "reportType": "year-semester-evaluations", "format": "xlsx",
+    })
+
+    assert response.status_code == 200
+    workbook = zipfile.ZipFile(io.BytesIO(response.content))
+    sheets = sorted(name for name in workbook.namelist() if name.startswith("xl/worksheets/"))
+    assert sheets == ["xl/worksheets/sheet1.xml", "xl/worksheets/sheet2.xml"]
+    assert "5.º B" in workbook.read("xl/workbook.xml").decode("utf-8")
+    assert "Bruno" in "".join(workbook.read(name).decode("utf-8") for name in sheets)
+
+
+def test_year_reports_archive_streams_every_class_report(school, monkeypatch):
+    client, _, cell = school
+    monkeypatch.setattr(class_tests_router, "report_workers", ProcessWorkerPool(0))
+    monkeypatch.setattr(class_tests_router, "archive_progress", ArchiveProgress())
+    upsert(client, cell, "1", 7)
+    year_request = {key: value for key, value in SUMMARY_REQUEST.items() if key != "classId"}
+
+    response = client.post("/config/year-reports-archive", json=year_request)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+    archive = zipfile.ZipFile(io.BytesIO(response.content))
+    assert sorted(archive.namelist()) == ["5_A/Teste_1.pdf", "5_A/semestre_1.pdf", "5_B/semestre_1.pdf"]
+    assert all(archive.read(name).startswith(b"%PDF-") for name in archive.namelist())
+    progress = client.get(f"/config/report-archives/{response.headers['x-archive-id']}").json()
+    assert progress == {
+        "archiveId": response.headers["x-archive-id"],
+        "status": "done",
+        "total": 3,
+        "done": 3,
+        "failed": 0,
+    }
+    assert client.get("/config/report-archives/unknown").status_code == 404
+
+
+def test_year_reports_archive_is_not_streamed_when_class_data_cannot_be_read(school, monkeypatch):
+    client, database, cell = school
+    monkeypatch.setattr(class_tests_router, "report_workers", ProcessWorkerPool(0))
+    monkeypatch.setattr(class_tests_router, "archive_progress", ArchiveProgress())
+    upsert(client, cell, "1", 7)
+    database.failing_collections.add(CLASS_MOMENTS_COLLECTION)
+    year_request = {key: value for key, value in SUMMARY_REQUEST.items() if key != "classId"}
+
+    response = client.post("/config/year-reports-archive", json=year_request)
+
+    assert response.status_code == 500
+    assert response.json() == {"message": "Erro ao ler os dados das turmas."}
+    assert "x-archive-id" not in response.headers
+
+
+def test_semester_simulation_grades_every_scenario_against_current_settings(school):
+    client, _, cell = school
+    upsert(client, cell, "1", 8)
+    upsert(client, cell, "2", 7)
+    scenarios = [
+        {"name": "Só testes", "evaluationMomentTemplates": [{"type": "Teste", "weightPercentage": 100}]},
+        {"id": "metade", "evaluationMomentTemplates": [{"type": "Teste", "weightPercentage": 50}]},
+    ]
+
+    response = client.post("/config/semester-evaluations-simulation", json={**SUMMARY_REQUEST, "scenarios": scenarios})
+    no_scenarios = client.post("/config/semester-evaluations-simulation", json={**SUMMARY_REQUEST, "scenarios": []})
+    missing = client.post("/config/semester-evaluations-simulation", json={"userId": "user-1", "scenarios": scenarios})
+
+    assert response.status_code == 200
+    simulation = response.json()
+    assert simulation["studentCount"] == 1
+    assert simulation["current"]["students"][0]["studentName"] == "Ana"
+    only_tests, half = simulation["scenarios"]
+    assert (only_tests["name"], half["id"], half["name"]) == ("Só testes", "metade", "Cenário 2")
+    assert only_tests["students"][0]["finalValue"] == 15
+    assert only_tests["students"][0]["finalPercentage"] == 75.0
+    assert half["students"][0]["finalPercentage"] == 75.0
+    assert half["students"][0]["delta"]["finalValue"] == 7.5 - simulation["current"]["students"][0]["finalValue"]
+    assert no_scenarios.status_code == 400
+    assert missing.status_code == 400
+
+
+def test_semester_simulation_fails_when_class_data_cannot_be_read(school):
+    client, database, cell = school
+    upsert(client, cell, "1", 8)
+    database.failing_collections.add(CLASS_MOMENTS_COLLECTION)
+    scenarios = [{"evaluationMomentTemplates": [{"type": "Teste", "weightPercentage": 100}]}]
+
+    response = client.post("/config/semester-evaluations-simulation", json={**SUMMARY_REQUEST, "scenarios": scenarios})
+
+    assert response.status_code == 500
+    assert response.json() == {"message": "Erro ao ler os dados da turma."}
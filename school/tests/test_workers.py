@@ -0,0 +1,111 @@
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.reports import ReportCache, get_report_key, render_report_pdf
+from utils.workers import ProcessWorkerPool, WorkerPoolFull
+
+
+def test_pool_queues_tasks_and_rejects_when_queue_is_full():
+    pool = ProcessWorkerPool(1, max_queue=1)
+
+    async def scenario():
+        first = asyncio.ensure_future(pool.run(time.sleep, 0.3))
+        second = asyncio.ensure_future(pool.run(sum, [1, 2, 3]))
+        await asyncio.sleep(0.05)
+        waiting = pool.get_metrics()
+
+        with pytest.raises(WorkerPoolFull):
+            await pool.run(sum, [1])
+
+        return waiting, await first, await second
+
+    try:
+        waiting, first, second = asyncio.run(scenario())
+    finally:
+        pool.shutdown()
+
+    assert (waiting["running"], waiting["queued"]) == (1, 1)
+    assert first is None
+    assert second == 6
+    assert pool.get_metrics() == {
+        "workers": 1,
+        "maxQueue": 1,
+        "queued": 0,
+        "running": 0,
+        "completed": 2,
+        "failed": 0,
+        "rejected": 1,
+    }
+
+
+def test_pool_does_not_fork_workers_from_the_threaded_server():
+    pool = ProcessWorkerPool(1)
+    try:
+        start_method = pool.get_executor()._mp_context.get_start_method()
+        assert asyncio.run(pool.run(sum, [1, 2])) == 3
+    finally:
+        pool.shutdown()
+
+    assert start_method in ("forkserver", "spawn")
+
+
+def test_report_renders_without_blocking_the_event_loop(tmp_path):
+    pool = ProcessWorkerPool(1)
+    headers = ["Aluno", *[f"Q{number}" for number in range(1, 21)], "Total"]
+    rows = [[f"Aluno {index}", *["5"] * 20, "100"] for index in range(600)]
+
+    async def scenario():
+        ticks = 0
+        render = asyncio.ensure_future(
+            pool.run(render_report_pdf, "Relatório", headers, rows, str(tmp_path / "report.pdf"))
+        )
+        while not render.done():
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+        return ticks, await render
+
+    try:
+        ticks, pdf_path = asyncio.run(scenario())
+    finally:
+        pool.shutdown()
+
+    assert ticks > 5
+    assert pdf_path == str(tmp_path / "report.pdf")
+    with open(pdf_path, "rb") as pdf_file:
+        assert pdf_file.read(5) == b"%PDF-"
+
+
+def test_report_cache_evicts_least_recently_used_reports(tmp_path):
+    cache = ReportCache(tmp_path, max_bytes=250)
+    paths = []
+    for name in ["a", "b", "c"]:
+        path = cache.get_path("Turma", get_report_key(name, ["Aluno"], [[name]]))
+        path.write_bytes(b"x" * 100)
+        cache.add(path)
+        paths.append(path)
+        if name == "b":
+            assert cache.get(paths[0]) == paths[0]
+
+    assert len({path.name for path in paths}) == 3
+    assert [path.exists() for path in paths] == [True, False, True]
+    assert cache.get(paths[1]) is None
+    assert cache.get_metrics() == {
+        "reports": 2,
+        "bytes": 200,
+        "maxBytes": 250,
+        "hits": 1,
+        "misses": 1,
+        "evictions": 1,
+        "expired": 0,
+    }
+
+    reloaded = ReportCache(tmp_path, max_bytes=250)
+    assert reloaded.get(paths[2]) == paths[2]
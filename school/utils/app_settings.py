@@ -0,0 +1,137 @@
+"""
+app_settings.py
+
+In-memory cache of the normalized app settings of the school service.
+
+AppSettingsService loads the `appsettings` document from db_service, normalizes it and compiles
+the grading lookups once (CompiledSettings: percentage scale and template index). The snapshot
+is reused until APP_SETTINGS_TTL_SECONDS have passed or PUT /config/app-settings replaces it.
+Every change of the settings gets a new version stamp.
+
+Classes:
+    - AppSettingsService: Returns the current CompiledSettings, refreshing them when needed.
+"""
+
+import asyncio
+import time
+
+from utils.config import APP_SETTINGS_TTL_SECONDS
+from utils.grading import APP_SETTINGS_KEY, CompiledSettings, normalize_app_settings
+from utils.logging import logging
+
+APP_SETTINGS_COLLECTION = "appsettings"
+
+
+class AppSettingsService:
+    """
+    Holds the normalized app settings in memory with a version stamp.
+
+    Args:
+        api_client (BDClient): Client used to read and repair the settings document.
+        ttl_seconds (float): How long a loaded snapshot is reused before reading it again, so
+            changes made through other instances are picked up.
+        clock (Callable[[], float]): Monotonic clock, replaceable in tests.
+    """
+    def __init__(self, api_client, ttl_seconds: float = APP_SETTINGS_TTL_SECONDS, clock=time.monotonic):
+        self.api_client = api_client
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.compiled = None
+        self.stored = False
+        self.version = 0
+        self.expires_at = 0
+        self.lock = None
+        self.lock_loop = None
+
+    def get_lock(self):
+        """
+        Return the lock bound to the running event loop, so concurrent requests refresh once.
+        """
+        loop = asyncio.get_running_loop()
+        if self.lock is None or self.lock_loop is not loop:
+            self.lock = asyncio.Lock()
+            self.lock_loop = loop
+
+        return self.lock
+
+    def is_fresh(self):
+        return self.compiled is not None and self.clock() < self.expires_at
+
+    async def get(self):
+        """
+        Return the current settings, reading them from db_service when the snapshot expired.
+
+        Returns:
+            CompiledSettings: The normalized settings (`.settings`) and their lookups.
+        """
+        if self.is_fresh():
+            return self.compiled
+
+        async with self.get_lock():
+            if self.is_fresh():
+                return self.compiled
+
+            return await self.refresh()
+
+    async def refresh(self):
+        """
+        Read the settings document, repair it in the database when normalization changed it
+        and store the result.
+        """
+        response = await self.api_client.find(
+            endpoint="find",
+            payload={"collection": APP_SETTINGS_COLLECTION, "query": {"key": APP_SETTINGS_KEY}},
+        )
+        if "documents" not in response:
+            # db_service failed: keep serving the last snapshot (or the defaults) without caching the failure
+            logging.warning("AppSettingsService.refresh();could not read the app settings")
+            return self.compiled or CompiledSettings(self.normalize(None), self.version)
+
+        documents = response["documents"]
+        document = documents[0] if documents else None
+        settings = self.normalize(document)
+
+        if document is not None and any(document.get(key) != value for key, value in settings.items()):
+            await self.api_client.update(
+                endpoint="update",
+                payload={
+                    "collection": APP_SETTINGS_COLLECTION,
+                    "query": {"key": APP_SETTINGS_KEY},
+                    "data": settings,
+                },
+            )
+
+        self.stored = document is not None
+        return self.replace(settings)
+
+    def normalize(self, document):
+        settings = normalize_app_settings(document)
+        settings.pop("_id", None)
+        return settings
+
+    def replace(self, settings, stored: bool = None):
+        """
+        Store the given normalized settings, compiling them under a new version when they changed.
+
+        Args:
+            settings (dict): The normalized settings, e.g. the data saved by PUT /config/app-settings.
+            stored (bool, optional): Whether the settings document exists in the database.
+
+        Returns:
+            CompiledSettings: The current settings.
+        """
+        if stored is not None:
+            self.stored = stored
+
+        if self.compiled is None or self.compiled.settings != settings:
+            self.version += 1
+            self.compiled = CompiledSettings(settings, self.version)
+
+        self.expires_at = self.clock() + self.ttl_seconds
+        return self.compiled
+
+    def invalidate(self):
+        """
+        Force the next get() to read the settings from db_service again.
+        """
+        self.expires_at = 0
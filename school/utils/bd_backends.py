@@ -0,0 +1,298 @@
+"""
+bd_backends.py
+
+This file contains the backends used by BDClient to execute database operations.
+
+A backend receives the HTTP method, the db_service endpoint name (e.g., "find", "insert")
+and the payload, and returns the same JSON-like dictionary that db_service would return.
+
+Backends:
+    - HTTPBackend: Sends the request to db_service over HTTP (default), using TCP or a
+      Unix domain socket (BD_UDS_PATH).
+    - InProcessBackend: Calls the db_service `Database` engine directly inside this process,
+      skipping the HTTP hop. Intended for single-host deployments.
+
+Configuration:
+    - BD_BACKEND: "http" (default) or "inprocess".
+    - BD_UDS_PATH: Unix domain socket of db_service, used by the HTTP backend.
+    - DB_SERVICE_PATH: Path to the db_service folder, used by the in-process backend.
+"""
+
+import asyncio
+import copy
+import importlib
+import importlib.machinery
+import importlib.util
+import sys
+import threading
+import weakref
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import httpx
+
+from utils.config import BD_BACKEND, BD_UDS_PATH, DB_SERVICE_PATH
+from utils.logging import logging
+from utils.request_context import DeadlineExceeded, check_deadline, get_propagation_headers, get_remaining_ms
+
+
+class HTTPBackend:
+    """
+    Executes database operations through the db_service REST API.
+
+    Args:
+        base_url (str): The base URL of the REST API.
+        uds (str, optional): Unix domain socket of db_service. When empty, TCP is used.
+    """
+    # Every HTTP backend of the process, closed together when the server shuts down
+    instances = weakref.WeakSet()
+
+    def __init__(self, base_url: str, uds: str = BD_UDS_PATH):
+        self.base_url = base_url
+        self.uds = uds
+        self.client = None
+        self.client_loop = None
+        HTTPBackend.instances.add(self)
+
+    def create_client(self):
+        """
+        Create the httpx client, connecting over the Unix domain socket when configured.
+        """
+        if self.uds:
+            return httpx.AsyncClient(transport=httpx.AsyncHTTPTransport(uds=self.uds))
+
+        return httpx.AsyncClient()
+
+    def get_client(self):
+        """
+        Return the client bound to the running event loop, creating it when needed.
+        Reusing it keeps connections alive and avoids rebuilding the client per request; a
+        client left on another event loop is closed.
+        """
+        loop = asyncio.get_running_loop()
+        if self.client is not None and self.client_loop is not loop:
+            self.discard_client()
+
+        if self.client is None:
+            self.client = self.create_client()
+            self.client_loop = loop
+
+        return self.client
+
+    def discard_client(self):
+        """
+        Close the client of a previous event loop on that loop, or drop it when the loop is closed
+        (its connections were closed with it).
+        """
+        client, client_loop = self.client, self.client_loop
+        self.client = None
+        self.client_loop = None
+        if not client_loop.is_closed():
+            asyncio.run_coroutine_threadsafe(client.aclose(), client_loop)
+
+    async def aclose(self):
+        """
+        Close the client and its connections.
+        """
+        client = self.client
+        self.client = None
+        self.client_loop = None
+        if client is not None:
+            await client.aclose()
+
+    async def send(self, method: str, endpoint: str, payload: Optional[Dict[str, Any]] = None):
+        """
+        Send a request to db_service.
+
+        Args:
+            method (str): The HTTP method (POST, PUT, DELETE).
+            endpoint (str): The API endpoint (e.g., "find").
+            payload (Dict[str, Any]): The JSON body of the request.
+
+        Returns:
+            Dict[str, Any]: The JSON response from the API.
+        """
+        url = f"{self.base_url}/{endpoint}"
+
+        # Do not start work the caller is no longer waiting for; otherwise forward the
+        # request id and the remaining deadline to db_service
+        check_deadline()
+        remaining_ms = get_remaining_ms()
+        try:
+            response = await self.get_client().request(
+                method,
+                url,
+                json=payload,
+                headers=get_propagation_headers(),
+                timeout=remaining_ms / 1000 if remaining_ms is not None else httpx.USE_CLIENT_DEFAULT,
+            )
+        except httpx.TimeoutException as e:
+            if remaining_ms is None:
+                raise
+            raise DeadlineExceeded(f"Deadline exceeded calling db_service {endpoint}: {e}") from e
+
+        # db_service answers 504 when the forwarded deadline passed while it worked
+        if response.status_code == 504:
+            raise DeadlineExceeded(f"Deadline exceeded in db_service {endpoint}")
+
+        # Raise an exception for any HTTP errors
+        response.raise_for_status()
+        return response.json()
+
+
+DB_SERVICE_PACKAGE = "db_service"
+
+
+def import_db_service_module(name: str, db_service_path: str = DB_SERVICE_PATH):
+    """
+    Import a module of the db_service `utils` folder under a package-qualified name
+    (e.g. "db_service.utils.database"), so it never collides with the school `utils` package.
+    The db_service modules import each other with relative imports, which resolve inside
+    that package.
+
+    Args:
+        name (str): The module name inside db_service/utils (e.g., "operations").
+        db_service_path (str): Path to the db_service folder.
+
+    Raises:
+        FileNotFoundError: When db_service_path has no such module.
+    """
+    module_path = Path(db_service_path) / "utils" / f"{name}.py"
+    if not module_path.is_file():
+        raise FileNotFoundError(f"db_service module not found: {module_path}")
+
+    package = sys.modules.get(DB_SERVICE_PACKAGE)
+    if package is None:
+        spec = importlib.machinery.ModuleSpec(DB_SERVICE_PACKAGE, None, is_package=True)
+        spec.submodule_search_locations = [str(Path(db_service_path))]
+        package = importlib.util.module_from_spec(spec)
+        sys.modules[DB_SERVICE_PACKAGE] = package
+
+    return importlib.import_module(f"{DB_SERVICE_PACKAGE}.utils.{name}")
+
+
+def load_db_service_engine(db_service_path: str = DB_SERVICE_PATH):
+    """
+    Import the db_service `Database` engine (db_service/utils/database.py) with its own modules.
+
+    Returns:
+        tuple: The db_service `database` and `request_context` modules.
+
+    Raises:
+        FileNotFoundError: When db_service_path has no db_service engine.
+        ImportError: When a dependency of the engine (e.g. pymongo) is not installed.
+    """
+    database_module = import_db_service_module("database", db_service_path)
+    return database_module, import_db_service_module("request_context", db_service_path)
+
+
+class InProcessBackend:
+    """
+    Executes database operations by calling the db_service `Database` engine directly.
+
+    The engine is loaded once from DB_SERVICE_PATH (see load_db_service_engine) and shared by
+    every BDClient in the process. Calls run in a worker thread because PyMongo is blocking,
+    with the request id and deadline of the school request, as db_service would receive them.
+    """
+
+    _database = None
+    _operations = None
+    _request_context = None
+    _deadline_errors = ()
+    _lock = threading.Lock()
+
+    def __init__(self, db_service_path: str = DB_SERVICE_PATH):
+        self.db_service_path = db_service_path
+
+    def get_database(self):
+        """
+        Load the db_service `Database` singleton, importing it on first use.
+        """
+        with InProcessBackend._lock:
+            if InProcessBackend._database is None:
+                database_module, request_context_module = load_db_service_engine(self.db_service_path)
+                InProcessBackend._request_context = request_context_module
+                # The engine's own deadline errors, raised as this service's DeadlineExceeded
+                InProcessBackend._deadline_errors = (
+                    request_context_module.DeadlineExceeded,
+                    database_module.ExecutionTimeout,
+                )
+                InProcessBackend._database = database_module.database
+                logging.info(f"InProcessBackend();database loaded from {self.db_service_path}")
+
+        return InProcessBackend._database
+
+    async def send(self, method: str, endpoint: str, payload: Optional[Dict[str, Any]] = None):
+        """
+        Execute the operation that db_service would run for the given endpoint.
+
+        Args:
+            method (str): The HTTP method (kept for interface compatibility).
+            endpoint (str): The db_service endpoint name (e.g., "find").
+            payload (Dict[str, Any]): The request body.
+
+        Returns:
+            Dict[str, Any]: The same response db_service would return.
+        """
+        check_deadline()
+
+        # Copy the payload so the engine never mutates the caller's data (e.g., insert adds "_id")
+        body = copy.deepcopy(payload or {})
+        return await asyncio.to_thread(self.execute, endpoint, body)
+
+    async def aclose(self):
+        """
+        Nothing to close: the engine is shared by the whole process.
+        """
+
+    def execute(self, endpoint: str, body: Dict[str, Any]):
+        """
+        Run the database operation synchronously, as the db_service routes do.
+        Raises ValueError where db_service would answer with a 400 (an invalid request), and
+        DeadlineExceeded where it would answer with a 504.
+        """
+        database = self.get_database()
+        request_context_module = InProcessBackend._request_context
+        if request_context_module is None:
+            return self.run(database, endpoint, body)
+
+        # Runs in the copied context of asyncio.to_thread, so it does not leak to the request
+        request_context_module.start_request(get_propagation_headers())
+        try:
+            return self.run(database, endpoint, body)
+        except InProcessBackend._deadline_errors as e:
+            raise DeadlineExceeded(str(e)) from e
+
+    def run(self, database, endpoint: str, body: Dict[str, Any]):
+        """
+        Run the db_service operation of the endpoint (db_service/utils/operations.py).
+        """
+        if InProcessBackend._operations is None:
+            InProcessBackend._operations = import_db_service_module("operations", self.db_service_path)
+
+        return InProcessBackend._operations.run_operation(database, endpoint, body)
+
+
+def create_backend(base_url: str, backend_name: str = BD_BACKEND):
+    """
+    Create the backend selected by configuration.
+
+    Args:
+        base_url (str): The base URL of db_service, used by the HTTP backend.
+        backend_name (str): "http" or "inprocess".
+
+    Returns:
+        HTTPBackend | InProcessBackend: The selected backend.
+    """
+    if backend_name == "inprocess":
+        return InProcessBackend()
+
+    return HTTPBackend(base_url)
+
+
+async def close_backends():
+    """
+    Close the clients of every HTTP backend; called when the server shuts down.
+    """
+    for backend in list(HTTPBackend.instances):
+        await backend.aclose()
@@ -4,7 +4,12 @@ bd_client.py
 This file contains the BDClient class, which provides methods for interacting with a REST API
 that performs database operations such as inserting, finding, updating, and deleting documents.
 
-The BDClient class uses the `httpx` library to make asynchronous HTTP requests to the API.
+The BDClient class delegates each operation to a backend (see bd_backends.py). By default the
+HTTP backend is used, which makes asynchronous requests to db_service with `httpx`. Setting
+BD_BACKEND=inprocess makes the client call the db_service `Database` engine directly.
+
+Errors are logged and answered with an empty response, except DeadlineExceeded (the request
+deadline has passed), which is raised so the route answers with a 504 (see main.py).
 
 Methods:
     - insert: Insert a new document into the database.
@@ -12,16 +17,17 @@ Methods:
     - find_by_id: Find a specific document in the database by its ID.
     - update: Update an existing document in the database.
     - delete: Delete a document from the database.
+    - aclose: Close the connections of the backend.
 
 Dependencies:
-    - httpx: For making asynchronous HTTP requests.
-    - json: For serializing and deserializing JSON data.
-    - typing: For type annotations (Dict, Any, Optional).
+    - bd_backends: The HTTP and in-process backends.
+    - typing: For type annotations (Dict, Any).
 """
 
-import json
-import httpx
-from typing import Optional, Dict, Any
+from typing import Dict, Any
+
+from utils.bd_backends import create_backend
+from utils.request_context import DeadlineExceeded
 
 class BDClient:
     """
@@ -29,9 +35,12 @@ class BDClient:
 
     Args:
         base_url (str): The base URL of the REST API.
+        backend (optional): The backend that executes the operations. Defaults to the one
+            selected by the BD_BACKEND configuration.
     """
-    def __init__(self, base_url: str):
+    def __init__(self, base_url: str, backend=None):
         self.base_url = base_url
+        self.backend = backend or create_backend(base_url)
 
     async def insert(self, endpoint: str, payload: Dict[str, Any] = None):
         """
@@ -44,21 +53,18 @@ class BDClient:
         Returns:
             Dict[str, Any]: The JSON response from the API.
         """
-        url = f"{self.base_url}/{endpoint}"
-
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(url, json=payload)
-                print("Insert Document Response:", response.status_code, response.json())
-
-                # Raise an exception for any HTTP errors
-                response.raise_for_status()
-                return response.json()
-            except Exception as e:
-                # Log the error and return an empty response
-                print(f"Error in insert(): {e}")
-                return {}
-            
+        try:
+            response = await self.backend.send("POST", endpoint, payload)
+            print("Insert Document Response:", response)
+            return response
+        except DeadlineExceeded:
+            # The caller is no longer waiting: answering with {} would pass for an empty result
+            raise
+        except Exception as e:
+            # Log the error and return an empty response
+            print(f"Error in insert(): {e}")
+            return {}
+
     async def find(self, endpoint: str, payload: Dict[str, Any] = None):
         """
         Find documents in the database based on a query.
@@ -70,20 +76,17 @@ class BDClient:
         Returns:
             Dict[str, Any]: The JSON response from the API.
         """
-        url = f"{self.base_url}/{endpoint}"
-
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(url, json=payload)
-                print("Find Documents Response:", response.status_code, response.json())
-
-                # Raise an exception for any HTTP errors
-                response.raise_for_status()
-                return response.json()
-            except Exception as e:
-                # Log the error and return an empty response
-                print(f"Error in find(): {e}")
-                return {}
+        try:
+            response = await self.backend.send("POST", endpoint, payload)
+            print("Find Documents Response:", response)
+            return response
+        except DeadlineExceeded:
+            # The caller is no longer waiting: answering with {} would pass for an empty result
+            raise
+        except Exception as e:
+            # Log the error and return an empty response
+            print(f"Error in find(): {e}")
+            return {}
 
     async def find_by_id(self, endpoint: str, payload: Dict[str, Any] = None):
         """
@@ -96,20 +99,17 @@ class BDClient:
         Returns:
             Dict[str, Any]: The JSON response from the API.
         """
-        url = f"{self.base_url}/{endpoint}"
-
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(url, json=payload)
-                print("Find Document by ID Response:", response.status_code, response.json())
-
-                # Raise an exception for any HTTP errors
-                response.raise_for_status()
-                return response.json()
-            except Exception as e:
-                # Log the error and return an empty response
-                print(f"Error in find_by_id(): {e}")
-                return {}
+        try:
+            response = await self.backend.send("POST", endpoint, payload)
+            print("Find Document by ID Response:", response)
+            return response
+        except DeadlineExceeded:
+            # The caller is no longer waiting: answering with {} would pass for an empty result
+            raise
+        except Exception as e:
+            # Log the error and return an empty response
+            print(f"Error in find_by_id(): {e}")
+            return {}
 
     async def update(self, endpoint: str, payload: Dict[str, Any] = None):
         """
@@ -122,21 +122,18 @@ class BDClient:
         Returns:
             Dict[str, Any]: The JSON response from the API.
         """
-        url = f"{self.base_url}/{endpoint}"
-
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.put(url, json=payload)
-                print("Update Document Response:", response.status_code, response.json())
-
-                # Raise an exception for any HTTP errors
-                response.raise_for_status()
-                return response.json()
-            except Exception as e:
-                # Log the error and return an empty response
-                print(f"Error in update(): {e}")
-                return {}
-            
+        try:
+            response = await self.backend.send("PUT", endpoint, payload)
+            print("Update Document Response:", response)
+            return response
+        except DeadlineExceeded:
+            # The caller is no longer waiting: answering with {} would pass for an empty result
+            raise
+        except Exception as e:
+            # Log the error and return an empty response
+            print(f"Error in update(): {e}")
+            return {}
+
     async def delete(self, endpoint: str, payload: Dict[str, Any] = None):
         """
         Delete a document from the database.
@@ -148,17 +145,20 @@ class BDClient:
         Returns:
             Dict[str, Any]: The JSON response from the API.
         """
-        url = f"{self.base_url}/{endpoint}"
-
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.request("DELETE", url, content=json.dumps(payload))  # Use request with content
-                print("Delete Document Response:", response.status_code, response.json())
-
-                # Raise an exception for any HTTP errors
-                response.raise_for_status()
-                return response.json()
-            except Exception as e:
-                # Log the error and return an empty response
-                print(f"Error in delete(): {e}")
-                return {}
+        try:
+            response = await self.backend.send("DELETE", endpoint, payload)
+            print("Delete Document Response:", response)
+            return response
+        except DeadlineExceeded:
+            # The caller is no longer waiting: answering with {} would pass for an empty result
+            raise
+        except Exception as e:
+            # Log the error and return an empty response
+            print(f"Error in delete(): {e}")
+            return {}
+
+    async def aclose(self):
+        """
+        Close the connections of the backend (e.g. the httpx client of the HTTP backend).
+        """
+        await self.backend.aclose()
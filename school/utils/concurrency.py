@@ -0,0 +1,49 @@
+"""
+concurrency.py
+
+Helpers for running independent asynchronous calls (e.g., BDClient requests) concurrently.
+
+Functions:
+    - gather_named: Run named calls with asyncio.gather under a concurrency cap and return
+      their results by name. If one call fails, the remaining calls are cancelled and the
+      error is raised.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+from utils.config import BD_FANOUT_LIMIT
+
+
+async def gather_named(calls: Dict[str, Callable[[], Awaitable[Any]]], limit: int = BD_FANOUT_LIMIT):
+    """
+    Run independent calls concurrently and return their results by name.
+
+    Args:
+        calls (Dict[str, Callable]): Call name -> function without arguments returning an awaitable,
+            e.g. {"students": lambda: api_client.find(endpoint="find", payload=...)}.
+        limit (int): Maximum number of calls running at the same time for this request.
+
+    Returns:
+        Dict[str, Any]: Call name -> result.
+
+    Raises:
+        Exception: The first error raised by a call. Calls still running are cancelled.
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(call):
+        async with semaphore:
+            return await call()
+
+    tasks = [asyncio.ensure_future(run(call)) for call in calls.values()]
+
+    try:
+        results = await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+    return dict(zip(calls.keys(), results))
@@ -16,9 +16,50 @@ TESTS_COLLECTION: str = "schooltestes"
 STUDENT_TESTES_COLLECTION: str = "classtestes"
 MOMENTS_COLLECTION: str = "testsmoments"
 CLASS_MOMENTS_COLLECTION: str = "studentstestmoments"
+STUDENT_MOMENT_TOTALS_COLLECTION: str = "studentsmomenttotals"
 STUDENT_CALENDAR_COLLECTION: str = "studentscalendar"
 SEMESTER_EVALUATIONS_COLLECTION: str = "semesterstudentsevaluations"
+SEMESTER_SUMMARIES_COLLECTION: str = "semestersummaries"
+# GridFS bucket of db_service where reports are stored when REPORT_STORAGE is "gridfs"
+REPORTS_BUCKET: str = "schoolreports"
 # MongoDB connection string
 
 BD_BASE_URL: str = os.getenv("BD_BASE_URL", "http://127.0.0.1:8000/db-api")
+# Optional Unix domain socket of db_service; when set, BD_BASE_URL only provides the path prefix
+BD_UDS_PATH: str = os.getenv("BD_UDS_PATH", "")
+
+# Database backend used by BDClient: "http" (db_service REST API) or "inprocess"
+BD_BACKEND: str = os.getenv("BD_BACKEND", "http").strip().lower()
+DB_SERVICE_PATH: str = os.getenv(
+    "DB_SERVICE_PATH",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "db_service")),
+)
+# Default deadline for incoming requests without X-Deadline-Remaining-Ms (0 disables it)
+REQUEST_TIMEOUT_MS: int = int(os.getenv("REQUEST_TIMEOUT_MS", "30000"))
+# Maximum number of concurrent db_service calls issued by a single request
+BD_FANOUT_LIMIT: int = int(os.getenv("BD_FANOUT_LIMIT", "8"))
+# Seconds the normalized app settings are cached before being read from db_service again
+APP_SETTINGS_TTL_SECONDS: float = float(os.getenv("APP_SETTINGS_TTL_SECONDS", "60"))
+# Grading engine for semester summaries: "auto" (NumPy when installed) or "python"
+GRADING_ENGINE: str = os.getenv("GRADING_ENGINE", "auto").strip().lower()
+# Maximum number of what-if scenarios graded by one semester simulation request
+SIMULATION_MAX_SCENARIOS: int = int(os.getenv("SIMULATION_MAX_SCENARIOS", "20"))
+# Worker processes building the semester summaries of a whole year (empty: one per CPU, 0: no processes)
+SUMMARY_WORKERS: int = int(os.getenv("SUMMARY_WORKERS") or os.cpu_count() or 1)
+# Worker processes rendering PDF reports (0: render in a thread) and reports allowed to wait for one
+REPORT_WORKERS: int = int(os.getenv("REPORT_WORKERS", "2"))
+REPORT_MAX_QUEUE: int = int(os.getenv("REPORT_MAX_QUEUE", "32"))
+# How PDF reports are drawn: "fast" (plain cells unless wrapping is needed, wide tables split by
+# columns) or "standard" (a wrapped paragraph in every cell, all columns on the same page)
+REPORT_RENDER_MODE: str = os.getenv("REPORT_RENDER_MODE", "fast").strip().lower()
+# Where rendered reports are kept for their download URL: "local" (REPORTS_DIR of this instance) or
+# "gridfs" (db_service GridFS bucket, so any school-API instance can serve the download)
+REPORT_STORAGE: str = os.getenv("REPORT_STORAGE", "local").strip().lower()
+# Maximum total size of the cached PDF reports, in bytes (least recently used are evicted)
+REPORT_CACHE_MAX_BYTES: int = int(os.getenv("REPORT_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+# Seconds a stored report is kept after its last use, and seconds between two report janitor runs
+REPORT_MAX_AGE_SECONDS: float = float(os.getenv("REPORT_MAX_AGE_SECONDS", str(24 * 60 * 60)))
+REPORT_JANITOR_INTERVAL_SECONDS: float = float(os.getenv("REPORT_JANITOR_INTERVAL_SECONDS", "600"))
+# Seconds a finished background report job (and its status) is kept
+REPORT_JOB_TTL_SECONDS: float = float(os.getenv("REPORT_JOB_TTL_SECONDS", "600"))
 ENCRYPTION_KEY: str = os.getenv("ENCRYPTION_KEY", "")
@@ -0,0 +1,248 @@
+"""
+exports.py
+
+Spreadsheet exports (CSV and XLSX) of the school reports.
+
+The writers are push-based so the routes can stream a report while its rows are produced: every
+call returns the bytes ready to be sent, and nothing but the current row (and the compressor
+state of an XLSX file) is kept in memory. A report may have several tables (e.g. one per class),
+written one after the other: a CSV repeats the header row of each table, an XLSX file gets one
+worksheet per table.
+
+XLSX files are written with the standard library only: the sheets are streamed into a ZIP archive
+that is never seeked, using inline strings instead of a shared strings table.
+
+Classes:
+    - ChunkBuffer: Write-only stream that hands out what was written to it.
+    - CsvExportWriter: Streams CSV (";" separated, UTF-8 with BOM so spreadsheet programs detect it).
+    - XlsxExportWriter: Streams an XLSX workbook.
+
+Functions:
+    - create_export_writer: Writer of an export format.
+    - stream_export: Async iterator of the bytes of an exported report.
+"""
+
+import csv
+import io
+import itertools
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+# Bytes gathered before they are sent to the client
+EXPORT_CHUNK_SIZE = 64 * 1024
+CSV_DELIMITER = ";"
+NUMBER_PATTERN = re.compile(r"-?\d+(\.\d+)?")
+SHEET_NAME_MAX_LENGTH = 31
+
+XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    "{sheets}"
+    "</Types>"
+)
+XLSX_SHEET_CONTENT_TYPE = (
+    '<Override PartName="/xl/worksheets/sheet{number}.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+)
+XLSX_ROOT_RELATIONSHIPS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    "</Relationships>"
+)
+XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    "<sheets>{sheets}</sheets>"
+    "</workbook>"
+)
+XLSX_WORKBOOK_RELATIONSHIPS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    "{sheets}"
+    "</Relationships>"
+)
+XLSX_SHEET_RELATIONSHIP = (
+    '<Relationship Id="rId{number}" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet{number}.xml"/>'
+)
+XLSX_SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+XLSX_SHEET_END = "</sheetData></worksheet>"
+
+
+class ChunkBuffer(io.RawIOBase):
+    """
+    Write-only, non-seekable stream that keeps what was written until take() is called.
+    """
+    def __init__(self):
+        super().__init__()
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def take(self):
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+class CsvExportWriter:
+    """
+    Streams the tables of a report as CSV.
+    """
+    def __init__(self):
+        self.output = io.StringIO()
+        self.writer = csv.writer(self.output, delimiter=CSV_DELIMITER, lineterminator="\r\n")
+        self.tables = 0
+
+    def take(self):
+        text = self.output.getvalue()
+        self.output.seek(0)
+        self.output.truncate()
+        return text.encode("utf-8")
+
+    def start_table(self, name, headers):
+        if self.tables:
+            self.writer.writerow([])
+        else:
+            self.output.write("\ufeff")
+        self.tables += 1
+        self.writer.writerow(headers)
+        return self.take()
+
+    def write_row(self, row):
+        self.writer.writerow(row)
+        return self.take()
+
+    def close(self):
+        return self.take()
+
+
+class XlsxExportWriter:
+    """
+    Streams the tables of a report as the worksheets of an XLSX workbook. Cells that hold a number
+    (e.g. "12.5") are written as numbers, the others as text.
+    """
+    def __init__(self):
+        self.buffer = ChunkBuffer()
+        self.archive = zipfile.ZipFile(self.buffer, "w", zipfile.ZIP_DEFLATED)
+        self.sheet_names = []
+        self.sheet = None
+        self.row_number = 0
+
+    def get_sheet_name(self, name):
+        base_name = re.sub(r"[\[\]:*?/\\]", " ", str(name or "")).strip()[:SHEET_NAME_MAX_LENGTH] or "Folha"
+        sheet_name = base_name
+        suffix = 1
+        while sheet_name.lower() in (existing.lower() for existing in self.sheet_names):
+            suffix += 1
+            sheet_name = f"{base_name[:SHEET_NAME_MAX_LENGTH - len(str(suffix)) - 1]} {suffix}"
+        return sheet_name
+
+    def close_sheet(self):
+        if self.sheet is not None:
+            self.sheet.write(XLSX_SHEET_END.encode("utf-8"))
+            self.sheet.close()
+            self.sheet = None
+
+    def start_table(self, name, headers):
+        self.close_sheet()
+        self.sheet_names.append(self.get_sheet_name(name))
+        self.sheet = self.archive.open(f"xl/worksheets/sheet{len(self.sheet_names)}.xml", "w", force_zip64=True)
+        self.sheet.write(XLSX_SHEET_START.encode("utf-8"))
+        self.row_number = 0
+        return self.write_row(headers, numbers=False)
+
+    def build_cell(self, value, numbers):
+        text = "" if value is None else str(value)
+        if numbers and NUMBER_PATTERN.fullmatch(text):
+            return f"<c><v>{text}</v></c>"
+        return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(text)}</t></is></c>'
+
+    def write_row(self, row, numbers=True):
+        self.row_number += 1
+        cells = "".join(self.build_cell(value, numbers) for value in row)
+        self.sheet.write(f'<row r="{self.row_number}">{cells}</row>'.encode("utf-8"))
+        return self.buffer.take()
+
+    def close(self):
+        self.close_sheet()
+        sheet_numbers = range(1, len(self.sheet_names) + 1)
+        self.archive.writestr(
+            "[Content_Types].xml",
+            XLSX_CONTENT_TYPES.format(
+                sheets="".join(XLSX_SHEET_CONTENT_TYPE.format(number=number) for number in sheet_numbers)
+            ),
+        )
+        self.archive.writestr("_rels/.rels", XLSX_ROOT_RELATIONSHIPS)
+        self.archive.writestr(
+            "xl/workbook.xml",
+            XLSX_WORKBOOK.format(
+                sheets="".join(
+                    f'<sheet name="{escape(name, {chr(34): "&quot;"})}" sheetId="{number}" r:id="rId{number}"/>'
+                    for number, name in enumerate(self.sheet_names, start=1)
+                )
+            ),
+        )
+        self.archive.writestr(
+            "xl/_rels/workbook.xml.rels",
+            XLSX_WORKBOOK_RELATIONSHIPS.format(
+                sheets="".join(XLSX_SHEET_RELATIONSHIP.format(number=number) for number in sheet_numbers)
+            ),
+        )
+        self.archive.close()
+        return self.buffer.take()
+
+
+def create_export_writer(export_format):
+    """
+    Return the writer of an export format ("csv" or "xlsx").
+    """
+    if export_format == "xlsx":
+        return XlsxExportWriter()
+    return CsvExportWriter()
+
+
+async def stream_export(writer, tables):
+    """
+    Write the tables of a report and yield the exported bytes in chunks of about EXPORT_CHUNK_SIZE.
+
+    Args:
+        writer (CsvExportWriter | XlsxExportWriter): The writer of the export format.
+        tables: Async iterable of (name, headers, rows); rows may be any iterable, read lazily.
+    """
+    pending = []
+    pending_size = 0
+
+    async for name, headers, rows in tables:
+        for data in itertools.chain([writer.start_table(name, headers)], map(writer.write_row, rows)):
+            pending.append(data)
+            pending_size += len(data)
+            if pending_size >= EXPORT_CHUNK_SIZE:
+                yield b"".join(pending)
+                pending.clear()
+                pending_size = 0
+
+    pending.append(writer.close())
+    yield b"".join(pending)
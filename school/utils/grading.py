@@ -0,0 +1,1778 @@
+"""
+grading.py
+
+Grading engine of the school service: app settings normalization, per-student moment totals,
+percentage ranges and the semester evaluations summary.
+
+All functions are pure (no database access), so they can be reused by the routes, tests and
+benchmarks.
+
+When NumPy is installed, the per-student maths of the semester summary runs as array operations
+(see build_student_summaries_vectorized); otherwise, or with GRADING_ENGINE=python, the pure-Python
+engine is used. Both produce the same summary. The moment statistics (build_moment_statistics)
+follow the same rule, and so does the what-if grading of SemesterSimulation.
+"""
+
+import hashlib
+import json
+import re
+import statistics
+from bisect import bisect_right
+
+from utils.config import GRADING_ENGINE
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional
+    np = None
+
+
+APP_SETTINGS_KEY = "global"
+# Settings a what-if scenario may change (see SemesterSimulation)
+SIMULATION_SETTINGS_FIELDS = ("evaluationMomentTemplates", "attitudeTemplates", "percentageRanges")
+DEFAULT_APP_SETTINGS = {
+    "key": APP_SETTINGS_KEY,
+    "inactiveLogoutMinutes": 15,
+    "messageTimeoutSeconds": 5,
+    "popupBackgroundColor": "#15803d",
+    "popupTextColor": "#ffffff",
+    "errorPopupBackgroundColor": "#fee2e2",
+    "errorPopupTextColor": "#dc2626",
+    "evaluationMomentTemplates": [],
+    "attitudeTemplates": [],
+    "percentageRanges": [
+        {
+            "id": "very-low",
+            "min": 0,
+            "max": 10,
+            "nota": 1,
+            "backgroundColor": "#dc2626",
+            "textColor": "#ffffff",
+        },
+        {
+            "id": "low",
+            "min": 11,
+            "max": 39,
+            "nota": 2,
+            "backgroundColor": "#fdba74",
+            "textColor": "#7c2d12",
+        },
+        {
+            "id": "mid-low",
+            "min": 40,
+            "max": 49,
+            "nota": 2,
+            "backgroundColor": "#fde68a",
+            "textColor": "#713f12",
+        },
+        {
+            "id": "mid",
+            "min": 50,
+            "max": 69,
+            "nota": 3,
+            "backgroundColor": "#bbf7d0",
+            "textColor": "#14532d",
+        },
+        {
+            "id": "high",
+            "min": 70,
+            "max": 85,
+            "nota": 4,
+            "backgroundColor": "#15803d",
+            "textColor": "#ffffff",
+        },
+        {
+            "id": "very-high",
+            "min": 86,
+            "max": 100,
+            "nota": 5,
+            "backgroundColor": "#ddd6fe",
+            "textColor": "#4c1d95",
+        },
+    ],
+}
+
+
+DEFAULT_EVALUATION_MOMENT_TEMPLATE_COLORS = [
+    {
+        "backgroundColor": "#1e40af",
+        "averageBackgroundColor": "#1d4ed8",
+        "weightedBackgroundColor": "#2563eb",
+        "textColor": "#eff6ff",
+    },
+    {
+        "backgroundColor": "#5b21b6",
+        "averageBackgroundColor": "#6d28d9",
+        "weightedBackgroundColor": "#7c3aed",
+        "textColor": "#f5f3ff",
+    },
+    {
+        "backgroundColor": "#9a3412",
+        "averageBackgroundColor": "#c2410c",
+        "weightedBackgroundColor": "#ea580c",
+        "textColor": "#fff7ed",
+    },
+    {
+        "backgroundColor": "#115e59",
+        "averageBackgroundColor": "#0f766e",
+        "weightedBackgroundColor": "#0d9488",
+        "textColor": "#f0fdfa",
+    },
+]
+
+
+def normalize_inactive_logout_minutes(value):
+    if isinstance(value, bool):
+        return DEFAULT_APP_SETTINGS["inactiveLogoutMinutes"]
+
+    try:
+        minutes = int(value)
+    except (TypeError, ValueError):
+        return DEFAULT_APP_SETTINGS["inactiveLogoutMinutes"]
+
+    return minutes if minutes > 0 else DEFAULT_APP_SETTINGS["inactiveLogoutMinutes"]
+
+
+def normalize_message_timeout_seconds(value):
+    if isinstance(value, bool):
+        return DEFAULT_APP_SETTINGS["messageTimeoutSeconds"]
+
+    try:
+        seconds = int(value)
+    except (TypeError, ValueError):
+        return DEFAULT_APP_SETTINGS["messageTimeoutSeconds"]
+
+    return seconds if seconds > 0 else DEFAULT_APP_SETTINGS["messageTimeoutSeconds"]
+
+
+def normalize_hex_color(value, default):
+    if not isinstance(value, str) or not re.fullmatch(r"#[0-9a-fA-F]{6}", value):
+        return default
+
+    return value.lower()
+
+
+def normalize_weight_percentage(value):
+    if isinstance(value, bool):
+        return None
+
+    if isinstance(value, str):
+        value = value.strip().replace(",", ".")
+
+    try:
+        numeric_value = float(value)
+    except (TypeError, ValueError):
+        return None
+
+    return format_number(min(100, max(0, round(numeric_value, 2))))
+
+
+def normalize_evaluation_moment_templates(value):
+    if not isinstance(value, list):
+        return DEFAULT_APP_SETTINGS["evaluationMomentTemplates"]
+
+    normalized_templates = []
+    for template_index, template in enumerate(value):
+        if not isinstance(template, dict):
+            continue
+
+        moment_type = template.get("type")
+        if not isinstance(moment_type, str) or not moment_type.strip():
+            continue
+
+        weight_percentage = template.get("weightPercentage")
+        if isinstance(weight_percentage, bool):
+            continue
+
+        normalized_weight = normalize_weight_percentage(weight_percentage)
+        if normalized_weight is None:
+            continue
+        default_colors = DEFAULT_EVALUATION_MOMENT_TEMPLATE_COLORS[
+            template_index % len(DEFAULT_EVALUATION_MOMENT_TEMPLATE_COLORS)
+        ]
+
+        normalized_templates.append(
+            {
+                "id": str(template.get("id") or f"evaluation-template-{template_index + 1}"),
+                "type": moment_type.strip(),
+                "weightPercentage": normalized_weight,
+                "backgroundColor": normalize_hex_color(
+                    template.get("backgroundColor"),
+                    default_colors["backgroundColor"],
+                ),
+                "averageBackgroundColor": normalize_hex_color(
+                    template.get("averageBackgroundColor"),
+                    default_colors["averageBackgroundColor"],
+                ),
+                "weightedBackgroundColor": normalize_hex_color(
+                    template.get("weightedBackgroundColor"),
+                    default_colors["weightedBackgroundColor"],
+                ),
+                "textColor": normalize_hex_color(
+                    template.get("textColor"),
+                    default_colors["textColor"],
+                ),
+            }
+        )
+
+    return normalized_templates
+
+
+def normalize_attitude_templates(value):
+    if not isinstance(value, list):
+        return DEFAULT_APP_SETTINGS["attitudeTemplates"]
+
+    normalized_templates = []
+    for template_index, template in enumerate(value):
+        if not isinstance(template, dict):
+            continue
+
+        text = template.get("text")
+        alias = template.get("alias")
+        if not isinstance(text, str) or not text.strip():
+            continue
+        if not isinstance(alias, str) or not alias.strip():
+            continue
+
+        weight_percentage = template.get("weightPercentage")
+        if isinstance(weight_percentage, bool):
+            continue
+
+        normalized_weight = normalize_weight_percentage(weight_percentage)
+        if normalized_weight is None:
+            continue
+        default_colors = DEFAULT_EVALUATION_MOMENT_TEMPLATE_COLORS[
+            template_index % len(DEFAULT_EVALUATION_MOMENT_TEMPLATE_COLORS)
+        ]
+
+        normalized_templates.append(
+            {
+                "id": str(template.get("id") or f"attitude-template-{template_index + 1}"),
+                "text": text.strip(),
+                "alias": alias.strip(),
+                "weightPercentage": normalized_weight,
+                "backgroundColor": normalize_hex_color(
+                    template.get("backgroundColor"),
+                    default_colors["backgroundColor"],
+                ),
+                "weightedBackgroundColor": normalize_hex_color(
+                    template.get("weightedBackgroundColor"),
+                    default_colors["weightedBackgroundColor"],
+                ),
+                "textColor": normalize_hex_color(
+                    template.get("textColor"),
+                    default_colors["textColor"],
+                ),
+            }
+        )
+
+    return normalized_templates
+
+
+def normalize_percentage_ranges(value):
+    if not isinstance(value, list):
+        return DEFAULT_APP_SETTINGS["percentageRanges"]
+
+    normalized_ranges = []
+    for percentage_range in value:
+        if not isinstance(percentage_range, dict):
+            return DEFAULT_APP_SETTINGS["percentageRanges"]
+
+        try:
+            min_value = int(percentage_range.get("min"))
+            max_value = int(percentage_range.get("max"))
+            nota = int(percentage_range.get("nota", 0))
+        except (TypeError, ValueError):
+            return DEFAULT_APP_SETTINGS["percentageRanges"]
+
+        background_color = percentage_range.get("backgroundColor")
+        text_color = percentage_range.get("textColor")
+        if not isinstance(background_color, str) or not isinstance(text_color, str):
+            return DEFAULT_APP_SETTINGS["percentageRanges"]
+
+        normalized_ranges.append(
+            {
+                "id": str(percentage_range.get("id") or f"{min_value}-{max_value}"),
+                "min": min_value,
+                "max": max_value,
+                "nota": max(0, nota),
+                "backgroundColor": background_color,
+                "textColor": text_color,
+            }
+        )
+
+    return normalized_ranges or DEFAULT_APP_SETTINGS["percentageRanges"]
+
+
+def normalize_app_settings(document=None):
+    """
+    Return the app settings document merged over the defaults, with every field normalized.
+    """
+    settings = {**DEFAULT_APP_SETTINGS, **(document or {})}
+    settings["inactiveLogoutMinutes"] = normalize_inactive_logout_minutes(
+        settings.get("inactiveLogoutMinutes"),
+    )
+    settings["messageTimeoutSeconds"] = normalize_message_timeout_seconds(
+        settings.get("messageTimeoutSeconds"),
+    )
+    for color_key in (
+        "popupBackgroundColor",
+        "popupTextColor",
+        "errorPopupBackgroundColor",
+        "errorPopupTextColor",
+    ):
+        settings[color_key] = normalize_hex_color(settings.get(color_key), DEFAULT_APP_SETTINGS[color_key])
+    settings["evaluationMomentTemplates"] = normalize_evaluation_moment_templates(
+        settings.get("evaluationMomentTemplates"),
+    )
+    settings["attitudeTemplates"] = normalize_attitude_templates(settings.get("attitudeTemplates"))
+    settings["percentageRanges"] = normalize_percentage_ranges(settings.get("percentageRanges"))
+    return settings
+
+
+class PercentageScale:
+    """
+    Percentage ranges compiled once, to look up the range of many percentages.
+
+    Args:
+        percentage_ranges (list, optional): The configured ranges; they are normalized once here.
+            Defaults to the default app settings ranges.
+    """
+    def __init__(self, percentage_ranges=None):
+        self.ranges = normalize_percentage_ranges(percentage_ranges or DEFAULT_APP_SETTINGS["percentageRanges"])
+        self.range_mins = [percentage_range["min"] for percentage_range in self.ranges]
+        # When every range ends before the next one starts, the first matching range is also
+        # the last range starting at or below the percentage, which bisect finds directly
+        self.ordered = all(
+            current_range["max"] < next_range["min"]
+            for current_range, next_range in zip(self.ranges, self.ranges[1:])
+        )
+
+    def get_range(self, percentage):
+        """
+        Return the first range containing the percentage, or the last range when none does.
+        """
+        if self.ordered:
+            index = bisect_right(self.range_mins, percentage) - 1
+            if index >= 0 and percentage <= self.ranges[index]["max"]:
+                return self.ranges[index]
+
+            return self.ranges[-1]
+
+        matching_range = next(
+            (
+                percentage_range
+                for percentage_range in self.ranges
+                if percentage >= percentage_range["min"] and percentage <= percentage_range["max"]
+            ),
+            None,
+        )
+
+        return matching_range or self.ranges[-1]
+
+    def get_fields(self, percentage, prefix=""):
+        percentage_range = self.get_range(percentage)
+        return {
+            f"{prefix}Percentage": round(percentage, 1),
+            f"{prefix}PercentageText": f"{percentage:.1f}%",
+            f"{prefix}Grade": percentage_range.get("nota", 0),
+            f"{prefix}BackgroundColor": percentage_range.get("backgroundColor"),
+            f"{prefix}TextColor": percentage_range.get("textColor"),
+        }
+
+    def get_range_indexes(self, percentages):
+        """
+        Vectorized get_range for ordered scales: the index of the range of each percentage in a
+        NumPy array, found with searchsorted.
+        """
+        range_mins = np.array(self.range_mins, dtype=float)
+        range_maxs = np.array([percentage_range["max"] for percentage_range in self.ranges], dtype=float)
+        candidates = np.searchsorted(range_mins, percentages, side="right") - 1
+        bounded_candidates = np.clip(candidates, 0, len(self.ranges) - 1)
+        matches = (candidates >= 0) & (percentages <= range_maxs[bounded_candidates])
+
+        return np.where(matches, bounded_candidates, len(self.ranges) - 1)
+
+
+def get_percentage_scale(percentage_ranges=None):
+    """
+    Return the given PercentageScale, or compile one from a list of ranges.
+    """
+    if isinstance(percentage_ranges, PercentageScale):
+        return percentage_ranges
+
+    return PercentageScale(percentage_ranges)
+
+
+def get_percentage_range(percentage, percentage_ranges=None):
+    return get_percentage_scale(percentage_ranges).get_range(percentage)
+
+
+def get_percentage_fields(percentage, percentage_ranges=None, prefix=""):
+    return get_percentage_scale(percentage_ranges).get_fields(percentage, prefix)
+
+
+class CompiledSettings:
+    """
+    Normalized grading settings with the lookups derived from them, built once per settings
+    version and shared by the grading functions.
+
+    Args:
+        settings (dict): The app settings; the grading fields are normalized here.
+        version (int): Version stamp of the settings (see utils/app_settings.py).
+    """
+    def __init__(self, settings, version=0):
+        self.settings = settings
+        self.version = version
+        self.percentage_scale = PercentageScale(settings.get("percentageRanges"))
+        self.templates = normalize_evaluation_moment_templates(settings.get("evaluationMomentTemplates"))
+        self.template_index = MomentTemplateIndex(self.templates)
+        self.attitude_templates = normalize_attitude_templates(settings.get("attitudeTemplates"))
+        self.attitude_index = AttitudeTemplateIndex(self.attitude_templates)
+        # Identifies the grading inputs across processes, e.g. for materialized summaries
+        self.content_hash = get_content_hash(
+            {
+                "percentageRanges": self.percentage_scale.ranges,
+                "evaluationMomentTemplates": self.templates,
+                "attitudeTemplates": self.attitude_templates,
+            }
+        )
+
+
+def get_compiled_settings(settings):
+    """
+    Return the given CompiledSettings, or compile a settings dictionary.
+    """
+    if isinstance(settings, CompiledSettings):
+        return settings
+
+    return CompiledSettings(settings)
+
+
+def to_float(value, default=0):
+    if isinstance(value, bool):
+        return default
+
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def format_number(value):
+    rounded_value = round(value, 2)
+    return int(rounded_value) if rounded_value.is_integer() else rounded_value
+
+
+def get_document_id(document):
+    return document.get("_id") or document.get("id")
+
+
+def get_string_value(value, default=""):
+    return value if isinstance(value, str) else default
+
+
+def get_student_name(student):
+    return get_string_value(student.get("name")) or "Aluno"
+
+
+def get_moment_name(moment):
+    return get_string_value(moment.get("name")) or "Momento de avaliação"
+
+
+def get_moment_type_label(moment):
+    moment_type = get_string_value(
+        moment.get("evaluationMomentTemplateType") or moment.get("type")
+    )
+
+    if moment_type == "questao-aula":
+        return "Questão aula"
+
+    if moment_type == "teste":
+        return "Teste"
+
+    return moment_type or "Sem tipo"
+
+
+class MomentTemplateIndex:
+    """
+    Evaluation moment templates indexed by id and by type, to match many moments.
+
+    Args:
+        templates (list): The evaluation moment templates. The first template wins for a
+            repeated id or type, like a linear search would.
+    """
+    def __init__(self, templates):
+        self.templates = templates
+        self.by_id = {}
+        self.by_type = {}
+
+        for template in templates:
+            template_id = get_string_value(template.get("id"))
+            if template_id:
+                self.by_id.setdefault(template_id, template)
+
+            moment_type = template.get("type")
+            if isinstance(moment_type, str):
+                self.by_type.setdefault(moment_type, template)
+
+    def get(self, moment):
+        """
+        Return the template of the moment: by evaluationMomentTemplateId, else by type label.
+        """
+        template_id = get_string_value(moment.get("evaluationMomentTemplateId"))
+        if template_id and template_id in self.by_id:
+            return self.by_id[template_id]
+
+        return self.by_type.get(get_moment_type_label(moment))
+
+
+def get_moment_template_index(templates):
+    """
+    Return the given MomentTemplateIndex, or build one from a list of templates.
+    """
+    if isinstance(templates, MomentTemplateIndex):
+        return templates
+
+    return MomentTemplateIndex(templates)
+
+
+def get_moment_template(moment, templates):
+    return get_moment_template_index(templates).get(moment)
+
+
+def get_moment_group_type_label(moment, templates):
+    matching_template = get_moment_template(moment, templates)
+    if matching_template:
+        return get_string_value(matching_template.get("type")) or "Sem tipo"
+
+    return get_moment_type_label(moment)
+
+
+def get_moment_semester(moment):
+    return "2" if str(moment.get("semester", "1")) == "2" else "1"
+
+
+def get_moment_max_value(moment, value_documents):
+    if moment:
+        max_value = to_float(moment.get("totalValue"))
+        if max_value:
+            return max_value
+
+        questions = moment.get("questions")
+        if isinstance(questions, list):
+            questions_total = sum(
+                to_float(question.get("value")) for question in questions if isinstance(question, dict)
+            )
+            if questions_total:
+                return questions_total
+
+    question_values = {}
+    for value_document in value_documents:
+        question_number = value_document.get("questionNumber")
+        if question_number not in question_values:
+            question_values[question_number] = to_float(value_document.get("questionValue"))
+
+    return sum(question_values.values())
+
+
+def get_moment_weight_percentage(moment, templates):
+    configured_template = get_moment_template(moment, templates)
+
+    if configured_template:
+        return to_float(configured_template.get("weightPercentage"))
+
+    return to_float(moment.get("evaluationMomentTemplateWeightPercentage"))
+
+
+def get_question_max_value(moment, question_number, fallback_value):
+    if moment:
+        questions = moment.get("questions")
+        if isinstance(questions, list):
+            for question in questions:
+                if (
+                    isinstance(question, dict)
+                    and str(question.get("number") or question.get("questionNumber")) == str(question_number)
+                ):
+                    return to_float(question.get("value"))
+
+    return to_float(fallback_value)
+
+
+def normalize_moment_value(value):
+    if value in (None, ""):
+        value = 0
+    if isinstance(value, str):
+        value = value.strip() or "0"
+    if isinstance(value, bool):
+        return None
+
+    try:
+        numeric_value = float(value)
+    except (TypeError, ValueError):
+        return None
+
+    return numeric_value if numeric_value >= 0 else None
+
+
+def build_projected_student_moment_values(existing_values, next_value):
+    projected_values = []
+    replaced = False
+
+    for existing_value in existing_values:
+        if existing_value.get("questionNumber") == next_value.get("questionNumber"):
+            projected_values.append(next_value)
+            replaced = True
+        else:
+            projected_values.append(existing_value)
+
+    if not replaced:
+        projected_values.append(next_value)
+
+    return projected_values
+
+
+def validate_evaluation_moment_payload(data):
+    if not isinstance(data, dict):
+        return "Dados do momento de avaliação inválidos."
+
+    questions = data.get("questions")
+    if not isinstance(questions, list) or len(questions) == 0:
+        return None
+
+    question_total = 0
+    for question in questions:
+        if not isinstance(question, dict):
+            return "Preenche o número e o valor de todas as questões."
+
+        question_number = question.get("number") or question.get("questionNumber")
+        question_value = normalize_moment_value(question.get("value"))
+        if not question_number or question_value is None or question_value <= 0:
+            return "Preenche o número e o valor de todas as questões."
+
+        question_total += question_value
+
+    total_value = to_float(data.get("totalValue"))
+    if total_value and format_number(question_total) != format_number(total_value):
+        return (
+            f"O total das questões deve ser {format_number(total_value)}. "
+            f"Total atual: {format_number(question_total)}."
+        )
+
+    return None
+
+
+def get_student_moment_fields(total, max_value, percentage_ranges=None):
+    """
+    Fields added to every value of a (moment, student) group: the student total, the moment
+    maximum and the percentage with its range.
+    """
+    percentage = (total / max_value) * 100 if max_value else 0
+    return {
+        "studentMomentTotal": format_number(total),
+        "studentMomentMaxValue": format_number(max_value),
+        **get_percentage_scale(percentage_ranges).get_fields(percentage, "studentMoment"),
+    }
+
+
+def enrich_student_moment_values(value_documents, moments=None, percentage_ranges=None):
+    moments = moments or []
+    percentage_scale = get_percentage_scale(percentage_ranges)
+    moments_by_id = {
+        str(moment_id): moment
+        for moment in moments
+        if isinstance(moment, dict)
+        for moment_id in [get_document_id(moment)]
+        if moment_id
+    }
+    groups = {}
+
+    for value_document in value_documents:
+        group_key = (value_document.get("momentId"), value_document.get("studentId"))
+        groups.setdefault(group_key, []).append(value_document)
+
+    enriched_documents = []
+    for (moment_id, student_id), group_documents in groups.items():
+        total = sum(to_float(value_document.get("value")) for value_document in group_documents)
+        moment = moments_by_id.get(str(moment_id))
+        max_value = get_moment_max_value(moment, group_documents)
+        processed_fields = get_student_moment_fields(total, max_value, percentage_scale)
+
+        enriched_documents.extend(
+            {
+                **value_document,
+                **processed_fields,
+            }
+            for value_document in group_documents
+        )
+
+    return enriched_documents
+
+
+def get_student_moment_total(enriched_values, student_id, moment_id):
+    matching_value = next(
+        (
+            value_document
+            for value_document in enriched_values
+            if str(value_document.get("studentId")) == str(student_id)
+            and str(value_document.get("momentId")) == str(moment_id)
+            and value_document.get("studentMomentTotal") is not None
+        ),
+        None,
+    )
+
+    return to_float(matching_value.get("studentMomentTotal")) if matching_value else 0
+
+
+def index_student_moment_totals(enriched_values):
+    """
+    Index the student moment totals of enriched values by (studentId, momentId).
+
+    Keeps the first total found for each pair, exactly like get_student_moment_total, but the
+    values are scanned once and every lookup afterwards is a dictionary access.
+    """
+    totals = {}
+
+    for value_document in enriched_values:
+        total = value_document.get("studentMomentTotal")
+        if total is None:
+            continue
+
+        key = (str(value_document.get("studentId")), str(value_document.get("momentId")))
+        if key not in totals:
+            totals[key] = to_float(total)
+
+    return totals
+
+
+def get_question_number(question):
+    return question.get("number") or question.get("questionNumber")
+
+
+def index_moment_values(value_documents):
+    """
+    Index moment values by (studentId, questionNumber), both as strings, keeping the first value
+    of each pair.
+    """
+    values = {}
+
+    for value_document in value_documents:
+        key = (str(value_document.get("studentId")), str(value_document.get("questionNumber")))
+        if key not in values:
+            values[key] = value_document
+
+    return values
+
+
+def build_moment_assessment_report(moment, students, value_documents, percentage_ranges=None):
+    """
+    Build the headers and rows of the assessment report of one moment: a row per active student
+    with the value of each question, the total, the percentage and the grade.
+
+    The values and the enriched student totals are indexed once, so each cell is a dictionary
+    lookup instead of a scan of all the values.
+
+    Returns:
+        dict: {"headers": [...], "rows": [...]}
+    """
+    enriched_values = enrich_student_moment_values(value_documents, [moment], percentage_ranges)
+    questions = [
+        question
+        for question in moment.get("questions", [])
+        if isinstance(question, dict)
+    ]
+    question_numbers = [str(get_question_number(question)) for question in questions]
+    values = index_moment_values(value_documents)
+    student_totals = {}
+    for value_document in enriched_values:
+        student_totals.setdefault(str(value_document.get("studentId")), value_document)
+
+    headers = [
+        "Aluno",
+        *[
+            f"Q{get_question_number(question)} ({format_number(to_float(question.get('value')))})"
+            for question in questions
+        ],
+        "Total",
+        "%",
+        "Nota",
+    ]
+    rows = []
+
+    for student in students:
+        if student.get("active") is False:
+            continue
+
+        student_id = str(get_document_id(student))
+        student_total = student_totals.get(student_id, {})
+        rows.append(
+            [
+                get_student_name(student),
+                *[
+                    str(values.get((student_id, question_number), {}).get("value", 0))
+                    for question_number in question_numbers
+                ],
+                str(format_number(to_float(student_total.get("studentMomentTotal")))),
+                student_total.get("studentMomentPercentageText", "0.0%"),
+                str(student_total.get("studentMomentGrade", 0)),
+            ]
+        )
+
+    return {"headers": headers, "rows": rows}
+
+
+def get_score_statistics(scores, max_value):
+    """
+    Mean, median, standard deviation (of the population), minimum, maximum and difficulty index
+    (mean / max_value) of a list of scores, rounded to 2 decimals.
+    """
+    if not scores:
+        return {"mean": 0, "median": 0, "standardDeviation": 0, "minimum": 0, "maximum": 0, "difficultyIndex": 0}
+
+    mean = statistics.fmean(scores)
+    return {
+        "mean": round(mean, 2),
+        "median": round(statistics.median(scores), 2),
+        "standardDeviation": round(statistics.pstdev(scores), 2),
+        "minimum": round(min(scores), 2),
+        "maximum": round(max(scores), 2),
+        "difficultyIndex": round(mean / max_value, 2) if max_value else 0,
+    }
+
+
+def get_score_statistics_vectorized(scores, max_values):
+    """
+    get_score_statistics of every column of a NumPy score matrix (one row per student).
+    """
+    if not len(scores):
+        return [get_score_statistics([], 0) for _ in max_values]
+
+    means = scores.mean(axis=0)
+    columns = zip(
+        means,
+        np.median(scores, axis=0),
+        scores.std(axis=0),
+        scores.min(axis=0),
+        scores.max(axis=0),
+        np.divide(means, max_values, out=np.zeros_like(means), where=max_values > 0),
+    )
+    return [
+        {
+            "mean": round(float(mean), 2),
+            "median": round(float(median), 2),
+            "standardDeviation": round(float(deviation), 2),
+            "minimum": round(float(minimum), 2),
+            "maximum": round(float(maximum), 2),
+            "difficultyIndex": round(float(difficulty), 2),
+        }
+        for mean, median, deviation, minimum, maximum, difficulty in columns
+    ]
+
+
+def build_moment_statistics(moment, students, value_documents, percentage_ranges=None):
+    """
+    Per-question statistics of a moment (mean, median, standard deviation, minimum, maximum and
+    difficulty index, the mean as a fraction of the question maximum), statistics of the student
+    totals and the distribution of the students by percentage range (grade).
+
+    Only active students with at least one value in the moment are counted; a question they have
+    no value for counts as 0, as in the assessment report. With NumPy the scores are a student x
+    question matrix reduced column by column, and the ranges of all the percentages are found with
+    one searchsorted.
+
+    Returns:
+        dict: {"studentCount", "maxValue", "questions", "total", "gradeDistribution"}
+    """
+    percentage_scale = get_percentage_scale(percentage_ranges)
+    question_numbers = [
+        str(get_question_number(question))
+        for question in moment.get("questions", [])
+        if isinstance(question, dict)
+    ]
+    question_indexes = {question_number: index for index, question_number in enumerate(question_numbers)}
+    active_student_ids = {
+        str(get_document_id(student))
+        for student in students
+        if student.get("active") is not False
+    }
+    has_questions = bool(question_numbers)
+    student_indexes = {}
+    fallback_max_values = {}
+    cells = {}
+
+    for (student_id, question_number), value_document in index_moment_values(value_documents).items():
+        if student_id not in active_student_ids:
+            continue
+        if question_number not in question_indexes:
+            # Moments without configured questions take them from the values
+            if has_questions:
+                continue
+            question_indexes[question_number] = len(question_numbers)
+            question_numbers.append(question_number)
+        fallback_max_values.setdefault(question_number, value_document.get("questionValue"))
+        student_index = student_indexes.setdefault(student_id, len(student_indexes))
+        cells[(student_index, question_indexes[question_number])] = to_float(value_document.get("value"))
+
+    max_values = [
+        get_question_max_value(moment, question_number, fallback_max_values.get(question_number))
+        for question_number in question_numbers
+    ]
+    moment_max_value = get_moment_max_value(moment, value_documents)
+    student_count = len(student_indexes)
+    ranges = percentage_scale.ranges
+
+    if np is not None and GRADING_ENGINE != "python":
+        scores = np.zeros((student_count, len(question_numbers)))
+        if cells:
+            positions = np.array(list(cells.keys()), dtype=int)
+            scores[positions[:, 0], positions[:, 1]] = np.fromiter(cells.values(), dtype=float, count=len(cells))
+        question_statistics = get_score_statistics_vectorized(scores, np.array(max_values, dtype=float))
+        totals = scores.sum(axis=1)
+        percentages = totals / moment_max_value * 100 if moment_max_value else np.zeros(student_count)
+        if percentage_scale.ordered:
+            range_indexes = percentage_scale.get_range_indexes(percentages)
+        else:
+            range_indexes = np.array(
+                [ranges.index(percentage_scale.get_range(percentage)) for percentage in percentages], dtype=int,
+            )
+        range_counts = np.bincount(range_indexes, minlength=len(ranges)).tolist()
+        total_statistics = get_score_statistics(totals.tolist(), moment_max_value)
+    else:
+        columns = [[0.0] * student_count for _ in question_numbers]
+        for (student_index, question_index), value in cells.items():
+            columns[question_index][student_index] = value
+        question_statistics = [
+            get_score_statistics(column, max_value) for column, max_value in zip(columns, max_values)
+        ]
+        totals = [sum(column[student_index] for column in columns) for student_index in range(student_count)]
+        percentages = [total / moment_max_value * 100 if moment_max_value else 0 for total in totals]
+        range_counts = [0] * len(ranges)
+        for percentage in percentages:
+            range_counts[ranges.index(percentage_scale.get_range(percentage))] += 1
+        total_statistics = get_score_statistics(totals, moment_max_value)
+
+    return {
+        "studentCount": student_count,
+        "maxValue": format_number(moment_max_value),
+        "questions": [
+            {"questionNumber": question_number, "maxValue": format_number(max_value), **question_statistic}
+            for question_number, max_value, question_statistic in zip(question_numbers, max_values, question_statistics)
+        ],
+        "total": total_statistics,
+        "gradeDistribution": [
+            {
+                "id": percentage_range.get("id"),
+                "min": percentage_range["min"],
+                "max": percentage_range["max"],
+                "nota": percentage_range.get("nota", 0),
+                "backgroundColor": percentage_range.get("backgroundColor"),
+                "textColor": percentage_range.get("textColor"),
+                "count": count,
+                "percentage": round(count / student_count * 100, 1) if student_count else 0,
+            }
+            for percentage_range, count in zip(ranges, range_counts)
+        ],
+    }
+
+
+def get_student_attitude_value(student, template):
+    matching_keys = [
+        str(template.get("id") or ""),
+        get_string_value(template.get("alias")),
+        get_string_value(template.get("text")),
+    ]
+    matching_keys = [key for key in matching_keys if key]
+
+    for collection_key in ("attitudes", "attitudeValues", "attitudeAssessments"):
+        collection = student.get(collection_key)
+
+        if isinstance(collection, list):
+            for attitude in collection:
+                if not isinstance(attitude, dict):
+                    continue
+
+                attitude_keys = [
+                    str(attitude.get("id") or ""),
+                    str(attitude.get("templateId") or ""),
+                    get_string_value(attitude.get("alias")),
+                    get_string_value(attitude.get("text")),
+                ]
+                if any(key in matching_keys for key in attitude_keys):
+                    return to_float(
+                        attitude.get("value")
+                        if attitude.get("value") is not None
+                        else attitude.get("studentTotal")
+                        if attitude.get("studentTotal") is not None
+                        else attitude.get("total")
+                    )
+
+        if isinstance(collection, dict):
+            for key in matching_keys:
+                if key in collection:
+                    return to_float(collection.get(key))
+
+    for key in matching_keys:
+        if key in student:
+            return to_float(student.get(key))
+
+    return 0
+
+
+class AttitudeTemplateIndex:
+    """
+    Attitude templates with their matching keys (id, alias, text), to read the attitude values
+    of many students.
+
+    Args:
+        templates (list): The normalized attitude templates.
+    """
+    COLLECTION_KEYS = ("attitudes", "attitudeValues", "attitudeAssessments")
+
+    def __init__(self, templates):
+        self.templates = templates
+        self.matching_keys = []
+        self.templates_by_key = {}
+
+        for position, template in enumerate(templates):
+            matching_keys = [
+                str(template.get("id") or ""),
+                get_string_value(template.get("alias")),
+                get_string_value(template.get("text")),
+            ]
+            matching_keys = [key for key in matching_keys if key]
+            self.matching_keys.append(matching_keys)
+            for key in matching_keys:
+                self.templates_by_key.setdefault(key, []).append(position)
+
+    def get_student_values(self, student):
+        """
+        Return the value of every template for the student, in template order, reading the
+        student's attitude collections once. Matches exactly like get_student_attitude_value:
+        the first collection with a match wins, then the first matching item of a list.
+        """
+        values = [None] * len(self.templates)
+        pending = len(self.templates)
+
+        for collection_key in self.COLLECTION_KEYS:
+            if not pending:
+                break
+
+            collection = student.get(collection_key)
+
+            if isinstance(collection, list):
+                for attitude in collection:
+                    if not isinstance(attitude, dict):
+                        continue
+
+                    attitude_keys = {
+                        str(attitude.get("id") or ""),
+                        str(attitude.get("templateId") or ""),
+                        get_string_value(attitude.get("alias")),
+                        get_string_value(attitude.get("text")),
+                    }
+                    positions = {
+                        position
+                        for key in attitude_keys
+                        for position in self.templates_by_key.get(key, [])
+                        if values[position] is None
+                    }
+                    if not positions:
+                        continue
+
+                    value = to_float(
+                        attitude.get("value")
+                        if attitude.get("value") is not None
+                        else attitude.get("studentTotal")
+                        if attitude.get("studentTotal") is not None
+                        else attitude.get("total")
+                    )
+                    for position in positions:
+                        values[position] = value
+                    pending -= len(positions)
+
+            if isinstance(collection, dict):
+                for position, matching_keys in enumerate(self.matching_keys):
+                    if values[position] is not None:
+                        continue
+
+                    key = next((key for key in matching_keys if key in collection), None)
+                    if key is not None:
+                        values[position] = to_float(collection.get(key))
+                        pending -= 1
+
+        for position, matching_keys in enumerate(self.matching_keys):
+            if values[position] is None:
+                key = next((key for key in matching_keys if key in student), None)
+                values[position] = to_float(student.get(key)) if key is not None else 0
+
+        return values
+
+
+def get_attitude_template_index(templates):
+    """
+    Return the given AttitudeTemplateIndex, or build one from a list of templates.
+    """
+    if isinstance(templates, AttitudeTemplateIndex):
+        return templates
+
+    return AttitudeTemplateIndex(templates)
+
+
+def group_semester_moments(moments, templates):
+    templates = get_moment_template_index(templates)
+    groups = {}
+
+    for moment in moments:
+        moment_type = get_moment_group_type_label(moment, templates)
+        existing_group = groups.get(moment_type)
+
+        if existing_group:
+            existing_group["moments"].append(moment)
+        else:
+            groups[moment_type] = {
+                "type": moment_type,
+                "weightPercentage": format_number(
+                    get_moment_weight_percentage(moment, templates),
+                ),
+                "moments": [moment],
+            }
+
+    return list(groups.values())
+
+
+def build_student_summary(
+    student,
+    student_groups,
+    final_value,
+    final_max_value,
+    final_percentage,
+    final_range,
+    attitude_templates,
+    total_attitude_weight_percentage,
+):
+    attitude_templates = get_attitude_template_index(attitude_templates)
+    attitude_summaries = [
+        {
+            "id": template["id"],
+            "text": template["text"],
+            "alias": template["alias"],
+            "weightPercentage": template["weightPercentage"],
+            "value": format_number(value),
+        }
+        for template, value in zip(attitude_templates.templates, attitude_templates.get_student_values(student))
+    ]
+    attitudes_weighted_value = sum(
+        attitude["value"] for attitude in attitude_summaries
+    ) * (total_attitude_weight_percentage / 100)
+
+    return {
+        "studentId": get_document_id(student),
+        "studentName": get_student_name(student),
+        "groups": student_groups,
+        "attitudes": attitude_summaries,
+        "attitudesWeightPercentage": format_number(total_attitude_weight_percentage),
+        "attitudesWeightedValue": format_number(attitudes_weighted_value),
+        "finalValue": format_number(final_value),
+        "finalMaxValue": format_number(final_max_value),
+        "finalPercentage": round(final_percentage, 1),
+        "finalPercentageText": f"{final_percentage:.1f}%",
+        "finalGrade": final_range.get("nota", 0),
+        "finalBackgroundColor": final_range.get("backgroundColor"),
+        "finalTextColor": final_range.get("textColor"),
+    }
+
+
+def build_student_summaries(
+    students,
+    groups,
+    value_documents,
+    semester_moments,
+    final_max_value,
+    percentage_scale,
+    attitude_templates,
+    total_attitude_weight_percentage,
+):
+    """
+    Pure-Python engine: enrich the values, then compute every student's summary one moment at a time.
+    """
+    enriched_values = enrich_student_moment_values(
+        value_documents,
+        semester_moments,
+        percentage_scale,
+    )
+    moment_totals = index_student_moment_totals(enriched_values)
+    student_summaries = []
+
+    for student in students:
+        student_id = get_document_id(student)
+        student_groups = []
+        final_value = 0
+
+        for group in groups:
+            moment_summaries = [
+                {
+                    **moment_summary,
+                    "studentTotal": format_number(
+                        moment_totals.get((str(student_id), str(moment_summary["id"])), 0)
+                    ),
+                }
+                for moment_summary in group["momentSummaries"]
+            ]
+            group_average = (
+                sum(moment["studentTotal"] for moment in moment_summaries) / len(moment_summaries)
+                if moment_summaries
+                else 0
+            )
+            weighted_value = group_average * (to_float(group["weightPercentage"]) / 100)
+            final_value += weighted_value
+            student_groups.append(
+                {
+                    "type": group["type"],
+                    "weightPercentage": group["weightPercentage"],
+                    "moments": moment_summaries,
+                    "average": format_number(group_average),
+                    "weightedValue": format_number(weighted_value),
+                }
+            )
+
+        final_percentage = (final_value / final_max_value) * 100 if final_max_value else final_value
+        student_summaries.append(
+            build_student_summary(
+                student,
+                student_groups,
+                final_value,
+                final_max_value,
+                final_percentage,
+                percentage_scale.get_range(final_percentage),
+                attitude_templates,
+                total_attitude_weight_percentage,
+            )
+        )
+
+    return student_summaries
+
+
+def use_vectorized_engine(percentage_scale):
+    # searchsorted only gives the first matching range when the ranges are ordered
+    return np is not None and GRADING_ENGINE != "python" and percentage_scale.ordered
+
+
+def build_student_summaries_vectorized(
+    students,
+    groups,
+    value_documents,
+    final_max_value,
+    percentage_scale,
+    attitude_templates,
+    total_attitude_weight_percentage,
+):
+    """
+    NumPy engine: scatter the values into a students x moments x questions matrix and compute
+    totals, group averages, weighted values, final values and grades as array operations.
+
+    Moments are added in the same order as the pure-Python engine and totals are rounded with
+    format_number, so both engines return the same summary.
+    """
+    student_rows = {}
+    for student in students:
+        student_rows.setdefault(str(get_document_id(student)), len(student_rows))
+
+    moment_columns = {}
+    for group in groups:
+        for moment_summary in group["momentSummaries"]:
+            moment_columns.setdefault(str(moment_summary["id"]), len(moment_columns))
+
+    # Like index_student_moment_totals, a (student, moment) cell takes the values of the first
+    # (momentId, studentId) group found for it, e.g. when ids are stored both as int and str
+    cell_groups = {}
+    question_columns = {}
+    rows, columns, questions, values = [], [], [], []
+    for value_document in value_documents:
+        row = student_rows.get(str(value_document.get("studentId")))
+        column = moment_columns.get(str(value_document.get("momentId")))
+        if row is None or column is None:
+            continue
+
+        group_key = (value_document.get("momentId"), value_document.get("studentId"))
+        if cell_groups.setdefault((row, column), group_key) != group_key:
+            continue
+
+        rows.append(row)
+        columns.append(column)
+        questions.append(
+            question_columns.setdefault(str(value_document.get("questionNumber")), len(question_columns))
+        )
+        values.append(to_float(value_document.get("value")))
+
+    scores = np.zeros((len(student_rows), len(moment_columns), max(1, len(question_columns))))
+    np.add.at(
+        scores,
+        (np.array(rows, dtype=int), np.array(columns, dtype=int), np.array(questions, dtype=int)),
+        np.array(values, dtype=float),
+    )
+    student_totals = [
+        [format_number(total) for total in row_totals]
+        for row_totals in scores.sum(axis=2).tolist()
+    ]
+    totals = np.array(student_totals, dtype=float).reshape(len(student_rows), len(moment_columns))
+
+    student_indexes = [student_rows[str(get_document_id(student))] for student in students]
+    student_matrix = totals[np.array(student_indexes, dtype=int)]
+    final_values = np.zeros(len(students))
+    group_results = []
+    for group in groups:
+        group_columns = [moment_columns[str(moment_summary["id"])] for moment_summary in group["momentSummaries"]]
+        group_sums = np.zeros(len(students))
+        for column in group_columns:
+            group_sums = group_sums + student_matrix[:, column]
+
+        group_averages = group_sums / len(group_columns) if group_columns else group_sums
+        weighted_values = group_averages * (to_float(group["weightPercentage"]) / 100)
+        final_values = final_values + weighted_values
+        group_results.append((group_columns, group_averages.tolist(), weighted_values.tolist()))
+
+    final_percentages = (final_values / final_max_value) * 100 if final_max_value else final_values
+    range_indexes = percentage_scale.get_range_indexes(final_percentages).tolist()
+
+    student_summaries = []
+    for position, (student, final_value, final_percentage, range_index) in enumerate(
+        zip(students, final_values.tolist(), final_percentages.tolist(), range_indexes)
+    ):
+        row_totals = student_totals[student_indexes[position]]
+        student_groups = [
+            {
+                "type": group["type"],
+                "weightPercentage": group["weightPercentage"],
+                "moments": [
+                    {**moment_summary, "studentTotal": row_totals[column]}
+                    for moment_summary, column in zip(group["momentSummaries"], group_columns)
+                ],
+                "average": format_number(group_averages[position]),
+                "weightedValue": format_number(weighted_values[position]),
+            }
+            for group, (group_columns, group_averages, weighted_values) in zip(groups, group_results)
+        ]
+        student_summaries.append(
+            build_student_summary(
+                student,
+                student_groups,
+                final_value,
+                final_max_value,
+                final_percentage,
+                percentage_scale.ranges[range_index],
+                attitude_templates,
+                total_attitude_weight_percentage,
+            )
+        )
+
+    return student_summaries
+
+
+def get_semester_final_max_value(groups):
+    """
+    Return the final value of a student with every moment at its maximum: the weighted sum of the
+    average maximum value of the moments of each group (see group_semester_moments).
+    """
+    final_max_value = 0
+
+    for group in groups:
+        if not group["moments"]:
+            continue
+
+        group_max_average = sum(
+            get_moment_max_value(moment, [])
+            for moment in group["moments"]
+        ) / len(group["moments"])
+        final_max_value += group_max_average * (to_float(group["weightPercentage"]) / 100)
+
+    return final_max_value
+
+
+def build_semester_evaluations_summary(metadata, students, moments, value_documents, settings):
+    compiled_settings = get_compiled_settings(settings)
+    percentage_scale = compiled_settings.percentage_scale
+    templates = compiled_settings.template_index
+    attitude_templates = compiled_settings.attitude_templates
+    attitude_index = compiled_settings.attitude_index
+    total_attitude_weight_percentage = sum(
+        to_float(template.get("weightPercentage"))
+        for template in attitude_templates
+    )
+    semester = str(metadata.get("semester"))
+    semester_moments = [
+        moment
+        for moment in moments
+        if get_moment_semester(moment) == semester
+    ]
+    groups = group_semester_moments(semester_moments, templates)
+    final_max_value = get_semester_final_max_value(groups)
+
+    for group in groups:
+        group["momentSummaries"] = [
+            {
+                "id": get_document_id(moment),
+                "name": get_moment_name(moment),
+                "totalValue": format_number(get_moment_max_value(moment, [])),
+            }
+            for moment in group["moments"]
+        ]
+
+    active_students = [student for student in students if student.get("active") is not False]
+
+    if groups and use_vectorized_engine(percentage_scale):
+        student_summaries = build_student_summaries_vectorized(
+            active_students,
+            groups,
+            value_documents,
+            final_max_value,
+            percentage_scale,
+            attitude_index,
+            total_attitude_weight_percentage,
+        )
+    else:
+        student_summaries = build_student_summaries(
+            active_students,
+            groups,
+            value_documents,
+            semester_moments,
+            final_max_value,
+            percentage_scale,
+            attitude_index,
+            total_attitude_weight_percentage,
+        )
+
+    headers = [
+        "Aluno",
+        *[
+            header
+            for group in groups
+            for header in [
+                *[
+                    f"{moment_summary['name']} ({moment_summary['totalValue']})"
+                    for moment_summary in group["momentSummaries"]
+                ],
+                f"{group['type']} - Média",
+                f"{group['type']} - M*{format_number(group['weightPercentage'])}%",
+            ]
+        ],
+        *[
+            attitude["alias"]
+            for attitude in attitude_templates
+        ],
+        *(
+            [f"Atitudes - {format_number(total_attitude_weight_percentage)}%"]
+            if attitude_templates
+            else []
+        ),
+        "Final",
+        "Nota",
+    ]
+    rows = [
+        [
+            student_summary["studentName"],
+            *[
+                str(value)
+                for group in student_summary["groups"]
+                for value in [
+                    *[moment["studentTotal"] for moment in group["moments"]],
+                    group["average"],
+                    group["weightedValue"],
+                ]
+            ],
+            *[
+                str(attitude["value"])
+                for attitude in student_summary["attitudes"]
+            ],
+            *(
+                [str(student_summary["attitudesWeightedValue"])]
+                if student_summary["attitudes"]
+                else []
+            ),
+            str(student_summary["finalValue"]),
+            str(student_summary["finalGrade"]),
+        ]
+        for student_summary in student_summaries
+    ]
+
+    return {
+        **metadata,
+        "title": get_semester_evaluations_title(metadata),
+        "tests": [
+            {
+                "id": get_document_id(moment),
+                "name": get_moment_name(moment),
+                "totalValue": format_number(get_moment_max_value(moment, [])),
+            }
+            for moment in semester_moments
+        ],
+        "groups": [
+            {
+                "type": group["type"],
+                "weightPercentage": group["weightPercentage"],
+                "moments": [{**moment_summary} for moment_summary in group["momentSummaries"]],
+            }
+            for group in groups
+        ],
+        "attitudes": [
+            {
+                "id": template["id"],
+                "text": template["text"],
+                "alias": template["alias"],
+                "weightPercentage": template["weightPercentage"],
+            }
+            for template in attitude_templates
+        ],
+        "attitudesWeightPercentage": format_number(total_attitude_weight_percentage),
+        "headers": headers,
+        "rows": rows,
+        "students": student_summaries,
+    }
+
+
+def build_semester_summary_content(semester, students, moments, value_documents, settings):
+    """
+    Build the stored content of a class semester summary. Top-level and picklable, so it can run
+    in a worker process (see utils/workers.py).
+    """
+    summary = build_semester_evaluations_summary({"semester": semester}, students, moments, value_documents, settings)
+    return get_semester_evaluations_summary_content(summary)
+
+
+class SemesterSimulation:
+    """
+    What-if grading of a class semester: the final values, percentages and grades that
+    build_semester_evaluations_summary would give with other settings, without building the
+    whole summary.
+
+    The student moment totals do not depend on the settings, so they are computed once (as a
+    students x moments matrix when NumPy is installed); every scenario then only groups the
+    moments by its templates and weights the totals, with the same operations in the same order
+    as the summary engines, so the results are the same as a rebuilt summary.
+
+    Args:
+        semester (str): "1" or "2".
+        students (list): The students of the class; inactive students are left out.
+        moments (list): The moments of the class; only those of the semester are used.
+        value_documents (list): The per-question values of the class.
+    """
+    def __init__(self, semester, students, moments, value_documents):
+        semester = str(semester)
+        self.moments = [moment for moment in moments if get_moment_semester(moment) == semester]
+        self.students = [student for student in students if student.get("active") is not False]
+        student_ids = [str(get_document_id(student)) for student in self.students]
+        moment_totals = index_student_moment_totals(enrich_student_moment_values(value_documents, self.moments))
+        # Rounded like the studentTotal of the summary, one list (in student order) per moment id
+        self.totals = {}
+        for moment in self.moments:
+            moment_id = str(get_document_id(moment))
+            if moment_id not in self.totals:
+                self.totals[moment_id] = [
+                    format_number(moment_totals.get((student_id, moment_id), 0))
+                    for student_id in student_ids
+                ]
+
+        self.columns = {moment_id: column for column, moment_id in enumerate(self.totals)}
+        self.matrix = None
+        if np is not None:
+            self.matrix = np.array(list(self.totals.values()), dtype=float).reshape(
+                len(self.totals), len(self.students),
+            ).T
+
+    def get_final_values(self, group_weights, vectorized):
+        student_count = len(self.students)
+        if vectorized:
+            final_values = np.zeros(student_count)
+            for moment_ids, weight in group_weights:
+                group_sums = np.zeros(student_count)
+                for moment_id in moment_ids:
+                    group_sums = group_sums + self.matrix[:, self.columns[moment_id]]
+                final_values = final_values + (group_sums / len(moment_ids)) * weight
+            return final_values.tolist()
+
+        final_values = [0] * student_count
+        for moment_ids, weight in group_weights:
+            moment_totals = [self.totals[moment_id] for moment_id in moment_ids]
+            for position in range(student_count):
+                group_average = sum(totals[position] for totals in moment_totals) / len(moment_ids)
+                final_values[position] += group_average * weight
+        return final_values
+
+    def grade(self, settings):
+        """
+        Grade the students with the given settings.
+
+        Returns:
+            tuple: (final_max_value, [{"finalValue", "finalPercentage", "finalGrade",
+            "attitudesWeightedValue"}, ...]) in the order of the active students.
+        """
+        compiled_settings = get_compiled_settings(settings)
+        percentage_scale = compiled_settings.percentage_scale
+        groups = group_semester_moments(self.moments, compiled_settings.template_index)
+        final_max_value = get_semester_final_max_value(groups)
+        group_weights = [
+            (
+                [str(get_document_id(moment)) for moment in group["moments"]],
+                to_float(group["weightPercentage"]) / 100,
+            )
+            for group in groups
+        ]
+        vectorized = self.matrix is not None and use_vectorized_engine(percentage_scale)
+        final_values = self.get_final_values(group_weights, vectorized)
+        final_percentages = [
+            (final_value / final_max_value) * 100 if final_max_value else final_value
+            for final_value in final_values
+        ]
+        if vectorized and final_percentages:
+            final_ranges = [
+                percentage_scale.ranges[index]
+                for index in percentage_scale.get_range_indexes(np.array(final_percentages, dtype=float)).tolist()
+            ]
+        else:
+            final_ranges = [percentage_scale.get_range(percentage) for percentage in final_percentages]
+
+        attitude_index = compiled_settings.attitude_index
+        attitude_weight = sum(
+            to_float(template.get("weightPercentage"))
+            for template in compiled_settings.attitude_templates
+        ) / 100
+        results = [
+            {
+                "finalValue": format_number(final_value),
+                "finalPercentage": round(final_percentage, 1),
+                "finalGrade": final_range.get("nota", 0),
+                "attitudesWeightedValue": format_number(
+                    sum(format_number(value) for value in attitude_index.get_student_values(student)) * attitude_weight
+                ),
+            }
+            for student, final_value, final_percentage, final_range in zip(
+                self.students, final_values, final_percentages, final_ranges,
+            )
+        ]
+
+        return final_max_value, results
+
+    def simulate(self, settings, scenarios):
+        """
+        Grade the students with the current settings and with every scenario.
+
+        Args:
+            settings (dict | CompiledSettings): The current app settings.
+            scenarios (list[dict]): {"id", "name"} (optional) and any of SIMULATION_SETTINGS_FIELDS;
+                the fields left out keep their current value.
+
+        Returns:
+            dict: {"studentCount", "current": {"finalMaxValue", "students"}, "scenarios": [{"id",
+            "name", "finalMaxValue", "changedGrades", "students"}]}, where every scenario student
+            has the "delta" of its results against the current ones.
+        """
+        compiled_settings = get_compiled_settings(settings)
+        current_max_value, current_results = self.grade(compiled_settings)
+        scenario_summaries = []
+
+        for scenario_index, scenario in enumerate(scenarios):
+            scenario_settings = {
+                **compiled_settings.settings,
+                **{field: scenario[field] for field in SIMULATION_SETTINGS_FIELDS if field in scenario},
+            }
+            final_max_value, results = self.grade(scenario_settings)
+            students = []
+            for student, current, result in zip(self.students, current_results, results):
+                students.append(
+                    {
+                        "studentId": get_document_id(student),
+                        **result,
+                        "delta": {
+                            "finalValue": format_number(result["finalValue"] - current["finalValue"]),
+                            "finalPercentage": round(result["finalPercentage"] - current["finalPercentage"], 1),
+                            "finalGrade": format_number(to_float(result["finalGrade"]) - to_float(current["finalGrade"])),
+                            "attitudesWeightedValue": format_number(
+                                result["attitudesWeightedValue"] - current["attitudesWeightedValue"]
+                            ),
+                        },
+                    }
+                )
+
+            scenario_summaries.append(
+                {
+                    "id": scenario.get("id") or f"scenario-{scenario_index + 1}",
+                    "name": get_string_value(scenario.get("name")) or f"Cenário {scenario_index + 1}",
+                    "finalMaxValue": format_number(final_max_value),
+                    "changedGrades": sum(1 for student in students if student["delta"]["finalGrade"] != 0),
+                    "students": students,
+                }
+            )
+
+        return {
+            "studentCount": len(self.students),
+            "current": {
+                "finalMaxValue": format_number(current_max_value),
+                "students": [
+                    {"studentId": get_document_id(student), "studentName": get_student_name(student), **result}
+                    for student, result in zip(self.students, current_results)
+                ],
+            },
+            "scenarios": scenario_summaries,
+        }
+
+
+def get_semester_evaluations_title(metadata):
+    return metadata.get("title") or f"Avaliações - {metadata.get('semester')}.º semestre"
+
+
+def get_semester_evaluations_comparison_payload(document):
+    return {
+        "tests": document.get("tests") or [],
+        "groups": document.get("groups") or [],
+        "headers": document.get("headers") or [],
+        "rows": document.get("rows") or [],
+        "students": document.get("students") or [],
+    }
+
+
+def get_content_hash(value):
+    """
+    Return a SHA-256 hash of a JSON-like value; equal values give equal hashes.
+    """
+    content = json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def get_semester_evaluations_content_hash(document):
+    """
+    Hash of the parts of a semester summary that define hasUnsavedChanges. Saved summaries
+    store it as "contentHash"; older saved documents without it are hashed on read.
+    """
+    return document.get("contentHash") or get_content_hash(get_semester_evaluations_comparison_payload(document))
+
+
+# Parts of build_semester_evaluations_summary that depend on the class data and settings only
+SEMESTER_EVALUATIONS_SUMMARY_FIELDS = (
+    "tests",
+    "groups",
+    "attitudes",
+    "attitudesWeightPercentage",
+    "headers",
+    "rows",
+    "students",
+)
+
+
+def get_semester_evaluations_summary_content(summary):
+    """
+    Keep the data parts of a semester summary, with their content hash, to be materialized.
+    """
+    content = {field: summary[field] for field in SEMESTER_EVALUATIONS_SUMMARY_FIELDS}
+    content["contentHash"] = get_content_hash(get_semester_evaluations_comparison_payload(content))
+    return content
+
+
+def restore_semester_evaluations_summary(metadata, content):
+    """
+    Rebuild the summary returned by build_semester_evaluations_summary from the request metadata
+    and materialized content.
+    """
+    return {
+        **metadata,
+        "title": get_semester_evaluations_title(metadata),
+        **content,
+    }
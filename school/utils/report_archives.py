@@ -0,0 +1,101 @@
+"""
+report_archives.py
+
+ZIP archives of many reports, streamed while the reports are rendered.
+
+The archive is written into a ChunkBuffer (see utils/exports.py) that is never seeked, so each
+report is sent as soon as it is ready and only the report being added is kept in memory. The
+progress of an archive (reports done and failed out of the total) is kept in ArchiveProgress,
+so the client can poll it while it downloads.
+
+Classes:
+    - ArchiveProgress: Progress of the archives being streamed by this process.
+
+Functions:
+    - stream_zip: Async iterator of the bytes of a ZIP archive of (name, data) entries.
+"""
+
+import time
+import uuid
+import zipfile
+
+from utils.config import REPORT_JOB_TTL_SECONDS
+from utils.exports import ChunkBuffer
+
+ARCHIVE_FIELDS = ("archiveId", "status", "total", "done", "failed")
+
+
+class ArchiveProgress:
+    """
+    In-memory progress of the archives of this process:
+
+        running -> done | cancelled (the client stopped the download)
+
+    Args:
+        ttl_seconds (float): How long a finished archive is kept.
+        clock (Callable[[], float]): Monotonic clock, replaceable in tests.
+    """
+    def __init__(self, ttl_seconds: float = REPORT_JOB_TTL_SECONDS, clock=time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.archives = {}
+
+    def purge(self):
+        """
+        Forget the archives that finished more than ttl_seconds ago.
+        """
+        now = self.clock()
+        for archive_id, archive in list(self.archives.items()):
+            if archive["expiresAt"] is not None and archive["expiresAt"] <= now:
+                del self.archives[archive_id]
+
+    def start(self, total):
+        self.purge()
+        archive_id = uuid.uuid4().hex
+        self.archives[archive_id] = {
+            "archiveId": archive_id,
+            "status": "running",
+            "total": total,
+            "done": 0,
+            "failed": 0,
+            "expiresAt": None,
+        }
+        return archive_id
+
+    def advance(self, archive_id, failed=False):
+        archive = self.archives.get(archive_id)
+        if archive is not None:
+            archive["failed" if failed else "done"] += 1
+
+    def finish(self, archive_id, status="done"):
+        archive = self.archives.get(archive_id)
+        if archive is not None and archive["status"] == "running":
+            archive.update({"status": status, "expiresAt": self.clock() + self.ttl_seconds})
+
+    def get(self, archive_id):
+        """
+        Return the public fields of an archive, or None when it does not exist (or expired).
+        """
+        self.purge()
+        archive = self.archives.get(archive_id)
+        if archive is None:
+            return None
+
+        return {field: archive[field] for field in ARCHIVE_FIELDS}
+
+
+async def stream_zip(entries):
+    """
+    Write the entries into a ZIP archive and yield its bytes as each entry is added.
+
+    Args:
+        entries: Async iterable of (name, data). PDFs are already compressed, so they are stored.
+    """
+    buffer = ChunkBuffer()
+    archive = zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED)
+    async for name, data in entries:
+        archive.writestr(name, data)
+        yield buffer.take()
+
+    archive.close()
+    yield buffer.take()
@@ -0,0 +1,104 @@
+"""
+report_janitor.py
+
+Background task that keeps the stored reports bounded.
+
+Every `interval_seconds` the janitor re-reads the reports directory (REPORTS_DIR, shared by every
+worker process of the server), deletes the reports not used for `max_age_seconds` and then the
+least recently used ones while they take more than REPORT_CACHE_MAX_BYTES. When reports are
+stored in GridFS (REPORT_STORAGE="gridfs"), the shared store is trimmed the same way.
+
+The task is started and stopped by the lifespan of the school API (main.py).
+
+Classes:
+    - ReportJanitor: Periodically evicts old reports and counts what it did.
+"""
+
+import asyncio
+import time
+from contextlib import suppress
+
+from utils.config import REPORT_JANITOR_INTERVAL_SECONDS, REPORT_MAX_AGE_SECONDS
+from utils.logging import logging
+
+
+class ReportJanitor:
+    """
+    Evicts old reports from a ReportCache (and optionally a GridFSReportStore).
+
+    Args:
+        cache (ReportCache): The local reports.
+        store (GridFSReportStore, optional): The shared reports.
+        max_age_seconds (float): Maximum time since a report was last used (stored, for GridFS).
+        interval_seconds (float): Time between two runs.
+        clock (Callable[[], float]): Wall clock (file times are wall-clock times), replaceable in tests.
+    """
+    def __init__(
+        self,
+        cache,
+        store=None,
+        max_age_seconds: float = REPORT_MAX_AGE_SECONDS,
+        interval_seconds: float = REPORT_JANITOR_INTERVAL_SECONDS,
+        clock=time.time,
+    ):
+        self.cache = cache
+        self.store = store
+        self.max_age_seconds = max_age_seconds
+        self.interval_seconds = interval_seconds
+        self.clock = clock
+        self.task = None
+        self.runs = 0
+        self.failures = 0
+        self.evictions = 0
+        self.last_run_at = None
+
+    async def run_once(self):
+        """
+        Evict the old reports once.
+
+        Returns:
+            int: The number of reports deleted.
+        """
+        # Reading the directory blocks, so it runs in a thread; the index is updated in the loop
+        files = await asyncio.to_thread(self.cache.scan)
+        now = self.clock()
+        evictions = self.cache.collect(files, self.max_age_seconds, now)
+        if self.store is not None:
+            evictions += await self.store.collect(self.max_age_seconds, self.cache.max_bytes, now)
+
+        self.runs += 1
+        self.evictions += evictions
+        self.last_run_at = now
+        if evictions:
+            logging.info(f"ReportJanitor.run_once();evicted={evictions}")
+        return evictions
+
+    async def run(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                self.failures += 1
+                logging.error(f"ReportJanitor.run();error={e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self.task
+            self.task = None
+
+    def get_metrics(self):
+        return {
+            "runs": self.runs,
+            "failures": self.failures,
+            "evictions": self.evictions,
+            "lastRunAt": self.last_run_at,
+            "maxAgeSeconds": self.max_age_seconds,
+            "intervalSeconds": self.interval_seconds,
+        }
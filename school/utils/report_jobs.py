@@ -0,0 +1,124 @@
+"""
+report_jobs.py
+
+Background jobs for the PDF reports of the school service.
+
+POST /config/moment-assessment-report with "async": true submits a job and answers at once
+with its id; GET /config/report-jobs/{jobId} reports its status:
+
+    queued -> running -> done (with the report "url") | failed (with a "message")
+
+At most `max_running` jobs build reports at the same time; the others stay queued. Identical
+requests (same deduplication key) share the job while it is queued or running; once it ended, the
+same request submits a new job, since a report built from the class data (reportType) may have
+changed since then. Finished jobs are forgotten `ttl_seconds` after they end.
+
+Classes:
+    - ReportJobs: Submits, runs and tracks the report jobs.
+"""
+
+import asyncio
+import time
+import uuid
+
+from utils.config import REPORT_JOB_TTL_SECONDS, REPORT_WORKERS
+from utils.logging import logging
+from utils.request_context import deadline_var
+
+JOB_FIELDS = ("jobId", "status", "url", "message")
+
+
+class ReportJobs:
+    """
+    In-memory report jobs of this process.
+
+    Args:
+        max_running (int): Maximum number of jobs building reports at the same time.
+        ttl_seconds (float): How long a finished job (done or failed) is kept.
+        clock (Callable[[], float]): Monotonic clock, replaceable in tests.
+    """
+    def __init__(self, max_running: int = REPORT_WORKERS, ttl_seconds: float = REPORT_JOB_TTL_SECONDS, clock=time.monotonic):
+        self.max_running = max(1, max_running)
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.jobs = {}
+        self.jobs_by_key = {}
+        self.slots = None
+        self.slots_loop = None
+
+    def get_slots(self):
+        """
+        Return the semaphore of the running event loop that limits the running jobs.
+        """
+        loop = asyncio.get_running_loop()
+        if self.slots is None or self.slots_loop is not loop:
+            self.slots = asyncio.Semaphore(self.max_running)
+            self.slots_loop = loop
+
+        return self.slots
+
+    def purge(self):
+        """
+        Forget the jobs that finished more than ttl_seconds ago.
+        """
+        now = self.clock()
+        for job_id, job in list(self.jobs.items()):
+            if job["expiresAt"] is not None and job["expiresAt"] <= now:
+                del self.jobs[job_id]
+                if self.jobs_by_key.get(job["key"]) == job_id:
+                    del self.jobs_by_key[job["key"]]
+
+    def get(self, job_id):
+        """
+        Return the public fields of a job, or None when it does not exist (or expired).
+        """
+        self.purge()
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+
+        return {field: job[field] for field in JOB_FIELDS if job.get(field) is not None}
+
+    def submit(self, key, build):
+        """
+        Submit a job, or return the job with the same key that is still queued or running.
+
+        Args:
+            key (str): Deduplication key, e.g. a hash of the request.
+            build (Callable[[], Awaitable[tuple]]): Builds the report and returns (url, message):
+                the report url when it succeeded, else None and the error message.
+
+        Returns:
+            dict: The public fields of the job.
+        """
+        self.purge()
+        existing_id = self.jobs_by_key.get(key)
+        existing = self.jobs.get(existing_id)
+        if existing is not None and existing["status"] in ("queued", "running"):
+            return self.get(existing_id)
+
+        job_id = uuid.uuid4().hex
+        job = {"jobId": job_id, "key": key, "status": "queued", "expiresAt": None}
+        self.jobs[job_id] = job
+        self.jobs_by_key[key] = job_id
+        job["task"] = asyncio.ensure_future(self.run(job, build))
+        return self.get(job_id)
+
+    async def run(self, job, build):
+        # The job outlives the request that submitted it: drop the request deadline (the task
+        # runs in a copy of the request context, so the request is not affected)
+        deadline_var.set(None)
+        try:
+            async with self.get_slots():
+                job["status"] = "running"
+                url, message = await build()
+        except Exception as e:
+            logging.error(f"ReportJobs.run();job={job['jobId']};error={e}")
+            url, message = None, "Erro ao gerar o relatório."
+
+        if url:
+            job.update({"status": "done", "url": url})
+        else:
+            job.update({"status": "failed", "message": message})
+        job["expiresAt"] = self.clock() + self.ttl_seconds
+        job.pop("task", None)
@@ -0,0 +1,516 @@
+"""
+reports.py
+
+PDF rendering of the school reports (moment assessment and semester evaluations tables).
+
+render_report_pdf is a top-level function of plain arguments, so the routes run it in the
+report worker processes (see utils/workers.py) and the event loop never blocks on reportlab.
+
+Rendered PDFs are content-addressed: the file name carries a hash of the title, headers, rows,
+render mode and REPORT_STYLE_VERSION, so an identical request is served from ReportCache without rendering
+and two reports with the same title never overwrite each other.
+
+Classes:
+    - ReportCache: Size-bounded LRU cache of the rendered PDFs in REPORTS_DIR.
+    - GridFSReportStore: Rendered PDFs shared by every instance through a db_service GridFS bucket.
+
+Functions:
+    - safe_report_filename: File name (without extension) derived from a report title.
+    - get_report_key: Content hash of a report.
+    - get_report_styles: Paragraph styles of the reports, built once per process.
+    - split_report_columns: Groups of columns of a table too wide for the page.
+    - render_report_pdf: Build the PDF of a table report ("fast" or "standard" mode) into a file.
+    - render_report_bytes: Build the same PDF in memory.
+"""
+
+import base64
+import io
+import os
+import re
+import tempfile
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from functools import lru_cache
+from xml.sax.saxutils import escape
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.platypus import PageBreak, SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+
+from utils.config import REPORT_CACHE_MAX_BYTES, REPORT_RENDER_MODE, REPORTS_BUCKET
+from utils.grading import get_content_hash
+
+REPORTS_DIR = Path(tempfile.gettempdir()) / "school-server-reports"
+# Change whenever render_report_pdf draws reports differently, so cached PDFs are not reused
+REPORT_STYLE_VERSION = 2
+# Temporary files older than this are left over from renders that did not finish
+TEMPORARY_FILE_MAX_AGE_SECONDS = 60 * 60
+REPORT_RENDER_MODES = ("fast", "standard")
+
+PAGE_SIZE = landscape(A4)
+PAGE_MARGIN = 24
+AVAILABLE_WIDTH = PAGE_SIZE[0] - 2 * PAGE_MARGIN
+CELL_FONT = "Helvetica"
+HEADER_FONT = "Helvetica-Bold"
+CELL_FONT_SIZE = 7
+# Left plus right padding of a table cell
+CELL_PADDING = 12
+# Narrowest column of a fast report; wider tables are split into groups of columns
+MIN_COLUMN_WIDTH = 36
+
+TABLE_STYLE = TableStyle(
+    [
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#e2e8f0")),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.HexColor("#0f172a")),
+        ("GRID", (0, 0), (-1, -1), 0.4, colors.HexColor("#cbd5e1")),
+        ("FONTNAME", (0, 0), (-1, 0), HEADER_FONT),
+        ("FONTSIZE", (0, 0), (-1, -1), CELL_FONT_SIZE),
+        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+        ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor("#f8fafc")]),
+    ]
+)
+
+
+def safe_report_filename(value):
+    normalized = re.sub(r"[^A-Za-z0-9_-]+", "_", value.strip())
+    return normalized.strip("_") or "momento_avaliacao"
+
+
+def get_report_key(title, headers, rows, mode=REPORT_RENDER_MODE):
+    return get_content_hash([str(title), headers, rows, mode, REPORT_STYLE_VERSION])
+
+
+class ReportCache:
+    """
+    Keeps the rendered reports in a directory, evicting the least recently used files once they
+    take more than max_bytes.
+
+    Args:
+        directory (Path): Where the PDFs are stored.
+        max_bytes (int): Maximum total size of the stored PDFs.
+    """
+    def __init__(self, directory=REPORTS_DIR, max_bytes: int = REPORT_CACHE_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.entries = None
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def scan(self):
+        """
+        Return (mtime, name, size) of the files in the directory, least recently used first. Only
+        reads the directory, so it can run in a thread.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        files = []
+        for path in self.directory.iterdir():
+            if path.suffix != ".pdf" and path.suffix != ".tmp":
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, path.name, stat.st_size))
+
+        return sorted(files)
+
+    def load(self):
+        """
+        Index the PDFs already in the directory (e.g. after a restart), least recently used first.
+        """
+        if self.entries is not None:
+            return
+
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        for _, name, size in self.scan():
+            if name.endswith(".pdf"):
+                self.entries[name] = size
+                self.total_bytes += size
+
+    def collect(self, files, max_age_seconds=None, now=None):
+        """
+        Index the reports again from a scan of the directory (so reports written by other
+        processes are counted), delete the ones not used for max_age_seconds, then the least
+        recently used ones while they take more than max_bytes. Temporary files of renders that
+        never finished are deleted after TEMPORARY_FILE_MAX_AGE_SECONDS.
+
+        Args:
+            files (list): The result of scan().
+            max_age_seconds (float, optional): Maximum time since a report was last used.
+            now (float, optional): Current time (time.time()).
+
+        Returns:
+            int: The number of reports deleted.
+        """
+        now = time.time() if now is None else now
+        previous_entries = self.entries or OrderedDict()
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        evictions = self.evictions
+
+        for mtime, name, size in files:
+            age = now - mtime
+            if name.endswith(".tmp"):
+                if age > TEMPORARY_FILE_MAX_AGE_SECONDS:
+                    (self.directory / name).unlink(missing_ok=True)
+                continue
+            if max_age_seconds is not None and age > max_age_seconds:
+                (self.directory / name).unlink(missing_ok=True)
+                self.evictions += 1
+                self.expirations += 1
+                continue
+            self.entries[name] = size
+            self.total_bytes += size
+
+        # Reports added while the directory was being scanned are the most recent ones
+        scanned_names = {name for _, name, _ in files}
+        for name, size in previous_entries.items():
+            if name not in scanned_names and (self.directory / name).exists():
+                self.entries[name] = size
+                self.total_bytes += size
+
+        self.evict()
+        return self.evictions - evictions
+
+    def get_path(self, title, key):
+        return self.directory / f"{safe_report_filename(title)}-{key[:20]}.pdf"
+
+    def get(self, path):
+        """
+        Return the path when the report is cached (marking it as recently used), else None.
+        """
+        self.load()
+        path = Path(path)
+        if path.name in self.entries and path.exists():
+            self.hits += 1
+            self.touch(path)
+            return path
+
+        self.discard(path.name)
+        self.misses += 1
+        return None
+
+    def touch(self, path):
+        """
+        Mark a stored report as recently used, e.g. when it is downloaded.
+        """
+        self.load()
+        path = Path(path)
+        if path.name in self.entries:
+            self.entries.move_to_end(path.name)
+            try:
+                os.utime(path)
+            except OSError:
+                self.discard(path.name)
+
+    def add(self, path):
+        """
+        Register a rendered report and evict the least recently used ones over max_bytes.
+        """
+        self.load()
+        path = Path(path)
+        self.discard(path.name)
+        size = path.stat().st_size
+        self.entries[path.name] = size
+        self.total_bytes += size
+        self.evict()
+
+    def discard(self, name):
+        size = self.entries.pop(name, None)
+        if size is not None:
+            self.total_bytes -= size
+
+    def evict(self):
+        # The most recent report is kept even when it is larger than max_bytes
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            name, size = self.entries.popitem(last=False)
+            self.total_bytes -= size
+            self.evictions += 1
+            (self.directory / name).unlink(missing_ok=True)
+
+    def get_metrics(self):
+        self.load()
+        return {
+            "reports": len(self.entries),
+            "bytes": self.total_bytes,
+            "maxBytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expired": self.expirations,
+        }
+
+
+class GridFSReportStore:
+    """
+    Keeps the rendered reports in a GridFS bucket of db_service, so a download URL returned by one
+    school-API instance can be served by any other.
+
+    Args:
+        api_client (BDClient): Client used to store and read the files.
+        bucket (str): The GridFS bucket.
+    """
+    def __init__(self, api_client, bucket: str = REPORTS_BUCKET):
+        self.api_client = api_client
+        self.bucket = bucket
+        # Last counted by collect()
+        self.reports = None
+        self.total_bytes = None
+        self.evictions = 0
+
+    async def exists(self, name):
+        response = await self.api_client.find(
+            endpoint="findfiles",
+            payload={"bucket": self.bucket, "query": {"filename": name}},
+        )
+        return bool(response.get("files"))
+
+    async def get(self, name):
+        """
+        Return the content of a stored report, or None when it does not exist.
+        """
+        response = await self.api_client.find(
+            endpoint="getfile",
+            payload={"bucket": self.bucket, "filename": name},
+        )
+        data = response.get("data")
+        return base64.b64decode(data) if data else None
+
+    async def put(self, name, data: bytes):
+        """
+        Store a rendered report. Returns False when db_service did not store it.
+        """
+        response = await self.api_client.update(
+            endpoint="putfile",
+            payload={
+                "bucket": self.bucket,
+                "filename": name,
+                "data": base64.b64encode(data).decode("ascii"),
+                "metadata": {"storedAt": time.time()},
+            },
+        )
+        return bool(response.get("id"))
+
+    async def collect(self, max_age_seconds=None, max_bytes=None, now=None):
+        """
+        Delete the reports stored more than max_age_seconds ago, then the oldest ones while they
+        take more than max_bytes.
+
+        Returns:
+            int: The number of reports deleted.
+        """
+        now = time.time() if now is None else now
+        response = await self.api_client.find(endpoint="findfiles", payload={"bucket": self.bucket, "query": {}})
+        if "files" not in response:
+            # db_service could not list the files: try again on the next run
+            return 0
+        files = response["files"] or []
+        total_bytes = sum(file.get("length") or 0 for file in files)
+        expired = []
+        kept = []
+        for file in files:
+            stored_at = (file.get("metadata") or {}).get("storedAt")
+            if max_age_seconds is not None and stored_at is not None and now - stored_at > max_age_seconds:
+                expired.append(file)
+            else:
+                kept.append(file)
+
+        total_bytes -= sum(file.get("length") or 0 for file in expired)
+        # Files are listed oldest first
+        while max_bytes is not None and total_bytes > max_bytes and len(kept) > 1:
+            file = kept.pop(0)
+            total_bytes -= file.get("length") or 0
+            expired.append(file)
+
+        for file in expired:
+            await self.api_client.delete(
+                endpoint="deletefile",
+                payload={"bucket": self.bucket, "filename": file["filename"]},
+            )
+
+        self.reports = len(kept)
+        self.total_bytes = total_bytes
+        self.evictions += len(expired)
+        return len(expired)
+
+    def get_metrics(self):
+        return {"reports": self.reports, "bytes": self.total_bytes, "evictions": self.evictions}
+
+
+@lru_cache(maxsize=None)
+def get_report_styles():
+    """
+    Return the paragraph styles of the reports. The sample style sheet is built once per process
+    instead of once per report.
+    """
+    styles = getSampleStyleSheet()
+    styles.add(
+        ParagraphStyle(
+            "ReportCell",
+            parent=styles["BodyText"],
+            fontName=CELL_FONT,
+            fontSize=CELL_FONT_SIZE,
+            leading=CELL_FONT_SIZE + 1.5,
+        )
+    )
+    styles.add(ParagraphStyle("ReportHeaderCell", parent=styles["ReportCell"], fontName=HEADER_FONT))
+    return styles
+
+
+@lru_cache(maxsize=4096)
+def get_text_width(text, font_name):
+    return stringWidth(text, font_name, CELL_FONT_SIZE)
+
+
+def get_column_widths(column_count):
+    """
+    Return the widths of a table whose first (student) column is wider than the others.
+    """
+    first_col_width = min(160, AVAILABLE_WIDTH * 0.28)
+    other_columns = max(column_count - 1, 1)
+    return [first_col_width] + [(AVAILABLE_WIDTH - first_col_width) / other_columns] * other_columns
+
+
+def split_report_columns(column_count, min_width=MIN_COLUMN_WIDTH):
+    """
+    Split the columns of a table into groups that fit the page width with columns of at least
+    min_width. Every group starts with the first (student) column.
+
+    Returns:
+        list: One list of column indexes per group.
+    """
+    if column_count <= 1:
+        return [[0]]
+
+    first_col_width = get_column_widths(column_count)[0]
+    per_group = max(int((AVAILABLE_WIDTH - first_col_width) // min_width), 1)
+    return [
+        [0, *range(start, min(start + per_group, column_count))]
+        for start in range(1, column_count, per_group)
+    ]
+
+
+def get_fast_cell(value, width, style, font_name):
+    """
+    Return the cell as a plain string when it fits its column on one line, otherwise as a
+    paragraph that wraps.
+    """
+    text = str(value)
+    if "\n" not in text and get_text_width(text, font_name) + CELL_PADDING <= width:
+        return text
+    return Paragraph(escape(text), style)
+
+
+def build_report_document(path):
+    return SimpleDocTemplate(
+        path,
+        pagesize=PAGE_SIZE,
+        rightMargin=PAGE_MARGIN,
+        leftMargin=PAGE_MARGIN,
+        topMargin=PAGE_MARGIN,
+        bottomMargin=PAGE_MARGIN,
+    )
+
+
+def build_standard_tables(headers, rows, styles):
+    table_data = [[Paragraph(str(cell), styles["BodyText"]) for cell in headers]]
+    table_data.extend([[Paragraph(str(cell), styles["BodyText"]) for cell in row] for row in rows])
+    table = Table(table_data, colWidths=get_column_widths(len(headers)), repeatRows=1)
+    table.setStyle(TABLE_STYLE)
+    return [table]
+
+
+def build_fast_tables(headers, rows, styles):
+    elements = []
+    column_groups = split_report_columns(len(headers))
+
+    for group_index, columns in enumerate(column_groups):
+        if len(column_groups) > 1:
+            if group_index:
+                elements.append(PageBreak())
+            elements.append(
+                Paragraph(f"Colunas {columns[1] + 1} a {columns[-1] + 1} de {len(headers)}", styles["Normal"])
+            )
+            elements.append(Spacer(1, 6))
+
+        col_widths = get_column_widths(len(columns))
+        table_data = [
+            [
+                get_fast_cell(headers[column], width, styles["ReportHeaderCell"], HEADER_FONT)
+                for column, width in zip(columns, col_widths)
+            ]
+        ]
+        table_data.extend(
+            [
+                get_fast_cell(row[column] if column < len(row) else "", width, styles["ReportCell"], CELL_FONT)
+                for column, width in zip(columns, col_widths)
+            ]
+            for row in rows
+        )
+        table = Table(table_data, colWidths=col_widths, repeatRows=1)
+        table.setStyle(TABLE_STYLE)
+        elements.append(table)
+
+    return elements
+
+
+def build_report_elements(title, headers, rows, mode):
+    styles = get_report_styles()
+    elements = [
+        Paragraph(str(title), styles["Title"]),
+        Spacer(1, 12),
+    ]
+    if mode == "standard":
+        elements.extend(build_standard_tables(headers, rows, styles))
+    else:
+        elements.extend(build_fast_tables(headers, rows, styles))
+    return elements
+
+
+def render_report_pdf(title, headers, rows, pdf_path, mode=REPORT_RENDER_MODE):
+    """
+    Build the PDF of a table report: the title followed by a table whose header repeats on every
+    page.
+
+    In "fast" mode cells that fit their column are drawn as plain strings (a Paragraph is only
+    built for cells that must wrap) and tables too wide for the page are split into groups of
+    columns, each repeating the first column. "standard" mode keeps a Paragraph in every cell and
+    all the columns on the same page.
+
+    Args:
+        title (str): Report title.
+        headers (list): Column headers.
+        rows (list): Table rows, one list of cells per row.
+        pdf_path (str): Where to write the PDF.
+        mode (str): "fast" or "standard".
+
+    Returns:
+        str: The path of the PDF.
+    """
+    Path(pdf_path).parent.mkdir(parents=True, exist_ok=True)
+    # Write to a temporary file first, so a cached report is never seen half written
+    temporary_path = f"{pdf_path}.{os.getpid()}.tmp"
+    build_report_document(temporary_path).build(build_report_elements(title, headers, rows, mode))
+    os.replace(temporary_path, pdf_path)
+
+    return str(pdf_path)
+
+
+def render_report_bytes(title, headers, rows, mode=REPORT_RENDER_MODE):
+    """
+    Build the PDF of a table report (see render_report_pdf) in a memory buffer.
+
+    Returns:
+        bytes: The PDF.
+    """
+    buffer = io.BytesIO()
+    build_report_document(buffer).build(build_report_elements(title, headers, rows, mode))
+    return buffer.getvalue()
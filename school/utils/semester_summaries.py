@@ -0,0 +1,177 @@
+"""
+semester_summaries.py
+
+Materialized semester evaluations summaries of the school service.
+
+One document per (userId, classId, semester) in SEMESTER_SUMMARIES_COLLECTION keeps the last
+computed summary content. Routes that change values, moments or students call mark_dirty, which
+adds 1 to the document "revision" with an atomic $inc. The stored content is reused while its
+"summaryRevision" equals the revision and it was computed with the current settings
+("settingsHash"); otherwise the summary is recomputed on the next read.
+
+A recomputed summary is only stored when the revision did not change while it was being built,
+so an edit made in the meantime is never hidden by an older summary. When the $inc of mark_dirty
+fails, the summary document is deleted instead, so the next read recomputes it.
+
+Classes:
+    - SemesterSummaryStore: Reads, stores and invalidates the materialized summaries.
+"""
+
+from typing import Any, Dict, Optional
+
+from utils.concurrency import gather_named
+from utils.config import SEMESTER_SUMMARIES_COLLECTION
+from utils.logging import logging
+
+SEMESTERS = ("1", "2")
+
+
+class SemesterSummaryStore:
+    """
+    Keeps the materialized semester summaries in db_service.
+
+    Args:
+        api_client (BDClient): Client used to read and write the summary documents.
+    """
+    def __init__(self, api_client):
+        self.api_client = api_client
+
+    def get_query(self, user_id, class_id, semester):
+        return {"userId": user_id, "classId": class_id, "semester": str(semester)}
+
+    async def find(self, user_id, class_id, semester):
+        """
+        Return the summary document of the class semester, or None when it does not exist.
+        """
+        response = await self.api_client.find(
+            endpoint="find",
+            payload={"collection": SEMESTER_SUMMARIES_COLLECTION, "query": self.get_query(user_id, class_id, semester)},
+        )
+        documents = response.get("documents") or []
+        return documents[0] if documents else None
+
+    async def find_many(self, user_id, class_ids, semester):
+        """
+        Return the summary documents of a semester of many classes, by classId.
+        """
+        response = await self.api_client.find(
+            endpoint="find",
+            payload={
+                "collection": SEMESTER_SUMMARIES_COLLECTION,
+                "query": {"userId": user_id, "classId": {"$in": list(class_ids)}, "semester": str(semester)},
+            },
+        )
+        return {str(document.get("classId")): document for document in response.get("documents") or []}
+
+    def get_fresh_content(self, document: Optional[Dict[str, Any]], settings_hash: str):
+        """
+        Return the stored summary content when it is up to date, otherwise None.
+        """
+        if (
+            document
+            and document.get("summary") is not None
+            and document.get("summaryRevision") == document.get("revision", 0)
+            and document.get("settingsHash") == settings_hash
+        ):
+            return document["summary"]
+
+        return None
+
+    async def get_revision(self, user_id, class_id, semester, document: Optional[Dict[str, Any]] = None):
+        """
+        Return the current revision, creating the summary document when needed. Read it before
+        the class data, so any change made afterwards is detected when storing the summary.
+        """
+        if document is not None:
+            return document.get("revision", 0)
+
+        response = await self.api_client.update(
+            endpoint="increment",
+            payload={
+                "collection": SEMESTER_SUMMARIES_COLLECTION,
+                "query": self.get_query(user_id, class_id, semester),
+                "inc": {"revision": 0},
+            },
+        )
+        created = response.get("document")
+        return created.get("revision", 0) if created else None
+
+    async def save(self, user_id, class_id, semester, revision, settings_hash: str, content: Dict[str, Any]):
+        """
+        Store the summary content computed from the data of the given revision.
+
+        Returns:
+            bool: True when stored; False when the revision changed in the meantime (the summary
+            stays dirty) or the document could not be updated.
+        """
+        if revision is None:
+            return False
+
+        response = await self.api_client.update(
+            endpoint="update",
+            payload={
+                "collection": SEMESTER_SUMMARIES_COLLECTION,
+                "query": {**self.get_query(user_id, class_id, semester), "revision": revision},
+                "data": {"summary": content, "summaryRevision": revision, "settingsHash": settings_hash},
+            },
+        )
+        return bool(response.get("modified_count"))
+
+    async def mark_dirty(self, user_id, class_id):
+        """
+        Mark the summaries of both semesters of a class as changed.
+        """
+        if not user_id or not class_id:
+            return
+
+        responses = await gather_named(
+            {
+                semester: (
+                    lambda semester=semester: self.api_client.update(
+                        endpoint="increment",
+                        payload={
+                            "collection": SEMESTER_SUMMARIES_COLLECTION,
+                            "query": self.get_query(user_id, class_id, semester),
+                            "inc": {"revision": 1},
+                        },
+                    )
+                )
+                for semester in SEMESTERS
+            }
+        )
+        failed_semesters = [semester for semester, response in responses.items() if not response.get("document")]
+        if failed_semesters:
+            await self.discard(user_id, class_id, failed_semesters)
+
+    async def discard(self, user_id, class_id, semesters):
+        """
+        Delete the summary documents of the given semesters of a class, whose revision could not
+        be increased, so a stored summary is not served as fresh after the change.
+        """
+        responses = await gather_named(
+            {
+                semester: (
+                    lambda semester=semester: self.api_client.delete(
+                        endpoint="delete",
+                        payload={
+                            "collection": SEMESTER_SUMMARIES_COLLECTION,
+                            "query": self.get_query(user_id, class_id, semester),
+                        },
+                    )
+                )
+                for semester in semesters
+            }
+        )
+        for semester, response in responses.items():
+            if "deleted_count" not in response:
+                logging.error(
+                    f"SemesterSummaryStore.discard();userId={user_id};classId={class_id};semester={semester};"
+                    "error=the summary could not be marked as changed and may be stale"
+                )
+
+    async def mark_document_dirty(self, document: Optional[Dict[str, Any]]):
+        """
+        Mark the summaries of the class a document (value, moment or student) belongs to.
+        """
+        if isinstance(document, dict):
+            await self.mark_dirty(document.get("userId"), document.get("classId"))
@@ -39,6 +39,7 @@ from fastapi.responses import JSONResponse
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 import jwt
 from utils.bd_client import BDClient
+from utils.request_context import DeadlineExceeded
 from utils.logging import logging
 from datetime import datetime, timedelta, timezone
 
@@ -143,8 +144,11 @@ class Utils:
                         }
                     }
         
-        # Check if the user already exists in the database via the REST API
-        await api_client.insert(endpoint="log", payload=logData)
+        try:
+            await api_client.insert(endpoint="log", payload=logData)
+        except DeadlineExceeded:
+            # Past the request deadline the log goes to the log file instead of db_service
+            logging.log(logging.ERROR if error else logging.INFO, f"{source};{method};{message}")
 
     def returnLevels(self):
         """
@@ -0,0 +1,134 @@
+"""
+workers.py
+
+Process pools for the CPU-bound work of the school service, e.g. building the semester
+summaries of every class of a year or rendering PDF reports. The work runs on all cores and
+outside the event loop, so the other requests stay responsive.
+
+Each pool runs at most `max_workers` tasks at a time; the others wait in the pool queue, whose
+depth can be capped with `max_queue`. get_metrics() reports the queue and the task counters.
+
+The pools start lazily, inside a server that already runs threads (the anyio thread pool,
+asyncio.to_thread, httpx), so the workers are not forked from it: a forked child could inherit a
+lock held by another thread and deadlock. They are started by a fork server (or spawned where
+there is none, e.g. on Windows) and import the modules of the functions they run.
+
+Classes:
+    - WorkerPoolFull: Raised when the queue of a pool is full.
+    - ProcessWorkerPool: A lazily started ProcessPoolExecutor with an async run().
+"""
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+WORKER_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+class WorkerPoolFull(Exception):
+    """
+    Raised by ProcessWorkerPool.run when `max_queue` tasks are already waiting.
+    """
+
+
+class ProcessWorkerPool:
+    """
+    Runs picklable top-level functions in a process pool.
+
+    Args:
+        max_workers (int | None): Number of worker processes (None: one per CPU). With 0 the
+            functions run in a thread of the event loop instead, e.g. in tests or small setups.
+        max_queue (int | None): Maximum number of tasks waiting for a worker (None: no limit).
+    """
+    def __init__(self, max_workers=None, max_queue=None):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.executor = None
+        self.slots = None
+        self.slots_loop = None
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def get_concurrency(self):
+        return self.max_workers or os.cpu_count() or 1
+
+    def get_executor(self):
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context(WORKER_START_METHOD),
+            )
+        return self.executor
+
+    def get_slots(self):
+        """
+        Return the semaphore of the running event loop that limits the tasks in the workers.
+        """
+        loop = asyncio.get_running_loop()
+        if self.slots is None or self.slots_loop is not loop:
+            self.slots = asyncio.Semaphore(self.get_concurrency())
+            self.slots_loop = loop
+
+        return self.slots
+
+    async def run(self, function, *args):
+        """
+        Run function(*args) in a worker process and return its result, waiting in the pool queue
+        while all the workers are busy.
+
+        Raises:
+            WorkerPoolFull: When `max_queue` tasks are already waiting.
+        """
+        if self.max_queue is not None and self.queued >= self.max_queue:
+            self.rejected += 1
+            raise WorkerPoolFull(f"{self.queued} tasks are waiting for a worker")
+
+        slots = self.get_slots()
+        self.queued += 1
+        try:
+            await slots.acquire()
+        finally:
+            self.queued -= 1
+
+        self.running += 1
+        try:
+            if self.max_workers == 0:
+                result = await asyncio.to_thread(function, *args)
+            else:
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(self.get_executor(), function, *args)
+        except BaseException:
+            self.failed += 1
+            raise
+        finally:
+            self.running -= 1
+            slots.release()
+
+        self.completed += 1
+        return result
+
+    def get_metrics(self):
+        """
+        Return the queue depth and task counters of the pool.
+        """
+        return {
+            "workers": self.get_concurrency(),
+            "maxQueue": self.max_queue,
+            "queued": self.queued,
+            "running": self.running,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self):
+        """
+        Stop the worker processes; the pool starts again on the next run().
+        """
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None